@@ -0,0 +1,209 @@
+"""
+日志索引 - 基于 SQLite 的本地日志存储
+
+日志在写入CSV的同时写入 SQLite，并在 (date, level, username) 上建立索引，
+日志查看、错误列表、统计等查询直接走索引分页，不再逐行解析每天的CSV文件。
+
+文件路径: webproduct_ui_template/common/log_index.py
+"""
+import csv
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# 与CSV日志一致的列，查询结果与 csv.DictReader 返回的字段保持一致
+LOG_COLUMNS = (
+    'timestamp', 'level', 'user_id', 'username', 'module', 'function',
+    'line_number', 'message', 'exception_type', 'stack_trace', 'extra_data'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    timestamp TEXT,
+    level TEXT,
+    user_id TEXT,
+    username TEXT,
+    module TEXT,
+    function TEXT,
+    line_number TEXT,
+    message TEXT,
+    exception_type TEXT,
+    stack_trace TEXT,
+    extra_data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_logs_date_level_username ON logs (date, level, username);
+-- (date, level) 索引隐含 rowid，按级别分页取最新记录时无需排序
+CREATE INDEX IF NOT EXISTS idx_logs_date_level ON logs (date, level);
+"""
+
+class LogIndex:
+    """SQLite 日志索引（写入由单个后台线程完成，查询每次使用独立的只读连接）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]):
+        """
+        批量写入日志记录
+
+        Args:
+            rows: 按 LOG_COLUMNS 顺序排列的日志记录，timestamp 为 ISO 格式字符串
+        """
+        values = [
+            (str(row[0])[:10],) + tuple('' if value is None else str(value) for value in row)
+            for row in rows
+        ]
+        if not values:
+            return
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            with self._write_conn:
+                self._write_conn.executemany(
+                    f"INSERT INTO logs (date, {', '.join(LOG_COLUMNS)}) "
+                    f"VALUES (?, {', '.join('?' * len(LOG_COLUMNS))})",
+                    values
+                )
+
+    def query(self, date: Optional[str] = None, levels: Optional[Sequence[str]] = None,
+              username: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, str]]:
+        """
+        分页查询日志，返回最新的 limit 条（跳过最新的 offset 条），结果按时间正序排列
+
+        Args:
+            date: 日期 YYYY-MM-DD
+            levels: 日志级别列表
+            username: 用户名
+            limit: 每页条数
+            offset: 跳过的最新记录条数
+        """
+        conditions, params = self._build_conditions(date, levels, username)
+        sql = f"SELECT {', '.join(LOG_COLUMNS)} FROM logs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(zip(LOG_COLUMNS, row)) for row in reversed(rows)]
+
+    def count(self, date: Optional[str] = None, levels: Optional[Sequence[str]] = None,
+              username: Optional[str] = None) -> int:
+        """统计符合条件的日志条数"""
+        conditions, params = self._build_conditions(date, levels, username)
+        sql = "SELECT COUNT(*) FROM logs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def aggregate(self, dates: Sequence[str]) -> List[tuple]:
+        """
+        按 (日期, 级别, 用户名) 聚合日志条数（走覆盖索引）
+
+        Returns:
+            [(date, level, username, count), ...]
+        """
+        if not dates:
+            return []
+        sql = (
+            "SELECT date, level, username, COUNT(*) FROM logs "
+            f"WHERE date IN ({', '.join('?' * len(dates))}) "
+            "GROUP BY date, level, username"
+        )
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, list(dates)).fetchall()
+
+    def backfill(self, csv_files: Dict[str, Path]) -> int:
+        """
+        用CSV日志补齐索引（索引建立之前或索引不可用期间写入的日志）
+
+        某天索引中的条数少于CSV中的条数时，用CSV重建该天的记录。
+
+        Args:
+            csv_files: {日期 YYYY-MM-DD: 当天的CSV日志文件}
+
+        Returns:
+            int: 重建的日志条数
+        """
+        with closing(self._connect()) as conn:
+            indexed = dict(conn.execute("SELECT date, COUNT(*) FROM logs GROUP BY date").fetchall())
+
+        restored = 0
+        for date, csv_file in sorted(csv_files.items()):
+            indexed_count = indexed.get(date, 0)
+            # 物理行数（去掉表头）是记录数的上界，不超过索引条数时无需解析
+            with open(csv_file, 'rb') as f:
+                if sum(1 for _ in f) - 1 <= indexed_count:
+                    continue
+            with open(csv_file, 'r', newline='', encoding='utf-8', errors='replace') as f:
+                rows = [
+                    tuple(row.get(column) or '' for column in LOG_COLUMNS)
+                    for row in csv.DictReader(f)
+                ]
+            if len(rows) <= indexed_count:
+                continue
+            self._replace_date(date, rows)
+            restored += len(rows)
+        return restored
+
+    def _replace_date(self, date: str, rows: List[Sequence[Any]]):
+        """用给定的记录替换某天的全部索引记录"""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            with self._write_conn:
+                self._write_conn.execute("DELETE FROM logs WHERE date = ?", (date,))
+                self._write_conn.executemany(
+                    f"INSERT INTO logs (date, {', '.join(LOG_COLUMNS)}) "
+                    f"VALUES (?, {', '.join('?' * len(LOG_COLUMNS))})",
+                    [(date,) + tuple(row) for row in rows]
+                )
+
+    def purge_before(self, date: str) -> int:
+        """删除指定日期之前的日志，返回删除的条数"""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            with self._write_conn:
+                cursor = self._write_conn.execute("DELETE FROM logs WHERE date < ?", (date,))
+            return cursor.rowcount
+
+    def close(self):
+        with self._write_lock:
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
+
+    @staticmethod
+    def _build_conditions(date: Optional[str], levels: Optional[Sequence[str]],
+                          username: Optional[str]) -> tuple:
+        conditions: List[str] = []
+        params: List[Any] = []
+        if date:
+            conditions.append("date = ?")
+            params.append(date)
+        if levels:
+            conditions.append(f"level IN ({', '.join('?' * len(levels))})")
+            params.extend(levels)
+        if username is not None:
+            conditions.append("username = ?")
+            params.append(username)
+        return conditions, params
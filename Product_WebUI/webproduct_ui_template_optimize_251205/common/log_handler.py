@@ -33,6 +33,8 @@ from contextlib import contextmanager
 from loguru import logger
 from nicegui import ui
 
+from common.log_index import LogIndex
+
 # =============================================================================
 # 配置和初始化
 # =============================================================================
@@ -72,6 +74,10 @@ class LoguruExceptionHandler:
         if self.csv_enabled:
             self._setup_csv_logging()
         
+        # 日志索引(SQLite),日志查询走索引分页,不再逐行解析CSV
+        self.log_index = self._open_log_index()
+        self._setup_index_logging()
+        
         # 启动定时清理任务
         self._start_cleanup_task()
         
@@ -96,6 +102,7 @@ class LoguruExceptionHandler:
             self._setup_loguru()
             if self.csv_enabled:
                 self._setup_csv_logging()
+            self._setup_index_logging()
     
     def _setup_loguru(self):
         """配置 Loguru 日志系统 - 按日期文件夹组织"""
@@ -191,29 +198,7 @@ class LoguruExceptionHandler:
                 # 写入日志记录
                 with open(csv_file, 'a', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
-                    
-                    # 处理异常信息
-                    exception_type = ''
-                    stack_trace = ''
-                    if record['exception']:
-                        exception_type = record['exception'].type.__name__
-                        # 格式化堆栈信息(移除过长的堆栈)
-                        stack_lines = str(record['exception']).split('\n')
-                        stack_trace = '\n'.join(stack_lines[:20])
-                    
-                    writer.writerow([
-                        record['time'].strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                        record['level'].name,
-                        record['extra'].get('user_id', ''),
-                        record['extra'].get('username', ''),
-                        record['name'],
-                        record['function'],
-                        record['line'],
-                        record['message'],
-                        exception_type,
-                        stack_trace,
-                        json.dumps(record['extra'].get('extra_data', {}), ensure_ascii=False)
-                    ])
+                    writer.writerow(self._record_to_row(record))
             except Exception as e:
                 # 备用日志记录(避免日志系统本身出错)
                 print(f"CSV 日志写入失败: {e}")
@@ -225,6 +210,76 @@ class LoguruExceptionHandler:
             enqueue=True  # 异步写入
         )
     
+    @staticmethod
+    def _record_to_row(record) -> list:
+        """将 Loguru 日志记录转换为 CSV / 日志索引共用的行"""
+        # 处理异常信息
+        exception_type = ''
+        stack_trace = ''
+        if record['exception']:
+            exception_type = record['exception'].type.__name__
+            # 格式化堆栈信息(移除过长的堆栈)
+            stack_lines = str(record['exception']).split('\n')
+            stack_trace = '\n'.join(stack_lines[:20])
+        
+        return [
+            record['time'].strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            record['level'].name,
+            record['extra'].get('user_id', ''),
+            record['extra'].get('username', ''),
+            record['name'],
+            record['function'],
+            record['line'],
+            record['message'],
+            exception_type,
+            stack_trace,
+            json.dumps(record['extra'].get('extra_data', {}), ensure_ascii=False)
+        ]
+    
+    def _open_log_index(self) -> Optional[LogIndex]:
+        """打开日志索引,失败时日志查询退回读取CSV"""
+        try:
+            log_index = LogIndex(self.log_base_dir / 'log_index.db')
+        except Exception as e:
+            print(f"日志索引初始化失败: {e}")
+            return None
+        
+        # 补齐索引建立之前(或索引不可用期间)写入CSV的日志
+        try:
+            csv_files = {}
+            for date_folder in self.log_base_dir.iterdir():
+                csv_file = date_folder / 'app_logs.csv'
+                if date_folder.is_dir() and csv_file.exists():
+                    try:
+                        datetime.strptime(date_folder.name, '%Y-%m-%d')
+                    except ValueError:
+                        continue
+                    csv_files[date_folder.name] = csv_file
+            restored = log_index.backfill(csv_files)
+            if restored:
+                print(f"日志索引已从CSV补齐 {restored} 条记录")
+        except Exception as e:
+            print(f"日志索引补齐失败: {e}")
+        return log_index
+    
+    def _setup_index_logging(self):
+        """设置日志索引 sink - 与 CSV 记录相同的内容写入 SQLite"""
+        if not self.log_index:
+            return
+        
+        def index_sink(message):
+            """日志索引 sink - 在 Loguru 的后台线程中执行"""
+            try:
+                self.log_index.add_rows([self._record_to_row(message.record)])
+            except Exception as e:
+                print(f"日志索引写入失败: {e}")
+        
+        logger.add(
+            index_sink,
+            level="INFO",
+            enqueue=True  # 异步写入
+        )
+    
     def _start_cleanup_task(self):
         """启动定时清理任务(清理过期的日志文件夹)"""
         def cleanup_worker():
@@ -259,6 +314,9 @@ class LoguruExceptionHandler:
             cutoff_date = datetime.now() - timedelta(days=self.max_log_days)
             deleted_count = 0
             
+            if self.log_index:
+                self.log_index.purge_before(cutoff_date.strftime('%Y-%m-%d'))
+            
             # 遍历所有日期文件夹
             for log_folder in self.log_base_dir.iterdir():
                 if not log_folder.is_dir():
@@ -674,9 +732,19 @@ def get_log_files(days: int = 7) -> List[Dict]:
     
     return log_files
 
-def get_today_errors(limit: int = 50) -> List[Dict]:
-    """获取今天的错误日志 (兼容现有 API)"""
+def get_today_errors(limit: int = 50, offset: int = 0) -> List[Dict]:
+    """获取今天的错误日志 (兼容现有 API, offset 用于向前翻页)"""
     handler = get_exception_handler()
+    
+    if handler.log_index:
+        try:
+            return handler.log_index.query(
+                date=datetime.now().strftime('%Y-%m-%d'), levels=['ERROR', 'CRITICAL'],
+                limit=limit, offset=offset
+            )
+        except Exception as e:
+            print(f"查询日志索引失败,改为读取CSV: {e}")
+    
     today_folder = handler.current_log_dir
     csv_file = today_folder / "app_logs.csv"
     
@@ -697,9 +765,19 @@ def get_today_errors(limit: int = 50) -> List[Dict]:
         print(f"读取错误日志失败: {e}")
         return []
 
-def get_today_logs_by_level(level: str = "INFO", limit: int = 100) -> List[Dict]:
-    """根据日志级别获取今天的日志"""
+def get_today_logs_by_level(level: str = "INFO", limit: int = 100, offset: int = 0) -> List[Dict]:
+    """根据日志级别获取今天的日志 (offset 用于向前翻页)"""
     handler = get_exception_handler()
+    
+    if handler.log_index:
+        try:
+            return handler.log_index.query(
+                date=datetime.now().strftime('%Y-%m-%d'), levels=[level.upper()],
+                limit=limit, offset=offset
+            )
+        except Exception as e:
+            print(f"查询日志索引失败,改为读取CSV: {e}")
+    
     today_folder = handler.current_log_dir
     csv_file = today_folder / "app_logs.csv"
     
@@ -720,6 +798,33 @@ def get_today_logs_by_level(level: str = "INFO", limit: int = 100) -> List[Dict]
         print(f"读取日志失败: {e}")
         return []
 
+def query_logs(date: Optional[str] = None, level: Optional[str] = None,
+               username: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+    """
+    分页查询日志(走日志索引)
+    
+    Args:
+        date: 日期 YYYY-MM-DD,默认今天
+        level: 日志级别,为空时不过滤
+        username: 用户名,为空时不过滤
+        limit: 每页条数
+        offset: 跳过的最新记录条数
+        
+    Returns:
+        Dict: {'total': 总条数, 'items': 当前页日志(按时间正序)}
+    """
+    handler = get_exception_handler()
+    if not handler.log_index:
+        return {'total': 0, 'items': []}
+    
+    date = date or datetime.now().strftime('%Y-%m-%d')
+    levels = [level.upper()] if level else None
+    return {
+        'total': handler.log_index.count(date=date, levels=levels, username=username),
+        'items': handler.log_index.query(date=date, levels=levels, username=username,
+                                         limit=limit, offset=offset)
+    }
+
 def cleanup_logs(days_to_keep: int = 30):
     """手动清理旧日志文件夹 (兼容现有 API)"""
     handler = get_exception_handler()
@@ -740,6 +845,28 @@ def get_log_statistics(days: int = 7) -> Dict[str, Any]:
         'by_user': {}
     }
     
+    if handler.log_index:
+        try:
+            dates = [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+            for date_str, level, username, count in handler.log_index.aggregate(dates):
+                stats['total_logs'] += count
+                stats['by_level'][level] = stats['by_level'].get(level, 0) + count
+                
+                if level == 'ERROR':
+                    stats['error_count'] += count
+                elif level == 'WARNING':
+                    stats['warning_count'] += count
+                elif level == 'INFO':
+                    stats['info_count'] += count
+                
+                stats['by_date'][date_str] = stats['by_date'].get(date_str, 0) + count
+                stats['by_user'][username] = stats['by_user'].get(username, 0) + count
+            return stats
+        except Exception as e:
+            print(f"查询日志索引失败,改为读取CSV: {e}")
+            stats.update(total_logs=0, error_count=0, warning_count=0, info_count=0,
+                         by_date={}, by_level={}, by_user={})
+    
     for i in range(days):
         date = datetime.now() - timedelta(days=i)
         date_str = date.strftime('%Y-%m-%d')
@@ -6,7 +6,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from nicegui import app, ui
 from .models import User, Role, LoginLog, Permission
-from .database import get_db
+from .database import get_db, run_db
 from .config import auth_config
 from .utils import validate_password, validate_email
 from .session_manager import session_manager, UserSession
@@ -70,6 +70,33 @@ class AuthManager:
     
     def login(self, username: str, password: str, remember_me: bool = False) -> Dict[str, Any]:
         """用户登录"""
+        return self._finish_login(self._authenticate(username, password, remember_me))
+
+    async def login_async(self, username: str, password: str, remember_me: bool = False) -> Dict[str, Any]:
+        """用户登录（数据库查询和密码校验在数据库线程池中执行，不阻塞事件循环）"""
+        result = await run_db(self._authenticate, username, password, remember_me)
+        return self._finish_login(result)
+
+    def _finish_login(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """登录成功后写入浏览器存储（需在事件循环中执行）"""
+        session_token = result.pop('session_token', None)
+        remember_token = result.pop('remember_token', None)
+        if not result['success']:
+            return result
+
+        # 设置会话
+        app.storage.user[self._session_key] = session_token
+        
+        # 处理记住我
+        if remember_token:
+            app.storage.user[self._remember_key] = remember_token
+
+        self._set_current_session(result['user'])
+        return result
+
+    def _authenticate(self, username: str, password: str, remember_me: bool) -> Dict[str, Any]:
+        """校验用户名密码并更新登录信息（只访问数据库，可在线程池中执行）"""
+        session_version = session_manager.current_version()
         with get_db() as db:
             from sqlalchemy.orm import joinedload
             # 查找用户（支持用户名或邮箱登录）
@@ -115,13 +142,10 @@ class AuthManager:
             # 生成会话令牌
             session_token = user.generate_session_token()
             
-            # 设置会话
-            app.storage.user[self._session_key] = session_token
-            
             # 处理记住我
+            remember_token = None
             if remember_me and auth_config.allow_remember_me:
                 remember_token = user.generate_remember_token()
-                app.storage.user[self._remember_key] = remember_token
             
             # 记录登录日志
             log = LoginLog(
@@ -136,12 +160,12 @@ class AuthManager:
             db.commit()
             
             # 创建会话
-            user_session = session_manager.create_session(session_token, user)
-            self.current_user = user_session
+            user_session = session_manager.create_session(session_token, user, session_version)
             
             logger.info(f"用户登录成功: {user.username}")
             
-            return {'success': True, 'message': '登录成功', 'user': user_session}
+            return {'success': True, 'message': '登录成功', 'user': user_session,
+                    'session_token': session_token, 'remember_token': remember_token}
             
     def logout(self):
         """用户登出 - 增强版"""
@@ -164,9 +188,9 @@ class AuthManager:
         # 清除所有用户存储数据
         try:
             app.storage.user.clear()  # 清除所有用户存储数据，包括路由
-            print("🗑️ 已清除所有用户存储数据")
+            logger.debug("已清除所有用户存储数据")
         except Exception as e:
-            print(f"⚠️ 清除用户存储失败: {e}")
+            logger.warning(f"清除用户存储失败: {e}")
             # 逐个清除关键数据
             for key in [self._session_key, self._remember_key, 'current_route']:
                 try:
@@ -178,104 +202,93 @@ class AuthManager:
     
     def check_session(self) -> Optional[UserSession]:
         """
-        检查会话状态 - 完整版本
+        检查会话状态
         解决多浏览器状态不一致问题
+
+        内存缓存命中时不访问数据库（每次都经过会话缓存，权限变更和其他标签页登出立即生效），
+        未命中时按（有索引的）session_token / remember_token 加载用户。
         """
-        import time
-        current_time = time.strftime("%H:%M:%S")
-        print(f"🔍 {current_time} 当前服务器内存用户: {self.current_user.username if self.current_user else 'None'}")
-        
         # 1. 获取浏览器存储的 session_token
         session_token = app.storage.user.get(self._session_key)
-        print(f"🔑 浏览器 session_token: {session_token[:12] + '...' if session_token else 'None'}")
-        
+
         # 2. 如果浏览器没有 token，清除可能的服务器状态残留
         if not session_token:
-            print("❌ 浏览器无 session_token")
             if self.current_user:
-                print(f"⚠️ 发现服务器状态残留，清除用户: {self.current_user.username}")
+                logger.debug(f"浏览器无 session_token，清除服务器状态残留: {self.current_user.username}")
                 self.current_user = None
             return None
-        # 3. 浏览器有 token，检查内存缓存
-        print("✅ 浏览器有 session_token，开始验证...")
+
+        # 3. 检查内存缓存（O(1)，过期、失效的会话不会返回）
         user_session = session_manager.get_session(session_token)
         if user_session:
-            print(f"🎯 内存缓存命中: {user_session.username}")
-            self.current_user = user_session
-            return user_session
-        
-        # 4. 内存缓存没有，从数据库验证 token 有效性
+            return self._set_current_session(user_session)
+
+        # 4. 内存缓存没有，从数据库验证 token 有效性（加载前记下版本号，加载期间的权限变更不会被缓存）
+        session_version = session_manager.current_version()
         try:
             with get_db() as db:
-                from sqlalchemy.orm import joinedload
-                user = db.query(User).options(
-                    joinedload(User.roles).joinedload(Role.permissions),
-                    joinedload(User.permissions)
-                ).filter(
-                    User.session_token == session_token,
-                    User.is_active == True
-                ).first()
-                
+                user = self._load_active_user(db, User.session_token == session_token)
                 if user:
-                    print(f"✅ 数据库验证成功: {user.username}")
-                    # 重新创建内存会话
-                    user_session = session_manager.create_session(session_token, user)
-                    self.current_user = user_session
-                    return user_session
-                else:
-                    print("❌ 数据库验证失败，token 已失效或用户不存在")                 
-                    # token 无效，清除浏览器存储
-                    app.storage.user.pop(self._session_key, None)
-                    app.storage.user.pop(self._remember_key, None)
-                    self.current_user = None
-                    
+                    logger.debug(f"会话缓存未命中，数据库验证成功: {user.username}")
+                    user_session = session_manager.create_session(session_token, user, session_version)
+                    return self._set_current_session(user_session)
+
+            logger.debug("session_token 已失效或用户不存在")
+            # token 无效，清除浏览器存储
+            app.storage.user.pop(self._session_key, None)
+            app.storage.user.pop(self._remember_key, None)
+            self.current_user = None
+
         except Exception as e:
-            print(f"❌ 数据库查询出错: {e}")
+            logger.error(f"会话验证数据库查询出错: {e}")
             self.current_user = None
             return None
-        
+
         # 5. 检查 remember_me token（如果主 token 失效）
         remember_token = app.storage.user.get(self._remember_key)
         if remember_token and auth_config.allow_remember_me:
-            print(f"🔍 检查记住我 token: {remember_token[:12] + '...'}")
-            
+            session_version = session_manager.current_version()
             try:
                 with get_db() as db:
-                    from sqlalchemy.orm import joinedload
-                    user = db.query(User).options(
-                        joinedload(User.roles).joinedload(Role.permissions),
-                        joinedload(User.permissions)
-                    ).filter(
-                        User.remember_token == remember_token,
-                        User.is_active == True
-                    ).first()
-                    
+                    user = self._load_active_user(db, User.remember_token == remember_token)
                     if user:
-                        print(f"✅ 记住我验证成功: {user.username}")
-                        
                         # 生成新的 session token
                         new_session_token = user.generate_session_token()
                         app.storage.user[self._session_key] = new_session_token
                         db.commit()
-                        
+
                         # 创建新会话
-                        user_session = session_manager.create_session(new_session_token, user)
-                        self.current_user = user_session
-                        
-                        print(f"🔄 通过记住我重新建立会话: {user_session.username}")
-                        return user_session
-                    else:
-                        print("❌ 记住我 token 验证失败")
-                        app.storage.user.pop(self._remember_key, None)
-                        
+                        user_session = session_manager.create_session(new_session_token, user, session_version)
+                        logger.info(f"通过记住我重新建立会话: {user_session.username}")
+                        return self._set_current_session(user_session)
+
+                logger.debug("记住我 token 验证失败")
+                app.storage.user.pop(self._remember_key, None)
+
             except Exception as e:
-                print(f"❌ 记住我验证出错: {e}")
-        
+                logger.error(f"记住我验证出错: {e}")
+
         # 6. 所有验证都失败
-        print("❌ 所有验证都失败，用户未登录")
         self.current_user = None
         return None
 
+    def _set_current_session(self, user_session: UserSession) -> UserSession:
+        """记录当前已验证的会话"""
+        self.current_user = user_session
+        return user_session
+
+    @staticmethod
+    def _load_active_user(db, token_filter) -> Optional[User]:
+        """按令牌加载有效用户及其角色、权限（selectinload 分开查询，避免三表 JOIN 的行数膨胀）"""
+        from sqlalchemy.orm import selectinload
+        return db.query(User).options(
+            selectinload(User.roles).selectinload(Role.permissions),
+            selectinload(User.permissions)
+        ).filter(
+            token_filter,
+            User.is_active == True
+        ).first()
+
     def change_password(self, user_id: int, old_password: str, new_password: str) -> Dict[str, Any]:
         """修改密码"""
         with get_db() as db:
@@ -358,6 +371,7 @@ class AuthManager:
             session_token = app.storage.user.get(self._session_key)
             if session_token and self.current_user and self.current_user.id == user_id:
                 # 重新加载用户数据到会话
+                session_version = session_manager.current_version()
                 from sqlalchemy.orm import joinedload
                 user = db.query(User).options(
                     joinedload(User.roles).joinedload(Role.permissions),
@@ -365,8 +379,8 @@ class AuthManager:
                 ).filter(User.id == user_id).first()
                 
                 if user:
-                    user_session = session_manager.create_session(session_token, user)
-                    self.current_user = user_session
+                    user_session = session_manager.create_session(session_token, user, session_version)
+                    self._set_current_session(user_session)
             
             logger.info(f"用户资料更新成功: {user.username}")
             return {'success': True, 'message': '资料更新成功', 'user': self.current_user}
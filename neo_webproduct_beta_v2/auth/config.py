@@ -15,11 +15,19 @@ class AuthConfig:
         # 数据库配置
         self.database_type = 'sqlite'  # 默认使用SQLite，可切换为mysql、postgresql等
         self.database_url = self._get_database_url()
+        self.db_pool_size = 5  # 连接池常驻连接数
+        self.db_max_overflow = 10  # 连接池允许临时超出的连接数
+        self.db_pool_timeout = 30  # 等待空闲连接的超时时间（秒）
+        self.db_executor_workers = 8  # 异步数据库访问线程池大小，不宜超过 db_pool_size + db_max_overflow
+        self.sqlite_busy_timeout = 5000  # SQLite 等待写锁的超时时间（毫秒）
         
         # 会话配置
         self.session_secret_key = os.environ.get('SESSION_SECRET_KEY', 'your-secret-key-here')
         self.session_timeout = 3600 * 24  # 24小时
         self.remember_me_duration = 3600 * 24 * 30  # 30天
+        self.session_idle_timeout = 3600 * 2  # 会话缓存空闲过期时间：2小时
+        self.session_cache_max_entries = 10000  # 会话缓存最大条目数，超出后淘汰最久未使用的
+        self.session_sweep_interval = 300  # 后台清理过期会话的间隔（秒）
         
         # 密码配置
         self.password_min_length = 6
@@ -5,8 +5,14 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Optional
 from .config import auth_config
+import asyncio
+import contextvars
 import logging
 
 # 配置日志
@@ -18,25 +24,39 @@ Base = declarative_base()
 # 全局变量
 engine = None
 SessionLocal = None
+_db_executor: Optional[ThreadPoolExecutor] = None
 
 def init_database():
     """初始化数据库连接（不再负责建表）"""
     global engine, SessionLocal
     
     try:
-        # 创建数据库引擎
+        # 创建数据库引擎（连接池大小显式配置，需覆盖 run_db 线程池的并发）
+        connect_args = {}
+        if auth_config.database_type == 'sqlite':
+            # 连接由连接池在线程间复用
+            connect_args['check_same_thread'] = False
+
         engine = create_engine(
             auth_config.database_url,
+            poolclass=QueuePool,
+            pool_size=auth_config.db_pool_size,
+            max_overflow=auth_config.db_max_overflow,
+            pool_timeout=auth_config.db_pool_timeout,
             pool_pre_ping=True,
+            connect_args=connect_args,
             echo=False  # 生产环境设为False
         )
         
-        # 为SQLite启用外键约束
+        # 为SQLite启用外键约束和WAL模式（读写互不阻塞）
         if auth_config.database_type == 'sqlite':
             @event.listens_for(engine, "connect")
             def set_sqlite_pragma(dbapi_connection, connection_record):
                 cursor = dbapi_connection.cursor()
                 cursor.execute("PRAGMA foreign_keys=ON")
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute(f"PRAGMA busy_timeout={int(auth_config.sqlite_busy_timeout)}")
                 cursor.close()
         
         # 创建会话工厂
@@ -74,10 +94,38 @@ def get_db():
     finally:
         session.close()
 
+def _get_executor() -> ThreadPoolExecutor:
+    """获取数据库线程池（首次使用时创建）"""
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=auth_config.db_executor_workers,
+            thread_name_prefix='db'
+        )
+    return _db_executor
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    在数据库线程池中执行同步的数据库操作，供异步处理函数 await，避免阻塞事件循环
+
+    func 内部照常使用 get_db()；scoped_session 按线程隔离，每个工作线程使用自己的会话。
+    func 不能调用 ui.* 等依赖 NiceGUI 客户端上下文的接口，只返回结果，由调用方在事件循环中更新界面。
+
+    示例:
+        histories = await run_db(load_histories, user_id)
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), partial(context.run, func, *args, **kwargs))
+
 def close_database():
     """关闭数据库连接"""
-    global SessionLocal
+    global SessionLocal, _db_executor
     
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
+
     if SessionLocal:
         SessionLocal.remove()
         logger.info("数据库连接已关闭")
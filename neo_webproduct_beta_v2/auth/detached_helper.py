@@ -8,9 +8,17 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
+from sqlalchemy import func
+
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 批量关联时单条 IN 查询的最大参数个数（SQLite 旧版本限制为999个绑定参数）
+BULK_IN_CHUNK_SIZE = 900
+
+# 角色分页列表中每个角色附带的用户名数量（完整列表通过 get_role_safe 获取）
+ROLE_USERS_PREVIEW = 20
+
 @dataclass
 class DetachedUser:
     """分离的用户数据类 - 不依赖SQLAlchemy会话"""
@@ -136,7 +144,7 @@ class DetachedRole:
     # 权限和用户信息
     permissions: List[str] = field(default_factory=list)
     user_count: int = 0
-    users: List[str] = field(default_factory=list)  # 用户名列表
+    users: List[str] = field(default_factory=list)  # 用户名列表（分页列表中只包含前 ROLE_USERS_PREVIEW 个）
 
     @classmethod
     def from_role(cls, role) -> 'DetachedRole':
@@ -192,7 +200,7 @@ class DetachedPermission:
     roles: List[str] = field(default_factory=list)  # 关联的角色名称列表
     roles_count: int = 0  # 关联的角色数量
     users_count: int = 0  # 间接关联的用户数量（通过角色）
-    direct_users: List[str] = field(default_factory=list)  # 直接关联的用户名称列表
+    direct_users: List[str] = field(default_factory=list)  # 直接关联的用户名称列表（分页列表中不加载）
     direct_users_count: int = 0  # 直接关联的用户数量
 
     @classmethod
@@ -243,9 +251,115 @@ class DetachedPermission:
             )
 
 
+@dataclass
+class DetachedPage:
+    """分页查询结果"""
+    items: List[Any] = field(default_factory=list)
+    total: Optional[int] = None          # 符合条件的总数（单独的COUNT查询），未统计时为None
+    next_after_id: Optional[int] = None  # 键集分页游标：作为下一页的 after_id，None 表示没有更多数据
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_after_id is not None
+
+
 class DetachedDataManager:
     """分离数据管理器 - 处理SQLAlchemy会话依赖问题，增强用户权限关联支持"""
 
+    @staticmethod
+    def _fetch_page(query, id_column, loader_options: list, converter,
+                    page_size: int, after_id: Optional[int], offset: int, with_count: bool) -> DetachedPage:
+        """
+        分页查询通用实现
+
+        总数使用不带关联加载的 COUNT(*)；当前页按主键排序，after_id 有值时使用键集分页（id > after_id），
+        否则使用 offset。关联数据通过 selectinload 只为当前页的记录加载，避免关联JOIN导致的行数膨胀。
+        """
+        total = query.with_entities(func.count(id_column)).scalar() if with_count else None
+        if page_size <= 0:
+            return DetachedPage(total=total)
+
+        page_query = query.options(*loader_options)
+        if after_id is not None:
+            page_query = page_query.filter(id_column > after_id)
+        page_query = page_query.order_by(id_column)
+        if after_id is None and offset:
+            page_query = page_query.offset(offset)
+
+        # 多取一条用于判断是否还有下一页
+        rows = page_query.limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        return DetachedPage(
+            items=[converter(row) for row in rows],
+            total=total,
+            next_after_id=rows[-1].id if has_more and rows else None
+        )
+
+    @staticmethod
+    def _attach_role_users(db, roles: List[DetachedRole]):
+        """
+        为当前页的角色补充用户数（分组 COUNT）和前 ROLE_USERS_PREVIEW 个用户名
+
+        不加载 Role.users，用户很多时也只读取每个角色的少量用户名。
+        """
+        role_ids = [role.id for role in roles]
+        if not role_ids:
+            return
+
+        user_counts = dict(
+            db.query(user_roles.c.role_id, func.count(user_roles.c.user_id.distinct()))
+            .filter(user_roles.c.role_id.in_(role_ids))
+            .group_by(user_roles.c.role_id)
+            .all()
+        )
+
+        ranked = (
+            db.query(
+                user_roles.c.role_id.label('role_id'),
+                User.username.label('username'),
+                func.row_number().over(partition_by=user_roles.c.role_id, order_by=User.id).label('rank')
+            )
+            .join(User, User.id == user_roles.c.user_id)
+            .filter(user_roles.c.role_id.in_(role_ids))
+            .subquery()
+        )
+        usernames: Dict[int, List[str]] = {}
+        for role_id, username in (db.query(ranked.c.role_id, ranked.c.username)
+                                  .filter(ranked.c.rank <= ROLE_USERS_PREVIEW)
+                                  .order_by(ranked.c.role_id, ranked.c.rank)):
+            usernames.setdefault(role_id, []).append(username)
+
+        for role in roles:
+            role.user_count = user_counts.get(role.id, 0)
+            role.users = usernames.get(role.id, [])
+
+    @staticmethod
+    def _attach_permission_user_counts(db, permissions: List[DetachedPermission]):
+        """为当前页的权限补充间接（通过角色）和直接关联的用户数（分组 COUNT，不加载用户）"""
+        permission_ids = [permission.id for permission in permissions]
+        if not permission_ids:
+            return
+
+        users_counts = dict(
+            db.query(role_permissions.c.permission_id, func.count(user_roles.c.user_id.distinct()))
+            .join(user_roles, user_roles.c.role_id == role_permissions.c.role_id)
+            .filter(role_permissions.c.permission_id.in_(permission_ids))
+            .group_by(role_permissions.c.permission_id)
+            .all()
+        )
+        direct_users_counts = dict(
+            db.query(user_permissions.c.permission_id, func.count(user_permissions.c.user_id.distinct()))
+            .filter(user_permissions.c.permission_id.in_(permission_ids))
+            .group_by(user_permissions.c.permission_id)
+            .all()
+        )
+
+        for permission in permissions:
+            permission.users_count = users_counts.get(permission.id, 0)
+            permission.direct_users_count = direct_users_counts.get(permission.id, 0)
+
     @staticmethod
     def get_user_safe(user_id: int) -> Optional[DetachedUser]:
         """安全获取用户数据（不会产生DetachedInstanceError）"""
@@ -299,6 +413,111 @@ class DetachedDataManager:
             logger.error(f"获取用户列表失败: {e}")
             return []
 
+    @staticmethod
+    def get_users_page_safe(search_term: str = None, page_size: int = 20, after_id: int = None,
+                            offset: int = 0, with_count: bool = True,
+                            exclude_role: str = None) -> DetachedPage:
+        """
+        分页获取用户列表
+
+        Args:
+            search_term: 按用户名、邮箱、姓名模糊搜索
+            page_size: 每页数量
+            after_id: 键集分页游标（上一页返回的 next_after_id）
+            offset: 不使用游标时跳过的记录数
+            with_count: 是否统计符合条件的总数
+            exclude_role: 排除已关联该角色的用户
+        """
+        try:
+            from .database import get_db
+            from sqlalchemy.orm import selectinload
+
+            with get_db() as db:
+                query = db.query(User)
+
+                if search_term:
+                    query = query.filter(
+                        (User.username.contains(search_term)) |
+                        (User.email.contains(search_term)) |
+                        (User.full_name.contains(search_term))
+                    )
+
+                if exclude_role:
+                    query = query.filter(~User.roles.any(Role.name == exclude_role))
+
+                return DetachedDataManager._fetch_page(
+                    query, User.id,
+                    [selectinload(User.roles).selectinload(Role.permissions), selectinload(User.permissions)],
+                    DetachedUser.from_user, page_size, after_id, offset, with_count
+                )
+
+        except Exception as e:
+            logger.error(f"分页获取用户列表失败: {e}")
+            return DetachedPage(total=0)
+
+    @staticmethod
+    def get_roles_page_safe(search_term: str = None, page_size: int = 50, after_id: int = None,
+                            offset: int = 0, with_count: bool = True) -> DetachedPage:
+        """分页获取角色列表（按名称、显示名称、描述模糊搜索）"""
+        try:
+            from .database import get_db
+            from sqlalchemy.orm import selectinload, noload
+
+            with get_db() as db:
+                query = db.query(Role)
+
+                if search_term:
+                    query = query.filter(
+                        (Role.name.contains(search_term)) |
+                        (Role.display_name.contains(search_term)) |
+                        (Role.description.contains(search_term))
+                    )
+
+                page = DetachedDataManager._fetch_page(
+                    query, Role.id,
+                    [selectinload(Role.permissions), noload(Role.users)],
+                    DetachedRole.from_role, page_size, after_id, offset, with_count
+                )
+                DetachedDataManager._attach_role_users(db, page.items)
+                return page
+
+        except Exception as e:
+            logger.error(f"分页获取角色列表失败: {e}")
+            return DetachedPage(total=0)
+
+    @staticmethod
+    def get_permissions_page_safe(search_term: str = None, category: str = None, page_size: int = 20,
+                                  after_id: int = None, offset: int = 0, with_count: bool = True) -> DetachedPage:
+        """分页获取权限列表（按名称、显示名称、描述模糊搜索，可按分类过滤）"""
+        try:
+            from .database import get_db
+            from sqlalchemy.orm import selectinload, noload
+
+            with get_db() as db:
+                query = db.query(Permission)
+
+                if search_term:
+                    query = query.filter(
+                        (Permission.name.contains(search_term)) |
+                        (Permission.display_name.contains(search_term)) |
+                        (Permission.description.contains(search_term))
+                    )
+
+                if category:
+                    query = query.filter(Permission.category == category)
+
+                page = DetachedDataManager._fetch_page(
+                    query, Permission.id,
+                    [selectinload(Permission.roles).noload(Role.users), noload(Permission.users)],
+                    DetachedPermission.from_permission, page_size, after_id, offset, with_count
+                )
+                DetachedDataManager._attach_permission_user_counts(db, page.items)
+                return page
+
+        except Exception as e:
+            logger.error(f"分页获取权限列表失败: {e}")
+            return DetachedPage(total=0)
+
     @staticmethod
     def get_permission_safe(permission_id: int) -> Optional[DetachedPermission]:
         """安全获取权限数据"""
@@ -416,6 +635,7 @@ class DetachedDataManager:
                         logger.debug(f"更新用户字段 {field}: {update_data[field]}")
 
                 db.commit()
+                session_manager.invalidate_user(user_id)
                 logger.info(f"用户更新成功: {user.username}")
                 return True
 
@@ -437,6 +657,7 @@ class DetachedDataManager:
                 username = user.username
                 db.delete(user)
                 db.commit()
+                session_manager.invalidate_user(user_id)
                 logger.info(f"用户删除成功: {username}")
                 return True
 
@@ -691,6 +912,7 @@ class DetachedDataManager:
                 if permission not in user.permissions:
                     user.permissions.append(permission)
                     db.commit()
+                    session_manager.invalidate_user(user_id)
                     logger.info(f"为用户 {user.username} 添加权限 {permission.name}")
                     return True
                 else:
@@ -717,6 +939,7 @@ class DetachedDataManager:
                 if permission in user.permissions:
                     user.permissions.remove(permission)
                     db.commit()
+                    session_manager.invalidate_user(user_id)
                     logger.info(f"从用户 {user.username} 移除权限 {permission.name}")
                     return True
                 else:
@@ -727,6 +950,119 @@ class DetachedDataManager:
             logger.error(f"从用户移除权限失败 (用户ID: {user_id}, 权限ID: {permission_id}): {e}")
             return False
 
+    @staticmethod
+    def _bulk_associate_users(link_table, target_column: str, target_id: int,
+                              identifiers: List[str]) -> Dict[str, Any]:
+        """
+        批量将用户关联到角色/权限（集合操作，往返次数与上传的行数无关）
+
+        1. 用户名、邮箱各用 IN 查询解析用户ID
+        2. 一次查询取出已存在的关联
+        3. 只插入缺失的关联行（单次 executemany）
+
+        Args:
+            link_table: 关联表（user_roles / user_permissions）
+            target_column: 关联表中目标对象的列名（role_id / permission_id）
+            target_id: 目标角色/权限ID
+            identifiers: 用户名或邮箱列表
+
+        Returns:
+            Dict: success_count（新关联数）、skip_count（已关联或重复）、error_users（无法识别的标识）
+        """
+        from .database import get_db
+
+        def chunks(values: list):
+            for start in range(0, len(values), BULK_IN_CHUNK_SIZE):
+                yield values[start:start + BULK_IN_CHUNK_SIZE]
+
+        unique_identifiers = list(dict.fromkeys(identifiers))
+
+        with get_db() as db:
+            # 按用户名解析，未命中的再按邮箱解析
+            user_ids: Dict[str, int] = {}
+            for chunk in chunks(unique_identifiers):
+                for user_id, username in db.query(User.id, User.username).filter(User.username.in_(chunk)):
+                    user_ids[username] = user_id
+
+            emails = [item for item in unique_identifiers if item not in user_ids and '@' in item]
+            for chunk in chunks(emails):
+                for user_id, email in db.query(User.id, User.email).filter(User.email.in_(chunk)):
+                    user_ids.setdefault(email, user_id)
+
+            # 已存在的关联
+            resolved_ids = list(set(user_ids.values()))
+            linked_ids = set()
+            for chunk in chunks(resolved_ids):
+                linked_ids.update(
+                    row[0] for row in db.query(link_table.c.user_id).filter(
+                        link_table.c[target_column] == target_id,
+                        link_table.c.user_id.in_(chunk)
+                    )
+                )
+
+            # 逐行统计结果（重复的行、同一用户的用户名和邮箱都计为跳过）
+            success_count = 0
+            skip_count = 0
+            error_users = []
+            new_ids = []
+            for identifier in identifiers:
+                user_id = user_ids.get(identifier)
+                if user_id is None:
+                    error_users.append(identifier)
+                elif user_id in linked_ids:
+                    skip_count += 1
+                else:
+                    linked_ids.add(user_id)
+                    new_ids.append(user_id)
+                    success_count += 1
+
+            if new_ids:
+                db.execute(link_table.insert(), [
+                    {"user_id": user_id, target_column: target_id} for user_id in new_ids
+                ])
+
+        # 提交后再清除缓存会话，避免重新加载到未提交的旧数据
+        session_manager.invalidate_users(new_ids)
+        logger.info(f"批量关联完成: {target_column}={target_id}, 成功={success_count}, 跳过={skip_count}, 无法识别={len(error_users)}")
+        return {'success_count': success_count, 'skip_count': skip_count, 'error_users': error_users}
+
+    @staticmethod
+    def batch_add_users_to_permission_safe(permission_id: int, identifiers: List[str]) -> Optional[Dict[str, Any]]:
+        """批量为用户添加直接权限（用户名或邮箱），权限不存在或出错时返回None"""
+        try:
+            from .database import get_db
+
+            with get_db() as db:
+                if not db.query(Permission.id).filter(Permission.id == permission_id).first():
+                    return None
+
+            return DetachedDataManager._bulk_associate_users(
+                user_permissions, 'permission_id', permission_id, identifiers
+            )
+
+        except Exception as e:
+            logger.error(f"批量为用户添加权限失败 (权限ID: {permission_id}): {e}")
+            return None
+
+    @staticmethod
+    def batch_add_users_to_role_safe(role_name: str, identifiers: List[str]) -> Optional[Dict[str, Any]]:
+        """批量为用户关联角色（用户名或邮箱），角色不存在或出错时返回None"""
+        try:
+            from .database import get_db
+
+            with get_db() as db:
+                role = db.query(Role.id).filter(Role.name == role_name).first()
+                if not role:
+                    return None
+
+            return DetachedDataManager._bulk_associate_users(
+                user_roles, 'role_id', role.id, identifiers
+            )
+
+        except Exception as e:
+            logger.error(f"批量为用户关联角色失败 (角色: {role_name}): {e}")
+            return None
+
     @staticmethod
     def get_user_direct_permissions_safe(user_id: int) -> List[str]:
         """安全获取用户直接权限列表"""
@@ -880,7 +1216,8 @@ class DetachedDataManager:
 
 # 需要导入模型类
 try:
-    from .models import User, Role, Permission
+    from .models import User, Role, Permission, user_roles, user_permissions, role_permissions
+    from .session_manager import session_manager
 except ImportError:
     logger.warning("无法导入模型类，某些功能可能不可用")
 
@@ -896,6 +1233,21 @@ def get_users_safe(search_term: str = None, limit: int = None) -> List[DetachedU
     """便捷函数：安全获取用户列表"""
     return detached_manager.get_users_safe(search_term, limit)
 
+def get_users_page_safe(search_term: str = None, page_size: int = 20, after_id: int = None,
+                        offset: int = 0, with_count: bool = True, exclude_role: str = None) -> DetachedPage:
+    """便捷函数：分页获取用户列表"""
+    return detached_manager.get_users_page_safe(search_term, page_size, after_id, offset, with_count, exclude_role)
+
+def get_roles_page_safe(search_term: str = None, page_size: int = 50, after_id: int = None,
+                        offset: int = 0, with_count: bool = True) -> DetachedPage:
+    """便捷函数：分页获取角色列表"""
+    return detached_manager.get_roles_page_safe(search_term, page_size, after_id, offset, with_count)
+
+def get_permissions_page_safe(search_term: str = None, category: str = None, page_size: int = 20,
+                              after_id: int = None, offset: int = 0, with_count: bool = True) -> DetachedPage:
+    """便捷函数：分页获取权限列表"""
+    return detached_manager.get_permissions_page_safe(search_term, category, page_size, after_id, offset, with_count)
+
 def get_role_safe(role_id: int) -> Optional[DetachedRole]:
     """便捷函数：安全获取角色"""
     return detached_manager.get_role_safe(role_id)
@@ -965,6 +1317,14 @@ def remove_permission_from_user_safe(user_id: int, permission_id: int) -> bool:
     """便捷函数：安全从用户移除直接权限"""
     return detached_manager.remove_permission_from_user_safe(user_id, permission_id)
 
+def batch_add_users_to_permission_safe(permission_id: int, identifiers: List[str]) -> Optional[Dict[str, Any]]:
+    """便捷函数：批量为用户添加直接权限"""
+    return detached_manager.batch_add_users_to_permission_safe(permission_id, identifiers)
+
+def batch_add_users_to_role_safe(role_name: str, identifiers: List[str]) -> Optional[Dict[str, Any]]:
+    """便捷函数：批量为用户关联角色"""
+    return detached_manager.batch_add_users_to_role_safe(role_name, identifiers)
+
 def get_user_direct_permissions_safe(user_id: int) -> List[str]:
     """便捷函数：安全获取用户直接权限列表"""
     return detached_manager.get_user_direct_permissions_safe(user_id)
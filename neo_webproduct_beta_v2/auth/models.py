@@ -60,8 +60,8 @@ class User(Base):
     locked_until = Column(DateTime)  # 账户锁定时间
     
     # 会话信息
-    session_token = Column(String(255), unique=True)
-    remember_token = Column(String(255), unique=True)
+    session_token = Column(String(255), unique=True, index=True)
+    remember_token = Column(String(255), unique=True, index=True)
     
     # 时间戳
     created_at = Column(DateTime, server_default=func.now())
@@ -51,8 +51,8 @@ def login_page_content():
                 login_button.disable()
                 login_button.props('loading')
                 
-                # 执行登录
-                result = auth_manager.login(
+                # 执行登录（数据库和密码校验不阻塞事件循环）
+                result = await auth_manager.login_async(
                     username, 
                     password,
                     remember_checkbox.value if remember_checkbox else False
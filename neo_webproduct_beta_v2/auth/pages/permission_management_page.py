@@ -7,27 +7,122 @@ from ..decorators import require_role
 from ..auth_manager import auth_manager
 from ..detached_helper import (
     detached_manager,
-    get_permissions_safe,
+    get_permissions_page_safe,
     get_permission_safe,
     get_roles_safe,
-    get_users_safe,
+    get_users_page_safe,
     update_permission_safe,
     delete_permission_safe,
     create_permission_safe,
     get_permission_direct_users_safe,  # 新增导入
+    batch_add_users_to_permission_safe,
     DetachedPermission,
     DetachedRole,
     DetachedUser
 )
 from ..models import Permission, Role, User
-from ..database import get_db
+from ..database import get_db, run_db
+from ..session_manager import session_manager
 from datetime import datetime
 
 # 导入异常处理模块
-from common.exception_handler import log_info, log_error, safe, db_safe, safe_protect
+from common.exception_handler import log_info, log_error, safe, safe_protect
 
 @require_role('admin')
 @safe_protect(name="权限管理页面", error_msg="权限管理页面加载失败，请稍后重试")
+# ==================== 数据库操作（在数据库线程池中执行，不调用 ui.*） ====================
+
+def _load_permission_statistics():
+    """权限统计数据，附带角色和用户总数"""
+    permission_stats = detached_manager.get_permission_statistics()
+    role_stats = detached_manager.get_role_statistics()
+    user_stats = detached_manager.get_user_statistics()
+    return {
+        **permission_stats,
+        'total_roles': role_stats['total_roles'],
+        'total_users': user_stats['total_users']
+    }
+
+def _load_permissions_page(search_term, page_size: int):
+    """加载一页权限及每个权限直接关联的用户，返回 (分页结果, {权限ID: 用户列表})"""
+    permissions_page = get_permissions_page_safe(search_term=search_term, page_size=page_size)
+    direct_users = {
+        permission.id: get_permission_direct_users_safe(permission.id)
+        for permission in permissions_page.items
+    }
+    return permissions_page, direct_users
+
+def _add_permission_to_roles(permission_id: int, role_ids: list) -> bool:
+    """将权限添加到指定角色"""
+    try:
+        with get_db() as db:
+            permission = db.query(Permission).filter(Permission.id == permission_id).first()
+            if not permission:
+                return False
+
+            roles = db.query(Role).filter(Role.id.in_(role_ids)).all()
+            affected_user_ids = set()
+            for role in roles:
+                if permission not in role.permissions:
+                    role.permissions.append(permission)
+                    affected_user_ids.update(user.id for user in role.users)
+
+        session_manager.invalidate_users(affected_user_ids)
+        return True
+
+    except Exception as e:
+        log_error(f"添加权限到角色失败: {e}")
+        return False
+
+def _remove_permission_from_roles(permission_id: int, role_names) -> int:
+    """从指定角色中移除权限，返回成功处理的角色数量"""
+    try:
+        with get_db() as db:
+            permission = db.query(Permission).filter(Permission.id == permission_id).first()
+            if not permission:
+                return 0
+
+            roles = db.query(Role).filter(Role.name.in_(list(role_names))).all()
+            affected_user_ids = set()
+            for role in roles:
+                if permission in role.permissions:
+                    role.permissions.remove(permission)
+                    affected_user_ids.update(user.id for user in role.users)
+
+        session_manager.invalidate_users(affected_user_ids)
+        return len(roles)
+
+    except Exception as e:
+        log_error(f"移除权限角色关联失败: {e}")
+        return 0
+
+def _add_permission_to_users(permission_id: int, user_ids: list) -> bool:
+    """将权限直接添加到指定用户 - 使用 detached_helper 中的函数"""
+    from ..detached_helper import add_permission_to_user_safe
+    try:
+        success_count = 0
+        for user_id in user_ids:
+            if add_permission_to_user_safe(user_id, permission_id):
+                success_count += 1
+        
+        return success_count > 0
+
+    except Exception as e:
+        log_error(f"添加权限到用户失败: {e}")
+        return False
+
+def _remove_permission_from_users(permission_id: int, user_ids) -> int:
+    """从指定用户中移除权限 - 使用 detached_helper 中的函数，返回成功数量"""
+    from ..detached_helper import remove_permission_from_user_safe
+    success_count = 0
+    for user_id in user_ids:
+        try:
+            if remove_permission_from_user_safe(user_id, permission_id):
+                success_count += 1
+        except Exception as e:
+            log_error(f"移除用户 {user_id} 权限关联失败: {e}")
+    return success_count
+
 def permission_management_page_content():
     """权限管理页面内容 - 仅管理员可访问"""
     log_info("权限管理页面开始加载")
@@ -37,26 +132,19 @@ def permission_management_page_content():
         ui.label('权限管理').classes('text-4xl font-bold text-green-800 dark:text-green-200 mb-2')
         ui.label('管理系统权限和资源访问控制，支持角色和用户关联管理').classes('text-lg text-gray-600 dark:text-gray-400')
 
-    # 权限统计卡片
-    def load_permission_statistics():
+    # 权限统计卡片（页面渲染后异步加载数值）
+    stat_labels = {}
+
+    async def load_permission_statistics():
         """加载权限统计数据"""
         log_info("开始加载权限统计数据")
-        permission_stats = detached_manager.get_permission_statistics()
-        role_stats = detached_manager.get_role_statistics()
-        user_stats = detached_manager.get_user_statistics()
-        
-        return {
-            **permission_stats,
-            'total_roles': role_stats['total_roles'],
-            'total_users': user_stats['total_users']
-        }
-
-    # 安全执行统计数据加载
-    stats = safe(
-        load_permission_statistics,
-        return_value={'total_permissions': 0, 'system_permissions': 0, 'content_permissions': 0, 'total_roles': 0, 'total_users': 0},
-        error_msg="权限统计数据加载失败"
-    )
+        stats = await safe(
+            run_db, _load_permission_statistics,
+            return_value={'total_permissions': 0, 'system_permissions': 0, 'content_permissions': 0, 'total_roles': 0, 'total_users': 0},
+            error_msg="权限统计数据加载失败"
+        )
+        for key, label in stat_labels.items():
+            label.set_text(str(stats.get(key, 0)))
 
     # 统计卡片区域
     with ui.row().classes('w-full gap-6 mb-8'):
@@ -64,30 +152,32 @@ def permission_management_page_content():
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('总权限数').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['total_permissions'])).classes('text-3xl font-bold')
+                    stat_labels['total_permissions'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('security').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-blue-500 to-blue-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('系统权限').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['system_permissions'])).classes('text-3xl font-bold')
+                    stat_labels['system_permissions'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('admin_panel_settings').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-purple-500 to-purple-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('内容权限').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['content_permissions'])).classes('text-3xl font-bold')
+                    stat_labels['content_permissions'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('folder_shared').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-orange-500 to-orange-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('关联角色').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['total_roles'])).classes('text-3xl font-bold')
+                    stat_labels['total_roles'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('group').classes('text-4xl opacity-80')
 
+    ui.timer(0, load_permission_statistics, once=True)
+
     # 权限列表容器
     with ui.column().classes('w-full'):
         with ui.row().classes('w-full gap-2 mt-4'):
@@ -97,15 +187,15 @@ def permission_management_page_content():
                      on_click=lambda: safe(lambda: ui.notify("test")),
                      color='red').classes('ml-4')
         # 处理函数
-        def handle_search():
+        async def handle_search():
             """处理搜索"""
             log_info(f"权限搜索: {search_input.value}")
-            load_permissions()
+            await load_permissions()
 
-        def reset_search():
+        async def reset_search():
             """重置搜索"""
             search_input.value = ''
-            load_permissions()
+            await load_permissions()
             
         with ui.row().classes('w-full gap-2 mb-4 items-end'):
             search_input = ui.input('搜索权限', placeholder='权限名称、标识或描述').classes('flex-1').props('outlined clearable')
@@ -119,21 +209,26 @@ def permission_management_page_content():
         # 权限列表容器
         permissions_container = ui.column().classes('w-full gap-4')
 
-    def load_permissions():
+    async def load_permissions():
         """更新权限显示"""
         log_info("开始更新权限显示")
         
         search_term = search_input.value.strip() if search_input.value else None
-        all_permissions = safe(
-            lambda: get_permissions_safe(search_term=search_term),
-            return_value=[],
+        MAX_DISPLAY_USERS = 2
+        # 服务端分页：只加载需要显示的权限，总数单独统计（连同各权限的直接关联用户）
+        permissions_page, direct_users = await safe(
+            run_db, _load_permissions_page, search_term, MAX_DISPLAY_USERS,
+            return_value=(None, {}),
             error_msg="权限列表加载失败"
         )
+        permissions_to_display = permissions_page.items if permissions_page else []
+        total_permissions = (permissions_page.total or 0) if permissions_page else 0
+        has_more_permissions = permissions_page.has_more if permissions_page else False
         
         permissions_container.clear()
         
         with permissions_container:
-            if not all_permissions:
+            if not permissions_to_display:
                 search_term = search_input.value.strip() if search_input.value else None
                 with ui.card().classes('w-full p-8 text-center bg-gray-50 dark:bg-gray-700'):
                     if search_term:
@@ -145,10 +240,6 @@ def permission_management_page_content():
                         ui.label('暂无权限数据').classes('text-lg text-gray-600 dark:text-gray-400')
                 return
 
-            MAX_DISPLAY_USERS = 2
-            permissions_to_display = all_permissions[:MAX_DISPLAY_USERS]
-            has_more_permissions = len(all_permissions) > MAX_DISPLAY_USERS
-
             with ui.card().classes('w-full p-4 mb-4 bg-blue-50 dark:bg-blue-900/20 border border-blue-200 dark:border-blue-700'):
                 with ui.row().classes('items-center gap-3'):
                     ui.icon('info').classes('text-blue-600 dark:text-blue-400 text-2xl')
@@ -157,18 +248,18 @@ def permission_management_page_content():
                         if not search_term:
                             ui.label('权限列表最多显示2个权限。要查看或操作特定权限，请使用上方搜索框输入权限名称或标识搜索').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
                         else:
-                            if len(all_permissions) > MAX_DISPLAY_USERS:
-                                ui.label(f'搜索到 {len(all_permissions)} 个权限，当前显示前 {MAX_DISPLAY_USERS} 个。请使用更精确的关键词缩小搜索范围。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
+                            if total_permissions > MAX_DISPLAY_USERS:
+                                ui.label(f'搜索到 {total_permissions} 个权限，当前显示前 {MAX_DISPLAY_USERS} 个。请使用更精确的关键词缩小搜索范围。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
                             else:
-                                ui.label(f'搜索到 {len(all_permissions)} 个匹配权限。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
+                                ui.label(f'搜索到 {total_permissions} 个匹配权限。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
             
             with ui.row().classes('w-full items-center justify-between mb-4'):
                 if search_term:
-                    ui.label(f'搜索结果: {len(all_permissions)} 个权限').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
+                    ui.label(f'搜索结果: {total_permissions} 个权限').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
                 else:
-                    ui.label(f'权限总数: {len(all_permissions)} 个').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
+                    ui.label(f'权限总数: {total_permissions} 个').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
                 if has_more_permissions:
-                    ui.chip(f'显示 {len(permissions_to_display)}/{len(all_permissions)}', icon='visibility').classes('bg-orange-100 text-orange-800 dark:bg-orange-800 dark:text-orange-200')
+                    ui.chip(f'显示 {len(permissions_to_display)}/{total_permissions}', icon='visibility').classes('bg-orange-100 text-orange-800 dark:bg-orange-800 dark:text-orange-200')
 
 
             # 权限卡片列表
@@ -176,11 +267,11 @@ def permission_management_page_content():
                 with ui.row().classes('w-full gap-3'):
                     # 第一个权限卡片
                     with ui.column().classes('flex-1'):
-                        create_permission_card(permissions_to_display[i])
+                        create_permission_card(permissions_to_display[i], direct_users.get(permissions_to_display[i].id, []))
                     # 第二个权限卡片（如果存在）
                     if i + 1 < len(permissions_to_display):
                         with ui.column().classes('flex-1'):
-                            create_permission_card(permissions_to_display[i + 1])
+                            create_permission_card(permissions_to_display[i + 1], direct_users.get(permissions_to_display[i + 1].id, []))
                     else:
                         # 如果是奇数个权限，添加占位符保持布局
                         ui.column().classes('flex-1')
@@ -191,12 +282,12 @@ def permission_management_page_content():
                     with ui.row().classes('items-center gap-3'):
                         ui.icon('visibility_off').classes('text-orange-600 dark:text-orange-400 text-2xl')
                         with ui.column().classes('flex-1'):
-                            ui.label(f'还有 {len(all_permissions) - MAX_DISPLAY_USERS} 个权限未显示').classes('text-lg font-semibold text-orange-800 dark:text-orange-200')
+                            ui.label(f'还有 {total_permissions - MAX_DISPLAY_USERS} 个权限未显示').classes('text-lg font-semibold text-orange-800 dark:text-orange-200')
                             ui.label('请使用搜索功能查找特定权限，或者使用更精确的关键词缩小范围。').classes('text-orange-700 dark:text-orange-300 text-sm')
 
 
-    def create_permission_card(permission_data: DetachedPermission):
-        """创建权限卡片"""
+    def create_permission_card(permission_data: DetachedPermission, permission_users: list):
+        """创建权限卡片（permission_users 为权限直接关联的用户）"""
         # 确定角色颜色主题
         if permission_data.name == 'system.manage':
             card_theme = 'border-l-4 border-red-500 bg-red-50 dark:bg-red-900/10'
@@ -277,13 +368,6 @@ def permission_management_page_content():
 
                     # 关联用户区域 - 修改后的版本
                     with ui.column().classes('gap-2'):
-                        # 获取权限直接关联的用户
-                        permission_users = safe(
-                            lambda: get_permission_direct_users_safe(permission_data.id),
-                            return_value=[],
-                            error_msg="获取权限关联用户失败"
-                        )
-                        
                         with ui.row().classes('items-center justify-between w-full'):
                             ui.label(f'关联用户 ({len(permission_users)})').classes('text-lg font-bold text-gray-800 dark:text-gray-200')
 
@@ -386,7 +470,7 @@ def permission_management_page_content():
                 max_file_size=1024*1024  # 1MB 限制
             ).classes('w-full').props('accept=".txt,.csv"')
 
-            def process_batch_association():
+            async def process_batch_association():
                 """处理批量关联"""
                 if not uploaded_file_content:
                     ui.notify('请先上传用户列表文件', type='warning')
@@ -414,44 +498,16 @@ def permission_management_page_content():
 
                     log_info(f"开始批量关联用户到权限 {permission_data.name}: {len(users_list)} 个用户")
 
-                    # 执行批量关联
-                    success_count = 0
-                    skip_count = 0
-                    error_users = []
-
-                    with db_safe(f"批量关联用户到权限 {permission_data.name}") as db:
-                        permission = db.query(Permission).filter(Permission.id == permission_data.id).first()
-                        if not permission:
-                            ui.notify('权限不存在', type='error')
-                            return
-
-                        for user_identifier in users_list:
-                            try:
-                                # 尝试按用户名查找
-                                user = db.query(User).filter(User.username == user_identifier).first()
-                                
-                                # 如果按用户名找不到，尝试按邮箱查找
-                                if not user and '@' in user_identifier:
-                                    user = db.query(User).filter(User.email == user_identifier).first()
-                                
-                                if not user:
-                                    error_users.append(user_identifier)
-                                    continue
-                                
-                                # 检查是否已经有直接权限关联
-                                if permission in user.permissions:
-                                    skip_count += 1
-                                    log_info(f"用户 {user.username} 已拥有权限 {permission_data.name}，跳过")
-                                    continue
-                                
-                                # 添加权限关联
-                                user.permissions.append(permission)
-                                success_count += 1
-                                log_info(f"成功为用户 {user.username} 添加权限 {permission_data.name}")
-                                
-                            except Exception as e:
-                                log_error(f"处理用户 {user_identifier} 时出错", exception=e)
-                                error_users.append(user_identifier)
+                    # 执行批量关联（集合查询 + 单次批量插入）
+                    result = await run_db(batch_add_users_to_permission_safe, permission_data.id, users_list)
+                    if result is None:
+                        ui.notify('权限不存在或批量关联失败', type='error')
+                        return
+
+                    success_count = result['success_count']
+                    skip_count = result['skip_count']
+                    error_users = result['error_users']
+                    log_info(f"批量关联用户到权限 {permission_data.name} 完成: 成功 {success_count}, 跳过 {skip_count}, 无法识别 {len(error_users)}")
 
                     # 显示结果对话框
                     result_message = f'''批量关联完成！
@@ -498,7 +554,7 @@ def permission_management_page_content():
                     if success_count > 0:
                         ui.notify(f'成功关联 {success_count} 个用户到权限 {permission_data.name}', type='positive')
                         dialog.close()
-                        safe(load_permissions)  # 重新加载权限列表
+                        await safe(load_permissions)  # 重新加载权限列表
                     else:
                         ui.notify('没有新用户被关联', type='info')
 
@@ -531,7 +587,7 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('创建权限', on_click=lambda: create_new_permission()).classes('bg-green-600 text-white px-4 py-2')
 
-            def create_new_permission():
+            async def create_new_permission():
                 """创建新权限"""
                 if not name_input.value:
                     ui.notify('请输入权限标识', type='warning')
@@ -539,13 +595,12 @@ def permission_management_page_content():
 
                 log_info(f"开始创建权限: {name_input.value}")
                 
-                permission_id = safe(
-                    lambda: create_permission_safe(
-                        name=name_input.value,
-                        display_name=display_name_input.value or None,
-                        category=category_select.value,
-                        description=description_input.value or None
-                    ),
+                permission_id = await safe(
+                    run_db, create_permission_safe,
+                    name=name_input.value,
+                    display_name=display_name_input.value or None,
+                    category=category_select.value,
+                    description=description_input.value or None,
                     return_value=None,
                     error_msg="权限创建失败"
                 )
@@ -553,7 +608,7 @@ def permission_management_page_content():
                 if permission_id:
                     ui.notify('权限创建成功', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('权限创建失败，可能权限标识已存在', type='error')
 
@@ -579,17 +634,16 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('保存修改', on_click=lambda: save_permission_changes()).classes('bg-yellow-600 text-white px-4 py-2')
 
-            def save_permission_changes():
+            async def save_permission_changes():
                 """保存权限修改"""
                 log_info(f"开始更新权限: {permission_data.name}")
                 
-                success = safe(
-                    lambda: update_permission_safe(
-                        permission_data.id,
-                        display_name=display_name_input.value or None,
-                        category=category_select.value,
-                        description=description_input.value or None
-                    ),
+                success = await safe(
+                    run_db, update_permission_safe,
+                    permission_data.id,
+                    display_name=display_name_input.value or None,
+                    category=category_select.value,
+                    description=description_input.value or None,
                     return_value=False,
                     error_msg="权限更新失败"
                 )
@@ -597,7 +651,7 @@ def permission_management_page_content():
                 if success:
                     ui.notify('权限更新成功', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('权限更新失败', type='error')
 
@@ -619,12 +673,12 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('确认删除', on_click=lambda: execute_delete_permission()).classes('bg-red-600 text-white px-4 py-2')
 
-            def execute_delete_permission():
+            async def execute_delete_permission():
                 """执行删除权限"""
                 log_info(f"开始删除权限: {permission_data.name}")
                 
-                success = safe(
-                    lambda: delete_permission_safe(permission_data.id),
+                success = await safe(
+                    run_db, delete_permission_safe, permission_data.id,
                     return_value=False,
                     error_msg="权限删除失败"
                 )
@@ -632,14 +686,14 @@ def permission_management_page_content():
                 if success:
                     ui.notify('权限删除成功', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('权限删除失败，可能存在关联关系', type='error')
 
         dialog.open()
 
     # 角色关联管理 - 添加角色对话框
-    def add_roles_to_permission(permission_data: DetachedPermission):
+    async def add_roles_to_permission(permission_data: DetachedPermission):
         """为权限添加角色关联"""
         with ui.dialog() as dialog, ui.card().classes('w-lg p-6'):
             ui.label('为权限添加角色').classes('text-xl font-bold text-blue-600 mb-4')
@@ -652,12 +706,12 @@ def permission_management_page_content():
             with ui.column().classes('w-full max-h-60 overflow-y-auto border border-gray-200 dark:border-gray-600 rounded p-3') as role_list_container:
                 pass  # 角色列表将在这里动态生成
 
-            def update_role_list():
+            async def update_role_list():
                 """更新角色列表"""
                 search_term = role_search_input.value.strip() if role_search_input.value else None
                 
-                all_roles = safe(
-                    lambda: get_roles_safe(),
+                all_roles = await safe(
+                    run_db, get_roles_safe,
                     return_value=[],
                     error_msg="获取角色列表失败"
                 )
@@ -700,7 +754,7 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('确认添加', on_click=lambda: confirm_update_roles()).classes('bg-blue-600 text-white px-4 py-2')
 
-            def confirm_update_roles():
+            async def confirm_update_roles():
                 """确认更新角色关联"""
                 if not selected_roles:
                     ui.notify('请至少选择一个角色', type='warning')
@@ -708,8 +762,8 @@ def permission_management_page_content():
 
                 log_info(f"开始为权限 {permission_data.name} 添加角色关联: {list(selected_roles)}")
                 
-                success = safe(
-                    lambda: add_permission_to_roles(permission_data.id, list(selected_roles)),
+                success = await safe(
+                    run_db, _add_permission_to_roles, permission_data.id, list(selected_roles),
                     return_value=False,
                     error_msg="权限角色关联失败"
                 )
@@ -717,12 +771,12 @@ def permission_management_page_content():
                 if success:
                     ui.notify('权限角色关联成功', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('权限角色关联失败', type='error')
 
             # 初始化角色列表
-            update_role_list()
+            await update_role_list()
 
         dialog.open()
 
@@ -788,7 +842,7 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('确认删除', on_click=lambda: confirm_remove_roles()).classes('bg-red-600 text-white px-4 py-2')
 
-            def confirm_remove_roles():
+            async def confirm_remove_roles():
                 """确认删除角色关联"""
                 if not selected_roles_to_remove:
                     ui.notify('请至少选择一个角色', type='warning')
@@ -796,20 +850,16 @@ def permission_management_page_content():
 
                 log_info(f"开始从权限 {permission_data.name} 删除角色关联: {list(selected_roles_to_remove)}")
                 
-                success_count = 0
-                for role_name in selected_roles_to_remove:
-                    success = safe(
-                        lambda rn=role_name: remove_permission_from_role(permission_data.id, rn),
-                        return_value=False,
-                        error_msg=f"删除角色 {role_name} 关联失败"
-                    )
-                    if success:
-                        success_count += 1
+                success_count = await safe(
+                    run_db, _remove_permission_from_roles, permission_data.id, list(selected_roles_to_remove),
+                    return_value=0,
+                    error_msg="删除角色关联失败"
+                )
 
                 if success_count > 0:
                     ui.notify(f'成功删除 {success_count} 个角色关联', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('删除角色关联失败', type='error')
 
@@ -819,7 +869,7 @@ def permission_management_page_content():
         dialog.open()
 
     # 用户关联管理 - 添加用户对话框
-    def add_users_to_permission(permission_data: DetachedPermission):
+    async def add_users_to_permission(permission_data: DetachedPermission):
         """为权限添加用户关联"""
         with ui.dialog() as dialog, ui.card().classes('w-lg p-6'):
             ui.label('为权限添加用户').classes('text-xl font-bold text-indigo-600 mb-4')
@@ -832,19 +882,21 @@ def permission_management_page_content():
             with ui.column().classes('w-full max-h-60 overflow-y-auto border border-gray-200 dark:border-gray-600 rounded p-3') as user_list_container:
                 pass  # 用户列表将在这里动态生成
 
-            def update_user_list():
+            async def update_user_list():
                 """更新用户列表"""
                 search_term = user_search_input.value.strip() if user_search_input.value else None
                 
-                all_users = safe(
-                    lambda: get_users_safe(search_term=search_term, limit=100),
-                    return_value=[],
+                users_page = await safe(
+                    run_db, get_users_page_safe,
+                    search_term=search_term, page_size=100, with_count=False,
+                    return_value=None,
                     error_msg="获取用户列表失败"
                 )
+                all_users = users_page.items if users_page else []
                 
                 # 获取已关联的用户ID
-                permission_users = safe(
-                    lambda: get_permission_direct_users_safe(permission_data.id),
+                permission_users = await safe(
+                    run_db, get_permission_direct_users_safe, permission_data.id,
                     return_value=[],
                     error_msg="获取权限关联用户失败"
                 )
@@ -882,7 +934,7 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('确认添加', on_click=lambda: confirm_update_users()).classes('bg-indigo-600 text-white px-4 py-2')
 
-            def confirm_update_users():
+            async def confirm_update_users():
                 """确认更新用户关联"""
                 if not selected_users:
                     ui.notify('请至少选择一个用户', type='warning')
@@ -890,8 +942,8 @@ def permission_management_page_content():
 
                 log_info(f"开始为权限 {permission_data.name} 添加用户关联: {list(selected_users)}")
                 
-                success = safe(
-                    lambda: add_permission_to_users(permission_data.id, list(selected_users)),
+                success = await safe(
+                    run_db, _add_permission_to_users, permission_data.id, list(selected_users),
                     return_value=False,
                     error_msg="权限用户关联失败"
                 )
@@ -899,29 +951,29 @@ def permission_management_page_content():
                 if success:
                     ui.notify('权限用户关联成功', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('权限用户关联失败', type='error')
 
             # 初始化用户列表
-            update_user_list()
+            await update_user_list()
 
         dialog.open()
 
     # 用户关联管理 - 删除用户对话框（新增）
-    def remove_users_from_permission(permission_data: DetachedPermission):
+    async def remove_users_from_permission(permission_data: DetachedPermission):
         """从权限中删除用户关联"""
+        # 获取已关联的用户
+        permission_users = await safe(
+            run_db, get_permission_direct_users_safe, permission_data.id,
+            return_value=[],
+            error_msg="获取权限关联用户失败"
+        )
+
         with ui.dialog() as dialog, ui.card().classes('w-lg p-6'):
             ui.label('删除权限的用户关联').classes('text-xl font-bold text-orange-600 mb-4')
             ui.label(f'权限: {permission_data.display_name or permission_data.name}').classes('text-gray-700 mb-4')
 
-            # 获取已关联的用户
-            permission_users = safe(
-                lambda: get_permission_direct_users_safe(permission_data.id),
-                return_value=[],
-                error_msg="获取权限关联用户失败"
-            )
-
             if not permission_users:
                 ui.label('该权限暂无关联用户').classes('text-gray-500 text-center py-4')
                 with ui.row().classes('w-full gap-2 mt-6 justify-end'):
@@ -977,7 +1029,7 @@ def permission_management_page_content():
                 ui.button('取消', on_click=dialog.close).classes('bg-gray-500 text-white px-4 py-2')
                 ui.button('确认删除', on_click=lambda: confirm_remove_users()).classes('bg-orange-600 text-white px-4 py-2')
 
-            def confirm_remove_users():
+            async def confirm_remove_users():
                 """确认删除用户关联"""
                 if not selected_users_to_remove:
                     ui.notify('请至少选择一个用户', type='warning')
@@ -985,20 +1037,16 @@ def permission_management_page_content():
 
                 log_info(f"开始从权限 {permission_data.name} 删除用户关联: {list(selected_users_to_remove)}")
                 
-                success_count = 0
-                for user_id in selected_users_to_remove:
-                    success = safe(
-                        lambda uid=user_id: remove_permission_from_user(permission_data.id, uid),
-                        return_value=False,
-                        error_msg=f"删除用户 {user_id} 关联失败"
-                    )
-                    if success:
-                        success_count += 1
+                success_count = await safe(
+                    run_db, _remove_permission_from_users, permission_data.id, list(selected_users_to_remove),
+                    return_value=0,
+                    error_msg="删除用户关联失败"
+                )
 
                 if success_count > 0:
                     ui.notify(f'成功删除 {success_count} 个用户关联', type='positive')
                     dialog.close()
-                    load_permissions()
+                    await load_permissions()
                 else:
                     ui.notify('删除用户关联失败', type='error')
 
@@ -1007,76 +1055,8 @@ def permission_management_page_content():
 
         dialog.open()
 
-    # 辅助函数：权限-角色关联操作
-    def add_permission_to_roles(permission_id: int, role_ids: list) -> bool:
-        """将权限添加到指定角色"""
-        try:
-            with db_safe("添加权限到角色") as db:
-                permission = db.query(Permission).filter(Permission.id == permission_id).first()
-                if not permission:
-                    return False
-
-                roles = db.query(Role).filter(Role.id.in_(role_ids)).all()
-                for role in roles:
-                    if permission not in role.permissions:
-                        role.permissions.append(permission)
-
-                return True
-
-        except Exception as e:
-            log_error(f"添加权限到角色失败: {e}")
-            return False
-
-    def remove_permission_from_role(permission_id: int, role_name: str) -> bool:
-        """从指定角色中移除权限"""
-        try:
-            with db_safe("移除权限角色关联") as db:
-                permission = db.query(Permission).filter(Permission.id == permission_id).first()
-                if not permission:
-                    return False
-
-                role = db.query(Role).filter(Role.name == role_name).first()
-                if not role:
-                    return False
-
-                if permission in role.permissions:
-                    role.permissions.remove(permission)
-
-                return True
-
-        except Exception as e:
-            log_error(f"移除权限角色关联失败: {e}")
-            return False
-
-    # 辅助函数：权限-用户关联操作（新增功能）
-    def add_permission_to_users(permission_id: int, user_ids: list) -> bool:
-        """将权限直接添加到指定用户 - 使用 detached_helper 中的函数"""
-        try:
-            success_count = 0
-            for user_id in user_ids:
-                # 使用 detached_helper 中的函数
-                from ..detached_helper import add_permission_to_user_safe
-                if add_permission_to_user_safe(user_id, permission_id):
-                    success_count += 1
-            
-            return success_count > 0
-
-        except Exception as e:
-            log_error(f"添加权限到用户失败: {e}")
-            return False
-
-    def remove_permission_from_user(permission_id: int, user_id: int) -> bool:
-        """从指定用户中移除权限 - 使用 detached_helper 中的函数"""
-        try:
-            from ..detached_helper import remove_permission_from_user_safe
-            return remove_permission_from_user_safe(user_id, permission_id)
-
-        except Exception as e:
-            log_error(f"移除用户权限关联失败: {e}")
-            return False
-
-    # 初始加载权限显示
-    load_permissions()
+    # 初始加载权限显示（页面渲染后在事件循环中异步加载）
+    ui.timer(0, load_permissions, once=True)
 
     log_info("权限管理页面加载完成")
 
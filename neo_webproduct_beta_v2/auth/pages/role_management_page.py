@@ -6,22 +6,71 @@ from ..decorators import require_role
 from ..auth_manager import auth_manager
 from ..detached_helper import (
     detached_manager,
-    get_roles_safe,
+    get_roles_page_safe,
     get_role_safe,
-    get_users_safe,
+    get_users_page_safe,
     update_role_safe,
     delete_role_safe,
     create_role_safe,
+    batch_add_users_to_role_safe,
     DetachedRole,
     DetachedUser
 )
 from ..models import Role, User
-from ..database import get_db
+from ..database import get_db, run_db
+from ..session_manager import session_manager
 import io
 import csv
 
 # 导入异常处理模块
-from common.exception_handler import log_info, log_error, safe, db_safe, safe_protect
+from common.exception_handler import log_info, log_error, safe, safe_protect
+
+# 角色列表最多显示的角色数量
+MAX_DISPLAY_ROLES = 50
+
+# 添加用户对话框每次加载的用户数量
+USER_PICKER_PAGE_SIZE = 100
+
+# ==================== 数据库操作（在数据库线程池中执行，不调用 ui.*） ====================
+
+def _load_role_statistics():
+    """角色统计数据，附带用户总数"""
+    role_stats = detached_manager.get_role_statistics()
+    user_stats = detached_manager.get_user_statistics()
+    return {
+        **role_stats,
+        'total_users': user_stats['total_users']
+    }
+
+def _add_users_to_role(role_name: str, usernames):
+    """为角色添加用户，返回新增关联的用户ID列表，角色不存在时返回None"""
+    added_user_ids = []
+    with get_db() as db:
+        role = db.query(Role).filter(Role.name == role_name).first()
+        if not role:
+            return None
+
+        for username in usernames:
+            user = db.query(User).filter(User.username == username).first()
+            if user and role not in user.roles:
+                user.roles.append(role)
+                added_user_ids.append(user.id)
+    return added_user_ids
+
+def _remove_users_from_role(role_name: str, usernames):
+    """从角色中移除用户，返回被移除的用户ID列表，角色不存在时返回None"""
+    removed_user_ids = []
+    with get_db() as db:
+        role = db.query(Role).filter(Role.name == role_name).first()
+        if not role:
+            return None
+
+        for username in usernames:
+            user = db.query(User).filter(User.username == username).first()
+            if user and role in user.roles:
+                user.roles.remove(role)
+                removed_user_ids.append(user.id)
+    return removed_user_ids
 
 @require_role('admin')
 @safe_protect(name="角色管理页面", error_msg="角色管理页面加载失败，请稍后重试")
@@ -34,24 +83,19 @@ def role_management_page_content():
         ui.label('角色管理').classes('text-4xl font-bold text-purple-800 dark:text-purple-200 mb-2')
         ui.label('管理系统角色和权限分配，支持用户关联管理').classes('text-lg text-gray-600 dark:text-gray-400')
 
-    # 角色统计卡片
-    def load_role_statistics():
+    # 角色统计卡片（页面渲染后异步加载数值）
+    stat_labels = {}
+
+    async def load_role_statistics():
         """加载角色统计数据"""
         log_info("开始加载角色统计数据")
-        role_stats = detached_manager.get_role_statistics()
-        user_stats = detached_manager.get_user_statistics()
-        
-        return {
-            **role_stats,
-            'total_users': user_stats['total_users']
-        }
-
-    # 安全执行统计数据加载
-    stats = safe(
-        load_role_statistics,
-        return_value={'total_roles': 0, 'active_roles': 0, 'system_roles': 0, 'total_users': 0},
-        error_msg="角色统计数据加载失败"
-    )
+        stats = await safe(
+            run_db, _load_role_statistics,
+            return_value={'total_roles': 0, 'active_roles': 0, 'system_roles': 0, 'total_users': 0},
+            error_msg="角色统计数据加载失败"
+        )
+        for key, label in stat_labels.items():
+            label.set_text(str(stats.get(key, 0)))
 
     # 统计卡片区域
     with ui.row().classes('w-full gap-6 mb-8'):
@@ -59,30 +103,32 @@ def role_management_page_content():
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('总角色数').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['total_roles'])).classes('text-3xl font-bold')
+                    stat_labels['total_roles'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('group').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-green-500 to-green-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('活跃角色').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['active_roles'])).classes('text-3xl font-bold')
+                    stat_labels['active_roles'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('check_circle').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-blue-500 to-blue-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('系统角色').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['system_roles'])).classes('text-3xl font-bold')
+                    stat_labels['system_roles'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('admin_panel_settings').classes('text-4xl opacity-80')
 
         with ui.card().classes('flex-1 p-6 bg-gradient-to-br from-orange-500 to-orange-600 text-white shadow-lg'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('用户总数').classes('text-sm opacity-90 font-medium')
-                    ui.label(str(stats['total_users'])).classes('text-3xl font-bold')
+                    stat_labels['total_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('people').classes('text-4xl opacity-80')
 
+    ui.timer(0, load_role_statistics, once=True)
+
     # 角色列表容器
     with ui.column().classes('w-full'):
         ui.label('角色列表').classes('text-xl font-bold text-gray-800 dark:text-gray-200 mb-3')
@@ -99,18 +145,18 @@ def role_management_page_content():
                     on_click=lambda: safe(export_roles)).classes('bg-gray-600 hover:bg-gray-700 text-white px-4 py-2 text-sm font-medium shadow-md')
         
         # 搜索区域
-        def handle_search():
+        async def handle_search():
             """处理搜索事件"""
-            safe(load_roles)
+            await safe(load_roles)
         
         def handle_input_search():
             """处理输入时的搜索事件 - 带延迟"""
             ui.timer(0.5, lambda: safe(load_roles), once=True)
         
-        def reset_search():
+        async def reset_search():
             """重置搜索"""
             search_input.value = ''
-            safe(load_roles)
+            await safe(load_roles)
 
         with ui.row().classes('w-full gap-2 mb-4 items-end'):
             search_input = ui.input(
@@ -132,32 +178,22 @@ def role_management_page_content():
         # 角色卡片容器
         roles_container = ui.column().classes('w-full gap-4')
 
-    def load_roles():
+    async def load_roles():
         """加载角色列表"""
         log_info("开始加载角色列表")
         
-        # 清空现有内容
-        roles_container.clear()
-        
         # 获取搜索关键词
         search_term = search_input.value.strip() if hasattr(search_input, 'value') else ''
         log_info(f"角色搜索条件: {search_term}")
         
-        # 获取角色数据
-        all_roles = get_roles_safe()
+        # 获取角色数据（搜索过滤和分页在数据库中完成）
+        roles_page = await run_db(get_roles_page_safe, search_term=search_term or None, page_size=MAX_DISPLAY_ROLES)
+        filtered_roles = roles_page.items
         
-        # 过滤角色
-        if search_term:
-            filtered_roles = [
-                role for role in all_roles 
-                if search_term.lower() in (role.name or '').lower() 
-                or search_term.lower() in (role.display_name or '').lower()
-                or search_term.lower() in (role.description or '').lower()
-            ]
-        else:
-            filtered_roles = all_roles
+        # 查询完成后再清空现有内容
+        roles_container.clear()
         
-        log_info(f"角色加载完成，共找到 {len(filtered_roles)} 个角色")
+        log_info(f"角色加载完成，共找到 {roles_page.total} 个角色")
         
         with roles_container:
             if not filtered_roles:
@@ -190,6 +226,15 @@ def role_management_page_content():
                         # 如果是奇数个角色，添加占位符保持布局
                         ui.column().classes('flex-1')
 
+            # 如果有更多角色未显示，显示提示
+            if roles_page.has_more:
+                with ui.card().classes('w-full p-4 mt-4 bg-orange-50 dark:bg-orange-900/20 border border-orange-200 dark:border-orange-700'):
+                    with ui.row().classes('items-center gap-3'):
+                        ui.icon('visibility_off').classes('text-orange-600 dark:text-orange-400 text-2xl')
+                        with ui.column().classes('flex-1'):
+                            ui.label(f'还有 {roles_page.total - len(filtered_roles)} 个角色未显示').classes('text-lg font-semibold text-orange-800 dark:text-orange-200')
+                            ui.label('请使用搜索功能查找特定角色。').classes('text-orange-700 dark:text-orange-300 text-sm')
+
     def create_role_card(role_data: DetachedRole):
         """创建单个角色卡片"""
         # 确定角色颜色主题
@@ -270,6 +315,8 @@ def role_management_page_content():
                                         if not role_data.is_system:
                                             ui.button(icon='close',
                                                      on_click=lambda u=username, r=role_data: safe(lambda: remove_user_from_role(u, r))).props('flat round color=red').classes('w-6 h-6')
+                                if role_data.user_count > len(role_data.users):
+                                    ui.label(f'还有 {role_data.user_count - len(role_data.users)} 个用户，点击"查看"显示全部').classes('text-xs text-gray-500 dark:text-gray-400 p-2')
                         else:
                             with ui.column().classes('w-full items-center justify-center py-4'):
                                 ui.icon('people_outline').classes('text-3xl text-gray-400 mb-1')
@@ -391,7 +438,7 @@ developer@team.com''').classes('w-full text-sm')
             # 上传状态显示区域
             upload_status = ui.column().classes('w-full mb-4')
 
-            def process_batch_association():
+            async def process_batch_association():
                 """处理批量关联"""
                 if not upload_result['file_content']:
                     ui.notify('请先上传用户文件', type='warning')
@@ -407,42 +454,16 @@ developer@team.com''').classes('w-full text-sm')
                         ui.notify('文件中没有找到有效的用户数据', type='warning')
                         return
 
-                    # 统计变量
-                    success_count = 0
-                    skip_count = 0
-                    error_users = []
-                    
-                    with db_safe(f"批量关联用户到角色 {role_data.name}") as db:
-                        # 获取角色对象
-                        role = db.query(Role).filter(Role.name == role_data.name).first()
-                        if not role:
-                            ui.notify('角色不存在', type='error')
-                            return
-
-                        for user_identifier in lines:
-                            try:
-                                # 尝试通过用户名或邮箱查找用户
-                                user = db.query(User).filter(
-                                    (User.username == user_identifier) | 
-                                    (User.email == user_identifier)
-                                ).first()
-                                
-                                if user:
-                                    # 检查用户是否已经拥有该角色
-                                    if role not in user.roles:
-                                        user.roles.append(role)
-                                        success_count += 1
-                                        log_info(f"成功关联用户 {user_identifier} 到角色 {role_data.name}")
-                                    else:
-                                        skip_count += 1
-                                        log_info(f"用户 {user_identifier} 已拥有角色 {role_data.name}，跳过")
-                                else:
-                                    error_users.append(user_identifier)
-                                    log_error(f"未找到用户: {user_identifier}")
-                                    
-                            except Exception as e:
-                                error_users.append(user_identifier)
-                                log_error(f"处理用户 {user_identifier} 时出错", exception=e)
+                    # 执行批量关联（集合查询 + 单次批量插入）
+                    result = await run_db(batch_add_users_to_role_safe, role_data.name, lines)
+                    if result is None:
+                        ui.notify('角色不存在或批量关联失败', type='error')
+                        return
+
+                    success_count = result['success_count']
+                    skip_count = result['skip_count']
+                    error_users = result['error_users']
+                    log_info(f"批量关联用户到角色 {role_data.name} 完成: 成功 {success_count}, 跳过 {skip_count}, 无法识别 {len(error_users)}")
 
                     # 显示处理结果
                     total_processed = len(lines)
@@ -491,7 +512,7 @@ developer@team.com''').classes('w-full text-sm')
                     if success_count > 0:
                         ui.notify(f'成功关联 {success_count} 个用户到角色 {role_data.name}', type='positive')
                         dialog.close()
-                        safe(load_roles)  # 重新加载角色列表
+                        await safe(load_roles)  # 重新加载角色列表
                     else:
                         ui.notify('没有新用户被关联', type='info')
 
@@ -508,10 +529,13 @@ developer@team.com''').classes('w-full text-sm')
 
     # ==================== 现有功能保持不变 ====================
     @safe_protect(name="添加用户到角色")
-    def add_users_to_role_dialog(role_data: DetachedRole):
+    async def add_users_to_role_dialog(role_data: DetachedRole):
         """添加用户到角色对话框"""
         log_info(f"打开添加用户到角色对话框: {role_data.name}")
         
+        # 统计未关联此角色的用户（只做COUNT，不加载用户数据）
+        available_page = await run_db(get_users_page_safe, page_size=0, exclude_role=role_data.name)
+        
         with ui.dialog() as dialog, ui.card().classes('w-[600px] max-h-[80vh]'):
             dialog.open()
             
@@ -520,17 +544,13 @@ developer@team.com''').classes('w-full text-sm')
                 ui.label(f'为角色 "{role_data.display_name or role_data.name}" 添加用户').classes('text-xl font-bold')
                 ui.button(icon='close', on_click=dialog.close).props('flat round color=white').classes('ml-auto')
 
-            # 获取所有用户
-            all_users = get_users_safe()
-            available_users = [user for user in all_users if user.username not in role_data.users]
-
-            if not available_users:
+            if not available_page.total:
                 ui.label('所有用户都已关联到此角色').classes('text-center text-gray-500 dark:text-gray-400 py-8')
                 with ui.row().classes('w-full justify-center mt-4'):
                     ui.button('关闭', on_click=dialog.close).classes('bg-gray-500 text-white')
                 return
 
-            ui.label(f'选择要添加到角色的用户（可添加 {len(available_users)} 个用户）：').classes('text-lg font-medium mb-4')
+            ui.label(f'选择要添加到角色的用户（可添加 {available_page.total} 个用户）：').classes('text-lg font-medium mb-4')
 
             # 用户选择列表
             selected_users = set()
@@ -541,17 +561,16 @@ developer@team.com''').classes('w-full text-sm')
             # 用户列表容器
             user_list_container = ui.column().classes('w-full gap-2 max-h-80 overflow-auto')
 
-            def update_user_list():
+            async def update_user_list():
                 """更新用户列表显示"""
-                search_term = search_input.value.lower().strip() if search_input.value else ''
+                search_term = search_input.value.strip() if search_input.value else None
                 
-                # 过滤用户
-                filtered_users = [
-                    user for user in available_users
-                    if not search_term or 
-                    search_term in user.username.lower() or 
-                    search_term in (user.email or '').lower()
-                ]
+                # 在数据库中搜索未关联此角色的用户，只加载一页
+                filtered_users = (await run_db(
+                    get_users_page_safe,
+                    search_term=search_term, page_size=USER_PICKER_PAGE_SIZE,
+                    with_count=False, exclude_role=role_data.name
+                )).items
                 
                 user_list_container.clear()
                 with user_list_container:
@@ -582,33 +601,27 @@ developer@team.com''').classes('w-full text-sm')
             search_input.on('input', lambda: ui.timer(0.3, update_user_list, once=True))
             
             # 初始加载用户列表
-            update_user_list()
+            await update_user_list()
 
-            def confirm_add_users():
+            async def confirm_add_users():
                 """确认添加用户"""
                 if not selected_users:
                     ui.notify('请选择要添加的用户', type='warning')
                     return
 
                 try:
-                    added_count = 0
-                    with db_safe(f"为角色 {role_data.name} 添加用户") as db:
-                        role = db.query(Role).filter(Role.name == role_data.name).first()
-                        if not role:
-                            ui.notify('角色不存在', type='error')
-                            return
-
-                        for username in selected_users:
-                            user = db.query(User).filter(User.username == username).first()
-                            if user and role not in user.roles:
-                                user.roles.append(role)
-                                added_count += 1
+                    added_user_ids = await run_db(_add_users_to_role, role_data.name, list(selected_users))
+                    if added_user_ids is None:
+                        ui.notify('角色不存在', type='error')
+                        return
 
+                    session_manager.invalidate_users(added_user_ids)
+                    added_count = len(added_user_ids)
                     if added_count > 0:
                         log_info(f"成功为角色 {role_data.name} 添加了 {added_count} 个用户")
                         ui.notify(f'成功添加 {added_count} 个用户到角色 {role_data.name}', type='positive')
                         dialog.close()
-                        safe(load_roles)  # 重新加载角色列表
+                        await safe(load_roles)  # 重新加载角色列表
                     else:
                         ui.notify('没有用户被添加', type='info')
 
@@ -622,10 +635,12 @@ developer@team.com''').classes('w-full text-sm')
                 ui.button('确认添加', on_click=lambda: safe(confirm_add_users)).classes('px-6 py-2 bg-green-600 hover:bg-green-700 text-white')
 
     @safe_protect(name="批量移除用户")
-    def batch_remove_users_dialog(role_data: DetachedRole):
+    async def batch_remove_users_dialog(role_data: DetachedRole):
         """批量移除用户对话框"""
         log_info(f"打开批量移除用户对话框: {role_data.name}")
         
+        # 分页列表中只带部分用户名，重新加载完整的用户列表
+        role_data = await run_db(get_role_safe, role_data.id) or role_data
         if not role_data.users:
             ui.notify('此角色暂无用户可移除', type='info')
             return
@@ -656,31 +671,25 @@ developer@team.com''').classes('w-full text-sm')
                         ui.icon('person').classes('text-red-500 text-xl')
                         ui.label(username).classes('font-medium text-gray-800 dark:text-gray-200')
 
-            def confirm_remove_users():
+            async def confirm_remove_users():
                 """确认移除用户"""
                 if not selected_users:
                     ui.notify('请选择要移除的用户', type='warning')
                     return
 
                 try:
-                    removed_count = 0
-                    with db_safe(f"从角色 {role_data.name} 移除用户") as db:
-                        role = db.query(Role).filter(Role.name == role_data.name).first()
-                        if not role:
-                            ui.notify('角色不存在', type='error')
-                            return
-
-                        for username in selected_users:
-                            user = db.query(User).filter(User.username == username).first()
-                            if user and role in user.roles:
-                                user.roles.remove(role)
-                                removed_count += 1
+                    removed_user_ids = await run_db(_remove_users_from_role, role_data.name, list(selected_users))
+                    if removed_user_ids is None:
+                        ui.notify('角色不存在', type='error')
+                        return
 
+                    session_manager.invalidate_users(removed_user_ids)
+                    removed_count = len(removed_user_ids)
                     if removed_count > 0:
                         log_info(f"成功从角色 {role_data.name} 移除了 {removed_count} 个用户")
                         ui.notify(f'成功从角色 {role_data.name} 移除 {removed_count} 个用户', type='positive')
                         dialog.close()
-                        safe(load_roles)  # 重新加载角色列表
+                        await safe(load_roles)  # 重新加载角色列表
                     else:
                         ui.notify('没有用户被移除', type='info')
 
@@ -694,22 +703,19 @@ developer@team.com''').classes('w-full text-sm')
                 ui.button('确认移除', on_click=lambda: safe(confirm_remove_users)).classes('px-6 py-2 bg-red-600 hover:bg-red-700 text-white')
 
     @safe_protect(name="移除单个用户")
-    def remove_user_from_role(username: str, role_data: DetachedRole):
+    async def remove_user_from_role(username: str, role_data: DetachedRole):
         """从角色中移除单个用户"""
         log_info(f"移除用户 {username} 从角色 {role_data.name}")
         
         try:
-            with db_safe(f"移除用户 {username} 从角色 {role_data.name}") as db:
-                user = db.query(User).filter(User.username == username).first()
-                role = db.query(Role).filter(Role.name == role_data.name).first()
-                
-                if user and role and role in user.roles:
-                    user.roles.remove(role)
-                    log_info(f"成功移除用户 {username} 从角色 {role_data.name}")
-                    ui.notify(f'用户 {username} 从角色 {role_data.name} 中移除', type='positive')
-                    safe(load_roles)  # 重新加载角色列表
-                else:
-                    ui.notify('用户不在此角色中', type='info')
+            removed_user_ids = await run_db(_remove_users_from_role, role_data.name, [username])
+            if removed_user_ids:
+                session_manager.invalidate_user(removed_user_ids[0])
+                log_info(f"成功移除用户 {username} 从角色 {role_data.name}")
+                ui.notify(f'用户 {username} 从角色 {role_data.name} 中移除', type='positive')
+                await safe(load_roles)  # 重新加载角色列表
+            else:
+                ui.notify('用户不在此角色中', type='info')
 
         except Exception as e:
             log_error(f"移除用户角色失败: {username} - {role_data.name}", exception=e)
@@ -717,10 +723,12 @@ developer@team.com''').classes('w-full text-sm')
 
     # 其他功能函数（查看、编辑、删除角色等）保持原有逻辑
     @safe_protect(name="查看角色详情")
-    def view_role_dialog(role_data: DetachedRole):
+    async def view_role_dialog(role_data: DetachedRole):
         """查看角色详情对话框"""
         log_info(f"查看角色详情: {role_data.name}")
         
+        # 分页列表中只带部分用户名，重新加载完整的用户列表
+        role_data = await run_db(get_role_safe, role_data.id) or role_data
         with ui.dialog() as dialog, ui.card().classes('w-[700px] max-h-[80vh] overflow-auto'):
             dialog.open()
             
@@ -794,7 +802,7 @@ developer@team.com''').classes('w-full text-sm')
             description_input = ui.textarea('描述', value=role_data.description or '').classes('w-full')
             is_active_switch = ui.switch('启用角色', value=role_data.is_active).classes('mt-4')
 
-            def save_role():
+            async def save_role():
                 """保存角色修改"""
                 log_info(f"保存角色修改: {role_data.name}")
                 
@@ -805,13 +813,13 @@ developer@team.com''').classes('w-full text-sm')
                     'is_active': is_active_switch.value
                 }
                 
-                success = update_role_safe(role_data.id, update_data)
+                success = await run_db(update_role_safe, role_data.id, update_data)
                 
                 if success:
                     log_info(f"角色修改成功: {update_data['name']}")
                     ui.notify('角色信息已更新', type='positive')
                     dialog.close()
-                    safe(load_roles)
+                    await safe(load_roles)
                 else:
                     log_error(f"保存角色修改失败: {role_data.name}")
                     ui.notify('保存失败，角色名称可能已存在', type='negative')
@@ -835,7 +843,7 @@ developer@team.com''').classes('w-full text-sm')
             description_input = ui.textarea('描述', placeholder='角色功能描述').classes('w-full')
             is_active_switch = ui.switch('启用角色', value=True).classes('mt-4')
 
-            def save_new_role():
+            async def save_new_role():
                 """保存新角色"""
                 log_info("开始创建新角色")
                 
@@ -844,7 +852,8 @@ developer@team.com''').classes('w-full text-sm')
                     return
 
                 # 使用安全的创建方法
-                role_id = create_role_safe(
+                role_id = await run_db(
+                    create_role_safe,
                     name=name_input.value.strip(),
                     display_name=display_name_input.value.strip() or None,
                     description=description_input.value.strip() or None,
@@ -855,7 +864,7 @@ developer@team.com''').classes('w-full text-sm')
                     log_info(f"新角色创建成功: {name_input.value} (ID: {role_id})")
                     ui.notify(f'角色 {display_name_input.value or name_input.value} 创建成功', type='positive')
                     dialog.close()
-                    safe(load_roles)
+                    await safe(load_roles)
                 else:
                     log_error(f"创建角色失败: {name_input.value}")
                     ui.notify('角色创建失败，名称可能已存在', type='negative')
@@ -880,15 +889,15 @@ developer@team.com''').classes('w-full text-sm')
             ui.label(f'您确定要删除角色 "{role_data.display_name or role_data.name}" 吗？').classes('mt-4')
             ui.label('此操作将移除所有用户的该角色关联，且不可撤销。').classes('text-sm text-red-500 mt-2')
 
-            def confirm_delete():
+            async def confirm_delete():
                 """确认删除角色"""
-                success = delete_role_safe(role_data.id)
+                success = await run_db(delete_role_safe, role_data.id)
                 
                 if success:
                     log_info(f"角色删除成功: {role_data.name}")
                     ui.notify(f'角色 {role_data.name} 已删除', type='positive')
                     dialog.close()
-                    safe(load_roles)
+                    await safe(load_roles)
                 else:
                     log_error(f"删除角色失败: {role_data.name}")
                     ui.notify('删除失败，请稍后重试', type='negative')
@@ -908,5 +917,5 @@ developer@team.com''').classes('w-full text-sm')
         """导出角色数据"""
         ui.notify('导出功能开发中...', type='info')
 
-    # 初始加载角色列表
-    safe(load_roles)
\ No newline at end of file
+    # 初始加载角色列表（页面渲染后在事件循环中异步加载）
+    ui.timer(0, lambda: safe(load_roles), once=True)
\ No newline at end of file
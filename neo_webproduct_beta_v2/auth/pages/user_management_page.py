@@ -6,20 +6,125 @@ from ..decorators import require_role
 from ..auth_manager import auth_manager
 from ..detached_helper import (
     detached_manager, 
-    get_users_safe, 
+    get_users_page_safe,
     get_user_safe,
     get_roles_safe,
     DetachedUser
 )
 from ..utils import format_datetime, validate_email, validate_username
 from ..models import User, Role
-from ..database import get_db
+from ..database import get_db, run_db
+from ..session_manager import session_manager
 import secrets
 import string
 from datetime import datetime, timedelta
 
 # 导入异常处理模块
-from common.exception_handler import log_info, log_error, safe, db_safe, safe_protect
+from common.exception_handler import log_info, log_error, safe, safe_protect
+
+# ==================== 数据库操作（在数据库线程池中执行，不调用 ui.*） ====================
+
+def _load_user_statistics():
+    """用户统计数据，包括锁定用户数量"""
+    stats = detached_manager.get_user_statistics()
+    with get_db() as db:
+        stats['locked_users'] = db.query(User).filter(
+            User.locked_until != None,
+            User.locked_until > datetime.now()
+        ).count()
+    return stats
+
+def _set_user_lock(user_id: int, lock: bool):
+    """锁定（30分钟）或解锁用户，返回 (用户名, 锁定截止时间)，用户不存在时返回None"""
+    with get_db() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        user.locked_until = datetime.now() + timedelta(minutes=30) if lock else None
+        db.commit()
+        return user.username, user.locked_until
+
+def _unlock_all_users() -> int:
+    """解锁所有被锁定的用户，返回解锁数量"""
+    with get_db() as db:
+        locked_users = db.query(User).filter(
+            User.locked_until != None,
+            User.locked_until > datetime.now()
+        ).all()
+        for user in locked_users:
+            user.locked_until = None
+        db.commit()
+        return len(locked_users)
+
+def _update_user(user_id: int, username: str, email: str, full_name, is_active: bool,
+                 is_verified: bool, lock_action, role_names: list):
+    """
+    更新用户信息和角色，返回 (用户名, 锁定截止时间)，用户不存在时返回None
+
+    lock_action 为 'lock' 时锁定30分钟，'unlock' 时解除锁定，None 时不改变锁定状态
+    """
+    with get_db() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        
+        user.username = username
+        user.email = email
+        user.full_name = full_name
+        user.is_active = is_active
+        user.is_verified = is_verified
+        
+        if lock_action == 'lock':
+            user.locked_until = datetime.now() + timedelta(minutes=30)
+        elif lock_action == 'unlock':
+            user.locked_until = None
+        
+        user.roles.clear()
+        if role_names:
+            user.roles.extend(db.query(Role).filter(Role.name.in_(role_names)).all())
+        
+        db.commit()
+        session_manager.invalidate_user(user_id)
+        return user.username, user.locked_until
+
+def _create_user(username: str, email: str, full_name, password: str, role_names: list):
+    """创建新用户，返回 (用户名, 分配的角色列表)，用户名或邮箱已存在时返回None"""
+    with get_db() as db:
+        existing = db.query(User).filter(
+            (User.username == username) |
+            (User.email == email)
+        ).first()
+        if existing:
+            return None
+        
+        new_user = User(
+            username=username.strip(),
+            email=email.strip(),
+            full_name=full_name,
+            is_active=True,
+            is_verified=True,
+            locked_until=None  # 新用户默认不锁定
+        )
+        new_user.set_password(password)
+        
+        roles = db.query(Role).filter(Role.name.in_(role_names)).all() if role_names else []
+        new_user.roles.extend(roles)
+        
+        db.add(new_user)
+        db.commit()
+        return new_user.username, [role.name for role in roles]
+
+def _reset_user_password(user_id: int, password: str):
+    """重置用户密码并清除登录令牌，返回用户名，用户不存在时返回None"""
+    with get_db() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        user.set_password(password)
+        user.session_token = None
+        user.remember_token = None
+        db.commit()
+        return user.username
 
 @require_role('admin')
 @safe_protect(name="用户管理页面", error_msg="用户管理页面加载失败，请稍后重试")
@@ -32,59 +137,41 @@ def user_management_page_content():
         ui.label('用户管理').classes('text-4xl font-bold text-indigo-800 dark:text-indigo-200 mb-2')
         ui.label('管理系统中的所有用户账户').classes('text-lg text-gray-600 dark:text-gray-400')
 
-    # 用户统计卡片 - 添加锁定用户统计
-    def load_user_statistics():
+    # 用户统计卡片 - 添加锁定用户统计（页面渲染后异步加载数值）
+    stat_labels = {}
+
+    async def load_user_statistics():
         """加载用户统计数据 - 增加锁定用户统计"""
         log_info("开始加载用户统计数据")
-        
-        # 获取基础统计
-        base_stats = detached_manager.get_user_statistics()
-        
-        # 计算锁定用户数量
-        try:
-            with db_safe("统计锁定用户") as db:
-                current_time = datetime.now()
-                locked_users_count = db.query(User).filter(
-                    User.locked_until != None,
-                    User.locked_until > current_time
-                ).count()
-                
-                base_stats['locked_users'] = locked_users_count
-                log_info(f"锁定用户数量: {locked_users_count}")
-                
-        except Exception as e:
-            log_error("获取锁定用户统计失败", exception=e)
-            base_stats['locked_users'] = 0
-            
-        return base_stats
-
-    # 安全执行统计数据加载
-    stats = safe(
-        load_user_statistics,
-        return_value={'total_users': 0, 'active_users': 0, 'verified_users': 0, 'admin_users': 0, 'locked_users': 0},
-        error_msg="用户统计数据加载失败"
-    )
+        stats = await safe(
+            run_db, _load_user_statistics,
+            return_value={'total_users': 0, 'active_users': 0, 'verified_users': 0, 'admin_users': 0, 'locked_users': 0},
+            error_msg="用户统计数据加载失败"
+        )
+        log_info(f"锁定用户数量: {stats['locked_users']}")
+        for key, label in stat_labels.items():
+            label.set_text(str(stats.get(key, 0)))
 
     with ui.row().classes('w-full gap-6 mb-8'):
         with ui.card().classes('flex-1 p-4 bg-gradient-to-r from-blue-500 to-blue-600 text-white'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('总用户数').classes('text-sm opacity-90')
-                    ui.label(str(stats['total_users'])).classes('text-3xl font-bold')
+                    stat_labels['total_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('people').classes('text-2xl opacity-80')
 
         with ui.card().classes('flex-1 p-4 bg-gradient-to-r from-green-500 to-green-600 text-white'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('活跃用户').classes('text-sm opacity-90')
-                    ui.label(str(stats['active_users'])).classes('text-3xl font-bold')
+                    stat_labels['active_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('check_circle').classes('text-2xl opacity-80')
 
         with ui.card().classes('flex-1 p-4 bg-gradient-to-r from-orange-500 to-orange-600 text-white'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('已验证用户').classes('text-sm opacity-90')
-                    ui.label(str(stats['verified_users'])).classes('text-3xl font-bold')
+                    stat_labels['verified_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('verified').classes('text-2xl opacity-80')
 
         # 新增：锁定用户统计卡片
@@ -92,16 +179,18 @@ def user_management_page_content():
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('锁定用户').classes('text-sm opacity-90')
-                    ui.label(str(stats['locked_users'])).classes('text-3xl font-bold')
+                    stat_labels['locked_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('lock').classes('text-2xl opacity-80')
 
         with ui.card().classes('flex-1 p-4 bg-gradient-to-r from-purple-500 to-purple-600 text-white'):
             with ui.row().classes('items-center justify-between w-full'):
                 with ui.column().classes('gap-1'):
                     ui.label('管理员').classes('text-sm opacity-90')
-                    ui.label(str(stats['admin_users'])).classes('text-3xl font-bold')
+                    stat_labels['admin_users'] = ui.label('-').classes('text-3xl font-bold')
                 ui.icon('admin_panel_settings').classes('text-2xl opacity-80')
 
+    ui.timer(0, load_user_statistics, once=True)
+
     with ui.card().classes('w-full mt-6'):
         ui.label('用户列表').classes('text-lg font-semibold')
 
@@ -116,18 +205,18 @@ def user_management_page_content():
                      color='red').classes('ml-4')
 
         # 绑定搜索事件处理函数
-        def handle_search():
+        async def handle_search():
             """处理搜索事件 - 立即执行"""
-            safe(load_users)
+            await safe(load_users)
         
         def handle_input_search():
             """处理输入搜索事件 - 延迟执行"""
             ui.timer(0.5, lambda: safe(load_users), once=True)
         
-        def reset_search():
+        async def reset_search():
             """重置搜索"""
             search_input.value = ''
-            safe(load_users)
+            await safe(load_users)
 
         # 搜索区域
         with ui.row().classes('w-full gap-2 mt-4 items-end'):
@@ -147,23 +236,24 @@ def user_management_page_content():
         users_container = ui.column().classes('w-full gap-3')
 
         @safe_protect(name="用户列表加载", error_msg="用户列表加载失败")
-        def load_users():
+        async def load_users():
             """加载用户数据 - 使用网格布局，最多显示2个用户，鼓励搜索"""
             log_info("开始加载用户列表数据")
-            users_container.clear()
 
             # 获取搜索条件
             search_term = search_input.value.strip() if hasattr(search_input, 'value') and search_input.value else None
             log_info(f"搜索条件: '{search_term}'")
             
-            # 使用安全的数据获取方法，传入搜索条件
-            all_users = get_users_safe(search_term=search_term)
-            log_info(f"成功获取{len(all_users)}个用户数据")
-
             # 限制显示的用户数量
             MAX_DISPLAY_USERS = 2
-            users_to_display = all_users[:MAX_DISPLAY_USERS]
-            has_more_users = len(all_users) > MAX_DISPLAY_USERS
+
+            # 服务端分页：只加载需要显示的用户，总数单独统计（查询完成后再替换列表）
+            users_page = await run_db(get_users_page_safe, search_term=search_term, page_size=MAX_DISPLAY_USERS)
+            users_container.clear()
+            users_to_display = users_page.items
+            total_users = users_page.total or 0
+            has_more_users = users_page.has_more
+            log_info(f"成功获取{len(users_to_display)}个用户数据，共{total_users}个匹配用户")
 
             with users_container:
                 # 搜索提示区域
@@ -175,13 +265,13 @@ def user_management_page_content():
                             if not search_term:
                                 ui.label('用户列表最多显示2个用户。要查看或操作特定用户，请使用上方搜索框输入用户名或邮箱进行搜索。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
                             else:
-                                if len(all_users) > MAX_DISPLAY_USERS:
-                                    ui.label(f'搜索到 {len(all_users)} 个用户，当前显示前 {MAX_DISPLAY_USERS} 个。请使用更精确的关键词缩小搜索范围。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
+                                if total_users > MAX_DISPLAY_USERS:
+                                    ui.label(f'搜索到 {total_users} 个用户，当前显示前 {MAX_DISPLAY_USERS} 个。请使用更精确的关键词缩小搜索范围。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
                                 else:
-                                    ui.label(f'搜索到 {len(all_users)} 个匹配用户。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
+                                    ui.label(f'搜索到 {total_users} 个匹配用户。').classes('text-blue-700 dark:text-blue-300 text-sm leading-relaxed')
 
                 # 处理无数据情况
-                if not all_users:
+                if not users_to_display:
                     with ui.card().classes('w-full p-8 text-center bg-gray-50 dark:bg-gray-700'):
                         if search_term:
                             ui.icon('search_off').classes('text-6xl text-gray-400 mb-4')
@@ -203,12 +293,12 @@ def user_management_page_content():
                 # 显示统计信息
                 with ui.row().classes('w-full items-center justify-between mb-4'):
                     if search_term:
-                        ui.label(f'搜索结果: {len(all_users)} 个用户').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
+                        ui.label(f'搜索结果: {total_users} 个用户').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
                     else:
-                        ui.label(f'用户总数: {len(all_users)} 个').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
+                        ui.label(f'用户总数: {total_users} 个').classes('text-lg font-medium text-gray-700 dark:text-gray-300')
                     
                     if has_more_users:
-                        ui.chip(f'显示 {len(users_to_display)}/{len(all_users)}', icon='visibility').classes('bg-orange-100 text-orange-800 dark:bg-orange-800 dark:text-orange-200')
+                        ui.chip(f'显示 {len(users_to_display)}/{total_users}', icon='visibility').classes('bg-orange-100 text-orange-800 dark:bg-orange-800 dark:text-orange-200')
 
                 # 创建用户卡片网格 - 每行2个
                 if users_to_display:
@@ -232,7 +322,7 @@ def user_management_page_content():
                         with ui.row().classes('items-center gap-3'):
                             ui.icon('visibility_off').classes('text-orange-600 dark:text-orange-400 text-2xl')
                             with ui.column().classes('flex-1'):
-                                ui.label(f'还有 {len(all_users) - MAX_DISPLAY_USERS} 个用户未显示').classes('text-lg font-semibold text-orange-800 dark:text-orange-200')
+                                ui.label(f'还有 {total_users - MAX_DISPLAY_USERS} 个用户未显示').classes('text-lg font-semibold text-orange-800 dark:text-orange-200')
                                 ui.label('请使用搜索功能查找特定用户，或者使用更精确的关键词缩小范围。').classes('text-orange-700 dark:text-orange-300 text-sm')
 
         def create_user_card(user_data: DetachedUser):
@@ -358,9 +448,9 @@ def user_management_page_content():
                                         on_click=lambda: ui.notify('这是您当前登录的账户', type='info')).classes('flex-1 bg-gray-400 text-white py-1 text-xs').disable()
 
         @safe_protect(name="切换用户锁定状态")
-        def toggle_user_lock(user_id: int, lock: bool):
+        async def toggle_user_lock(user_id: int, lock: bool):
             """切换用户锁定状态"""
-            user_data = get_user_safe(user_id)
+            user_data = await run_db(get_user_safe, user_id)
             if not user_data:
                 ui.notify('用户不存在', type='error')
                 return
@@ -369,80 +459,63 @@ def user_management_page_content():
             log_info(f"开始{action}用户: {user_data.username}")
             
             try:
-                with db_safe(f"{action}用户") as db:
-                    user = db.query(User).filter(User.id == user_id).first()
-                    if not user:
-                        ui.notify('用户不存在', type='error')
-                        return
-                    
-                    if lock:
-                        # 锁定用户 - 设置30分钟后解锁
-                        user.locked_until = datetime.now() + timedelta(minutes=30)
-                        ui.notify(f'用户 {user.username} 已锁定 30 分钟', type='warning')
-                        log_info(f"用户锁定成功: {user.username}, 锁定至: {user.locked_until}")
-                    else:
-                        # 解锁用户
-                        user.locked_until = None
-                        ui.notify(f'用户 {user.username} 已解锁', type='positive')
-                        log_info(f"用户解锁成功: {user.username}")
-                    
-                    db.commit()
-                    safe(load_users)  # 重新加载用户列表
+                result = await run_db(_set_user_lock, user_id, lock)
+                if result is None:
+                    ui.notify('用户不存在', type='error')
+                    return
+                
+                username, locked_until = result
+                if lock:
+                    # 锁定用户 - 设置30分钟后解锁
+                    ui.notify(f'用户 {username} 已锁定 30 分钟', type='warning')
+                    log_info(f"用户锁定成功: {username}, 锁定至: {locked_until}")
+                else:
+                    ui.notify(f'用户 {username} 已解锁', type='positive')
+                    log_info(f"用户解锁成功: {username}")
+                
+                await safe(load_users)  # 重新加载用户列表
                     
             except Exception as e:
                 log_error(f"{action}用户失败: {user_data.username}", exception=e)
                 ui.notify(f'{action}失败，请稍后重试', type='negative')
 
         @safe_protect(name="批量解锁用户")
-        def batch_unlock_users():
+        async def batch_unlock_users():
             """批量解锁所有锁定的用户"""
             log_info("开始批量解锁用户")
             
             try:
-                with db_safe("批量解锁用户") as db:
-                    current_time = datetime.now()
-                    locked_users = db.query(User).filter(
-                        User.locked_until != None,
-                        User.locked_until > current_time
-                    ).all()
-                    
-                    if not locked_users:
-                        ui.notify('当前没有锁定的用户', type='info')
-                        return
-                    
-                    count = len(locked_users)
-                    for user in locked_users:
-                        user.locked_until = None
-                    
-                    db.commit()
-                    
-                    log_info(f"批量解锁用户成功: {count} 个用户")
-                    ui.notify(f'已解锁 {count} 个用户', type='positive')
-                    safe(load_users)  # 重新加载用户列表
+                count = await run_db(_unlock_all_users)
+                if not count:
+                    ui.notify('当前没有锁定的用户', type='info')
+                    return
+                
+                log_info(f"批量解锁用户成功: {count} 个用户")
+                ui.notify(f'已解锁 {count} 个用户', type='positive')
+                await safe(load_users)  # 重新加载用户列表
                     
             except Exception as e:
                 log_error("批量解锁用户失败", exception=e)
                 ui.notify('批量解锁失败，请稍后重试', type='negative')
 
         @safe_protect(name="编辑用户对话框")
-        def edit_user_dialog(user_id):
+        async def edit_user_dialog(user_id):
             """编辑用户对话框 - 增加锁定状态控制"""
             log_info(f"打开编辑用户对话框: 用户ID {user_id}")
             
+            # 安全获取用户数据和可用角色
+            user_data = await run_db(get_user_safe, user_id)
+            available_roles = await safe(run_db, get_roles_safe, return_value=[]) if user_data else []
+            
             with ui.dialog() as dialog, ui.card().classes('w-96'):
                 dialog.open()
                 ui.label('编辑用户').classes('text-lg font-semibold')
 
-                # 安全获取用户数据
-                user_data = get_user_safe(user_id)
                 if not user_data:
                     ui.label('用户不存在或加载失败').classes('text-red-500')
                     log_error(f"编辑用户失败: 用户ID {user_id} 不存在或加载失败")
                     return
 
-                # 获取可用角色
-                available_roles = safe(get_roles_safe, return_value=[])
-
                 # 检查用户是否被锁定
                 is_locked = user_data.locked_until and user_data.locked_until > datetime.now()
 
@@ -477,7 +550,7 @@ def user_management_page_content():
                         value=role.name in user_data.roles
                     ).classes('mt-1')
 
-                def save_user():
+                async def save_user():
                     """保存用户修改 - 包含锁定状态处理"""
                     log_info(f"开始保存用户修改: 用户ID {user_id}")
                     
@@ -490,44 +563,39 @@ def user_management_page_content():
                         ui.notify('邮箱格式不正确', type='warning')
                         return
 
+                    # 处理锁定状态：只在开关状态改变时修改 locked_until
+                    lock_action = None
+                    if is_locked_switch.value and not is_locked:
+                        lock_action = 'lock'
+                    elif not is_locked_switch.value and is_locked:
+                        lock_action = 'unlock'
+                    selected_roles = [role_name for role_name, checkbox in role_checkboxes.items() if checkbox.value]
+
                     try:
-                        with db_safe("更新用户信息") as db:
-                            user = db.query(User).filter(User.id == user_id).first()
-                            if not user:
-                                ui.notify('用户不存在', type='error')
-                                return
-                            
-                            # 更新基本信息
-                            user.username = username_input.value.strip()
-                            user.email = email_input.value.strip()
-                            user.full_name = full_name_input.value.strip() or None
-                            user.is_active = is_active_switch.value
-                            user.is_verified = is_verified_switch.value
-                            
-                            # 处理锁定状态 - 新增逻辑
-                            if is_locked_switch.value and not is_locked:
-                                # 用户从未锁定变为锁定
-                                user.locked_until = datetime.now() + timedelta(minutes=30)
-                                log_info(f"用户 {user.username} 被设置为锁定状态，锁定至: {user.locked_until}")
-                            elif not is_locked_switch.value and is_locked:
-                                # 用户从锁定变为未锁定
-                                user.locked_until = None
-                                log_info(f"用户 {user.username} 被解除锁定状态")
-                            # 如果状态没有改变，不处理 locked_until
-                            
-                            # 更新角色
-                            user.roles.clear()
-                            selected_roles = [role_name for role_name, checkbox in role_checkboxes.items() if checkbox.value]
-                            if selected_roles:
-                                roles = db.query(Role).filter(Role.name.in_(selected_roles)).all()
-                                user.roles.extend(roles)
-                            
-                            db.commit()
-                            
-                            log_info(f"用户修改成功: {user.username}, 新角色: {selected_roles}, 锁定状态: {is_locked_switch.value}")
-                            ui.notify('用户信息已更新', type='positive')
-                            dialog.close()
-                            safe(load_users)
+                        result = await run_db(
+                            _update_user, user_id,
+                            username_input.value.strip(),
+                            email_input.value.strip(),
+                            full_name_input.value.strip() or None,
+                            is_active_switch.value,
+                            is_verified_switch.value,
+                            lock_action,
+                            selected_roles
+                        )
+                        if result is None:
+                            ui.notify('用户不存在', type='error')
+                            return
+                        
+                        username, locked_until = result
+                        if lock_action == 'lock':
+                            log_info(f"用户 {username} 被设置为锁定状态，锁定至: {locked_until}")
+                        elif lock_action == 'unlock':
+                            log_info(f"用户 {username} 被解除锁定状态")
+                        
+                        log_info(f"用户修改成功: {username}, 新角色: {selected_roles}, 锁定状态: {is_locked_switch.value}")
+                        ui.notify('用户信息已更新', type='positive')
+                        dialog.close()
+                        await safe(load_users)
 
                     except Exception as e:
                         log_error(f"保存用户修改失败: 用户ID {user_id}", exception=e)
@@ -538,10 +606,13 @@ def user_management_page_content():
                     ui.button('保存', on_click=lambda: safe(save_user)).classes('bg-blue-500 text-white')
 
         @safe_protect(name="添加用户对话框")
-        def add_user_dialog():
+        async def add_user_dialog():
             """添加用户对话框"""
             log_info("打开添加用户对话框")
             
+            # 角色选择
+            available_roles = await safe(run_db, get_roles_safe, return_value=[])
+            
             with ui.dialog() as dialog, ui.card().classes('w-96'):
                 dialog.open()
                 ui.label('添加新用户').classes('text-lg font-semibold')
@@ -552,9 +623,6 @@ def user_management_page_content():
                 full_name_input = ui.input('姓名', placeholder='可选').classes('w-full')
                 password_input = ui.input('密码', password=True, placeholder='至少6个字符').classes('w-full')
 
-                # 角色选择
-                available_roles = safe(get_roles_safe, return_value=[])
-                
                 ui.label('角色权限').classes('mt-4 font-medium')
                 role_checkboxes = {}
                 for role in available_roles:
@@ -563,7 +631,7 @@ def user_management_page_content():
                         value=(role.name == 'user')  # 默认选择user角色
                     ).classes('mt-1')
 
-                def save_new_user():
+                async def save_new_user():
                     """保存新用户"""
                     log_info("开始创建新用户")
                     
@@ -585,45 +653,24 @@ def user_management_page_content():
                         return
 
                     try:
-                        with db_safe("创建新用户") as db:
-                            # 检查用户名和邮箱是否已存在
-                            existing = db.query(User).filter(
-                                (User.username == username_input.value) |
-                                (User.email == email_input.value)
-                            ).first()
-
-                            if existing:
-                                ui.notify('用户名或邮箱已存在', type='warning')
-                                log_error(f"用户创建失败: 用户名或邮箱已存在 - {username_input.value}, {email_input.value}")
-                                return
-
-                            # 创建新用户
-                            new_user = User(
-                                username=username_input.value.strip(),
-                                email=email_input.value.strip(),
-                                full_name=full_name_input.value.strip() or None,
-                                is_active=True,
-                                is_verified=True,
-                                locked_until=None  # 新用户默认不锁定
-                            )
-                            new_user.set_password(password_input.value)
-
-                            # 分配角色
-                            selected_roles = []
-                            for role_name, checkbox in role_checkboxes.items():
-                                if checkbox.value:
-                                    role = db.query(Role).filter(Role.name == role_name).first()
-                                    if role:
-                                        new_user.roles.append(role)
-                                        selected_roles.append(role_name)
-
-                            db.add(new_user)
-                            db.commit()
-
-                            log_info(f"新用户创建成功: {new_user.username}, 角色: {selected_roles}")
-                            ui.notify(f'用户 {new_user.username} 创建成功', type='positive')
-                            dialog.close()
-                            safe(load_users)
+                        result = await run_db(
+                            _create_user,
+                            username_input.value,
+                            email_input.value,
+                            full_name_input.value.strip() or None,
+                            password_input.value,
+                            [role_name for role_name, checkbox in role_checkboxes.items() if checkbox.value]
+                        )
+                        if result is None:
+                            ui.notify('用户名或邮箱已存在', type='warning')
+                            log_error(f"用户创建失败: 用户名或邮箱已存在 - {username_input.value}, {email_input.value}")
+                            return
+
+                        username, selected_roles = result
+                        log_info(f"新用户创建成功: {username}, 角色: {selected_roles}")
+                        ui.notify(f'用户 {username} 创建成功', type='positive')
+                        dialog.close()
+                        await safe(load_users)
 
                     except Exception as e:
                         log_error(f"创建用户失败: {username_input.value}", exception=e)
@@ -634,12 +681,12 @@ def user_management_page_content():
                     ui.button('创建用户', on_click=lambda: safe(save_new_user)).classes('bg-blue-500 text-white')
 
         @safe_protect(name="重置密码对话框")
-        def reset_password_dialog(user_id):
+        async def reset_password_dialog(user_id):
             """重置密码对话框"""
             log_info(f"打开重置密码对话框: 用户ID {user_id}")
             
             # 安全获取用户数据
-            user_data = get_user_safe(user_id)
+            user_data = await run_db(get_user_safe, user_id)
             if not user_data:
                 ui.notify('用户不存在', type='error')
                 log_error(f"重置密码失败: 用户ID {user_id} 不存在")
@@ -668,7 +715,7 @@ def user_management_page_content():
                 ui.button('生成随机密码', icon='casino', 
                          on_click=lambda: safe(generate_password)).classes('w-full mt-2 bg-purple-500 text-white')
 
-                def perform_reset():
+                async def perform_reset():
                     """执行密码重置"""
                     log_info(f"开始重置用户密码: {user_data.username}")
                     
@@ -677,21 +724,14 @@ def user_management_page_content():
                         return
 
                     try:
-                        with db_safe("重置用户密码") as db:
-                            user = db.query(User).filter(User.id == user_id).first()
-                            if not user:
-                                ui.notify('用户不存在', type='error')
-                                return
-
-                            # 更新密码
-                            user.set_password(password_display.value)
-                            user.session_token = None
-                            user.remember_token = None
-                            db.commit()
-
-                            log_info(f"用户密码重置成功: {user.username}")
-                            ui.notify(f'用户 {user.username} 密码重置成功', type='positive')
-                            dialog.close()
+                        username = await run_db(_reset_user_password, user_id, password_display.value)
+                        if username is None:
+                            ui.notify('用户不存在', type='error')
+                            return
+
+                        log_info(f"用户密码重置成功: {username}")
+                        ui.notify(f'用户 {username} 密码重置成功', type='positive')
+                        dialog.close()
 
                     except Exception as e:
                         log_error(f"重置密码失败: {user_data.username}", exception=e)
@@ -702,12 +742,12 @@ def user_management_page_content():
                     ui.button('重置密码', on_click=lambda: safe(perform_reset)).classes('bg-orange-500 text-white')
 
         @safe_protect(name="删除用户对话框")
-        def delete_user_dialog(user_id):
+        async def delete_user_dialog(user_id):
             """删除用户对话框"""
             log_info(f"打开删除用户对话框: 用户ID {user_id}")
             
             # 安全获取用户数据
-            user_data = get_user_safe(user_id)
+            user_data = await run_db(get_user_safe, user_id)
             if not user_data:
                 ui.notify('用户不存在', type='error')
                 log_error(f"删除用户失败: 用户ID {user_id} 不存在")
@@ -719,7 +759,7 @@ def user_management_page_content():
                 ui.label(f'您确定要删除用户 "{user_data.username}" 吗？').classes('mt-2')
                 ui.label('此操作不可撤销！').classes('text-red-500 mt-2 font-medium')
 
-                def confirm_delete():
+                async def confirm_delete():
                     """确认删除"""
                     log_info(f"开始删除用户: {user_data.username}")
                     
@@ -730,13 +770,13 @@ def user_management_page_content():
                         return
 
                     # 使用安全的删除方法
-                    success = detached_manager.delete_user_safe(user_id)
+                    success = await run_db(detached_manager.delete_user_safe, user_id)
                     
                     if success:
                         log_info(f"用户删除成功: {user_data.username}")
                         ui.notify(f'用户 {user_data.username} 已删除', type='positive')
                         dialog.close()
-                        safe(load_users)
+                        await safe(load_users)
                     else:
                         log_error(f"删除用户失败: {user_data.username}")
                         ui.notify('删除失败，请稍后重试', type='negative')
@@ -762,7 +802,7 @@ def user_management_page_content():
         # 添加调试信息
         log_info("用户搜索事件已绑定")
 
-        # 初始加载
-        safe(load_users, error_msg="初始化用户列表失败")
+        # 初始加载（页面渲染后在事件循环中异步加载）
+        ui.timer(0, lambda: safe(load_users, error_msg="初始化用户列表失败"), once=True)
 
     log_info("用户管理页面加载完成")
\ No newline at end of file
@@ -1,10 +1,18 @@
 """
 会话管理器 - 处理用户会话和缓存
 """
-from typing import Optional, Dict, Any
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from .config import auth_config
+
+logger = logging.getLogger(__name__)
+
 @dataclass
 class UserSession:
     """用户会话数据类"""
@@ -75,30 +83,190 @@ class UserSession:
             permissions=permissions
         )
 
+@dataclass
+class _SessionEntry:
+    """会话缓存条目"""
+    session: UserSession
+    version: int          # 开始从数据库加载用户时的全局版本号
+    created_at: float     # 创建时间（monotonic秒）
+    last_access: float    # 最近访问时间（monotonic秒）
+
 class SessionManager:
-    """会话管理器"""
-    
-    def __init__(self):
-        self._sessions: Dict[str, UserSession] = {}
-    
-    def create_session(self, token: str, user) -> UserSession:
-        """创建会话"""
+    """
+    会话管理器 - 有界的会话缓存
+
+    - 按 LRU 淘汰，条目数不超过 max_entries
+    - 空闲超过 idle_timeout 或创建超过 absolute_timeout 的会话视为过期
+    - 角色/权限变更时递增全局版本号，记为该用户的版本号，并清除该用户的缓存会话；
+      加载用户之前调用 current_version() 记下版本号传给 create_session，
+      加载期间发生的失效会使新建的会话立即过期，不会缓存旧的权限
+    - 后台线程定期清理过期会话
+
+    缓存过期只会让下一次请求回源数据库重新加载，不影响登录状态本身。
+    """
+
+    def __init__(self, max_entries: int = None, idle_timeout: int = None,
+                 absolute_timeout: int = None, sweep_interval: int = None):
+        self.max_entries = max_entries or auth_config.session_cache_max_entries
+        self.idle_timeout = idle_timeout or auth_config.session_idle_timeout
+        self.absolute_timeout = absolute_timeout or auth_config.session_timeout
+        self.sweep_interval = sweep_interval or auth_config.session_sweep_interval
+
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._user_tokens: Dict[int, Set[str]] = {}
+        self._user_versions: Dict[int, int] = {}  # 用户最近一次失效时的全局版本号
+        self._version = 0
+        self._lock = threading.RLock()
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def create_session(self, token: str, user, version: Optional[int] = None) -> UserSession:
+        """
+        创建会话
+
+        Args:
+            token: 会话令牌
+            user: User模型（已加载角色和权限）
+            version: 开始从数据库加载 user 之前 current_version() 的返回值，为空时取当前版本号
+        """
         session = UserSession.from_user(user)
-        self._sessions[token] = session
+        now = time.monotonic()
+
+        with self._lock:
+            self._remove(token)
+            self._sessions[token] = _SessionEntry(
+                session=session,
+                version=self._version if version is None else version,
+                created_at=now,
+                last_access=now
+            )
+            self._user_tokens.setdefault(session.id, set()).add(token)
+
+            # 超出容量时淘汰最久未使用的会话
+            while len(self._sessions) > self.max_entries:
+                oldest_token = next(iter(self._sessions))
+                self._remove(oldest_token)
+
+        self._ensure_sweeper()
         return session
-    
+
     def get_session(self, token: str) -> Optional[UserSession]:
-        """获取会话"""
-        return self._sessions.get(token)
-    
+        """获取会话（过期或权限版本已变化时返回None）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            if self._is_stale(entry, now):
+                self._remove(token)
+                return None
+            entry.last_access = now
+            self._sessions.move_to_end(token)
+            return entry.session
+
     def delete_session(self, token: str):
         """删除会话"""
-        if token in self._sessions:
-            del self._sessions[token]
-    
+        with self._lock:
+            self._remove(token)
+
     def clear_all_sessions(self):
         """清除所有会话"""
-        self._sessions.clear()
+        with self._lock:
+            self._sessions.clear()
+            self._user_tokens.clear()
+
+    def current_version(self) -> int:
+        """当前的全局版本号（从数据库加载用户之前获取，传给 create_session）"""
+        with self._lock:
+            return self._version
+
+    def get_user_version(self, user_id: int) -> int:
+        """获取用户最近一次失效时的版本号"""
+        with self._lock:
+            return self._user_versions.get(user_id, 0)
+
+    def invalidate_user(self, user_id: int):
+        """用户的角色/权限/状态发生变化：记录新的版本号并清除其缓存会话"""
+        self.invalidate_users([user_id])
+
+    def invalidate_users(self, user_ids: Iterable[int]):
+        """批量使用户的缓存会话失效"""
+        removed = 0
+        with self._lock:
+            self._version += 1
+            for user_id in set(user_ids):
+                self._user_versions[user_id] = self._version
+                for token in list(self._user_tokens.get(user_id, ())):
+                    self._remove(token)
+                    removed += 1
+        if removed:
+            logger.info(f"权限变更，已清除 {removed} 个缓存会话")
+
+    def cleanup_expired(self) -> int:
+        """清理过期会话，返回清理的数量"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, entry in self._sessions.items() if self._is_stale(entry, now)]
+            for token in expired:
+                self._remove(token)
+        if expired:
+            logger.debug(f"清理过期会话: {len(expired)} 个，剩余 {len(self._sessions)} 个")
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """会话缓存统计"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'users': len(self._user_tokens),
+                'max_entries': self.max_entries,
+                'idle_timeout': self.idle_timeout,
+                'absolute_timeout': self.absolute_timeout,
+            }
+
+    def stop_sweeper(self):
+        """停止后台清理线程"""
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+            self._sweeper = None
+
+    def _is_stale(self, entry: _SessionEntry, now: float) -> bool:
+        return (
+            now - entry.last_access > self.idle_timeout
+            or now - entry.created_at > self.absolute_timeout
+            or entry.version < self._user_versions.get(entry.session.id, 0)
+        )
+
+    def _remove(self, token: str):
+        """移除会话（调用方需持有锁）"""
+        entry = self._sessions.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._user_tokens.get(entry.session.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[entry.session.id]
+
+    def _ensure_sweeper(self):
+        """首次创建会话时启动后台清理线程"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop_event.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                logger.error(f"清理过期会话失败: {e}")
 
 # 全局会话管理器
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = SessionManager()
@@ -1,19 +1,37 @@
 """
 优化的异常处理和日志模块 - 单例模式（线程安全）
 提供统一的日志记录、异常处理和安全执行功能
+
+日志写入为异步批量方式：调用方只生成日志记录并放入队列，
+由后台线程批量写入当天的CSV文件并定期刷新，调用方不做文件IO。
 """
 import csv
+import os
+import sys
+import time
+import queue
+import atexit
 import asyncio
 import threading
 import functools
 import traceback
-import inspect
 from typing import Callable, Any, Optional, Dict
 from datetime import datetime
 from pathlib import Path
 from contextlib import contextmanager
 from nicegui import ui
 
+from common.log_index import LogIndex
+
+# 日志级别，低于最低级别的日志在调用方直接丢弃
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'ERROR': 40}
+
+# 通过环境变量调整最低日志级别（如设置为 ERROR 即可丢弃热点接口的 INFO 日志）
+LOG_LEVEL_ENV = 'APP_LOG_LEVEL'
+
+# 写入线程停止标记
+_STOP = object()
+
 
 class ExceptionHandler:
     """线程安全的单例异常处理器"""
@@ -38,16 +56,33 @@ class ExceptionHandler:
         self.log_dir = Path('logs')
         self.max_stack_depth = 10  # 限制调用栈深度
         self.max_log_days = 30     # 保留日志天数
+        self.flush_interval = 1.0  # 日志文件刷新间隔（秒）
+        self.batch_size = 500      # 单次批量写入的最大记录数
+        self.min_level = LOG_LEVELS.get(os.environ.get(LOG_LEVEL_ENV, 'INFO').upper(), LOG_LEVELS['INFO'])
         
         # 创建日志目录
         self.log_dir.mkdir(exist_ok=True)
         
-        # 线程锁
-        self._file_lock = threading.Lock()
+        # 日志索引（SQLite），供日志查询走索引分页
+        self.log_index = self._open_log_index()
         
         # 清理旧日志文件
         self._cleanup_old_logs()
         
+        # 用户信息获取入口（首次使用时导入）
+        self._auth_manager = None
+        
+        # 待写入的日志队列与后台写入线程
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self.dropped_count = 0
+        self._log_fp = None
+        self._log_writer = None
+        self._current_log_file: Optional[Path] = None
+        self._last_flush = time.monotonic()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='app-log-writer', daemon=True)
+        self._writer_thread.start()
+        atexit.register(self.close)
+        
         self._initialized = True
     
     def _get_today_log_file(self) -> Path:
@@ -74,12 +109,40 @@ class ExceptionHandler:
                     'extra_data'      # 额外数据（JSON格式）
                 ])
     
+    def _open_log_index(self) -> Optional[LogIndex]:
+        """打开日志索引，失败时只使用CSV"""
+        try:
+            log_index = LogIndex(self.log_dir / 'app_logs.db')
+        except Exception as e:
+            print(f"❌ 日志索引初始化失败: {e}")
+            return None
+        
+        # 补齐索引建立之前（或索引不可用期间）写入CSV的日志；此时后台写入线程尚未启动
+        try:
+            csv_files = {}
+            for log_file in self.log_dir.glob('app_logs_*.csv'):
+                date_part = log_file.stem.split('_')[-1]
+                try:
+                    datetime.strptime(date_part, '%Y-%m-%d')
+                except ValueError:
+                    continue
+                csv_files[date_part] = log_file
+            restored = log_index.backfill(csv_files)
+            if restored:
+                print(f"✅ 日志索引已从CSV补齐 {restored} 条记录")
+        except Exception as e:
+            print(f"❌ 日志索引补齐失败: {e}")
+        return log_index
+    
     def _cleanup_old_logs(self):
         """清理超过保留期的旧日志文件"""
         try:
             from datetime import timedelta
             cutoff_date = datetime.now() - timedelta(days=self.max_log_days)
             
+            if self.log_index:
+                self.log_index.purge_before(cutoff_date.strftime('%Y-%m-%d'))
+            
             for log_file in self.log_dir.glob('app_logs_*.csv'):
                 try:
                     # 从文件名提取日期 app_logs_2024-01-15.csv
@@ -102,15 +165,21 @@ class ExceptionHandler:
     def _get_current_user(self) -> Dict[str, Any]:
         """获取当前用户信息"""
         try:
-            from auth.session_manager import session_manager
-            from auth.auth_manager import auth_manager
+            if self._auth_manager is None:
+                from auth.auth_manager import auth_manager
+                self._auth_manager = auth_manager
+            if not self._auth_manager:
+                return {'user_id': None, 'username': 'anonymous'}
             
-            user = auth_manager.current_user
+            user = self._auth_manager.current_user
             if user:
                 return {
                     'user_id': user.id,
                     'username': user.username
                 }
+        except ModuleNotFoundError:
+            # 没有认证模块的进程（如独立服务）不再重复尝试导入
+            self._auth_manager = False
         except Exception:
             pass
         
@@ -119,10 +188,8 @@ class ExceptionHandler:
     def _get_caller_info(self, skip_frames: int = 2) -> Dict[str, Any]:
         """获取调用者信息"""
         try:
-            frame = inspect.currentframe()
             # 跳过指定数量的帧
-            for _ in range(skip_frames):
-                frame = frame.f_back if frame else None
+            frame = sys._getframe(skip_frames)
             
             if frame:
                 return {
@@ -158,44 +225,141 @@ class ExceptionHandler:
     
     def _write_log(self, level: str, message: str, exception: Optional[Exception] = None, 
                    extra_data: Optional[str] = None, skip_frames: int = 3):
-        """写入日志到CSV文件（线程安全）"""
+        """生成日志记录并放入写入队列（不做文件IO，不阻塞调用方）"""
+        if LOG_LEVELS.get(level, LOG_LEVELS['ERROR']) < self.min_level:
+            return
+        
         try:
-            with self._file_lock:
-                # 获取今天的日志文件
-                log_file = self._get_today_log_file()
-                
-                # 如果文件不存在则初始化
-                if not log_file.exists():
-                    self._init_csv_log(log_file)
-                
-                user_info = self._get_current_user()
-                caller_info = self._get_caller_info(skip_frames)
-                
-                # 准备日志数据
-                log_data = [
-                    datetime.now().isoformat(),
-                    level,
-                    user_info['user_id'],
-                    user_info['username'],
-                    caller_info['module'],
-                    caller_info['function'],
-                    caller_info['line_number'],
-                    message,
-                    type(exception).__name__ if exception else '',
-                    self._get_stack_trace(exception) if exception else '',
-                    extra_data or ''
-                ]
-                
-                # 写入CSV
-                with open(log_file, 'a', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(log_data)
-                    
+            # 用户和调用者信息依赖调用方上下文，需在当前线程获取
+            user_info = self._get_current_user()
+            caller_info = self._get_caller_info(skip_frames)
+            
+            # 准备日志数据
+            log_data = [
+                datetime.now().isoformat(),
+                level,
+                user_info['user_id'],
+                user_info['username'],
+                caller_info['module'],
+                caller_info['function'],
+                caller_info['line_number'],
+                message,
+                type(exception).__name__ if exception else '',
+                self._get_stack_trace(exception) if exception else '',
+                extra_data or ''
+            ]
+            
+            self._queue.put_nowait(log_data)
+            
+        except queue.Full:
+            # 写入跟不上时丢弃，避免日志拖慢业务请求
+            self.dropped_count += 1
         except Exception as e:
             # 备用日志记录（避免日志系统本身出错）
             print(f"[{datetime.now()}] 日志写入失败: {e}")
             print(f"[{datetime.now()}] 原始消息: {message}")
     
+    def _writer_loop(self):
+        """后台写入线程：批量取出日志记录写入当天的CSV文件"""
+        while True:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                # 空闲时把缓冲区内容刷新到文件
+                self._flush_file()
+                continue
+            
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            rows = [item for item in items if isinstance(item, list)]
+            try:
+                if rows:
+                    self._write_rows(rows)
+            except Exception as e:
+                print(f"[{datetime.now()}] 日志批量写入失败: {e}")
+            
+            # 处理刷新请求和停止标记
+            flush_events = [item for item in items if isinstance(item, threading.Event)]
+            if flush_events or any(item is _STOP for item in items):
+                self._flush_file()
+                for event in flush_events:
+                    event.set()
+            if any(item is _STOP for item in items):
+                self._close_file()
+                if self.log_index:
+                    self.log_index.close()
+                return
+    
+    def _write_rows(self, rows: list):
+        """将日志记录追加到当天的CSV文件，日期变化时切换文件"""
+        log_file = self._get_today_log_file()
+        if log_file != self._current_log_file:
+            self._close_file()
+            self._init_csv_log(log_file)
+            self._log_fp = open(log_file, 'a', newline='', encoding='utf-8')
+            self._log_writer = csv.writer(self._log_fp)
+            self._current_log_file = log_file
+        
+        self._log_writer.writerows(rows)
+        
+        if self.log_index:
+            try:
+                self.log_index.add_rows(rows)
+            except Exception as e:
+                print(f"[{datetime.now()}] 日志索引写入失败: {e}")
+        
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_file()
+    
+    def _flush_file(self):
+        if self._log_fp:
+            try:
+                self._log_fp.flush()
+            except Exception as e:
+                print(f"[{datetime.now()}] 日志刷新失败: {e}")
+        self._last_flush = time.monotonic()
+    
+    def _close_file(self):
+        if self._log_fp:
+            try:
+                self._log_fp.close()
+            except Exception:
+                pass
+        self._log_fp = None
+        self._log_writer = None
+        self._current_log_file = None
+    
+    def flush(self, timeout: float = 0.2):
+        """
+        等待已提交的日志写入文件（读取日志文件前调用）
+
+        调用方通常在事件循环中，只做短暂等待：队列已满或写入线程繁忙时不阻塞，
+        读到的日志可能缺少最近几条。
+        """
+        if not self._writer_thread.is_alive():
+            return
+        event = threading.Event()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return
+        event.wait(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """写完剩余日志并停止后台写入线程（进程退出时自动调用）"""
+        if not self._writer_thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer_thread.join(timeout)
+    
+    def set_log_level(self, level: str):
+        """运行时调整最低日志级别（INFO/ERROR）"""
+        self.min_level = LOG_LEVELS.get(level.upper(), self.min_level)
+    
     def log_info(self, message: str, extra_data: Optional[str] = None):
         """记录信息日志"""
         self._write_log('INFO', message, extra_data=extra_data, skip_frames=2)
@@ -207,7 +371,10 @@ class ExceptionHandler:
     
     def safe(self, func: Callable, *args, return_value: Any = None, 
              show_error: bool = True, error_msg: str = None, **kwargs) -> Any:
-        """万能安全执行函数"""
+        """万能安全执行函数（异步函数返回协程，由调用方 await）"""
+        if asyncio.iscoroutinefunction(func):
+            return self._safe_async(func, *args, return_value=return_value,
+                                    show_error=show_error, error_msg=error_msg, **kwargs)
         try:
             self.log_info(f"开始执行函数: {func.__name__}")
             result = func(*args, **kwargs)
@@ -225,6 +392,27 @@ class ExceptionHandler:
                     print(f"错误提示显示失败: {error_message}")
             
             return return_value
+
+    async def _safe_async(self, func: Callable, *args, return_value: Any = None,
+                          show_error: bool = True, error_msg: str = None, **kwargs) -> Any:
+        """safe 的异步版本"""
+        try:
+            self.log_info(f"开始执行函数: {func.__name__}")
+            result = await func(*args, **kwargs)
+            self.log_info(f"函数执行成功: {func.__name__}")
+            return result
+            
+        except Exception as e:
+            error_message = error_msg or f"函数 {func.__name__} 执行失败: {str(e)}"
+            self.log_error(error_message, exception=e)
+            
+            if show_error:
+                try:
+                    ui.notify(error_message, type='negative', timeout=5000)
+                except Exception:
+                    print(f"错误提示显示失败: {error_message}")
+            
+            return return_value
     
     @contextmanager
     def db_safe(self, operation_name: str = "数据库操作"):
@@ -251,39 +439,53 @@ class ExceptionHandler:
     
     def safe_protect(self, name: str = None, error_msg: str = None, 
                      return_on_error: Any = None):
-        """页面/函数保护装饰器"""
+        """页面/函数保护装饰器（同时支持同步和异步函数）"""
         def decorator(func: Callable) -> Callable:
+            func_name = name or func.__name__
+
+            def on_error(e: Exception):
+                error_message = error_msg or f"页面 {func_name} 加载失败"
+                self.log_error(f"{func_name}执行失败", exception=e)
+                
+                try:
+                    # 显示友好的错误页面
+                    with ui.column().classes('p-6 text-center w-full min-h-96'):
+                        ui.icon('error_outline', size='4rem').classes('text-red-500 mb-4')
+                        ui.label(f'{func_name} 执行失败').classes('text-2xl font-bold text-red-600 mb-2')
+                        ui.label(error_message).classes('text-gray-600 mb-4')
+                        
+                        with ui.row().classes('gap-2 mt-6'):
+                            ui.button('刷新页面', icon='refresh',
+                                     on_click=lambda: ui.navigate.reload()).classes('bg-blue-500 text-white')
+                            ui.button('返回首页', icon='home',
+                                     on_click=lambda: ui.navigate.to('/workbench')).classes('bg-gray-500 text-white')
+                except Exception:
+                    # 如果UI显示失败，只记录错误
+                    print(f"错误页面显示失败: {error_message}")
+                
+                return return_on_error
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    try:
+                        self.log_info(f"开始执行保护函数: {func_name}")
+                        result = await func(*args, **kwargs)
+                        self.log_info(f"保护函数执行成功: {func_name}")
+                        return result
+                    except Exception as e:
+                        return on_error(e)
+                return async_wrapper
+
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
-                func_name = name or func.__name__
-                
                 try:
                     self.log_info(f"开始执行保护函数: {func_name}")
                     result = func(*args, **kwargs)
                     self.log_info(f"保护函数执行成功: {func_name}")
                     return result
-                    
                 except Exception as e:
-                    error_message = error_msg or f"页面 {func_name} 加载失败"
-                    self.log_error(f"{func_name}执行失败", exception=e)
-                    
-                    try:
-                        # 显示友好的错误页面
-                        with ui.column().classes('p-6 text-center w-full min-h-96'):
-                            ui.icon('error_outline', size='4rem').classes('text-red-500 mb-4')
-                            ui.label(f'{func_name} 执行失败').classes('text-2xl font-bold text-red-600 mb-2')
-                            ui.label(error_message).classes('text-gray-600 mb-4')
-                            
-                            with ui.row().classes('gap-2 mt-6'):
-                                ui.button('刷新页面', icon='refresh',
-                                         on_click=lambda: ui.navigate.reload()).classes('bg-blue-500 text-white')
-                                ui.button('返回首页', icon='home',
-                                         on_click=lambda: ui.navigate.to('/workbench')).classes('bg-gray-500 text-white')
-                    except Exception:
-                        # 如果UI显示失败，只记录错误
-                        print(f"错误页面显示失败: {error_message}")
-                    
-                    return return_on_error
+                    return on_error(e)
                     
             return wrapper
         return decorator
@@ -320,7 +522,7 @@ def log_error(message: str, exception: Optional[Exception] = None,
 
 def safe(func: Callable, *args, return_value: Any = None, 
          show_error: bool = True, error_msg: str = None, **kwargs) -> Any:
-    """万能安全执行函数"""
+    """万能安全执行函数（异步函数返回协程，由调用方 await）"""
     handler = get_exception_handler()
     return handler.safe(func, *args, return_value=return_value, 
                        show_error=show_error, error_msg=error_msg, **kwargs)
@@ -364,9 +566,20 @@ def get_log_files(days: int = 7) -> list:
     return log_files
 
 
-def get_today_errors(limit: int = 50) -> list:
-    """获取今天的错误日志"""
+def get_today_errors(limit: int = 50, offset: int = 0) -> list:
+    """获取今天的错误日志（最新的limit条，offset用于向前翻页）"""
     handler = get_exception_handler()
+    handler.flush()
+    
+    if handler.log_index:
+        try:
+            return handler.log_index.query(
+                date=datetime.now().strftime('%Y-%m-%d'), levels=['ERROR'],
+                limit=limit, offset=offset
+            )
+        except Exception as e:
+            print(f"查询日志索引失败，改为读取CSV: {e}")
+    
     log_file = handler._get_today_log_file()
     
     if not log_file.exists():
@@ -387,6 +600,41 @@ def get_today_errors(limit: int = 50) -> list:
         print(f"读取错误日志失败: {e}")
         return []
 
+def query_logs(date: Optional[str] = None, level: Optional[str] = None,
+               username: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+    """
+    分页查询日志（走日志索引）
+    
+    Args:
+        date: 日期 YYYY-MM-DD，默认今天
+        level: 日志级别（INFO/ERROR），为空时不过滤
+        username: 用户名，为空时不过滤
+        limit: 每页条数
+        offset: 跳过的最新记录条数
+        
+    Returns:
+        Dict: {'total': 总条数, 'items': 当前页日志（按时间正序）}
+    """
+    handler = get_exception_handler()
+    handler.flush()
+    
+    if not handler.log_index:
+        return {'total': 0, 'items': []}
+    
+    date = date or datetime.now().strftime('%Y-%m-%d')
+    levels = [level.upper()] if level else None
+    return {
+        'total': handler.log_index.count(date=date, levels=levels, username=username),
+        'items': handler.log_index.query(date=date, levels=levels, username=username,
+                                         limit=limit, offset=offset)
+    }
+
+
+def set_log_level(level: str):
+    """运行时调整最低日志级别（INFO/ERROR）"""
+    get_exception_handler().set_log_level(level)
+
+
 def cleanup_logs(days_to_keep: int = 30):
     """手动清理旧日志文件"""
     handler = get_exception_handler()
@@ -13,6 +13,7 @@ SafeOpenAIClientPool - 线程安全的OpenAI客户端连接池
 - 详细的统计信息和性能监控
 - 配置更新时自动刷新客户端
 - 支持配置函数和配置字典两种传参方式
+- 提供AsyncOpenAI异步客户端，流式响应可用 async for 读取，不阻塞事件循环
 
 设计原则：
 1. 线程安全：使用asyncio.Lock()防止并发创建
@@ -27,7 +28,7 @@ import asyncio
 import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Set, Any, Union, Callable
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 
 class SafeOpenAIClientPool:
@@ -50,7 +51,7 @@ class SafeOpenAIClientPool:
             client_ttl_hours: 客户端生存时间（小时），超时自动清理
         """
         # 客户端缓存
-        self._clients: Dict[str, OpenAI] = {}
+        self._clients: Dict[str, AsyncOpenAI] = {}
         self._client_configs: Dict[str, Dict] = {}  # 缓存配置信息，用于验证
         self._creation_times: Dict[str, datetime] = {}  # 记录创建时间
         self._access_times: Dict[str, datetime] = {}  # 记录最后访问时间
@@ -75,7 +76,7 @@ class SafeOpenAIClientPool:
         print(f"   最大缓存: {max_clients} 个客户端")
         print(f"   客户端TTL: {client_ttl_hours} 小时")
     
-    async def get_client(self, model_key: str, config_getter_func=None) -> Optional[OpenAI]:
+    async def get_client(self, model_key: str, config_getter_func=None) -> Optional[AsyncOpenAI]:
         """
         获取指定模型的OpenAI客户端实例
         
@@ -87,7 +88,7 @@ class SafeOpenAIClientPool:
                               - None：尝试自动导入配置函数
             
         Returns:
-            OpenAI客户端实例，失败时返回None
+            AsyncOpenAI客户端实例，失败时返回None
         """
         self._total_requests += 1
         start_time = time.time()
@@ -143,7 +144,7 @@ class SafeOpenAIClientPool:
         except Exception:
             return False
     
-    async def _create_client_safe(self, model_key: str, config_getter_func, start_time: float) -> Optional[OpenAI]:
+    async def _create_client_safe(self, model_key: str, config_getter_func, start_time: float) -> Optional[AsyncOpenAI]:
         """
         线程安全的客户端创建方法
         
@@ -153,7 +154,7 @@ class SafeOpenAIClientPool:
             start_time: 开始时间（用于性能统计）
             
         Returns:
-            创建的OpenAI客户端实例
+            创建的AsyncOpenAI客户端实例
         """
         # 检查是否正在创建，避免重复创建
         if model_key in self._creating:
@@ -190,7 +191,7 @@ class SafeOpenAIClientPool:
                 # 无论成功失败，都要清除创建标记
                 self._creating.discard(model_key)
     
-    async def _create_client_internal(self, model_key: str, config_getter_func, start_time: float) -> Optional[OpenAI]:
+    async def _create_client_internal(self, model_key: str, config_getter_func, start_time: float) -> Optional[AsyncOpenAI]:
         """
         内部客户端创建方法
         
@@ -200,7 +201,7 @@ class SafeOpenAIClientPool:
             start_time: 开始时间
             
         Returns:
-            创建的OpenAI客户端实例
+            创建的AsyncOpenAI客户端实例
         """
         print(f"🔨 开始创建OpenAI客户端: {model_key}")
         
@@ -223,8 +224,8 @@ class SafeOpenAIClientPool:
             # 检查缓存是否已满，如需要则清理
             await self._check_and_cleanup_cache()
             
-            # 创建OpenAI客户端实例
-            client = OpenAI(
+            # 创建异步OpenAI客户端实例（网络读取在事件循环中异步进行）
+            client = AsyncOpenAI(
                 api_key=api_key,
                 base_url=base_url,
                 timeout=config.get('timeout', 60),
@@ -333,13 +334,29 @@ class SafeOpenAIClientPool:
         Args:
             model_key: 要移除的模型键名
         """
-        self._clients.pop(model_key, None)
+        client = self._clients.pop(model_key, None)
         self._client_configs.pop(model_key, None)
         self._creation_times.pop(model_key, None)
         self._access_times.pop(model_key, None)
         self._access_counts.pop(model_key, None)
+        
+        if client is not None:
+            await self._close_client(model_key, client)
+    
+    async def _close_client(self, model_key: str, client: AsyncOpenAI):
+        """
+        关闭被移除的客户端，释放其底层HTTP连接池
+        
+        Args:
+            model_key: 模型键名
+            client: 要关闭的客户端实例
+        """
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"⚠️ 关闭客户端失败: {model_key} - {str(e)}")
     
-    async def update_client(self, model_key: str, config_getter_func=None) -> Optional[OpenAI]:
+    async def update_client(self, model_key: str, config_getter_func=None) -> Optional[AsyncOpenAI]:
         """
         更新指定模型的客户端（配置变更时使用）
         
@@ -367,6 +384,7 @@ class SafeOpenAIClientPool:
         """
         async with self._lock:
             cleared_count = len(self._clients)
+            clients = list(self._clients.items())
             
             self._clients.clear()
             self._client_configs.clear()
@@ -374,6 +392,9 @@ class SafeOpenAIClientPool:
             self._access_times.clear()
             self._access_counts.clear()
             
+            for model_key, client in clients:
+                await self._close_client(model_key, client)
+            
             self._cleanup_count += cleared_count
             
             print(f"🧹 已清空所有客户端缓存，共清理 {cleared_count} 个客户端")
@@ -472,7 +493,7 @@ def get_openai_client_pool(max_clients: int = 20, client_ttl_hours: int = 24) ->
 
 # ==================== 便捷函数 ====================
 
-async def get_openai_client(model_key: str, config_getter_func=None) -> Optional[OpenAI]:
+async def get_openai_client(model_key: str, config_getter_func=None) -> Optional[AsyncOpenAI]:
     """
     便捷函数：获取OpenAI客户端（重构版本）
     
@@ -484,7 +505,7 @@ async def get_openai_client(model_key: str, config_getter_func=None) -> Optional
                           - None：尝试自动导入配置函数
         
     Returns:
-        OpenAI客户端实例
+        AsyncOpenAI客户端实例
     """
     pool = get_openai_client_pool()
     
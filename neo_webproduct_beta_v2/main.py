@@ -16,6 +16,9 @@ from auth import (
     register_page_content,
     get_auth_page_handlers
 )
+from auth.database import close_database
+from menu_pages.enterprise_archive.mongodb_service_client import mongodb_service_client
+from menu_pages.enterprise_archive.hierarchy_cache import purge_legacy_hierarchy_storage
 
 def create_protected_handlers():
     """为需要认证的页面添加装饰器"""
@@ -30,6 +33,16 @@ if __name__ in {"__main__", "__mp_main__"}:
     # 获取受保护的页面处理器
     protected_handlers = create_protected_handlers()
 
+    # 清理旧版本写入持久化存储的层级数据
+    app.on_startup(purge_legacy_hierarchy_storage)
+
+    # 定期记录MongoDB服务各接口的耗时分布
+    app.on_startup(mongodb_service_client.start_stats_logging)
+    # 应用退出时关闭MongoDB服务客户端的连接池
+    app.on_shutdown(mongodb_service_client.close)
+    # 应用退出时关闭数据库线程池和连接
+    app.on_shutdown(close_database)
+
     # 创建自定义配置
     config = LayoutConfig()
 
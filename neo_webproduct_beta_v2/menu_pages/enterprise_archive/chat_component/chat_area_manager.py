@@ -1,6 +1,5 @@
 from abc import ABC, abstractmethod
 import asyncio
-import aiohttp
 import re
 from datetime import datetime
 from nicegui import ui, app
@@ -8,49 +7,160 @@ from typing import Optional, List, Dict, Any
 from component import static_manager
 from .chat_data_state import ChatDataState
 from .markdown_ui_parser import MarkdownUIParser
+from ..mongodb_service_client import mongodb_service_client
+
+# 流式输出时UI刷新的最小间隔（秒），多个token合并为一帧渲染
+STREAM_RENDER_INTERVAL = 0.08
+
+# 聊天历史每页渲染的消息数量，更早的消息滚动到顶部时再加载
+HISTORY_PAGE_SIZE = 20
+
+# 流式回复中可作为冻结边界的空行：其后的行不能是缩进内容或列表项（避免拆断列表）
+_FREEZE_BLOCKED_LINE = re.compile(r'[ \t]|[-*+][ \t]|\d+[.)][ \t]')
+
+def find_stream_freeze_point(content: str, start: int) -> int:
+    """
+    查找流式回复中已完成块的结束位置（start之后最后一个可冻结的空行）
+
+    只有空行之后的一行已经完整输出时才能判断能否拆分；代码块（```）和公式块（$$）
+    内部的空行不作为边界。找不到时返回start。
+    """
+    freeze_point = start
+    in_fence = False
+    after_blank = False
+    pos = start
+    while True:
+        line_end = content.find('\n', pos)
+        if line_end < 0:
+            break
+        raw_line = content[pos:line_end]
+        line = raw_line.strip()
+        if after_blank and line and not _FREEZE_BLOCKED_LINE.match(raw_line):
+            freeze_point = pos
+        if line.startswith('```') or line == '$$':
+            in_fence = not in_fence
+        after_blank = not line and not in_fence and pos > start
+        pos = line_end + 1
+    return freeze_point
+
+# 延迟渲染时等待消息元素挂载到页面的重试次数（每次间隔100ms），超时后直接优化显示
+LAZY_RENDER_OBSERVE_RETRIES = 20
 
 class ThinkContentParser:
-    """思考内容解析器 - 专门处理<think>标签"""
+    """思考内容解析器 - 专门处理<think>标签
+    
+    流式状态机：每次只消费新增的数据块，思考内容与回复内容分别追加到各自的缓冲区，
+    跨数据块被截断的标签会暂存到下一个数据块再判断。只处理第一个<think>...</think>。
+    """
+    
+    THINK_START = '<think>'
+    THINK_END = '</think>'
     
     def __init__(self):
         self.is_in_think = False
-        self.think_start_pos = -1
-        self.think_content = ""
+        self.has_think = False
+        self.think_complete = False
+        self._think_parts: List[str] = []
+        self._display_parts: List[str] = []
+        self._pending = ''  # 可能是被截断标签的尾部
+        self._fed = False
     
-    def parse_chunk(self, full_content: str) -> Dict[str, Any]:
-        """解析内容块，返回处理结果"""
-        result = {
-            'has_think': False,
-            'think_content': '',
-            'display_content': full_content,
-            'think_complete': False,
-            'think_updated': False
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        """返回text末尾可能构成tag前缀的长度"""
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+    
+    def feed(self, delta: str) -> Dict[str, Any]:
+        """
+        消费新增的数据块
+        
+        Returns:
+            Dict: think_delta、display_delta（本次新增内容）及 think_complete（本次是否结束思考）
+        """
+        self._fed = True
+        text = self._pending + delta
+        self._pending = ''
+        think_delta = []
+        display_delta = []
+        think_completed_now = False
+        
+        while text:
+            if self.is_in_think:
+                end_pos = text.find(self.THINK_END)
+                if end_pos >= 0:
+                    think_delta.append(text[:end_pos])
+                    text = text[end_pos + len(self.THINK_END):]
+                    self.is_in_think = False
+                    self.think_complete = True
+                    think_completed_now = True
+                    continue
+                keep = self._partial_tag_length(text, self.THINK_END)
+                think_delta.append(text[:len(text) - keep])
+                self._pending = text[len(text) - keep:]
+                break
+            
+            if not self.has_think:
+                start_pos = text.find(self.THINK_START)
+                if start_pos >= 0:
+                    display_delta.append(text[:start_pos])
+                    text = text[start_pos + len(self.THINK_START):]
+                    self.is_in_think = True
+                    self.has_think = True
+                    continue
+                keep = self._partial_tag_length(text, self.THINK_START)
+                display_delta.append(text[:len(text) - keep])
+                self._pending = text[len(text) - keep:]
+                break
+            
+            display_delta.append(text)
+            break
+        
+        think_text = ''.join(think_delta)
+        display_text = ''.join(display_delta)
+        if think_text:
+            self._think_parts.append(think_text)
+        if display_text:
+            self._display_parts.append(display_text)
+        
+        return {
+            'think_delta': think_text,
+            'display_delta': display_text,
+            'think_complete': think_completed_now
         }
+    
+    def finish(self, full_content: str = '') -> Dict[str, Any]:
+        """
+        结束流式解析，将暂存的截断内容按原文输出，返回最终结果
         
-        # 检测思考开始
-        if '<think>' in full_content and not self.is_in_think:
-            self.is_in_think = True
-            self.think_start_pos = full_content.find('<think>')
-            result['has_think'] = True
-        
-        # 检测思考结束
-        if '</think>' in full_content and self.is_in_think:
-            think_end_pos = full_content.find('</think>') + 8
-            self.think_content = full_content[self.think_start_pos + 7:think_end_pos - 8]
-            result['display_content'] = full_content[:self.think_start_pos] + full_content[think_end_pos:]
-            result['think_content'] = self.think_content.strip()
-            result['think_complete'] = True
-            self.is_in_think = False
-        elif self.is_in_think:
-            # 正在思考中
-            if self.think_start_pos >= 0:
-                current_think = full_content[self.think_start_pos + 7:]
-                result['display_content'] = full_content[:self.think_start_pos]
-                result['think_content'] = current_think.strip()
-                result['think_updated'] = True
-        
-        result['has_think'] = self.think_start_pos >= 0
-        return result
+        Args:
+            full_content: 完整内容，解析器未消费过任何数据块时使用
+        """
+        if not self._fed and full_content:
+            self.feed(full_content)
+        
+        if self._pending:
+            target = self._think_parts if self.is_in_think else self._display_parts
+            target.append(self._pending)
+            self._pending = ''
+        
+        return {
+            'has_think': self.has_think,
+            'think_content': self.think_content,
+            'display_content': self.display_content,
+            'think_complete': self.think_complete,
+            'think_updated': False
+        }
+    
+    @property
+    def think_content(self) -> str:
+        return ''.join(self._think_parts).strip()
+    
+    @property
+    def display_content(self) -> str:
+        return ''.join(self._display_parts)
 
 class MessagePreprocessor:
     """消息预处理器"""
@@ -135,11 +245,18 @@ class ContentDisplayStrategy(ABC):
     def __init__(self, ui_components):
         self.ui_components = ui_components
         self.think_parser = ThinkContentParser()
+        # 两帧之间累积的变化
+        self._think_updated = False
+        self._display_updated = False
+        self._think_completed = False
         self.structure_created = False
         self.reply_created = False
         self.think_expansion = None
         self.think_label = None
+        # 回复内容按块拆分到多个元素中，reply_label 始终指向末尾正在输出的元素
         self.reply_label = None
+        self.reply_parent = None
+        self._frozen_length = 0
         self.chat_content_container = None
     
     @abstractmethod
@@ -152,9 +269,56 @@ class ContentDisplayStrategy(ABC):
         """更新内容显示，返回是否需要滚动"""
         pass
     
-    def process_stream_chunk(self, full_content: str) -> bool:
-        """处理流式数据块 - 模板方法"""
-        parse_result = self.think_parser.parse_chunk(full_content)
+    def _create_reply_element(self):
+        """创建一个回复内容元素"""
+        return ui.markdown('').classes('w-full')
+    
+    def _set_reply_text(self, element, text: str):
+        """设置回复内容元素的文本"""
+        element.set_content(text)
+    
+    def _start_reply(self, parent):
+        """在parent中创建第一个回复内容元素"""
+        self.reply_parent = parent
+        with parent:
+            self.reply_label = self._create_reply_element()
+        self.reply_created = True
+    
+    def _render_reply(self, display_content: str):
+        """
+        增量渲染回复内容：已完成的块留在各自的元素中不再更新，
+        每帧只推送末尾未完成的部分，不再重发完整回复
+        """
+        freeze_point = find_stream_freeze_point(display_content, self._frozen_length)
+        if freeze_point > self._frozen_length:
+            # 末尾元素写入完整的块后冻结，后续内容写入新建的末尾元素
+            self._set_reply_text(self.reply_label, display_content[self._frozen_length:freeze_point].strip())
+            with self.reply_parent:
+                self.reply_label = self._create_reply_element()
+            self._frozen_length = freeze_point
+        self._set_reply_text(self.reply_label, display_content[self._frozen_length:].strip())
+    
+    def feed_stream_delta(self, delta: str):
+        """消费新增的流式数据块，只做增量解析，不更新UI"""
+        feed_result = self.think_parser.feed(delta)
+        self._think_updated = self._think_updated or bool(feed_result['think_delta'])
+        self._display_updated = self._display_updated or bool(feed_result['display_delta'])
+        self._think_completed = self._think_completed or feed_result['think_complete']
+    
+    def process_stream_chunk(self) -> bool:
+        """将累积的变化渲染为一帧 - 模板方法"""
+        parser = self.think_parser
+        # 只在对应缓冲区有变化时才拼接并推送内容
+        parse_result = {
+            'has_think': parser.has_think,
+            'think_content': parser.think_content if (self._think_updated or self._think_completed) else '',
+            'display_content': parser.display_content if self._display_updated else '',
+            'think_complete': self._think_completed,
+            'think_updated': self._think_updated and parser.is_in_think
+        }
+        self._think_updated = False
+        self._display_updated = False
+        self._think_completed = False
         
         # 创建UI结构（如果需要）
         if not self.structure_created:
@@ -167,13 +331,13 @@ class ContentDisplayStrategy(ABC):
     
     async def finalize_content(self, final_content: str):
         """完成内容显示"""
-        final_result = self.think_parser.parse_chunk(final_content)
+        final_result = self.think_parser.finish(final_content)
         
         if final_result['think_complete'] and self.think_label:
             self.think_label.set_text(final_result['think_content'])
         
         if self.reply_label and final_result['display_content'].strip():
-            self.reply_label.set_content(final_result['display_content'].strip())
+            self._render_reply(final_result['display_content'])
             # 调用markdown优化显示
             if hasattr(self.ui_components, 'markdown_parser'):
                 await self.ui_components.markdown_parser.optimize_content_display(
@@ -198,8 +362,7 @@ class DefaultDisplayStrategy(ContentDisplayStrategy):
                             'whitespace-pre-wrap bg-[#81c784] border-0 shadow-none rounded-none'
                         )
                 else:
-                    self.reply_label = ui.markdown('').classes('w-full')
-                    self.reply_created = True
+                    self._start_reply(self.chat_content_container)
     
     def update_content(self, parse_result: Dict[str, Any]) -> bool:
         """更新默认展示内容"""
@@ -209,17 +372,17 @@ class DefaultDisplayStrategy(ContentDisplayStrategy):
         if parse_result['think_complete']:
             # 思考完成，创建回复组件
             if self.chat_content_container and not self.reply_created:
-                with self.chat_content_container:
-                    self.reply_label = ui.markdown('').classes('w-full')
-                self.reply_created = True
+                self._start_reply(self.chat_content_container)
             
             if self.think_label:
                 self.think_label.set_text(parse_result['think_content'])
         
         # 更新显示内容
         if self.reply_label and parse_result['display_content'].strip():
-            with self.chat_content_container:
-                self.reply_label.set_content(parse_result['display_content'].strip())
+            self._render_reply(parse_result['display_content'])
+            # 边输出边解析已完成的Markdown块，结束后的优化显示只需解析剩余部分
+            if hasattr(self.ui_components, 'markdown_parser'):
+                self.ui_components.markdown_parser.feed_stream_content(parse_result['display_content'])
         
         return True  # 需要滚动
 
@@ -229,7 +392,6 @@ class ExpertDisplayStrategy(ContentDisplayStrategy):
     def __init__(self, chat_area_manager):
         super().__init__(chat_area_manager)
         self.query_result_label = None
-        self.mongodb_api_base = "http://localhost:8001"  # MongoDB服务API地址，与项目中一致
     
     def create_ui_structure(self, has_think: bool):
         """创建专家模式UI结构"""
@@ -248,8 +410,7 @@ class ExpertDisplayStrategy(ContentDisplayStrategy):
                         )
                 else:
                     with ui.expansion('代码', icon='code',value=True).classes('w-full'):
-                        self.reply_label = ui.code('').classes('w-full bg-gray-200 dark:bg-zinc-600')
-                    self.reply_created = True
+                        self._start_reply(ui.column().classes('w-full gap-0'))
     
     def _detect_mongodb_query(self, content: str) -> Optional[str]:
         """
@@ -329,30 +490,21 @@ class ExpertDisplayStrategy(ContentDisplayStrategy):
         调用MongoDB服务API执行查询 - 适应新格式
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                # 构建请求数据
-                request_data = {"query_cmd": query_cmd}
-                
-                async with session.post(
-                    f"{self.mongodb_api_base}/api/v1/enterprises/execute_mongo_cmd",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        # 添加 success 字段以保持兼容性
-                        result["success"] = (result.get("type") != "错误" and result.get("messages") == "正常处理" )
-                        return result
-                    else:
-                        error_text = await response.text()
-                        # 返回与新API格式一致的错误响应
-                        return {
-                            "success": False,
-                            "type": "错误",
-                            "period": "0ms", 
-                            "messages": f"API调用失败: HTTP {response.status}, response={error_text}",
-                            "result_data": []
-                        }
+            response = await mongodb_service_client.execute_mongo_cmd(query_cmd)
+            if response.status == 200:
+                result = response.data
+                # 添加 success 字段以保持兼容性
+                result["success"] = (result.get("type") != "错误" and result.get("messages") == "正常处理" )
+                return result
+            else:
+                # 返回与新API格式一致的错误响应
+                return {
+                    "success": False,
+                    "type": "错误",
+                    "period": "0ms", 
+                    "messages": f"API调用失败: HTTP {response.status}, response={response.text}",
+                    "result_data": []
+                }
         except Exception as e:
             # 返回与新API格式一致的错误响应
             return {
@@ -1554,6 +1706,13 @@ class ExpertDisplayStrategy(ContentDisplayStrategy):
 
     #endregion ------------------------ 各类数据的渲染展示 -----------------------------
     
+    def _create_reply_element(self):
+        """流式输出期间使用等宽文本分段显示代码，结束后再替换为完整的代码组件"""
+        return ui.label('').classes('w-full whitespace-pre-wrap font-mono text-sm bg-gray-200 dark:bg-zinc-600 px-4')
+    
+    def _set_reply_text(self, element, text: str):
+        element.set_text(text)
+    
     def update_content(self, parse_result: Dict[str, Any]) -> bool:
         """更新专家模式展示内容"""
         # 只执行通用内容更新，不进行MongoDB查询检测
@@ -1568,27 +1727,28 @@ class ExpertDisplayStrategy(ContentDisplayStrategy):
             if self.chat_content_container and not self.reply_created:
                 with self.chat_content_container:
                     with ui.expansion('执行代码', icon='code' ,value=True).classes('w-full'):
-                        self.reply_label = ui.code('').classes('w-full bg-gray-200 dark:bg-zinc-600')
-                self.reply_created = True
+                        self._start_reply(ui.column().classes('w-full gap-0'))
             
             if self.think_label:
                 self.think_label.set_text(parse_result['think_content'])
         
         if self.reply_label and parse_result['display_content'].strip():
-            with self.chat_content_container:
-                self.reply_label.set_content(parse_result['display_content'].strip())
+            self._render_reply(parse_result['display_content'])
         
         return True  # 需要滚动
     
     async def finalize_content(self, final_content: str):
         """完成内容显示，并检测和执行MongoDB查询"""
-        final_result = self.think_parser.parse_chunk(final_content)
+        final_result = self.think_parser.finish(final_content)
         
         if final_result['think_complete'] and self.think_label:
             self.think_label.set_text(final_result['think_content'])
         
         if self.reply_label and final_result['display_content'].strip():
-            self.reply_label.set_content(final_result['display_content'].strip())
+            # 流式分段替换为完整的代码组件，完整内容只在结束时发送一次
+            self.reply_parent.clear()
+            with self.reply_parent:
+                self.reply_label = ui.code(final_result['display_content'].strip()).classes('w-full bg-gray-200 dark:bg-zinc-600')
         
         # 在内容完全处理完毕后，检测MongoDB查询并执行
         display_content = final_result.get('display_content', '')
@@ -1662,26 +1822,59 @@ class StreamResponseProcessor:
             return DefaultDisplayStrategy(self.chat_area_manager)
     
     async def process_stream_response(self, stream_response) -> str:
-        """处理流式响应"""
+        """处理流式响应 - 读取协程只累积数据块，由后台渲染任务按固定帧率刷新UI"""
         self.display_strategy = self.get_display_strategy()
         assistant_reply = ""
+        pending = asyncio.Event()
+        render_task = asyncio.create_task(self._render_stream_loop(pending))
         
-        for chunk in stream_response:
-            if chunk.choices[0].delta.content:
+        try:
+            async for chunk in stream_response:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                
                 chunk_content = chunk.choices[0].delta.content
                 assistant_reply += chunk_content
-                
-                # 使用策略处理内容
-                need_scroll = self.display_strategy.process_stream_chunk(assistant_reply)
-                
-                if need_scroll:
-                    await self.chat_area_manager.scroll_to_bottom_smooth()
-                    await asyncio.sleep(0.05)
+                self.display_strategy.feed_stream_delta(chunk_content)
+                pending.set()
+        finally:
+            render_task.cancel()
+            try:
+                await render_task
+            except asyncio.CancelledError:
+                pass
+        
+        # 渲染最后一帧未刷新的内容
+        if pending.is_set():
+            await self._render_stream_frame()
         
         # 完成内容显示
         await self.display_strategy.finalize_content(assistant_reply)
         return assistant_reply
 
+    async def _render_stream_loop(self, pending: asyncio.Event):
+        """
+        后台渲染任务：有新内容时渲染一帧，两帧之间至少间隔 STREAM_RENDER_INTERVAL
+
+        渲染不依赖下一个数据块到达，模型停顿时已收到的内容也会在一帧内显示。
+        """
+        loop = asyncio.get_running_loop()
+        # 后台任务没有调用方的UI上下文，在聊天消息容器内渲染
+        with self.chat_area_manager.chat_messages_container:
+            while True:
+                await pending.wait()
+                pending.clear()
+                frame_start = loop.time()
+                await self._render_stream_frame()
+                await asyncio.sleep(max(0.0, STREAM_RENDER_INTERVAL - (loop.time() - frame_start)))
+
+    async def _render_stream_frame(self):
+        """渲染一帧流式内容"""
+        # 使用策略处理内容
+        need_scroll = self.display_strategy.process_stream_chunk()
+        if need_scroll:
+            await self.chat_area_manager.scroll_to_bottom_smooth()
+
     async def execute_query_in_container(self, query_content: str, target_container) -> str:
         self.display_strategy = self.get_display_strategy()
         await self.display_strategy.display_query_result_in_container(query_content, target_container)
@@ -1727,8 +1920,7 @@ class MessageProcessor:
                 self.chat_area_manager.chat_data_state.current_model_config['selected_model']
             ) if model_config else self.chat_area_manager.chat_data_state.current_model_config['selected_model']
             
-            stream_response = await asyncio.to_thread(
-                client.chat.completions.create,
+            stream_response = await client.chat.completions.create(
                 model=actual_model_name,
                 messages=messages,
                 max_tokens=2000,
@@ -1797,6 +1989,12 @@ class ChatAreaManager:
             static_manager.get_logo_path('Live chatbot.gif'),
         )
         
+        # 聊天历史分页渲染状态
+        self.history_messages: List[Dict[str, Any]] = []
+        self.history_rendered_start = 0
+        self.history_loading = False
+        self.history_top_container = None
+        
         # 初始化消息处理器
         self.message_processor = MessageProcessor(self)
 
@@ -1858,8 +2056,14 @@ class ChatAreaManager:
         except Exception as e:
             ui.notify(f"滚动出错: {e}")
 
-    async def render_single_message(self, message: Dict[str, Any], container=None):
-        """渲染单条消息"""
+    async def render_single_message(self, message: Dict[str, Any], container=None, lazy: bool = False):
+        """渲染单条消息
+        
+        Args:
+            message: 消息字典
+            container: 目标容器，默认为聊天消息容器
+            lazy: 是否将Mermaid、公式、大表格等开销较大的组件延迟到可见时再渲染（用于历史消息）
+        """
         target_container = container if container is not None else self.chat_messages_container
         
         with target_container:
@@ -1889,12 +2093,79 @@ class ChatAreaManager:
                                 ui.code(message['content']).classes('w-full bg-gray-200 dark:bg-zinc-600')
                         else:
                             temp_reply_label = ui.markdown(message['content']).classes('w-full')
-                            # 调用optimize_content_display进行内容优化显示
-                            await self.markdown_parser.optimize_content_display(
-                                temp_reply_label, 
-                                message['content'], 
-                                self.chat_content_container
-                            )
+                            if lazy:
+                                await self._optimize_when_visible(
+                                    temp_reply_label,
+                                    message['content'],
+                                    self.chat_content_container
+                                )
+                            else:
+                                # 调用optimize_content_display进行内容优化显示
+                                await self.markdown_parser.optimize_content_display(
+                                    temp_reply_label, 
+                                    message['content'], 
+                                    self.chat_content_container
+                                )
+    
+    async def _optimize_when_visible(self, reply_label, content: str, content_container):
+        """开销较大的内容等消息滚动到可见区域后再优化显示，其余内容立即优化"""
+        blocks = self.markdown_parser.parse_content_with_regex(content)
+        if not self.markdown_parser.has_special_content(blocks):
+            return
+        if not self.markdown_parser.has_expensive_content(blocks):
+            await self.markdown_parser.optimize_content_display(reply_label, content, content_container)
+            return
+        
+        optimized = [False]
+        
+        async def on_visible(_=None):
+            if optimized[0]:
+                return
+            optimized[0] = True
+            await self.markdown_parser.optimize_content_display(reply_label, content, content_container)
+        
+        # 事件绑定在消息元素自身上，元素删除时随之释放
+        reply_label.on('visible', on_visible)
+        # 元素进入可见区域（预留300px）时通知服务端，只触发一次；
+        # 返回观察器是否挂载成功
+        observe_js = f'''
+            return new Promise((resolve) => {{
+                (function observe(retries) {{
+                    const el = getHtmlElement({reply_label.id});
+                    if (!el) {{
+                        if (retries > 0) setTimeout(() => observe(retries - 1), 100);
+                        else resolve(false);
+                        return;
+                    }}
+                    if (!('IntersectionObserver' in window)) {{
+                        resolve(false);
+                        return;
+                    }}
+                    const observer = new IntersectionObserver((entries) => {{
+                        if (entries.some(entry => entry.isIntersecting)) {{
+                            observer.disconnect();
+                            getElement({reply_label.id}).$emit('visible');
+                        }}
+                    }}, {{ rootMargin: '300px' }});
+                    observer.observe(el);
+                    resolve(true);
+                }})({LAZY_RENDER_OBSERVE_RETRIES});
+            }});
+        '''
+        
+        async def observe_or_fallback():
+            try:
+                attached = await reply_label.client.run_javascript(
+                    observe_js, timeout=LAZY_RENDER_OBSERVE_RETRIES * 0.1 + 3.0
+                )
+            except Exception:
+                attached = False
+            if not attached:
+                # 观察器无法挂载时直接优化显示，避免内容一直停留在未优化状态
+                with content_container:
+                    await on_visible()
+        
+        asyncio.create_task(observe_or_fallback())
     
     async def _execute_query_from_message(self, query_content: str , render_history_container):
         """从消息内容执行查询"""
@@ -1991,6 +2262,7 @@ class ChatAreaManager:
         try:
             # 清空聊天消息容器
             self.chat_messages_container.clear()
+            self._reset_history_state()
             # 清空聊天数据状态中的消息
             self.chat_data_state.current_chat_messages.clear()
             # 恢复欢迎消息
@@ -2003,6 +2275,7 @@ class ChatAreaManager:
     def restore_welcome_message(self):
         """恢复欢迎消息"""
         self.chat_messages_container.clear()
+        self._reset_history_state()
         if self.welcome_message_container:
             self.welcome_message_container.clear()
             with self.welcome_message_container:
@@ -2018,6 +2291,28 @@ class ChatAreaManager:
                             ui.chip('绘图', icon='dirty_lens').classes('text-purple-600 text-lg')
                             ui.chip('分析', icon='analytics').classes('text-orange-600 text-lg')
 
+    @staticmethod
+    def _fetch_chat_history(chat_id):
+        """查询聊天记录（在数据库线程池中执行），不存在时返回None"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            
+            if not chat:
+                return None
+            # 在会话关闭前获取消息数据
+            return {
+                'prompt_name': chat.prompt_name,
+                'model_name': chat.model_name,
+                'messages': chat.messages.copy() if chat.messages else [],
+                'title': chat.title,
+            }
+
     async def render_chat_history(self, chat_id):
         """渲染聊天历史内容"""
         try:
@@ -2025,22 +2320,15 @@ class ChatAreaManager:
             self.welcome_message_container.clear()
             await self.start_waiting_effect("正在加载聊天记录")
 
-            from database_models.business_models.chat_history_model import ChatHistory
-            from auth.database import get_db 
-            with get_db() as db:
-                chat = db.query(ChatHistory).filter(
-                    ChatHistory.id == chat_id,
-                    ChatHistory.is_deleted == False
-                ).first()
-                
-                if not chat:
-                    ui.notify('聊天记录不存在', type='negative')
-                    return
-                # 在会话关闭前获取消息数据
-                prompt_name = chat.prompt_name
-                model_name = chat.model_name
-                messages = chat.messages.copy() if chat.messages else []
-                chat_title = chat.title
+            from auth.database import run_db
+            chat = await run_db(self._fetch_chat_history, chat_id)
+            if not chat:
+                ui.notify('聊天记录不存在', type='negative')
+                return
+            prompt_name = chat['prompt_name']
+            model_name = chat['model_name']
+            messages = chat['messages']
+            chat_title = chat['title']
                 
             # 清空当前聊天消息并加载历史消息
             self.chat_data_state.current_chat_messages.clear()
@@ -2053,17 +2341,21 @@ class ChatAreaManager:
             self.chat_data_state.current_state.prompt_select_widget.set_value(prompt_name)
             self.chat_data_state.switch = (prompt_name == '一企一档专家')
 
-            # 清空聊天界面
+            # 清空聊天界面，只渲染最近一页消息，更早的消息滚动到顶部时再加载
             self.chat_messages_container.clear()
+            self.history_messages = messages
+            self.history_rendered_start = len(messages)
+            with self.chat_messages_container:
+                self.history_top_container = ui.row().classes('w-full justify-center')
+            
             # 使用异步任务来渲染消息
             async def render_messages_async():
-                for msg in messages:
-                    await self.render_single_message(msg)
+                await self.load_earlier_history(keep_position=False)
+                # 滚动到底部
+                self.scroll_area.scroll_to(percent=1)
 
             # 创建异步任务来处理消息渲染
             ui.timer(0.01, lambda: asyncio.create_task(render_messages_async()), once=True)
-            # 滚动到底部
-            ui.timer(0.1, lambda: self.scroll_area.scroll_to(percent=1), once=True)
             ui.notify(f'已加载聊天: {chat_title}', type='positive') 
  
         except Exception as e:
@@ -2072,12 +2364,78 @@ class ChatAreaManager:
             self.restore_welcome_message()
             ui.notify('加载聊天失败', type='negative')    
 
+    def _reset_history_state(self):
+        """重置聊天历史分页状态"""
+        self.history_messages = []
+        self.history_rendered_start = 0
+        self.history_top_container = None
+
+    def _update_history_top(self):
+        """更新历史消息顶部的"加载更早消息"入口"""
+        if not self.history_top_container:
+            return
+        self.history_top_container.clear()
+        if self.history_rendered_start > 0:
+            with self.history_top_container:
+                ui.button(
+                    f'加载更早的消息（剩余 {self.history_rendered_start} 条）',
+                    icon='expand_less',
+                    on_click=self.load_earlier_history
+                ).props('flat dense').classes('text-gray-500')
+
+    async def load_earlier_history(self, keep_position: bool = True):
+        """向前加载一页历史消息，插入到已渲染消息之前"""
+        if self.history_loading or self.history_rendered_start <= 0 or not self.history_top_container:
+            return
+        
+        self.history_loading = True
+        try:
+            start = max(0, self.history_rendered_start - HISTORY_PAGE_SIZE)
+            page_messages = self.history_messages[start:self.history_rendered_start]
+            
+            before_scroll = None
+            if keep_position:
+                try:
+                    before_scroll = await self.scroll_area.run_method('getScroll')
+                except Exception:
+                    before_scroll = None
+            
+            # 新的一页放在顶部入口之后、已渲染消息之前
+            with self.chat_messages_container:
+                page_container = ui.column().classes('w-full gap-2')
+            page_container.move(self.chat_messages_container, target_index=1)
+            
+            for msg in page_messages:
+                await self.render_single_message(msg, container=page_container, lazy=True)
+            
+            self.history_rendered_start = start
+            self._update_history_top()
+            
+            # 保持用户当前看到的消息位置不变
+            if before_scroll:
+                await asyncio.sleep(0.1)
+                try:
+                    after_scroll = await self.scroll_area.run_method('getScroll')
+                    offset = after_scroll['verticalSize'] - before_scroll['verticalSize']
+                    self.scroll_area.scroll_to(pixels=before_scroll['verticalPosition'] + offset)
+                except Exception:
+                    pass
+        except Exception as e:
+            ui.notify(f'加载历史消息失败: {str(e)}', type='negative')
+        finally:
+            self.history_loading = False
+
+    async def handle_history_scroll(self, e):
+        """滚动到顶部附近时自动加载更早的历史消息"""
+        if e.vertical_position <= 20 and self.history_rendered_start > 0 and not self.history_loading:
+            await self.load_earlier_history()
+
     def render_ui(self):
         """渲染主聊天区域UI"""
         # 主聊天区域 - 占据剩余空间
         with ui.column().classes('flex-grow h-full').style('position: relative; overflow: hidden;'):
             # 聊天消息区域 - 使用 scroll_area 提供更好的滚动体验
-            self.scroll_area = ui.scroll_area().classes('w-full').style('height: calc(100% - 80px); padding-bottom: 20px;')
+            self.scroll_area = ui.scroll_area(on_scroll=self.handle_history_scroll).classes('w-full').style('height: calc(100% - 80px); padding-bottom: 20px;')
 
             with self.scroll_area:
                 self.chat_messages_container = ui.column().classes('w-full gap-2')  
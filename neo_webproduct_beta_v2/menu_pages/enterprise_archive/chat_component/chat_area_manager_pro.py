@@ -284,8 +284,7 @@ class ChatAreaManagerPro:
                     actual_model_name = model_config.get('model_name', selected_model) if model_config else selected_model
                     
                     # 流式调用 OpenAI API
-                    stream_response = await asyncio.to_thread(
-                        client.chat.completions.create,
+                    stream_response = await client.chat.completions.create(
                         model=actual_model_name,
                         messages=recent_messages,
                         max_tokens=2000,
@@ -313,8 +312,8 @@ class ChatAreaManagerPro:
                     reply_created = False
 
                     # 处理流式数据
-                    for chunk in stream_response:
-                        if chunk.choices[0].delta.content:
+                    async for chunk in stream_response:
+                        if chunk.choices and chunk.choices[0].delta.content:
                             chunk_content = chunk.choices[0].delta.content
                             assistant_reply += chunk_content
             
@@ -519,6 +518,28 @@ class ChatAreaManagerPro:
                             ui.chip('绘图', icon='dirty_lens').classes('text-purple-600 text-lg')
                             ui.chip('分析', icon='analytics').classes('text-orange-600 text-lg')
 
+    @staticmethod
+    def _fetch_chat_history(chat_id):
+        """查询聊天记录（在数据库线程池中执行），不存在时返回None"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            
+            if not chat:
+                return None
+            # 在会话关闭前获取消息数据
+            return {
+                'prompt_name': chat.prompt_name,
+                'model_name': chat.model_name,
+                'messages': chat.messages.copy() if chat.messages else [],
+                'title': chat.title,
+            }
+
     async def render_chat_history(self, chat_id):
         """渲染聊天历史内容"""
         try:
@@ -526,22 +547,15 @@ class ChatAreaManagerPro:
             self.welcome_message_container.clear()
             await self.start_waiting_effect("正在加载聊天记录")
 
-            from database_models.business_models.chat_history_model import ChatHistory
-            from auth.database import get_db 
-            with get_db() as db:
-                chat = db.query(ChatHistory).filter(
-                    ChatHistory.id == chat_id,
-                    ChatHistory.is_deleted == False
-                ).first()
-                
-                if not chat:
-                    ui.notify('聊天记录不存在', type='negative')
-                    return
-                # 在会话关闭前获取消息数据
-                prompt_name = chat.prompt_name
-                model_name = chat.model_name
-                messages = chat.messages.copy() if chat.messages else []
-                chat_title = chat.title
+            from auth.database import run_db
+            chat = await run_db(self._fetch_chat_history, chat_id)
+            if not chat:
+                ui.notify('聊天记录不存在', type='negative')
+                return
+            prompt_name = chat['prompt_name']
+            model_name = chat['model_name']
+            messages = chat['messages']
+            chat_title = chat['title']
                 
             # 清空当前聊天消息并加载历史消息
             self.chat_data_state.current_chat_messages.clear()
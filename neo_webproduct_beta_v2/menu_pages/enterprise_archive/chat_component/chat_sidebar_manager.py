@@ -225,7 +225,7 @@ class ChatSidebarManager:
                 
                 if existing_chat_id:
                     # 更新现有聊天记录
-                    update_success = self.update_existing_chat_to_database(existing_chat_id)
+                    update_success = await self.update_existing_chat_to_database(existing_chat_id)
                     if update_success:
                         ui.notify('对话已更新', type='positive')
                     else:
@@ -233,7 +233,7 @@ class ChatSidebarManager:
                         return
                 else:
                     # 插入新的聊天记录
-                    save_success = self.save_chat_to_database()
+                    save_success = await self.save_chat_to_database()
                     if save_success:
                         ui.notify('对话已保存', type='positive')
                     else:
@@ -245,7 +245,7 @@ class ChatSidebarManager:
                 # 恢复欢迎消息
                 self.chat_area_manager.restore_welcome_message()
                 # 新增：自动刷新聊天历史列表
-                self.refresh_chat_history_list()
+                await self.refresh_chat_history_list()
                 # 重置当前加载的聊天ID
                 self.reset_current_loaded_chat_id()     
             else:
@@ -267,14 +267,13 @@ class ChatSidebarManager:
         """重置当前加载的聊天记录ID"""
         self.chat_data_state.current_chat_id = None
 
-    def update_existing_chat_to_database(self, chat_id):
+    async def update_existing_chat_to_database(self, chat_id):
         """更新现有的聊天记录到数据库"""
         if chat_id is None:
             return True
         try:
             from auth import auth_manager
-            from database_models.business_models.chat_history_model import ChatHistory
-            from auth.database import get_db
+            from auth.database import run_db
             
             current_user = auth_manager.current_user
             if not current_user:
@@ -285,39 +284,54 @@ class ChatSidebarManager:
                 ui.notify('没有聊天记录需要更新', type='info')
                 return False
             
-            with get_db() as db:
-                chat_history = db.query(ChatHistory).filter(
-                    ChatHistory.id == chat_id,
-                    ChatHistory.created_by == current_user.id,
-                    ChatHistory.is_deleted == False
-                ).first()
-                
-                if not chat_history:
-                    ui.notify('聊天记录不存在或无权限', type='negative')
-                    return False
-                
-                # 更新聊天记录
-                chat_history.messages = self.chat_data_state.current_chat_messages.copy()
-                chat_history.model_name = self.chat_data_state.current_state.selected_model
-                
-                # 使用模型的内置方法更新统计信息
-                chat_history.update_message_stats()
-                chat_history.updated_at = datetime.now()
-                
-                db.commit()
-                return True
+            updated = await run_db(
+                self._update_chat_history,
+                chat_id,
+                current_user.id,
+                self.chat_data_state.current_chat_messages.copy(),
+                self.chat_data_state.current_state.selected_model
+            )
+            if not updated:
+                ui.notify('聊天记录不存在或无权限', type='negative')
+                return False
+            return True
                 
         except Exception as e:
             ui.notify(f'更新聊天记录失败: {str(e)}', type='negative')
             return False
 
-    def save_chat_to_database(self):
+    @staticmethod
+    def _update_chat_history(chat_id, user_id, messages, model_name):
+        """更新聊天记录（在数据库线程池中执行），记录不存在或无权限时返回False"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_history = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.created_by == user_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            
+            if not chat_history:
+                return False
+            
+            # 更新聊天记录
+            chat_history.messages = messages
+            chat_history.model_name = model_name
+            
+            # 使用模型的内置方法更新统计信息
+            chat_history.update_message_stats()
+            chat_history.updated_at = datetime.now()
+            
+            db.commit()
+            return True
+
+    async def save_chat_to_database(self):
         """保存新的聊天记录到数据库"""
         try:
             from auth import auth_manager
-            from database_models.business_models.chat_history_model import ChatHistory
-            from database_models.business_utils import AuditHelper
-            from auth.database import get_db
+            from auth.database import run_db
             
             current_user = auth_manager.current_user
             if not current_user:
@@ -341,71 +355,92 @@ class ChatSidebarManager:
             if self.chat_area_manager.has_think_content(messages_to_save):
                 messages_to_save = self.chat_area_manager.remove_think_content(messages_to_save)
             
-            with get_db() as db:
-                chat_history = ChatHistory(
-                    title=title,
-                    model_name=self.chat_data_state.current_state.selected_model,
-                    prompt_name = self.chat_data_state.current_prompt_config.selected_prompt,
-                    messages=messages_to_save
-                )
-                
-                # 使用模型的内置方法更新统计信息
-                chat_history.update_message_stats()
-                
-                # 设置审计字段
-                AuditHelper.set_audit_fields(chat_history, current_user.id)
-                
-                db.add(chat_history)
-                db.commit()
-                
-                return True
+            await run_db(
+                self._insert_chat_history,
+                title,
+                self.chat_data_state.current_state.selected_model,
+                self.chat_data_state.current_prompt_config.selected_prompt,
+                messages_to_save,
+                current_user.id
+            )
+            return True
                 
         except Exception as e:
             ui.notify(f'保存聊天记录失败: {str(e)}', type='negative')
             return False
+
+    @staticmethod
+    def _insert_chat_history(title, model_name, prompt_name, messages, user_id):
+        """插入新的聊天记录（在数据库线程池中执行）"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from database_models.business_utils import AuditHelper
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_history = ChatHistory(
+                title=title,
+                model_name=model_name,
+                prompt_name=prompt_name,
+                messages=messages
+            )
+            
+            # 使用模型的内置方法更新统计信息
+            chat_history.update_message_stats()
+            
+            # 设置审计字段
+            AuditHelper.set_audit_fields(chat_history, user_id)
+            
+            db.add(chat_history)
+            db.commit()
+
     #endregion 新建会话相关逻辑
     
     #region 历史记录相关逻辑
-    def load_chat_histories(self):
+    async def load_chat_histories(self):
         """从数据库加载聊天历史列表"""
         try:
             from auth import auth_manager
-            from database_models.business_models.chat_history_model import ChatHistory
-            from auth.database import get_db
+            from auth.database import run_db
             
             current_user = auth_manager.current_user
             if not current_user:
                 return []
             
-            with get_db() as db:
-                chat_histories = ChatHistory.get_user_recent_chats(
-                    db_session=db, 
-                    user_id=current_user.id, 
-                    limit=20
-                )
-                
-                # 转换为UI需要的数据结构
-                history_list = []
-                for chat in chat_histories:
-                    preview = chat.get_message_preview(30)
-                    duration_info = chat.get_duration_info()
-                    
-                    history_list.append({
-                        'id': chat.id,
-                        'title': chat.title,
-                        'preview': preview,
-                        'created_at': chat.created_at.strftime('%Y-%m-%d %H:%M'),
-                        'updated_at': chat.updated_at.strftime('%Y-%m-%d %H:%M'),
-                        'last_message_at': chat.last_message_at.strftime('%Y-%m-%d %H:%M') if chat.last_message_at else None,
-                        'message_count': chat.message_count,
-                        'model_name': chat.model_name,
-                        'duration_minutes': duration_info['duration_minutes'],
-                        'chat_object': chat
-                    })
-                return history_list        
+            return await run_db(self._query_chat_histories, current_user.id)
         except Exception as e:
             ui.notify('加载聊天历史失败', type='negative')
             return []
+
+    @staticmethod
+    def _query_chat_histories(user_id):
+        """查询用户最近的聊天记录并转换为UI需要的数据结构（在数据库线程池中执行）"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_histories = ChatHistory.get_user_recent_chats(
+                db_session=db, 
+                user_id=user_id, 
+                limit=20
+            )
+            
+            history_list = []
+            for chat in chat_histories:
+                preview = chat.get_message_preview(30)
+                duration_info = chat.get_duration_info()
+                
+                history_list.append({
+                    'id': chat.id,
+                    'title': chat.title,
+                    'preview': preview,
+                    'created_at': chat.created_at.strftime('%Y-%m-%d %H:%M'),
+                    'updated_at': chat.updated_at.strftime('%Y-%m-%d %H:%M'),
+                    'last_message_at': chat.last_message_at.strftime('%Y-%m-%d %H:%M') if chat.last_message_at else None,
+                    'message_count': chat.message_count,
+                    'model_name': chat.model_name,
+                    'duration_minutes': duration_info['duration_minutes']
+                })
+            return history_list
         
     async def on_load_chat_history(self, chat_id):
         """加载指定的聊天历史到当前对话中"""
@@ -414,13 +449,12 @@ class ChatSidebarManager:
         # 调用聊天区域管理器渲染聊天历史
         await self.chat_area_manager.render_chat_history(chat_id)
     
-    def on_edit_chat_history(self, chat_id):
+    async def on_edit_chat_history(self, chat_id):
         """编辑聊天历史记录"""
-        def save_title():
+        async def save_title():
             try:
                 from auth import auth_manager
-                from database_models.business_models.chat_history_model import ChatHistory
-                from auth.database import get_db
+                from auth.database import run_db
                 
                 current_user = auth_manager.current_user
                 if not current_user:
@@ -432,24 +466,14 @@ class ChatSidebarManager:
                     ui.notify('标题不能为空', type='warning')
                     return
                 
-                with get_db() as db:
-                    chat_history = db.query(ChatHistory).filter(
-                        ChatHistory.id == chat_id,
-                        ChatHistory.created_by == current_user.id,
-                        ChatHistory.is_deleted == False
-                    ).first()
-                    
-                    if chat_history:
-                        chat_history.title = new_title
-                        chat_history.updated_at = datetime.now()
-                        db.commit()
-                        
-                        # 刷新历史记录列表
-                        self.refresh_chat_history_list()
-                        ui.notify('标题修改成功', type='positive')
-                        dialog.close()
-                    else:
-                        ui.notify('聊天记录不存在', type='negative')
+                updated = await run_db(self._update_chat_title, chat_id, current_user.id, new_title)
+                if updated:
+                    # 刷新历史记录列表
+                    await self.refresh_chat_history_list()
+                    ui.notify('标题修改成功', type='positive')
+                    dialog.close()
+                else:
+                    ui.notify('聊天记录不存在', type='negative')
                         
             except Exception as e:
                 ui.notify(f'修改失败: {str(e)}', type='negative')
@@ -457,26 +481,17 @@ class ChatSidebarManager:
         # 获取当前标题
         try:
             from auth import auth_manager
-            from database_models.business_models.chat_history_model import ChatHistory
-            from auth.database import get_db
+            from auth.database import run_db
             
             current_user = auth_manager.current_user
             if not current_user:
                 ui.notify('用户未登录', type='warning')
                 return
             
-            with get_db() as db:
-                chat_history = db.query(ChatHistory).filter(
-                    ChatHistory.id == chat_id,
-                    ChatHistory.created_by == current_user.id,
-                    ChatHistory.is_deleted == False
-                ).first()
-                
-                if not chat_history:
-                    ui.notify('聊天记录不存在', type='negative')
-                    return
-                
-                current_title = chat_history.title
+            current_title = await run_db(self._query_chat_title, chat_id, current_user.id)
+            if current_title is None:
+                ui.notify('聊天记录不存在', type='negative')
+                return
         except Exception as e:
             ui.notify('获取聊天记录失败', type='negative')
             return
@@ -493,55 +508,77 @@ class ChatSidebarManager:
                         ui.button('保存', on_click=save_title).props('color=primary')
         
         dialog.open()
+
+    @staticmethod
+    def _query_chat_title(chat_id, user_id):
+        """查询聊天记录的标题（在数据库线程池中执行），记录不存在或无权限时返回None"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_history = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.created_by == user_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            return chat_history.title if chat_history else None
+
+    @staticmethod
+    def _update_chat_title(chat_id, user_id, title):
+        """修改聊天记录的标题（在数据库线程池中执行），记录不存在或无权限时返回False"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_history = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.created_by == user_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            
+            if not chat_history:
+                return False
+            
+            chat_history.title = title
+            chat_history.updated_at = datetime.now()
+            db.commit()
+            return True
     
     def on_delete_chat_history(self, chat_id):
         """删除聊天历史记录"""
-        def confirm_delete():
+        async def confirm_delete():
             try:
                 from auth import auth_manager
-                from database_models.business_models.chat_history_model import ChatHistory
-                from auth.database import get_db
+                from auth.database import run_db
                 
                 current_user = auth_manager.current_user
                 if not current_user:
                     ui.notify('用户未登录，无法删除聊天记录', type='warning')
                     return
                 
-                with get_db() as db:
-                    chat_history = db.query(ChatHistory).filter(
-                        ChatHistory.id == chat_id,
-                        ChatHistory.created_by == current_user.id,
-                        ChatHistory.is_deleted == False
-                    ).first()
-                    
-                    if not chat_history:
-                        ui.notify('聊天记录不存在或无权限删除', type='negative')
-                        return
-                    
-                    chat_title = chat_history.title
-                    
-                    # 软删除操作
-                    chat_history.is_deleted = True
-                    chat_history.deleted_at = datetime.now()
-                    chat_history.deleted_by = current_user.id
-                    chat_history.is_active = False
-                    
-                    db.commit()
-                    
-                    # 如果删除的是当前加载的聊天，需要重置界面
-                    current_loaded_id = self.get_current_loaded_chat_id()
-                    if current_loaded_id == chat_id:
-                        self.chat_data_state.current_chat_messages.clear()
-                        self.chat_area_manager.restore_welcome_message()
-                        self.reset_current_loaded_chat_id()
-                        
-                    # 刷新聊天历史列表
-                    self.refresh_chat_history_list()
+                chat_title = await run_db(self._soft_delete_chat_history, chat_id, current_user.id)
+                if chat_title is None:
+                    ui.notify('聊天记录不存在或无权限删除', type='negative')
+                    return
+                
+                # 如果删除的是当前加载的聊天，需要重置界面
+                current_loaded_id = self.get_current_loaded_chat_id()
+                if current_loaded_id == chat_id:
+                    self.chat_data_state.current_chat_messages.clear()
+                    self.chat_area_manager.restore_welcome_message()
+                    self.reset_current_loaded_chat_id()
                     
-                    ui.notify(f'已删除聊天: {chat_title}', type='positive')
+                # 刷新聊天历史列表
+                await self.refresh_chat_history_list()
+                
+                ui.notify(f'已删除聊天: {chat_title}', type='positive')
                     
             except Exception as e:
                 ui.notify(f'删除聊天失败: {str(e)}', type='negative')
+
+        async def on_confirm_delete():
+            dialog.close()
+            await confirm_delete()
         
         # 显示确认对话框
         with ui.dialog() as dialog:
@@ -553,14 +590,40 @@ class ChatSidebarManager:
                     
                     with ui.row().classes('w-full justify-end gap-2'):
                         ui.button('取消', on_click=dialog.close).props('flat')
-                        ui.button('删除', on_click=lambda: [confirm_delete(), dialog.close()]).props('color=negative')
+                        ui.button('删除', on_click=on_confirm_delete).props('color=negative')
         
         dialog.open()
+
+    @staticmethod
+    def _soft_delete_chat_history(chat_id, user_id):
+        """软删除聊天记录（在数据库线程池中执行），返回被删除记录的标题，记录不存在或无权限时返回None"""
+        from database_models.business_models.chat_history_model import ChatHistory
+        from auth.database import get_db
+
+        with get_db() as db:
+            chat_history = db.query(ChatHistory).filter(
+                ChatHistory.id == chat_id,
+                ChatHistory.created_by == user_id,
+                ChatHistory.is_deleted == False
+            ).first()
+            
+            if not chat_history:
+                return None
+            
+            chat_title = chat_history.title
+            
+            # 软删除操作
+            chat_history.is_deleted = True
+            chat_history.deleted_at = datetime.now()
+            chat_history.deleted_by = user_id
+            chat_history.is_active = False
+            
+            db.commit()
+            return chat_title
     
-    def create_chat_history_list(self):
+    def create_chat_history_list(self, chat_histories):
         """创建聊天历史列表组件"""
-        chat_histories = self.load_chat_histories()
-        
+
         if not chat_histories:
             with ui.column().classes('w-full text-center'):
                 ui.icon('chat_bubble_outline', size='lg').classes('text-gray-400 mb-2')
@@ -589,13 +652,20 @@ class ChatSidebarManager:
                                 icon='delete'
                             ).on('click.stop', lambda chat_id=history['id']: self.on_delete_chat_history(chat_id)).props('dense flat round size="sm"').classes('text-red-600').tooltip('删除')
         
-    def refresh_chat_history_list(self):
+    async def reload_chat_history_list(self):
+        """重新加载聊天历史并重建列表（先查询完成再替换，加载期间保留原列表）"""
+        if not self.history_list_container:
+            return
+        chat_histories = await self.load_chat_histories()
+        self.history_list_container.clear()
+        with self.history_list_container:
+            self.create_chat_history_list(chat_histories)
+
+    async def refresh_chat_history_list(self):
         """刷新聊天历史列表"""
         try:
             if self.history_list_container:
-                self.history_list_container.clear()
-                with self.history_list_container:
-                    self.create_chat_history_list()
+                await self.reload_chat_history_list()
                 ui.notify('聊天历史已刷新', type='positive')
         except Exception as e:
             ui.notify('刷新失败', type='negative')
@@ -675,5 +745,5 @@ class ChatSidebarManager:
                         
                         # 聊天历史列表容器
                         self.history_list_container = ui.column().classes('w-full h-96 chathistorylist-hide-scrollbar')
-                        with self.history_list_container:
-                            self.create_chat_history_list()
\ No newline at end of file
+                        # 页面渲染完成后再异步加载，不阻塞页面构建
+                        ui.timer(0, self.reload_chat_history_list, once=True)
\ No newline at end of file
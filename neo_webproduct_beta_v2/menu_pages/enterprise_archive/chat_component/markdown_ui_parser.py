@@ -1,11 +1,199 @@
 import re
 import asyncio
-from typing import Optional, List, Dict, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Callable
 from nicegui import ui
 import io
 import json
 import csv
 
+# 单遍扫描的块级模式：按优先级依次为 代码块/Mermaid、块级公式、表格、标题、行内公式
+# 匹配结果互不重叠，代码块中的 # 注释、$ 符号等不会再被识别为标题或公式
+_BLOCK_PATTERN = re.compile(
+    r'(?P<fence>```(?P<lang>\w+)?\n(?P<code>(?s:.*?))```)'
+    r'|(?P<block_math>\$\$(?P<block_math_body>(?s:.*?))\$\$)'
+    r'|(?P<table>\|.*\|.*\n\|[-\s\|]*\|.*\n(?:\|.*\|.*\n)*)'
+    r'|(?P<heading>^(?P<hashes>#{1,6})\s+(?P<heading_text>.+)$)'
+    r'|(?P<inline_math>(?<!\$)\$(?P<inline_math_body>[^\$\n]+)\$(?!\$))',
+    re.MULTILINE
+)
+
+# 超过该行数的表格视为渲染开销较大的组件
+LARGE_TABLE_ROWS = 20
+
+# 解析结果LRU缓存（按内容哈希），进程内所有解析器共享
+PARSE_CACHE_SIZE = 256
+_parse_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+class MarkdownBlockTokenizer:
+    """
+    单遍Markdown块解析器
+    
+    一次扫描得到与 MarkdownUIParser.parse_content_with_regex 相同格式的块列表。
+    流式输出时内容只会在末尾追加，解析器记录最后一个已完成块的位置，
+    下次解析只从该位置继续扫描。
+    """
+    
+    def __init__(self, table_parser: Callable[[str], Optional[Dict[str, Any]]]):
+        """
+        Args:
+            table_parser: 表格文本解析函数，返回None表示不是有效表格
+        """
+        self.table_parser = table_parser
+        self.reset()
+    
+    def reset(self):
+        """清空已解析状态"""
+        self._stable_prefix = ''
+        self._stable_blocks: List[Dict[str, Any]] = []
+        self._stable_has_special = False
+    
+    def parse(self, content: str) -> List[Dict[str, Any]]:
+        """
+        解析内容；如果内容以上次已完成部分为前缀，则从该位置继续解析
+        """
+        if not content.startswith(self._stable_prefix):
+            self.reset()
+        
+        start = len(self._stable_prefix)
+        special_blocks = self._scan(content, start)
+        
+        # 确定本次新增的已完成块：块后至少还有一个完整行，且之前的文本中没有未闭合的代码块/公式；
+        # 行内公式所在行之后可能补全为表格，不作为续扫起点
+        stable_end = start
+        stable_count = 0
+        last_end = start
+        for block in special_blocks:
+            gap = content[last_end:block['start_pos']]
+            if '```' in gap or '$$' in gap:
+                break
+            if content.find('\n', block['end_pos']) == -1:
+                break
+            last_end = block['end_pos']
+            if block.get('display_mode') != 'inline':
+                stable_end = block['end_pos']
+                stable_count += 1
+        
+        has_special = self._stable_has_special or bool(special_blocks)
+        tail_blocks = self._merge_text_blocks(content, start, len(content), special_blocks, has_special)
+        
+        if stable_count:
+            new_stable = [block for block in tail_blocks if block['end_pos'] <= stable_end]
+            self._stable_blocks = self._stable_blocks + new_stable
+            self._stable_prefix = content[:stable_end]
+            self._stable_has_special = True
+            tail_blocks = tail_blocks[len(new_stable):]
+        
+        return self._stable_blocks + tail_blocks
+    
+    def _scan(self, content: str, start: int) -> List[Dict[str, Any]]:
+        """从start位置单遍扫描特殊块"""
+        blocks = []
+        for match in _BLOCK_PATTERN.finditer(content, start):
+            block = self._build_block(match)
+            if block:
+                blocks.append(block)
+        return blocks
+    
+    def _build_block(self, match) -> Optional[Dict[str, Any]]:
+        """根据匹配结果构建块"""
+        if match.group('fence') is not None:
+            language = match.group('lang') or 'text'
+            if language == 'mermaid':
+                return {
+                    'type': 'mermaid',
+                    'content': match.group('code').strip(),
+                    'start_pos': match.start(),
+                    'end_pos': match.end()
+                }
+            if language.lower() == 'mermaid':
+                return None
+            return {
+                'type': 'code',
+                'content': match.group('code').strip(),
+                'language': language,
+                'start_pos': match.start(),
+                'end_pos': match.end()
+            }
+        if match.group('block_math') is not None:
+            return {
+                'type': 'math',
+                'content': match.group('block_math_body').strip(),
+                'display_mode': 'block',
+                'start_pos': match.start(),
+                'end_pos': match.end()
+            }
+        if match.group('table') is not None:
+            table_data = self.table_parser(match.group('table'))
+            if not table_data:
+                return None
+            return {
+                'type': 'table',
+                'content': match.group('table'),
+                'data': table_data,
+                'start_pos': match.start(),
+                'end_pos': match.end()
+            }
+        if match.group('heading') is not None:
+            return {
+                'type': 'heading',
+                'content': match.group('heading_text').strip(),
+                'level': len(match.group('hashes')),
+                'start_pos': match.start(),
+                'end_pos': match.end()
+            }
+        if match.group('inline_math') is not None:
+            return {
+                'type': 'math',
+                'content': match.group('inline_math_body').strip(),
+                'display_mode': 'inline',
+                'start_pos': match.start(),
+                'end_pos': match.end()
+            }
+        return None
+    
+    @staticmethod
+    def _merge_text_blocks(content: str, start: int, end: int,
+                           special_blocks: List[Dict[str, Any]],
+                           has_special: bool) -> List[Dict[str, Any]]:
+        """在特殊块之间填充文本块（与 fill_text_blocks 规则一致）"""
+        if not has_special:
+            return [{
+                'type': 'text',
+                'content': content,
+                'start_pos': 0,
+                'end_pos': len(content)
+            }]
+        
+        blocks = []
+        last_end = start
+        for block in special_blocks:
+            if block['start_pos'] > last_end:
+                text_content = content[last_end:block['start_pos']].strip()
+                if text_content:
+                    blocks.append({
+                        'type': 'text',
+                        'content': text_content,
+                        'start_pos': last_end,
+                        'end_pos': block['start_pos']
+                    })
+            blocks.append(block)
+            last_end = block['end_pos']
+        
+        if last_end < end:
+            text_content = content[last_end:end].strip()
+            if text_content:
+                blocks.append({
+                    'type': 'text',
+                    'content': text_content,
+                    'start_pos': last_end,
+                    'end_pos': end
+                })
+        return blocks
+
 class MarkdownUIParser:
     """
     Markdown 内容解析器和 UI 组件映射器
@@ -14,7 +202,8 @@ class MarkdownUIParser:
     
     def __init__(self):
         """初始化解析器"""
-        pass
+        # 流式输出过程中复用的单遍解析器，可从上次已完成的块继续解析
+        self.stream_tokenizer = MarkdownBlockTokenizer(self.parse_table_data)
     
     # ==================== 主要接口方法 ====================
     async def optimize_content_display(self, reply_label, content: str, chat_content_container=None):
@@ -48,7 +237,7 @@ class MarkdownUIParser:
 
     def parse_content_with_regex(self, content: str) -> List[Dict[str, Any]]:
         """
-        使用正则表达式解析内容为结构化块
+        解析内容为结构化块（单遍扫描，结果按内容哈希LRU缓存）
         
         Args:
             content: 需要解析的 Markdown 内容
@@ -63,39 +252,34 @@ class MarkdownUIParser:
                 'end_pos': 结束位置
             }]
         """
-        blocks = []
-        
-        # 1. 检测表格
-        table_blocks = self.extract_tables(content)
-        blocks.extend(table_blocks)
-        
-        # 2. 检测Mermaid图表
-        mermaid_blocks = self.extract_mermaid(content)
-        blocks.extend(mermaid_blocks)
-        
-        # 3. 检测代码块
-        code_blocks = self.extract_code_blocks(content)
-        blocks.extend(code_blocks)
-        
-        # 4. 检测LaTeX公式
-        math_blocks = self.extract_math(content)
-        blocks.extend(math_blocks)
-        
-        # 5. 检测标题
-        heading_blocks = self.extract_headings(content)
-        blocks.extend(heading_blocks)
-        
-        # 6. 按位置排序
-        blocks.sort(key=lambda x: x['start_pos'])
-        
-        # 7. 填充文本块
-        text_blocks = self.fill_text_blocks(content, blocks)
-        
-        # 8. 合并并重新排序
-        all_blocks = blocks + text_blocks
-        all_blocks.sort(key=lambda x: x['start_pos'])
+        cache_key = hashlib.md5(content.encode('utf-8')).hexdigest()
+        with _parse_cache_lock:
+            cached = _parse_cache.get(cache_key)
+            if cached is not None:
+                _parse_cache.move_to_end(cache_key)
+                return list(cached)
+        
+        # 流式过程中已喂入的内容是最终内容的前缀，只需解析剩余部分
+        blocks = self.stream_tokenizer.parse(content)
+        
+        with _parse_cache_lock:
+            _parse_cache[cache_key] = blocks
+            if len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+        
+        return list(blocks)
+    
+    def feed_stream_content(self, content: str):
+        """
+        流式输出过程中喂入当前已累积的内容，提前解析已完成的块
         
-        return all_blocks
+        Args:
+            content: 当前累积的回复内容
+        """
+        try:
+            self.stream_tokenizer.parse(content)
+        except Exception:
+            self.stream_tokenizer.reset()
     
     # ==================== 内容提取方法 ====================
     
@@ -273,6 +457,15 @@ class MarkdownUIParser:
         special_types = {'table', 'mermaid', 'code', 'math', 'heading'}
         return any(block['type'] in special_types for block in blocks)
 
+    def has_expensive_content(self, blocks: List[Dict[str, Any]]) -> bool:
+        """检查是否包含渲染开销较大的内容（Mermaid图表、公式、大表格），可延迟到可见时再渲染"""
+        for block in blocks:
+            if block['type'] in ('mermaid', 'math'):
+                return True
+            if block['type'] == 'table' and len(block['data'].get('rows', [])) > LARGE_TABLE_ROWS:
+                return True
+        return False
+
     def show_optimization_hint(self, reply_label):
         """显示优化提示"""
         try:
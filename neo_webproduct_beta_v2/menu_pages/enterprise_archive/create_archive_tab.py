@@ -4,15 +4,16 @@
 """
 from nicegui import ui,app
 from .hierarchy_selector_component import HierarchySelector
-import aiohttp
+from .hierarchy_cache import hierarchy_cache
+from .mongodb_service_client import mongodb_service_client
 import asyncio
 import re
 from datetime import datetime
 from common.exception_handler import log_info, log_error, safe_protect
 from auth import auth_manager
 
-# MongoDB服务API基础URL
-MONGODB_SERVICE_URL = "http://localhost:8001"
+# 档案同步时每批提交的字段数量
+SYNC_BATCH_SIZE = 200
 
 @safe_protect(name="创建档案页面", error_msg="创建档案页面加载失败")
 def create_archive_content():
@@ -171,56 +172,51 @@ def create_archive_content():
                 await asyncio.sleep(0.5)
             
             # 调用MongoDB服务API
-            async with aiohttp.ClientSession() as session:
-                request_data = {
-                    "enterprise_code": credit_code,
-                    "enterprise_name": enterprise_name
-                }
+            request_data = {
+                "enterprise_code": credit_code,
+                "enterprise_name": enterprise_name
+            }
                 
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/documents",
-                    json=request_data,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
+            response = await mongodb_service_client.create_document(request_data)
                     
-                    progress_bar.set_value("100%")
+            progress_bar.set_value("100%")
                     
-                    if response.status == 200:
-                        result = await response.json()
+            if response.status == 200:
+                result = response.data
                         
-                        if result.get('success', False):
-                            status_label.set_text('创建成功！')
+                if result.get('success', False):
+                    status_label.set_text('创建成功！')
                             
-                            ui.notify(
-                                f'企业档案创建成功！文档ID: {result.get("document_id")}',
-                                type='positive',
-                                timeout=5000
-                            )
+                    ui.notify(
+                        f'企业档案创建成功！文档ID: {result.get("document_id")}',
+                        type='positive',
+                        timeout=5000
+                    )
                             
-                            # 记录成功日志
-                            doc_log.push(f'✅ 档案创建成功: {enterprise_name}')
-                            doc_log.push(f'📄 文档ID: {result.get("document_id")}')
-                            doc_log.push(f'📊 创建字段数: {result.get("documents_count", 0)}')
+                    # 记录成功日志
+                    doc_log.push(f'✅ 档案创建成功: {enterprise_name}')
+                    doc_log.push(f'📄 文档ID: {result.get("document_id")}')
+                    doc_log.push(f'📊 创建字段数: {result.get("documents_count", 0)}')
                             
-                            # 自动填入文档名称
-                            code_input_right.set_value(credit_code)
-                            code_input_left.set_value(credit_code) 
+                    # 自动填入文档名称
+                    code_input_right.set_value(credit_code)
+                    code_input_left.set_value(credit_code) 
                             
-                            # 清空输入框
-                            credit_code_input.set_value('')
-                            enterprise_name_input.set_value('')
+                    # 清空输入框
+                    credit_code_input.set_value('')
+                    enterprise_name_input.set_value('')
                             
-                            log_info("企业档案创建成功", 
-                                    extra_data=f'{{"document_id": "{result.get("document_id")}"}}')
-                        else:
-                            error_msg = result.get('message', '创建失败')
-                            status_label.set_text(f'创建失败: {error_msg}')
-                            ui.notify(f'创建失败: {error_msg}', type='negative')
-                    else:
-                        error_text = await response.text()
-                        status_label.set_text('服务器错误')
-                        ui.notify(f'服务器错误 ({response.status})', type='negative')
-                        log_error(f"API调用失败", extra_data=f'{{"status": {response.status}, "response": "{error_text}"}}')
+                    log_info("企业档案创建成功", 
+                            extra_data=f'{{"document_id": "{result.get("document_id")}"}}')
+                else:
+                    error_msg = result.get('message', '创建失败')
+                    status_label.set_text(f'创建失败: {error_msg}')
+                    ui.notify(f'创建失败: {error_msg}', type='negative')
+            else:
+                error_text = response.text
+                status_label.set_text('服务器错误')
+                ui.notify(f'服务器错误 ({response.status})', type='negative')
+                log_error(f"API调用失败", extra_data=f'{{"status": {response.status}, "response": "{error_text}"}}')
                         
         except Exception as e:
             progress_bar.set_value(0)
@@ -286,40 +282,57 @@ def create_archive_content():
             
             doc_log.push(f'📋 发现 {len(fields_to_sync)} 个字段需要同步')
             
-            # 3. 遍历字段并执行同步
+            # 3. 按批次调用批量更新API，每批一次往返
             sync_success_count = 0
             sync_error_count = 0
+            total_fields = len(fields_to_sync)
             
-            for idx, field_info in enumerate(fields_to_sync):
-                full_path_code = field_info['full_path_code']
-                data_url = field_info['data_url']
-                field_name = field_info['field_name']
+            for batch_start in range(0, total_fields, SYNC_BATCH_SIZE):
+                batch = fields_to_sync[batch_start:batch_start + SYNC_BATCH_SIZE]
+                batch_end = batch_start + len(batch)
                 
-                # 显示当前同步信息
-                doc_log.push(f'🔄 [{idx+1}/{len(fields_to_sync)}] {data_url}{credit_code}')
+                # 显示当前批次进度
+                doc_log.push(f'🔄 [{batch_end}/{total_fields}] 正在同步第 {batch_start + 1}-{batch_end} 个字段')
                 
-                # 调用MongoDB服务的/api/v1/fields/update API
                 try:
-                    success = await call_fields_update_api(
+                    result = await call_fields_batch_update_api(
                         enterprise_code=credit_code,
-                        full_path_code=full_path_code,
-                        field_value=field_name  # 这里使用field_name作为默认值，您可能需要根据实际需求修改
+                        updates=[
+                            {
+                                'full_path_code': field_info['full_path_code'],
+                                # 这里使用field_name作为默认值，您可能需要根据实际需求修改
+                                'value': field_info['field_name']
+                            }
+                            for field_info in batch
+                        ]
                     )
                     
-                    if success:
-                        sync_success_count += 1
-                        doc_log.push(f'✅ {field_name} 同步成功')
-                    else:
-                        sync_error_count += 1
-                        doc_log.push(f'❌ {field_name} 同步失败')
+                    if result is None:
+                        sync_error_count += len(batch)
+                        doc_log.push(f'❌ 第 {batch_start + 1}-{batch_end} 个字段同步失败')
+                        continue
+                    
+                    failed_paths = set(result.get('not_found_fields', []))
+                    if not result.get('success', False) and not failed_paths:
+                        # 企业文档不存在或数据库写入失败
+                        sync_error_count += len(batch)
+                        doc_log.push(f"❌ 第 {batch_start + 1}-{batch_end} 个字段同步失败: {result.get('message', '')}")
+                        continue
+                    
+                    # 不允许修改的字段被服务端忽略，视为同步成功；未找到的字段计为失败
+                    sync_success_count += len(batch) - len(failed_paths)
+                    sync_error_count += len(failed_paths)
+                    
+                    for field_info in batch:
+                        if field_info['full_path_code'] in failed_paths:
+                            doc_log.push(f"❌ {field_info['field_name']} 同步失败: 字段未找到")
+                    
+                    doc_log.push(f'✅ 第 {batch_start + 1}-{batch_end} 个字段同步完成')
                         
                 except Exception as e:
-                    sync_error_count += 1
-                    doc_log.push(f'⚠️ {field_name} 同步异常: {str(e)}')
-                    log_error(f"字段同步异常: {field_name}", exception=e)
-                
-                # 添加短暂延迟，避免API调用过于频繁
-                await asyncio.sleep(0.1)
+                    sync_error_count += len(batch)
+                    doc_log.push(f'⚠️ 第 {batch_start + 1}-{batch_end} 个字段同步异常: {str(e)}')
+                    log_error(f"字段批量同步异常", exception=e)
             
             # 4. 显示同步结果
             doc_log.push(f'✅ 文档同步完成！成功: {sync_success_count}, 失败: {sync_error_count}')
@@ -334,44 +347,9 @@ def create_archive_content():
             log_error("文档同步异常", exception=e)
 
     async def get_hierarchy_data():
-        """获取层级数据 - 优先从app.storage.general获取，否则从API获取"""
+        """获取层级数据 - 使用进程内共享的层级数据缓存"""
         try:
-            # 1. 首先尝试从app.storage.general获取
-            hierarchy_data = app.storage.general.get('hierarchy_data')
-            if hierarchy_data:
-                # 检查数据是否过期（可选，这里设置为1小时过期）
-                timestamp = app.storage.general.get('hierarchy_data_timestamp', 0)
-                current_time = asyncio.get_event_loop().time()
-                if current_time - timestamp < 3600:  # 1小时内的数据认为有效
-                    log_info("从存储获取层级数据成功")
-                    return hierarchy_data
-            
-            # 2. 如果存储中没有或已过期，从API获取
-            log_info("从API获取层级数据")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{MONGODB_SERVICE_URL}/api/v1/hierarchy") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # 检查响应格式
-                        if isinstance(data, dict) and data.get('success', False):
-                            hierarchy_data = data.get('data', {})
-                            
-                            # 缓存到storage
-                            app.storage.general['hierarchy_data'] = hierarchy_data
-                            app.storage.general['hierarchy_data_timestamp'] = asyncio.get_event_loop().time()
-                            
-                            log_info("API获取层级数据成功并已缓存")
-                            return hierarchy_data
-                        else:
-                            log_error("层级数据响应格式错误", extra_data=f'{{"response": {data}}}')
-                            return None
-                    else:
-                        error_text = await response.text()
-                        log_error("获取层级数据API失败", 
-                                extra_data=f'{{"status": {response.status}, "response": "{error_text}"}}')
-                        return None
-                        
+            return await hierarchy_cache.get()
         except Exception as e:
             log_error("获取层级数据异常", exception=e)
             return None
@@ -389,35 +367,30 @@ def create_archive_content():
             }
             
             # 调用API
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/fields/update",
-                    json=request_data,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('success', False):
-                            # 使用API返回的message内容
-                            api_message = result.get('message', '字段更新成功')
-                            log_info(f"字段更新API调用成功: {api_message}", 
-                                    extra_data=f'{{"enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}"}}')
-                            return True
-                        else:
-                            # 使用API返回的message内容
-                            api_message = result.get('message', '字段更新失败')
-                            log_error(f"字段更新API返回失败: {api_message}", 
-                                    extra_data=f'{{"enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}"}}')
-                            # 显示API返回的具体错误信息
-                            ui.notify(f'字段更新失败: {api_message}', type='negative')
-                            return False
-                    else:
-                        error_text = await response.text()
-                        log_error(f"字段更新API调用失败", 
-                                extra_data=f'{{"status": {response.status}, "enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}", "response": "{error_text}"}}')
-                        # 显示HTTP错误信息
-                        ui.notify(f'API调用失败 (状态码: {response.status}): {error_text}', type='negative')
-                        return False
+            response = await mongodb_service_client.update_field(request_data)
+            if response.status == 200:
+                result = response.data
+                if result.get('success', False):
+                    # 使用API返回的message内容
+                    api_message = result.get('message', '字段更新成功')
+                    log_info(f"字段更新API调用成功: {api_message}", 
+                            extra_data=f'{{"enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}"}}')
+                    return True
+                else:
+                    # 使用API返回的message内容
+                    api_message = result.get('message', '字段更新失败')
+                    log_error(f"字段更新API返回失败: {api_message}", 
+                            extra_data=f'{{"enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}"}}')
+                    # 显示API返回的具体错误信息
+                    ui.notify(f'字段更新失败: {api_message}', type='negative')
+                    return False
+            else:
+                error_text = response.text
+                log_error(f"字段更新API调用失败", 
+                        extra_data=f'{{"status": {response.status}, "enterprise_code": "{enterprise_code}", "full_path_code": "{full_path_code}", "response": "{error_text}"}}')
+                # 显示HTTP错误信息
+                ui.notify(f'API调用失败 (状态码: {response.status}): {error_text}', type='negative')
+                return False
                             
         except Exception as e:
             log_error("字段更新API调用异常", exception=e, 
@@ -425,6 +398,58 @@ def create_archive_content():
             ui.notify(f'API调用异常: {str(e)}', type='negative')
             return False
 
+    async def call_fields_batch_update_api(enterprise_code: str, updates: list) -> dict:
+        """
+        调用MongoDB服务的/api/v1/fields/batch_update API
+
+        服务端正常响应时返回响应数据（包括没有任何字段可更新、success 为 False 的情况，
+        由调用方根据 not_found_fields 区分），请求失败或服务端报错时返回None
+        """
+        try:
+            # 构建API请求数据
+            request_data = {
+                "enterprise_code": enterprise_code,
+                "updates": [
+                    {
+                        "full_path_code": item['full_path_code'],
+                        "dict_fields": {
+                            "value": item['value']
+                        }
+                    }
+                    for item in updates
+                ]
+            }
+            
+            # 调用API
+            response = await mongodb_service_client.batch_update_fields(request_data)
+            if response.status == 200:
+                result = response.data
+                api_message = result.get('message', '')
+                if result.get('success', False) or result.get('updated_count', 0) > 0:
+                    log_info(f"字段批量更新API调用成功: {api_message}", 
+                            extra_data=f'{{"enterprise_code": "{enterprise_code}", "updated_count": {result.get("updated_count", 0)}}}')
+                elif result.get('not_found_fields'):
+                    # 字段均未找到：没有需要更新的内容，不是服务端错误
+                    log_info(f"字段批量更新无可更新字段: {api_message}", 
+                            extra_data=f'{{"enterprise_code": "{enterprise_code}", "not_found_count": {len(result["not_found_fields"])}}}')
+                else:
+                    log_error(f"字段批量更新API返回失败: {api_message}", 
+                            extra_data=f'{{"enterprise_code": "{enterprise_code}", "total_count": {len(updates)}}}')
+                    ui.notify(f'字段批量更新失败: {api_message}', type='negative')
+                return result
+            else:
+                error_text = response.text
+                log_error(f"字段批量更新API调用失败", 
+                        extra_data=f'{{"status": {response.status}, "enterprise_code": "{enterprise_code}", "response": "{error_text}"}}')
+                ui.notify(f'API调用失败 (状态码: {response.status}): {error_text}', type='negative')
+                return None
+                            
+        except Exception as e:
+            log_error("字段批量更新API调用异常", exception=e, 
+                    extra_data=f'{{"enterprise_code": "{enterprise_code}"}}')
+            ui.notify(f'API调用异常: {str(e)}', type='negative')
+            return None
+
     # ============================ 3、同步字段 ===========================
     @safe_protect(name="字段同步操作", error_msg="字段同步失败")
     async def sync_field():
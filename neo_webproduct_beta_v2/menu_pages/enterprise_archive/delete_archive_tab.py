@@ -2,13 +2,12 @@
 删除数据Tab逻辑
 """
 from nicegui import ui
-import aiohttp
+from .mongodb_service_client import mongodb_service_client
 import asyncio
 import re
 from datetime import datetime
 from common.exception_handler import log_info, log_error, safe_protect
 from auth import auth_manager
-MONGODB_SERVICE_URL = "http://localhost:8001"
 
 def delete_archive_content():
     """创建配置数据内容网格"""
@@ -127,83 +126,71 @@ def delete_archive_content():
             search_status.set_text('🔍 搜索中...')
             log_info(f"开始搜索企业: {search_text}")
             
-            async with aiohttp.ClientSession() as session:
-                # 构建请求数据
-                request_data = {
-                    "enterprise_text": search_text.strip(),
-                    "limit": 50  # 限制返回50条结果
-                }
-                
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/enterprises/search",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            response = await mongodb_service_client.search_enterprises(search_text.strip(), limit=50)
+            if response.status == 200:
+                data = response.data
                         
-                        if data.get('success', False):
-                            enterprises = data.get('enterprises', [])
-                            total_count = data.get('total_count', 0)
+                if data.get('success', False):
+                    enterprises = data.get('enterprises', [])
                             
-                            # 1、每次search_input搜索到的内容，使用全局变量select_values存储
-                            select_values = enterprises
+                    # 1、每次search_input搜索到的内容，使用全局变量select_values存储
+                    select_values = enterprises
                             
-                            # 同时存储到历史搜索数据中，用于后续保持选项显示
-                            for enterprise in enterprises:
-                                enterprise_code = enterprise.get('enterprise_code', '')
-                                if enterprise_code:
-                                    all_searched_enterprises[enterprise_code] = enterprise
+                    # 同时存储到历史搜索数据中，用于后续保持选项显示
+                    for enterprise in enterprises:
+                        enterprise_code = enterprise.get('enterprise_code', '')
+                        if enterprise_code:
+                            all_searched_enterprises[enterprise_code] = enterprise
                             
-                            # 构建下拉选项：显示 enterprise_code + enterprise_name，值为 enterprise_code
-                            options = {}
+                    # 构建下拉选项：显示 enterprise_code + enterprise_name，值为 enterprise_code
+                    options = {}
                             
-                            # 首先添加新搜索的结果
-                            for enterprise in enterprises:
-                                enterprise_code = enterprise.get('enterprise_code', '')
-                                enterprise_name = enterprise.get('enterprise_name', '')
-                                display_text = f"{enterprise_code} - {enterprise_name}"
-                                options[enterprise_code] = display_text
+                    # 首先添加新搜索的结果
+                    for enterprise in enterprises:
+                        enterprise_code = enterprise.get('enterprise_code', '')
+                        enterprise_name = enterprise.get('enterprise_name', '')
+                        display_text = f"{enterprise_code} - {enterprise_name}"
+                        options[enterprise_code] = display_text
                             
-                            # 然后确保已选择的项也在选项中（即使不在当前搜索结果中）
-                            current_selected = search_select.value if search_select.value else []
-                            for selected_code in current_selected:
-                                if selected_code not in options:  # 如果已选择的项不在新搜索结果中
-                                    if selected_code in all_searched_enterprises:
-                                        enterprise_info = all_searched_enterprises[selected_code]
-                                        enterprise_name = enterprise_info.get('enterprise_name', '')
-                                        display_text = f"{selected_code} - {enterprise_name}"
-                                        options[selected_code] = display_text
-                                    else:
-                                        # 如果历史数据中也找不到，就只显示代码
-                                        options[selected_code] = selected_code
+                    # 然后确保已选择的项也在选项中（即使不在当前搜索结果中）
+                    current_selected = search_select.value if search_select.value else []
+                    for selected_code in current_selected:
+                        if selected_code not in options:  # 如果已选择的项不在新搜索结果中
+                            if selected_code in all_searched_enterprises:
+                                enterprise_info = all_searched_enterprises[selected_code]
+                                enterprise_name = enterprise_info.get('enterprise_name', '')
+                                display_text = f"{selected_code} - {enterprise_name}"
+                                options[selected_code] = display_text
+                            else:
+                                # 如果历史数据中也找不到，就只显示代码
+                                options[selected_code] = selected_code
                             
-                            # 更新下拉选择器选项
-                            search_select.set_options(options)
+                    # 更新下拉选择器选项
+                    search_select.set_options(options)
                             
-                            # 保持用户当前已有的选择，不改变选中值
-                            if current_selected:
-                                search_select.set_value(current_selected)
+                    # 保持用户当前已有的选择，不改变选中值
+                    if current_selected:
+                        search_select.set_value(current_selected)
                             
-                            # 更新状态
-                            if len(enterprises) > 0:
-                                search_status.set_text(f'✅ 找到 {len(enterprises)} 条记录（共 {total_count} 条匹配）')
-                                log_info(f"企业搜索成功: 找到 {len(enterprises)} 条记录")
-                            else:
-                                search_status.set_text('❌ 未找到匹配的企业')
-                                log_info(f"企业搜索无结果: {search_text}")
-                        else:
-                            error_msg = data.get('message', '搜索失败')
-                            search_status.set_text(f'❌ {error_msg}')
-                            search_select.set_options({})
-                            select_values = []  # 失败时重置全局变量
-                            log_error(f"企业搜索API返回失败: {error_msg}")
+                    # 更新状态
+                    if len(enterprises) > 0:
+                        search_status.set_text(f'✅ 找到 {len(enterprises)} 条记录')
+                        log_info(f"企业搜索成功: 找到 {len(enterprises)} 条记录")
                     else:
-                        error_text = await response.text()
-                        search_status.set_text('❌ 搜索服务异常')
-                        search_select.set_options({})
-                        select_values = []  # 异常时重置全局变量
-                        log_error(f"企业搜索API请求失败: status={response.status}, response={error_text}")
+                        search_status.set_text('❌ 未找到匹配的企业')
+                        log_info(f"企业搜索无结果: {search_text}")
+                else:
+                    error_msg = data.get('message', '搜索失败')
+                    search_status.set_text(f'❌ {error_msg}')
+                    search_select.set_options({})
+                    select_values = []  # 失败时重置全局变量
+                    log_error(f"企业搜索API返回失败: {error_msg}")
+            else:
+                error_text = response.text
+                search_status.set_text('❌ 搜索服务异常')
+                search_select.set_options({})
+                select_values = []  # 异常时重置全局变量
+                log_error(f"企业搜索API请求失败: status={response.status}, response={error_text}")
                         
         except Exception as e:
             search_status.set_text('❌ 搜索过程发生异常')
@@ -360,48 +347,43 @@ def delete_archive_content():
             }
             
             # 调用API
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(
-                    f"{MONGODB_SERVICE_URL}/api/v1/documents/batch",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
+            response = await mongodb_service_client.delete_documents(request_data)
                     
-                    if response.status == 200:
-                        data = await response.json()
+            if response.status == 200:
+                data = response.data
                         
-                        if data.get('success', False):
-                            # 5. 成功时在doc_log中展示结果
-                            deleted_count = data.get('deleted_count', 0)
-                            message = data.get('message', '删除成功')
+                if data.get('success', False):
+                    # 5. 成功时在doc_log中展示结果
+                    deleted_count = data.get('deleted_count', 0)
+                    message = data.get('message', '删除成功')
                             
-                            doc_log.push(f'✅ {message}')
-                            doc_log.push(f'📊 实际删除了 {deleted_count} 个企业档案')
-                            doc_log.push(f'🗂️ 删除的企业代码: {select_options}')
+                    doc_log.push(f'✅ {message}')
+                    doc_log.push(f'📊 实际删除了 {deleted_count} 个企业档案')
+                    doc_log.push(f'🗂️ 删除的企业代码: {select_options}')
                             
-                            # 成功通知
-                            ui.notify(f'成功删除 {deleted_count} 个企业档案', type='positive')
+                    # 成功通知
+                    ui.notify(f'成功删除 {deleted_count} 个企业档案', type='positive')
                             
-                            # 记录成功日志
-                            log_info("批量删除操作成功", 
-                                    extra_data=f'{{"deleted_count": {deleted_count}, "enterprises": {select_options}}}')
+                    # 记录成功日志
+                    log_info("批量删除操作成功", 
+                            extra_data=f'{{"deleted_count": {deleted_count}, "enterprises": {select_options}}}')
                             
-                            # 清空选择（可选，根据用户体验决定）
-                            # await on_cancel_config()
+                    # 清空选择（可选，根据用户体验决定）
+                    # await on_cancel_config()
                             
-                        else:
-                            # API返回失败
-                            error_msg = data.get('message', '删除操作失败')
-                            doc_log.push(f'❌ 删除失败: {error_msg}')
-                            ui.notify(f'删除失败: {error_msg}', type='negative')
-                            log_error(f"批量删除API返回失败: {error_msg}")
+                else:
+                    # API返回失败
+                    error_msg = data.get('message', '删除操作失败')
+                    doc_log.push(f'❌ 删除失败: {error_msg}')
+                    ui.notify(f'删除失败: {error_msg}', type='negative')
+                    log_error(f"批量删除API返回失败: {error_msg}")
                             
-                    else:
-                        # HTTP状态码错误
-                        error_text = await response.text()
-                        doc_log.push(f'❌ 删除服务异常 (状态码: {response.status})')
-                        ui.notify('删除服务异常', type='negative')
-                        log_error(f"批量删除API请求失败: status={response.status}, response={error_text}")
+            else:
+                # HTTP状态码错误
+                error_text = response.text
+                doc_log.push(f'❌ 删除服务异常 (状态码: {response.status})')
+                ui.notify('删除服务异常', type='negative')
+                log_error(f"批量删除API请求失败: status={response.status}, response={error_text}")
                         
         except Exception as e:
             # 异常处理
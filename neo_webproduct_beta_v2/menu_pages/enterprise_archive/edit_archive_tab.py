@@ -4,13 +4,10 @@
 
 from nicegui import ui
 from .hierarchy_selector_component import HierarchySelector
+from .mongodb_service_client import mongodb_service_client
 from common.exception_handler import log_info, log_error, safe_protect
-import aiohttp
 import asyncio
 
-# MongoDB服务API基础URL
-MONGODB_SERVICE_URL = "http://localhost:8001"
-
 @safe_protect(name="编辑档案页面", error_msg="编辑档案页面加载失败")
 def edit_archive_content():
     """编辑档案内容页面"""
@@ -31,58 +28,46 @@ def edit_archive_content():
             search_status.set_text('🔍 搜索中...')
             log_info(f"开始搜索企业: {search_text}")
             
-            async with aiohttp.ClientSession() as session:
-                # 构建请求数据
-                request_data = {
-                    "enterprise_text": search_text.strip(),
-                    "limit": 50  # 限制返回50条结果
-                }
-                
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/enterprises/search",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            response = await mongodb_service_client.search_enterprises(search_text.strip(), limit=50)
+            if response.status == 200:
+                data = response.data
                         
-                        if data.get('success', False):
-                            enterprises = data.get('enterprises', [])
-                            total_count = data.get('total_count', 0)
+                if data.get('success', False):
+                    enterprises = data.get('enterprises', [])
                             
-                            # 构建下拉选项：显示 enterprise_code + enterprise_name，值为 enterprise_code
-                            options = {}
-                            for enterprise in enterprises:
-                                enterprise_code = enterprise.get('enterprise_code', '')
-                                enterprise_name = enterprise.get('enterprise_name', '')
-                                display_text = f"{enterprise_code} - {enterprise_name}"
-                                options[enterprise_code] = display_text
+                    # 构建下拉选项：显示 enterprise_code + enterprise_name，值为 enterprise_code
+                    options = {}
+                    for enterprise in enterprises:
+                        enterprise_code = enterprise.get('enterprise_code', '')
+                        enterprise_name = enterprise.get('enterprise_name', '')
+                        display_text = f"{enterprise_code} - {enterprise_name}"
+                        options[enterprise_code] = display_text
                             
-                            # 更新下拉选择器选项
-                            search_select.set_options(options)
+                    # 更新下拉选择器选项
+                    search_select.set_options(options)
                             
-                            # 更新状态
-                            if len(enterprises) > 0:
-                                first_enterprise_code = enterprises[0].get('enterprise_code', '')
-                                if first_enterprise_code:
-                                    search_select.set_value(first_enterprise_code)
+                    # 更新状态
+                    if len(enterprises) > 0:
+                        first_enterprise_code = enterprises[0].get('enterprise_code', '')
+                        if first_enterprise_code:
+                            search_select.set_value(first_enterprise_code)
 
-                                # 更新状态（移除ui.notify避免上下文错误）    
-                                search_status.set_text(f'✅ 找到 {len(enterprises)} 条记录（共 {total_count} 条匹配）')
-                                log_info(f"企业搜索成功: 找到 {len(enterprises)} 条记录")
-                            else:
-                                search_status.set_text('❌ 未找到匹配的企业')
-                                log_info(f"企业搜索无结果: {search_text}")
-                        else:
-                            error_msg = data.get('message', '搜索失败')
-                            search_status.set_text(f'❌ {error_msg}')
-                            search_select.set_options({})
-                            log_error(f"企业搜索API返回失败: {error_msg}")
+                        # 更新状态（移除ui.notify避免上下文错误）    
+                        search_status.set_text(f'✅ 找到 {len(enterprises)} 条记录')
+                        log_info(f"企业搜索成功: 找到 {len(enterprises)} 条记录")
                     else:
-                        error_text = await response.text()
-                        search_status.set_text('❌ 搜索服务异常')
-                        search_select.set_options({})
-                        log_error(f"企业搜索API请求失败: status={response.status}, response={error_text}")
+                        search_status.set_text('❌ 未找到匹配的企业')
+                        log_info(f"企业搜索无结果: {search_text}")
+                else:
+                    error_msg = data.get('message', '搜索失败')
+                    search_status.set_text(f'❌ {error_msg}')
+                    search_select.set_options({})
+                    log_error(f"企业搜索API返回失败: {error_msg}")
+            else:
+                error_text = response.text
+                search_status.set_text('❌ 搜索服务异常')
+                search_select.set_options({})
+                log_error(f"企业搜索API请求失败: status={response.status}, response={error_text}")
                         
         except Exception as e:
             search_status.set_text('❌ 搜索过程发生异常')
@@ -158,43 +143,32 @@ def edit_archive_content():
                 fields_param = [fields_param] if fields_param else []
 
             # 3. 调用API: /api/v1/enterprises/query_fields
-            async with aiohttp.ClientSession() as session:
-                request_data = {
-                    "enterprise_code": enterprise_code,
-                    "path_code_param": path_code_param,
-                    "fields_param": fields_param
-                }
-                
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/enterprises/query_fields",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success', False):
-                            # 4. 成功调用API后，首先判断返回结果是否正确
-                            query_results = data.get('fields', [])
+            response = await mongodb_service_client.query_fields(enterprise_code, path_code_param, fields_param)
+            if response.status == 200:
+                data = response.data
+                if data.get('success', False):
+                    # 4. 成功调用API后，首先判断返回结果是否正确
+                    query_results = data.get('fields', [])
                             
-                            if not query_results:
-                                query_status.set_text('❌ 未查询到相关数据')
-                                # ui.notify('未查询到相关数据', type='info')
-                                return
+                    if not query_results:
+                        query_status.set_text('❌ 未查询到相关数据')
+                        # ui.notify('未查询到相关数据', type='info')
+                        return
 
-                            query_status.set_text(f'✅ 查询成功，找到 {len(query_results)} 条数据')
-                            log_info(f"档案数据查询成功: 找到 {len(query_results)} 条记录")
+                    query_status.set_text(f'✅ 查询成功，找到 {len(query_results)} 条数据')
+                    log_info(f"档案数据查询成功: 找到 {len(query_results)} 条记录")
                             
-                            # 显示要修改的查询结果
-                            await display_query_results(query_results)
+                    # 显示要修改的查询结果
+                    await display_query_results(query_results)
                             
-                        else:
-                            error_msg = data.get('message', '查询失败')
-                            query_status.set_text(f'❌ {error_msg}')
-                            log_error(f"档案数据查询API返回失败: {error_msg}")
-                    else:
-                        error_text = await response.text()
-                        query_status.set_text('❌ 查询服务异常')
-                        log_error(f"档案数据查询API请求失败: status={response.status}, response={error_text}")
+                else:
+                    error_msg = data.get('message', '查询失败')
+                    query_status.set_text(f'❌ {error_msg}')
+                    log_error(f"档案数据查询API返回失败: {error_msg}")
+            else:
+                error_text = response.text
+                query_status.set_text('❌ 查询服务异常')
+                log_error(f"档案数据查询API请求失败: status={response.status}, response={error_text}")
                         
         except Exception as e:
             query_status.set_text('❌ 查询过程发生异常')
@@ -865,37 +839,32 @@ def edit_archive_content():
             log_info(f"开始调用编辑字段API", 
                     extra_data=f'{{"enterprise_code": "{enterprise_code}", "path_code_param": "{path_code_param}", "fields_count": {len(dict_fields)}}}')
             
-            async with aiohttp.ClientSession() as session:
-                request_data = {
-                    "enterprise_code": enterprise_code,
-                    "path_code_param": path_code_param,
-                    "dict_fields": dict_fields
-                }
+            request_data = {
+                "enterprise_code": enterprise_code,
+                "path_code_param": path_code_param,
+                "dict_fields": dict_fields
+            }
                 
-                async with session.post(
-                    f"{MONGODB_SERVICE_URL}/api/v1/enterprises/edit_field_value",
-                    json=request_data,
-                    headers={'Content-Type': 'application/json'}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            response = await mongodb_service_client.edit_field_value(request_data)
+            if response.status == 200:
+                data = response.data
                         
-                        if data.get('success', False):
-                            query_status.set_text(f'✅ 字段更新成功！更新了 {data.get("updated_count", 0)} 个字段')  
-                            ui.notify(f'字段更新成功！更新了 {data.get("updated_count", 0)} 个字段', type='positive')
-                            log_info(f"字段更新成功: 更新了 {data.get('updated_count', 0)} 个字段")
-                            return True
-                        else:
-                            error_msg = data.get('message', '更新失败')
-                            query_status.set_text(f'❌ 更新失败: {error_msg}')  
-                            ui.notify(f'更新失败: {error_msg}', type='negative')
-                            log_error(f"字段更新API返回失败: {error_msg}")
-                            return False
-                    else:
-                        error_text = await response.text()
-                        ui.notify(f'服务器错误 (状态码: {response.status})', type='negative')
-                        log_error(f"字段更新API请求失败: status={response.status}, response={error_text}")
-                        return False
+                if data.get('success', False):
+                    query_status.set_text(f'✅ 字段更新成功！更新了 {data.get("updated_count", 0)} 个字段')  
+                    ui.notify(f'字段更新成功！更新了 {data.get("updated_count", 0)} 个字段', type='positive')
+                    log_info(f"字段更新成功: 更新了 {data.get('updated_count', 0)} 个字段")
+                    return True
+                else:
+                    error_msg = data.get('message', '更新失败')
+                    query_status.set_text(f'❌ 更新失败: {error_msg}')  
+                    ui.notify(f'更新失败: {error_msg}', type='negative')
+                    log_error(f"字段更新API返回失败: {error_msg}")
+                    return False
+            else:
+                error_text = response.text
+                ui.notify(f'服务器错误 (状态码: {response.status})', type='negative')
+                log_error(f"字段更新API请求失败: status={response.status}, response={error_text}")
+                return False
                         
         except Exception as e:
             ui.notify(f'API调用异常: {str(e)}', type='negative')
@@ -0,0 +1,131 @@
+"""
+层级数据进程内共享缓存
+所有层级选择器组件和创建档案页面共用一份层级数据，不再写入app.storage.general，
+避免大体积层级数据进入NiceGUI的持久化文件并拖慢其他storage写入。
+支持TTL过期、显式失效，过期后携带ETag向服务端校验，未变化时只刷新时间戳。
+"""
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+from nicegui import app
+
+from common.exception_handler import log_info, log_error
+from .hierarchy_index import HierarchyIndex
+from .mongodb_service_client import mongodb_service_client
+
+# 层级数据缓存有效期（秒）
+HIERARCHY_CACHE_TTL = 3600
+
+# 旧版本写入 app.storage.general 的层级数据键
+LEGACY_STORAGE_KEYS = ('hierarchy_data', 'hierarchy_data_timestamp')
+
+class HierarchyCache:
+    """层级数据缓存（进程内单例使用）"""
+
+    def __init__(self, ttl: float = HIERARCHY_CACHE_TTL):
+        """
+        初始化层级数据缓存
+
+        Args:
+            ttl: 缓存有效期（秒）
+        """
+        self.ttl = ttl
+        self._data: Optional[Dict[str, Any]] = None
+        # 与 _data 同一版本的扁平索引，只在数据版本变化（200响应）时重建
+        self._index: Optional[HierarchyIndex] = None
+        self._etag: Optional[str] = None
+        # 使用单调时钟，不受系统时间调整影响
+        self._loaded_at: float = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _is_fresh(self) -> bool:
+        return self._data is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """
+        同步获取未过期的缓存数据，不触发网络请求
+
+        Returns:
+            Optional[Dict]: 层级数据，未加载或已过期时返回None
+        """
+        return self._data if self._is_fresh() else None
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """
+        获取层级数据，缓存过期或不存在时从服务端加载（并发调用只发起一次请求）
+
+        Returns:
+            Optional[Dict]: 层级数据，加载失败时返回过期数据（如有）或None
+        """
+        if self._is_fresh():
+            return self._data
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # 等待锁期间其他协程可能已完成加载
+            if self._is_fresh():
+                return self._data
+
+            await self._refresh()
+            return self._data
+
+    def index(self) -> Optional[HierarchyIndex]:
+        """
+        获取当前层级数据版本对应的扁平索引，不触发网络请求
+
+        Returns:
+            Optional[HierarchyIndex]: 索引，层级数据尚未加载时返回None
+        """
+        return self._index
+
+    def invalidate(self):
+        """显式使缓存失效，下次获取时向服务端重新校验"""
+        self._loaded_at = 0.0
+        log_info("层级数据缓存已失效")
+
+    async def _refresh(self):
+        """向服务端获取层级数据，携带ETag做条件请求"""
+        try:
+            log_info("开始获取层级数据", extra_data='{"api": "/api/v1/hierarchy"}')
+
+            etag = self._etag if self._data is not None else None
+            response = await mongodb_service_client.get_hierarchy(etag)
+            if response.status == 304:
+                self._loaded_at = time.monotonic()
+                log_info("层级数据未变化，沿用缓存")
+                return
+
+            if response.status == 200:
+                data = response.data
+
+                # 检查响应格式
+                if isinstance(data, dict) and data.get('success', False):
+                    hierarchy_data = data.get('data', {})
+                    index = HierarchyIndex(hierarchy_data)
+                    self._data = hierarchy_data
+                    self._index = index
+                    self._etag = response.headers.get('ETag')
+                    self._loaded_at = time.monotonic()
+                    log_info("成功获取层级数据",
+                            extra_data=f'{{"categories_count": {len(hierarchy_data.get("l1_categories", []))}, "l3_count": {len(index.l3_nodes)}, "fields_count": {len(index.fields)}}}')
+                else:
+                    log_error("层级数据响应格式错误",
+                             extra_data=f'{{"response": {data}}}')
+            else:
+                log_error("获取层级数据失败",
+                         extra_data=f'{{"status": {response.status}, "response": "{response.text}"}}')
+
+        except Exception as e:
+            log_error("获取层级数据异常", exception=e)
+
+# 进程内共享的层级数据缓存
+hierarchy_cache = HierarchyCache()
+
+def purge_legacy_hierarchy_storage():
+    """删除旧版本留在 app.storage.general 中的层级数据（应用启动时调用一次）"""
+    removed = [key for key in LEGACY_STORAGE_KEYS if app.storage.general.pop(key, None) is not None]
+    if removed:
+        log_info("已清理旧版层级数据持久化缓存", extra_data=f'{{"keys": "{", ".join(removed)}"}}')
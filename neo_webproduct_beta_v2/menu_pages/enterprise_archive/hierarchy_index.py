@@ -0,0 +1,79 @@
+"""
+层级数据扁平索引 - 供层级选择器做O(1)查找
+层级数据加载后一次性建立 编码->节点、父级->子节点选项、field_code->字段信息 的索引，
+索引由 hierarchy_cache 在每个数据版本加载时建立并与数据一同保存，所有客户端连接共享。
+"""
+from typing import Dict, Any, List, Optional
+
+class HierarchyIndex:
+    """层级数据扁平索引"""
+
+    def __init__(self, hierarchy_data: Dict[str, Any]):
+        """
+        根据层级数据建立索引
+
+        Args:
+            hierarchy_data: /api/v1/hierarchy 返回的层级数据（包含l1_categories）
+        """
+        # 编码 -> 节点（l1/l2/l3 节点保留原始引用，包含path_code、path_name等）
+        self.l1_nodes: Dict[str, Dict[str, Any]] = {}
+        self.l2_nodes: Dict[str, Dict[str, Any]] = {}
+        self.l3_nodes: Dict[str, Dict[str, Any]] = {}
+        self.fields: Dict[str, Dict[str, Any]] = {}
+
+        # (层级, 父级编码) -> 选项列表 [{'value': code, 'label': name}]
+        self.options: Dict[tuple, List[Dict[str, str]]] = {}
+
+        l1_options = []
+        for l1 in hierarchy_data.get('l1_categories', []):
+            l1_code = l1.get('l1_code', '')
+            self.l1_nodes[l1_code] = l1
+            l1_options.append({'value': l1_code, 'label': l1.get('l1_name', '')})
+
+            l2_options = []
+            for l2 in l1.get('l2_categories', []):
+                l2_code = l2.get('l2_code', '')
+                self.l2_nodes[l2_code] = l2
+                l2_options.append({'value': l2_code, 'label': l2.get('l2_name', '')})
+
+                l3_options = []
+                for l3 in l2.get('l3_categories', []):
+                    l3_code = l3.get('l3_code', '')
+                    self.l3_nodes[l3_code] = l3
+                    l3_options.append({'value': l3_code, 'label': l3.get('l3_name', '')})
+
+                    field_options = []
+                    for field in l3.get('fields', []):
+                        field_code = field.get('field_code', '')
+                        # 与原遍历逻辑一致：重复的field_code以第一次出现的为准
+                        self.fields.setdefault(field_code, field)
+                        field_options.append({'value': field_code, 'label': field.get('field_name', '')})
+                    self.options[('field', l3_code)] = field_options
+
+                self.options[('l3', l2_code)] = l3_options
+
+            self.options[('l2', l1_code)] = l2_options
+
+        self.options[('l1', '')] = l1_options
+
+    def get_options(self, level: str, parent_code: str = "") -> List[Dict[str, str]]:
+        """获取指定层级的选项，l1 不需要 parent_code"""
+        if level != 'l1' and not parent_code:
+            return []
+        return self.options.get((level, parent_code or ''), [])
+
+    def get_field(self, field_code: str) -> Optional[Dict[str, Any]]:
+        """根据field_code获取字段信息"""
+        return self.fields.get(field_code)
+
+    def get_l3(self, l3_code: str) -> Optional[Dict[str, Any]]:
+        """根据l3_code获取三级分类信息"""
+        return self.l3_nodes.get(l3_code)
+
+    def get_l2(self, l2_code: str) -> Optional[Dict[str, Any]]:
+        """根据l2_code获取二级分类信息"""
+        return self.l2_nodes.get(l2_code)
+
+    def get_l1(self, l1_code: str) -> Optional[Dict[str, Any]]:
+        """根据l1_code获取一级分类信息"""
+        return self.l1_nodes.get(l1_code)
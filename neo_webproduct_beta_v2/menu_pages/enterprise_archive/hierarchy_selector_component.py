@@ -6,13 +6,10 @@
 """
 from nicegui import app, ui
 from common.exception_handler import log_info, log_error
-import aiohttp
+from .hierarchy_cache import hierarchy_cache
 import asyncio
 from typing import Dict, Any, List, Optional
 
-# MongoDB服务API基础URL
-MONGODB_SERVICE_URL = "http://localhost:8001"
-
 class HierarchySelector:
     """层级选择器组件，类似Vue组件"""
     
@@ -249,17 +246,8 @@ class HierarchySelector:
             if not hierarchy_data or not field_code:
                 return None
                 
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            
-            # 遍历所有层级查找字段名称
-            for l1 in l1_categories:
-                for l2 in l1.get('l2_categories', []):
-                    for l3 in l2.get('l3_categories', []):
-                        for field in l3.get('fields', []):
-                            if field.get('field_code') == field_code:
-                                return field.get('field_name', '')
-            
-            return None
+            field = self._find_field_info(hierarchy_data, field_code)
+            return field.get('field_name', '') if field else None
             
         except Exception as e:
             log_error(f"查找字段名称失败: {field_code}", exception=e)
@@ -338,14 +326,8 @@ class HierarchySelector:
     def _find_field_info(self, hierarchy_data: Dict[str, Any], field_code: str) -> Optional[Dict[str, Any]]:
         """查找字段信息"""
         try:
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            for l1 in l1_categories:
-                for l2 in l1.get('l2_categories', []):
-                    for l3 in l2.get('l3_categories', []):
-                        for field in l3.get('fields', []):
-                            if field.get('field_code') == field_code:
-                                return field
-            return None
+            index = hierarchy_cache.index() if hierarchy_data else None
+            return index.get_field(field_code) if index else None
         except Exception as e:
             log_error("查找字段信息失败", exception=e)
             return None
@@ -353,13 +335,8 @@ class HierarchySelector:
     def _find_l3_info(self, hierarchy_data: Dict[str, Any], l3_code: str) -> Optional[Dict[str, Any]]:
         """查找三级分类信息"""
         try:
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            for l1 in l1_categories:
-                for l2 in l1.get('l2_categories', []):
-                    for l3 in l2.get('l3_categories', []):
-                        if l3.get('l3_code') == l3_code:
-                            return l3
-            return None
+            index = hierarchy_cache.index() if hierarchy_data else None
+            return index.get_l3(l3_code) if index else None
         except Exception as e:
             log_error("查找三级分类信息失败", exception=e)
             return None
@@ -367,12 +344,8 @@ class HierarchySelector:
     def _find_l2_info(self, hierarchy_data: Dict[str, Any], l2_code: str) -> Optional[Dict[str, Any]]:
         """查找二级分类信息"""
         try:
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            for l1 in l1_categories:
-                for l2 in l1.get('l2_categories', []):
-                    if l2.get('l2_code') == l2_code:
-                        return l2
-            return None
+            index = hierarchy_cache.index() if hierarchy_data else None
+            return index.get_l2(l2_code) if index else None
         except Exception as e:
             log_error("查找二级分类信息失败", exception=e)
             return None
@@ -380,11 +353,8 @@ class HierarchySelector:
     def _find_l1_info(self, hierarchy_data: Dict[str, Any], l1_code: str) -> Optional[Dict[str, Any]]:
         """查找一级分类信息"""
         try:
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            for l1 in l1_categories:
-                if l1.get('l1_code') == l1_code:
-                    return l1
-            return None
+            index = hierarchy_cache.index() if hierarchy_data else None
+            return index.get_l1(l1_code) if index else None
         except Exception as e:
             log_error("查找一级分类信息失败", exception=e)
             return None
@@ -445,140 +415,37 @@ class HierarchySelector:
         
         asyncio.create_task(do_load())
     
-    async def _fetch_hierarchy_data(self) -> Optional[Dict[str, Any]]:
-        """调用MongoDB服务的/api/v1/hierarchy接口获取4级层级数据 - 保持原有API不变"""
-        try:
-            log_info("开始获取层级数据", extra_data='{"api": "/api/v1/hierarchy"}')
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{MONGODB_SERVICE_URL}/api/v1/hierarchy") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # 检查响应格式
-                        if isinstance(data, dict) and data.get('success', False):
-                            hierarchy_data = data.get('data', {})
-                            log_info("成功获取层级数据", 
-                                    extra_data=f'{{"categories_count": {len(hierarchy_data.get("l1_categories", []))}}}')
-                            return hierarchy_data
-                        else:
-                            log_error("层级数据响应格式错误", 
-                                     extra_data=f'{{"response": {data}}}')
-                            return None
-                    else:
-                        error_text = await response.text()
-                        log_error("获取层级数据失败", 
-                                 extra_data=f'{{"status": {response.status}, "response": "{error_text}"}}')
-                        return None
-                        
-        except Exception as e:
-            log_error("获取层级数据异常", exception=e)
-            return None
-    
     async def _ensure_hierarchy_data_in_storage(self) -> Optional[Dict[str, Any]]:
-        """确保存储中有层级数据，如果没有则获取并存储 - 保持原有逻辑不变"""
+        """确保有可用的层级数据，优先使用组件缓存，否则从进程内共享缓存获取"""
         try:
-            # 尝试从缓存中获取
+            # 尝试从组件缓存中获取
             if self.hierarchy_data_cache['data']:
                 return self.hierarchy_data_cache['data']
             
-            # 尝试从app.storage.general中获取
-            hierarchy_data = self._get_hierarchy_data_from_storage()
+            # 从进程内共享缓存获取（过期或不存在时由共享缓存统一请求API）
+            hierarchy_data = await hierarchy_cache.get()
             if hierarchy_data:
                 self.hierarchy_data_cache['data'] = hierarchy_data
-                return hierarchy_data
-            
-            # 如果存储中没有，则通过API获取
-            hierarchy_data = await self._fetch_hierarchy_data()
-            if hierarchy_data:
-                # 存储到app.storage.general
-                app.storage.general['hierarchy_data'] = hierarchy_data
-                app.storage.general['hierarchy_data_timestamp'] = asyncio.get_event_loop().time()
-                
-                # 更新缓存
-                self.hierarchy_data_cache['data'] = hierarchy_data
-                log_info("层级数据已缓存到storage")
-                return hierarchy_data
-            
-            return None
+            return hierarchy_data
             
         except Exception as e:
             log_error("确保层级数据存在失败", exception=e)
             return None
     
     def _get_hierarchy_data_from_storage(self) -> Optional[Dict[str, Any]]:
-        """从app.storage.general中获取层级数据 - 保持原有逻辑不变"""
-        try:
-            hierarchy_data = app.storage.general.get('hierarchy_data')
-            if hierarchy_data:
-                # 检查数据是否过期（可选，这里设置为1小时过期）
-                timestamp = app.storage.general.get('hierarchy_data_timestamp', 0)
-                current_time = asyncio.get_event_loop().time()
-                if current_time - timestamp < 3600:  # 1小时内的数据认为有效
-                    return hierarchy_data
-                else:
-                    log_info("层级数据已过期，需要重新获取")
-                    return None
-            return None
-        except Exception as e:
-            log_error("从存储获取层级数据失败", exception=e)
-            return None
+        """从进程内共享缓存中获取未过期的层级数据"""
+        return hierarchy_cache.peek()
     
     def _extract_level_options(self, hierarchy_data: Dict[str, Any], level: str, parent_code: str = "") -> List[Dict[str, str]]:
-        """从层级数据中提取指定层级的选项 - 保持原有逻辑不变"""
-        options = []
+        """从层级索引中提取指定层级的选项"""
         try:
-            if not hierarchy_data:
-                return options
-                
-            l1_categories = hierarchy_data.get('l1_categories', [])
-            
-            if level == 'l1':
-                # 第一级分类
-                for l1 in l1_categories:
-                    options.append({
-                        'value': l1.get('l1_code', ''),
-                        'label': l1.get('l1_name', '')
-                    })
-                    
-            elif level == 'l2' and parent_code:
-                # 第二级分类
-                for l1 in l1_categories:
-                    if l1.get('l1_code') == parent_code:
-                        for l2 in l1.get('l2_categories', []):
-                            options.append({
-                                'value': l2.get('l2_code', ''),
-                                'label': l2.get('l2_name', '')
-                            })
-                        break
-                        
-            elif level == 'l3' and parent_code:
-                # 第三级分类
-                for l1 in l1_categories:
-                    for l2 in l1.get('l2_categories', []):
-                        if l2.get('l2_code') == parent_code:
-                            for l3 in l2.get('l3_categories', []):
-                                options.append({
-                                    'value': l3.get('l3_code', ''),
-                                    'label': l3.get('l3_name', '')
-                                })
-                            break
-                            
-            elif level == 'field' and parent_code:
-                # 第四级（字段）
-                for l1 in l1_categories:
-                    for l2 in l1.get('l2_categories', []):
-                        for l3 in l2.get('l3_categories', []):
-                            if l3.get('l3_code') == parent_code:
-                                for field in l3.get('fields', []):
-                                    options.append({
-                                        'value': field.get('field_code', ''),
-                                        'label': field.get('field_name', '')
-                                    })
-                                break                    
+            index = hierarchy_cache.index() if hierarchy_data else None
+            if not index:
+                return []
+            return list(index.get_options(level, parent_code))
         except Exception as e:
             log_error(f"提取{level}级别选项失败", exception=e)
-        return options
+        return []
     
     def get_selected_values(self) -> Dict[str, Any]:
         """
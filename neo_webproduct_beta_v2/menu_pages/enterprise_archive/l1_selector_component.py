@@ -17,13 +17,10 @@ selected_names = selector.get_selected_l1_names()  # ['名称1', '名称2']
 """
 from nicegui import app, ui
 from common.exception_handler import log_info, log_error
-import aiohttp
+from .hierarchy_cache import hierarchy_cache
 import asyncio
 from typing import Dict, Any, List, Optional
 
-# MongoDB服务API基础URL
-MONGODB_SERVICE_URL = "http://localhost:8001"
-
 class L1Selector:
     """一级分类选择器组件"""
     
@@ -127,84 +124,26 @@ class L1Selector:
         
         asyncio.create_task(do_load())
     
-    async def _fetch_hierarchy_data(self) -> Optional[Dict[str, Any]]:
-        """调用MongoDB服务的/api/v1/hierarchy接口获取层级数据"""
-        try:
-            log_info("开始获取层级数据", extra_data='{"api": "/api/v1/hierarchy"}')
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{MONGODB_SERVICE_URL}/api/v1/hierarchy") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # 检查响应格式
-                        if isinstance(data, dict) and data.get('success', False):
-                            hierarchy_data = data.get('data', {})
-                            log_info("成功获取层级数据", 
-                                    extra_data=f'{{"categories_count": {len(hierarchy_data.get("l1_categories", []))}}}')
-                            return hierarchy_data
-                        else:
-                            log_error("层级数据响应格式错误", 
-                                     extra_data=f'{{"response": {data}}}')
-                            return None
-                    else:
-                        error_text = await response.text()
-                        log_error("获取层级数据失败", 
-                                 extra_data=f'{{"status": {response.status}, "response": "{error_text}"}}')
-                        return None
-                        
-        except Exception as e:
-            log_error("获取层级数据异常", exception=e)
-            return None
-    
     async def _ensure_hierarchy_data_in_storage(self) -> Optional[Dict[str, Any]]:
-        """确保存储中有层级数据，如果没有则获取并存储"""
+        """确保有可用的层级数据，优先使用组件缓存，否则从进程内共享缓存获取"""
         try:
-            # 尝试从缓存中获取
+            # 尝试从组件缓存中获取
             if self.hierarchy_data_cache['data']:
                 return self.hierarchy_data_cache['data']
             
-            # 尝试从app.storage.general中获取
-            hierarchy_data = self._get_hierarchy_data_from_storage()
-            if hierarchy_data:
-                self.hierarchy_data_cache['data'] = hierarchy_data
-                return hierarchy_data
-            
-            # 如果存储中没有，则通过API获取
-            hierarchy_data = await self._fetch_hierarchy_data()
+            # 从进程内共享缓存获取（过期或不存在时由共享缓存统一请求API）
+            hierarchy_data = await hierarchy_cache.get()
             if hierarchy_data:
-                # 存储到app.storage.general
-                app.storage.general['hierarchy_data'] = hierarchy_data
-                app.storage.general['hierarchy_data_timestamp'] = asyncio.get_event_loop().time()
-                
-                # 更新缓存
                 self.hierarchy_data_cache['data'] = hierarchy_data
-                log_info("层级数据已缓存到storage")
-                return hierarchy_data
-            
-            return None
+            return hierarchy_data
             
         except Exception as e:
             log_error("确保层级数据存在失败", exception=e)
             return None
     
     def _get_hierarchy_data_from_storage(self) -> Optional[Dict[str, Any]]:
-        """从app.storage.general中获取层级数据"""
-        try:
-            hierarchy_data = app.storage.general.get('hierarchy_data')
-            if hierarchy_data:
-                # 检查数据是否过期（1小时过期）
-                timestamp = app.storage.general.get('hierarchy_data_timestamp', 0)
-                current_time = asyncio.get_event_loop().time()
-                if current_time - timestamp < 3600:  # 1小时内的数据认为有效
-                    return hierarchy_data
-                else:
-                    log_info("层级数据已过期，需要重新获取")
-                    return None
-            return None
-        except Exception as e:
-            log_error("从存储获取层级数据失败", exception=e)
-            return None
+        """从进程内共享缓存中获取未过期的层级数据"""
+        return hierarchy_cache.peek()
     
     def _extract_level_options(self, hierarchy_data: Dict[str, Any], level: str) -> List[Dict[str, str]]:
         """从层级数据中提取一级分类选项"""
@@ -0,0 +1,274 @@
+"""
+MongoDB服务客户端 - NiceGUI 页面调用 MongoDB 服务的共享 HTTP 客户端
+整个应用共用一个带连接池和 keep-alive 的 aiohttp.ClientSession，不再每次请求新建连接。
+按接口设置超时，只读接口在连接失败/网关错误时按指数退避重试，并按接口统计耗时分布（定期写入日志）。
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Mapping, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+from common.exception_handler import log_info, log_error
+
+# MongoDB服务API基础URL
+MONGODB_SERVICE_URL = "http://localhost:8001"
+
+# 连接池配置
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 50
+KEEPALIVE_TIMEOUT = 60
+
+# 可重试的响应状态码（服务重启、网关超时等临时错误）
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# 耗时分布桶的上界（毫秒），最后一个桶收纳超过上界的请求
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 耗时分布写入日志的间隔（秒）
+STATS_LOG_INTERVAL = 300
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """接口调用策略"""
+    timeout: float          # 总超时（秒）
+    retries: int = 0        # 连接失败/网关错误后的重试次数，只给只读接口配置；超时不重试
+    backoff: float = 0.2    # 首次重试前的等待时间（秒），之后逐次翻倍
+
+# 各接口的调用策略，key 为 /api/v1/ 之后的路径
+ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    "hierarchy": EndpointPolicy(timeout=15, retries=2),
+    "enterprises/search": EndpointPolicy(timeout=10, retries=2),
+    "enterprises/query_fields": EndpointPolicy(timeout=15, retries=2),
+    # 大模型生成的查询可能很慢，保持 aiohttp 原来的 300 秒默认超时；
+    # 可能包含 $out/$merge 写入，连接断开时服务端可能已经执行完毕，不重试
+    "enterprises/execute_mongo_cmd": EndpointPolicy(timeout=300),
+    "enterprises/edit_field_value": EndpointPolicy(timeout=15),
+    "documents": EndpointPolicy(timeout=30),
+    "documents/batch": EndpointPolicy(timeout=60),
+    "fields/update": EndpointPolicy(timeout=15),
+    "fields/batch_update": EndpointPolicy(timeout=60),
+}
+DEFAULT_POLICY = EndpointPolicy(timeout=30)
+
+@dataclass
+class ServiceResponse:
+    """服务响应（响应体已读取完毕，连接已归还连接池）"""
+    status: int
+    text: str
+    data: Any = None                        # JSON 响应体，非JSON时为None
+    headers: Mapping[str, str] = field(default_factory=CIMultiDict)  # 不区分大小写
+
+class LatencyHistogram:
+    """单个接口的耗时分布"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float, error: bool = False):
+        index = 0
+        while index < len(LATENCY_BUCKETS_MS) and duration_ms > LATENCY_BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, ratio: float) -> Optional[float]:
+        """按桶估算分位数（返回所在桶的上界，毫秒）"""
+        if self.count == 0:
+            return None
+        threshold = self.count * ratio
+        cumulative = 0
+        for index, bucket_count in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+class MongoServiceClient:
+    """MongoDB服务客户端（应用内单例使用）"""
+
+    def __init__(self, base_url: str = MONGODB_SERVICE_URL):
+        self.base_url = base_url.rstrip("/")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._stats_task: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话，首次使用时在当前事件循环中创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'Content-Type': 'application/json'},
+            )
+            log_info("MongoDB服务客户端连接池已创建",
+                    extra_data=f'{{"base_url": "{self.base_url}", "limit": {POOL_LIMIT}, "keepalive_timeout": {KEEPALIVE_TIMEOUT}}}')
+        return self._session
+
+    async def start_stats_logging(self, interval: float = STATS_LOG_INTERVAL):
+        """启动后台任务，定期把各接口的耗时分布写入日志（应用启动时调用）"""
+        if self._stats_task is None or self._stats_task.done():
+            self._stats_task = asyncio.create_task(self._log_stats_loop(interval))
+
+    async def _log_stats_loop(self, interval: float):
+        logged_count = 0
+        while True:
+            await asyncio.sleep(interval)
+            request_count = sum(histogram.count for histogram in self._histograms.values())
+            if request_count == logged_count:
+                # 期间没有新的请求，不重复记录
+                continue
+            logged_count = request_count
+            log_info("MongoDB服务客户端耗时统计",
+                    extra_data=json.dumps({"latency": self.get_stats()}, ensure_ascii=False))
+
+    async def close(self):
+        """关闭连接池（应用退出时调用）"""
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+            self._stats_task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            log_info("MongoDB服务客户端连接池已关闭",
+                    extra_data=json.dumps({"latency": self.get_stats()}, ensure_ascii=False))
+        self._session = None
+
+    async def request(self, method: str, endpoint: str, json_data: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None) -> ServiceResponse:
+        """
+        调用 /api/v1/{endpoint}
+
+        Args:
+            method: HTTP方法
+            endpoint: /api/v1/ 之后的路径，同时作为超时/重试策略和耗时统计的key
+            json_data: 请求体
+            headers: 额外的请求头
+
+        Returns:
+            ServiceResponse: 响应，非2xx状态码同样正常返回，由调用方处理
+
+        Raises:
+            aiohttp.ClientError: 重试次数用完后仍然失败
+            asyncio.TimeoutError: 超时（不重试：服务端的查询不会被取消，重试会再执行一遍）
+        """
+        policy = ENDPOINT_POLICIES.get(endpoint, DEFAULT_POLICY)
+        histogram = self._histograms.setdefault(endpoint, LatencyHistogram())
+        url = f"{self.base_url}/api/v1/{endpoint}"
+        timeout = aiohttp.ClientTimeout(total=policy.timeout)
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self._get_session().request(
+                    method, url, json=json_data, headers=headers, timeout=timeout
+                ) as response:
+                    text = await response.text()
+                    result = ServiceResponse(status=response.status, text=text,
+                                             headers=CIMultiDict(response.headers))
+            except asyncio.TimeoutError:
+                # aiohttp.ServerTimeoutError 同时也是 ClientConnectionError，需先于连接错误处理
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                raise
+            except aiohttp.ClientConnectionError as e:
+                histogram.observe((time.perf_counter() - start) * 1000, error=True)
+                if attempt >= policy.retries:
+                    raise
+                log_error(f"MongoDB服务请求失败，准备重试: {endpoint}",
+                         extra_data=f'{{"attempt": {attempt + 1}, "error": "{type(e).__name__}"}}')
+            else:
+                histogram.observe((time.perf_counter() - start) * 1000, error=result.status >= 500)
+                if result.status not in RETRY_STATUSES or attempt >= policy.retries:
+                    if result.text:
+                        try:
+                            result.data = json.loads(result.text)
+                        except ValueError:
+                            pass
+                    return result
+
+            attempt += 1
+            histogram.retries += 1
+            await asyncio.sleep(policy.backoff * (2 ** (attempt - 1)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """按接口返回耗时分布统计"""
+        return {endpoint: histogram.to_dict() for endpoint, histogram in self._histograms.items()}
+
+    # ------------------------ 各接口 ------------------------
+
+    async def get_hierarchy(self, etag: Optional[str] = None) -> ServiceResponse:
+        """获取层级数据，携带ETag时服务端数据未变化返回304"""
+        headers = {"If-None-Match": etag} if etag else None
+        return await self.request("GET", "hierarchy", headers=headers)
+
+    async def search_enterprises(self, enterprise_text: str, limit: int = 50,
+                                 with_count: bool = False) -> ServiceResponse:
+        """按企业代码或名称搜索企业（联想下拉默认不统计总匹配数）"""
+        return await self.request("POST", "enterprises/search",
+                                  {"enterprise_text": enterprise_text, "limit": limit,
+                                   "with_count": with_count})
+
+    async def query_fields(self, enterprise_code: str, path_code_param: str,
+                           fields_param: List[str]) -> ServiceResponse:
+        """查询企业指定路径下的字段"""
+        return await self.request("POST", "enterprises/query_fields", {
+            "enterprise_code": enterprise_code,
+            "path_code_param": path_code_param,
+            "fields_param": fields_param,
+        })
+
+    async def execute_mongo_cmd(self, query_cmd: str) -> ServiceResponse:
+        """执行原生MongoDB查询语句"""
+        return await self.request("POST", "enterprises/execute_mongo_cmd", {"query_cmd": query_cmd})
+
+    async def edit_field_value(self, request_data: Dict[str, Any]) -> ServiceResponse:
+        """修改单个字段的值"""
+        return await self.request("POST", "enterprises/edit_field_value", request_data)
+
+    async def create_document(self, request_data: Dict[str, Any]) -> ServiceResponse:
+        """创建企业档案"""
+        return await self.request("POST", "documents", request_data)
+
+    async def delete_documents(self, request_data: Dict[str, Any]) -> ServiceResponse:
+        """批量删除企业档案"""
+        return await self.request("DELETE", "documents/batch", request_data)
+
+    async def update_field(self, request_data: Dict[str, Any]) -> ServiceResponse:
+        """按完整路径更新单个字段"""
+        return await self.request("POST", "fields/update", request_data)
+
+    async def batch_update_fields(self, request_data: Dict[str, Any]) -> ServiceResponse:
+        """批量更新字段"""
+        return await self.request("POST", "fields/batch_update", request_data)
+
+# 应用内共享的MongoDB服务客户端
+mongodb_service_client = MongoServiceClient()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本 - 为已有数据库补充模型中新增的索引
+使用方法：python scripts/database_migrate.py [--dry-run] [--verbose]
+"""
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+def setup_logging(verbose=False):
+    """设置日志"""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    return logging.getLogger(__name__)
+
+# 需要保证存在索引的列：(表名, 列名, 索引名, 是否唯一)
+REQUIRED_INDEXES = [
+    ('users', 'session_token', 'ix_users_session_token', True),
+    ('users', 'remember_token', 'ix_users_remember_token', True),
+]
+
+class DatabaseMigrator:
+    """数据库迁移器"""
+
+    def __init__(self, logger, dry_run=False):
+        self.logger = logger
+        self.dry_run = dry_run
+        self.engine = None
+
+    def create_engine(self):
+        """创建数据库引擎"""
+        from sqlalchemy import create_engine
+        from auth.config import auth_config  # 使用项目的配置
+
+        self.engine = create_engine(auth_config.database_url, pool_pre_ping=True, echo=False)
+        self.logger.info(f"✅ 数据库引擎创建成功: {auth_config.database_type}")
+        self.logger.info(f"📍 数据库位置: {auth_config.database_url}")
+
+    def _indexed_columns(self, inspector, table_name):
+        """已被索引覆盖的单列（包括唯一约束自动创建的索引）"""
+        covered = set()
+        for index in inspector.get_indexes(table_name):
+            if len(index['column_names']) == 1:
+                covered.add(index['column_names'][0])
+        for constraint in inspector.get_unique_constraints(table_name):
+            if len(constraint['column_names']) == 1:
+                covered.add(constraint['column_names'][0])
+        return covered
+
+    def ensure_indexes(self):
+        """为缺少索引的列创建索引，返回创建的数量"""
+        from sqlalchemy import inspect, Index, MetaData, Table
+
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        metadata = MetaData()
+        created = 0
+
+        for table_name, column_name, index_name, unique in REQUIRED_INDEXES:
+            if table_name not in existing_tables:
+                self.logger.warning(f"⚠️ 表不存在，跳过: {table_name}")
+                continue
+
+            if column_name in self._indexed_columns(inspector, table_name):
+                self.logger.info(f"✓ 已有索引: {table_name}.{column_name}")
+                continue
+
+            if self.dry_run:
+                self.logger.info(f"[dry-run] 将创建索引: {index_name} ON {table_name} ({column_name})")
+                continue
+
+            table = Table(table_name, metadata, autoload_with=self.engine)
+            Index(index_name, table.c[column_name], unique=unique).create(bind=self.engine)
+            self.logger.info(f"✅ 索引创建成功: {index_name} ON {table_name} ({column_name})")
+            created += 1
+
+        return created
+
+    def run(self):
+        """运行迁移"""
+        self.logger.info("🚀 开始数据库迁移...")
+        self.create_engine()
+        created = self.ensure_indexes()
+        self.logger.info(f"🎉 数据库迁移完成，新建索引 {created} 个")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='数据库迁移脚本')
+    parser.add_argument('--dry-run', action='store_true', help='只检查，不修改数据库')
+    parser.add_argument('--verbose', action='store_true', help='详细输出')
+
+    args = parser.parse_args()
+
+    logger = setup_logging(args.verbose)
+    migrator = DatabaseMigrator(logger, dry_run=args.dry_run)
+
+    try:
+        migrator.run()
+        print("\n✅ 数据库迁移成功！")
+    except Exception as e:
+        print(f"\n❌ 数据库迁移失败: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,12 @@ class SSLMode(str, Enum):
     PREFERRED = "preferred"
     REQUIRED = "required"
 
+# 选择运行环境的环境变量，未设置时使用配置文件中的 default_environment
+MONGO_ENV_VAR = "MONGO_ENV"
+
+# 只读客户端的默认读偏好
+DEFAULT_READ_ONLY_PREFERENCE = "secondaryPreferred"
+
 class MongoDBConfig:
     """MongoDB 配置类"""
     def __init__(self, config_dict: Dict[str, Any]):
@@ -53,10 +59,81 @@ class MongoDBConfig:
         
         return connection_string
     
+    def get_client_options(self, read_preference: Optional[str] = None,
+                           max_pool_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        生成 MongoClient 的连接池、超时、读偏好和压缩参数
+
+        Args:
+            read_preference: 覆盖配置中的读偏好（只读客户端使用）
+            max_pool_size: 覆盖配置中的最大连接池大小
+
+        Returns:
+            Dict[str, Any]: 传给 AsyncIOMotorClient 的关键字参数
+        """
+        config = self.config
+        options = {
+            "serverSelectionTimeoutMS": config.get("server_selection_timeout_ms", 30000),
+            "connectTimeoutMS": config.get("connect_timeout_ms", 30000),
+            "socketTimeoutMS": config.get("socket_timeout_ms", 30000),
+            "maxPoolSize": max_pool_size or config.get("max_pool_size", 50),
+            "minPoolSize": config.get("min_pool_size", 0),
+            "maxIdleTimeMS": config.get("max_idle_time_ms", 60000),
+            "readPreference": read_preference or config.get("read_preference") or "primary",
+        }
+        # 最小连接数不能超过最大连接数（只读客户端可能配置了更小的连接池）
+        options["minPoolSize"] = min(options["minPoolSize"], options["maxPoolSize"])
+
+        if config.get("replica_set"):
+            options["replicaSet"] = config["replica_set"]
+
+        # 网络压缩：按顺序与服务端协商，缺少 zstandard / python-snappy 时驱动会忽略对应算法
+        compressors = config.get("compressors")
+        if compressors:
+            options["compressors"] = ",".join(compressors) if isinstance(compressors, list) else compressors
+
+        if config.get("ssl_mode") in (SSLMode.REQUIRED, SSLMode.PREFERRED):
+            if config.get("ssl_ca_file"):
+                options["tlsCAFile"] = config["ssl_ca_file"]
+            # 驱动只接受证书和私钥合并在一起的PEM文件，不支持单独的私钥文件
+            if config.get("ssl_key_file"):
+                raise ValueError("不支持单独配置 ssl_key_file，请将客户端证书和私钥合并为一个PEM文件并配置到 ssl_cert_file")
+            if config.get("ssl_cert_file"):
+                options["tlsCertificateKeyFile"] = config["ssl_cert_file"]
+            if config.get("ssl_verify_cert") is False:
+                options["tlsAllowInvalidCertificates"] = True
+
+        return options
+
+    def get_read_only_client_options(self) -> Optional[Dict[str, Any]]:
+        """
+        只读客户端的连接参数（搜索、字段查询、原生查询使用）
+
+        仅在副本集环境下返回，单机环境没有从节点，返回None表示与主客户端共用连接。
+        """
+        if not self.config.get("replica_set"):
+            return None
+        return self.get_client_options(
+            read_preference=self.config.get("read_only_preference") or DEFAULT_READ_ONLY_PREFERENCE,
+            max_pool_size=self.config.get("read_only_max_pool_size"),
+        )
+
+    def get_database_name(self) -> str:
+        """获取数据库名称"""
+        return self.config.get("database_name") or "test"
+
     def get_collection_name(self) -> Optional[str]:
         """获取默认集合名称"""
         return self.config.get("collection_name")
 
+    def get_storage_layout(self) -> str:
+        """获取存储布局：embedded（一企一文档，默认）或 field_per_document（一字段一文档）"""
+        return self.config.get("storage_layout") or "embedded"
+
+    def get_field_collection_name(self) -> Optional[str]:
+        """获取一字段一文档布局下的字段集合名称"""
+        return self.config.get("field_collection_name")
+
 class ConfigLoader:
     """配置加载器"""
     
@@ -127,6 +204,16 @@ class ConfigLoader:
             return self._yaml_config['default_environment']
         return "local"
     
+    def get_active_environment(self) -> str:
+        """获取当前运行环境：优先使用环境变量 MONGO_ENV，其次为配置文件中的默认环境"""
+        return os.environ.get(MONGO_ENV_VAR) or self.get_default_environment()
+    
+    def get_section(self, name: str) -> Dict[str, Any]:
+        """获取顶层配置节点（如 query_journal），不存在时返回空字典"""
+        if self._yaml_config and isinstance(self._yaml_config.get(name), dict):
+            return self._yaml_config[name]
+        return {}
+    
     def list_environments(self) -> List[str]:
         """列出所有可用的环境"""
         if self._yaml_config and 'environments' in self._yaml_config:
@@ -173,6 +260,7 @@ class ConfigLoader:
                 "ssl_mode": SSLMode.PREFERRED,
                 "ssl_verify_cert": True,
                 "replica_set": "test-rs",
+                "compressors": ["zstd", "snappy"],
                 "read_preference": "secondary",
                 "connect_timeout_ms": 30000,
                 "socket_timeout_ms": 30000,
@@ -196,10 +284,10 @@ class ConfigLoader:
                 "auth_database": "admin",
                 "ssl_mode": SSLMode.REQUIRED,
                 "ssl_cert_file": "/path/to/client.pem",
-                "ssl_key_file": "/path/to/client-key.pem",
                 "ssl_ca_file": "/path/to/ca.pem",
                 "ssl_verify_cert": True,
                 "replica_set": "prod-rs",
+                "compressors": ["zstd", "snappy"],
                 "read_preference": "secondaryPreferred",
                 "connect_timeout_ms": 30000,
                 "socket_timeout_ms": 30000,
@@ -224,6 +312,7 @@ class ConfigLoader:
                 "ssl_mode": SSLMode.REQUIRED,
                 "ssl_verify_cert": True,
                 "replica_set": "atlas-cluster0-shard-0",
+                "compressors": ["zstd", "snappy"],
                 "read_preference": "primary",
                 "connect_timeout_ms": 30000,
                 "socket_timeout_ms": 30000,
@@ -241,6 +330,8 @@ class ConfigLoader:
                 "port": 27017,
                 "database_name": "数字政府",
                 "collection_name": "一企一档",
+                "storage_layout": "embedded",
+                "field_collection_name": "一企一档_字段",
                 "auth_type": AuthType.NONE,
                 "username": None,
                 "password": None,
@@ -271,10 +362,10 @@ class ConfigLoader:
                 "auth_database": "$external",
                 "ssl_mode": SSLMode.REQUIRED,
                 "ssl_cert_file": "/path/to/client.pem",
-                "ssl_key_file": "/path/to/client-key.pem",
                 "ssl_ca_file": "/path/to/ca.pem",
                 "ssl_verify_cert": True,
                 "replica_set": "secure-rs",
+                "compressors": ["zstd", "snappy"],
                 "read_preference": "primary",
                 "connect_timeout_ms": 30000,
                 "socket_timeout_ms": 30000,
@@ -331,6 +422,22 @@ def reload_config(config_file_path: Optional[str] = None) -> None:
     CONFIGS = _create_configs()
     DEFAULT_CONFIG = CONFIGS.get(_config_loader.get_default_environment(), CONFIGS.get("local"))
 
+def get_active_environment() -> str:
+    """
+    获取当前运行环境名称（环境变量 MONGO_ENV 优先）
+
+    Raises:
+        ValueError: 环境不存在（不回退到默认配置，以免连错数据库）
+    """
+    env = _config_loader.get_active_environment()
+    if env not in CONFIGS:
+        raise ValueError(f"未知的MongoDB运行环境: {env}，可用环境: {', '.join(CONFIGS.keys())}")
+    return env
+
+def get_query_journal_config() -> Dict[str, Any]:
+    """获取原生查询日志配置"""
+    return _config_loader.get_section("query_journal")
+
 def get_config_file_path() -> Path:
     """获取当前使用的配置文件路径"""
     return _config_loader.config_file_path
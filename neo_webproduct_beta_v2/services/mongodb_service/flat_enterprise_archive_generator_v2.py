@@ -423,6 +423,61 @@ class FlatEnterpriseArchiveGenerator:
         print(f"✅ 层级结构JSON文件已生成: {output_path}")
         return hierarchy_structure
 
+def get_template_version(full_path_codes: List[str]) -> str:
+    """
+    根据字段顺序计算模板版本戳
+
+    fields数组中字段的顺序决定了每个字段的下标，只要Excel模板中的字段或顺序发生变化，
+    版本戳就会随之变化。
+
+    Args:
+        full_path_codes: 按fields数组顺序排列的字段完整路径编码列表
+
+    Returns:
+        str: 模板版本戳
+    """
+    joined = "\n".join(code or "" for code in full_path_codes)
+    return hashlib.md5(joined.encode('utf-8')).hexdigest()[:12]
+
+def make_field_document_id(enterprise_code: str, full_path_code: str) -> str:
+    """
+    生成"一字段一文档"布局下字段文档的_id
+
+    Args:
+        enterprise_code: 企业代码
+        full_path_code: 字段完整路径编码
+
+    Returns:
+        str: 字段文档ID
+    """
+    return f"{enterprise_code}:{full_path_code}"
+
+def to_field_documents(template_documents: List[Dict[str, Any]],
+                       template_version: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    将字段模板转换为"一字段一文档"布局的文档列表
+
+    每个字段成为字段集合中的一个独立文档，保留企业信息、层级路径和字段元数据，
+    以便在 (enterprise_code, path_code, field_code) 等索引上直接查询。
+
+    Args:
+        template_documents: generate_doc() 或企业文档fields数组中的字段列表
+        template_version: 模板版本戳（可选）
+
+    Returns:
+        List[Dict]: 字段文档列表
+    """
+    field_documents = []
+    for field in template_documents:
+        field_document = dict(field)
+        field_document["_id"] = make_field_document_id(
+            field.get("enterprise_code", ""), field.get("full_path_code", "")
+        )
+        if template_version:
+            field_document["template_version"] = template_version
+        field_documents.append(field_document)
+    return field_documents
+
 def generate_doc(enterprise_code: str = "", enterprise_name: str = ""):
     """
     主函数：演示扁平化文档生成流程
@@ -1,5 +1,8 @@
+import gzip
+import hashlib
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from pydantic import BaseModel, Field
 
@@ -11,6 +14,65 @@ class HierarchyResponse(BaseModel):
     success: bool = Field(..., description="是否成功")
     message: str = Field(..., description="响应消息")
     data: Optional[Dict[str, Any]] = Field(default=None, description="层级结构数据")
+
+class HierarchyLevelResponse(BaseModel):
+    """单层级子节点响应模型"""
+    success: bool = Field(..., description="是否成功")
+    message: str = Field(..., description="响应消息")
+    level: str = Field(..., description="子节点层级：l1、l2、l3、fields")
+    parent_code: Optional[str] = Field(default=None, description="父级编码")
+    items: List[Dict[str, Any]] = Field(default_factory=list, description="子节点列表（不含下级节点）")
+
+# 各层级节点的子节点列表键名及子节点层级
+CHILD_KEYS = {
+    "l1": ("l2_categories", "l2"),
+    "l2": ("l3_categories", "l3"),
+    "l3": ("fields", "fields"),
+}
+
+# 查询子节点时的层级 -> 父节点层级
+PARENT_LEVELS = {
+    "l2": "l1",
+    "l3": "l2",
+    "fields": "l3",
+}
+
+class HierarchySnapshot:
+    """
+    层级结构文件的内存快照
+
+    解析后的数据、序列化后的响应体（含gzip压缩版本）、ETag 及按父级编码建立的子节点索引
+    都只在文件修改时间变化时重新生成一次。
+    """
+
+    def __init__(self, mtime: float, raw_bytes: bytes):
+        self.mtime = mtime
+        self.data: Dict[str, Any] = json.loads(raw_bytes.decode('utf-8'))
+        self.etag = f'"{hashlib.md5(raw_bytes).hexdigest()}"'
+
+        body = json.dumps(
+            {"success": True, "message": "获取层级结构数据成功", "data": self.data},
+            ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+
+        # (子节点层级, 父级编码) -> 去掉下级列表的子节点
+        self.children: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+        self._index_children("l1", None, self.data.get("l1_categories", []))
+
+    def _index_children(self, level: str, parent_code: Optional[str], nodes: List[Dict[str, Any]]):
+        """递归建立子节点索引"""
+        items = []
+        child_key, child_level = CHILD_KEYS.get(level, (None, None))
+        for node in nodes:
+            item = {key: value for key, value in node.items() if key != child_key}
+            if child_key:
+                children = node.get(child_key, [])
+                item["children_count"] = len(children)
+                self._index_children(child_level, node.get(f"{level}_code"), children)
+            items.append(item)
+        self.children[(level, parent_code)] = items
     
 class HierarchyData:
     """精简版层级结构服务类 - 专为前端级联查询设计"""
@@ -26,6 +88,8 @@ class HierarchyData:
         self.json_file_path = json_file_path
         self.excel_file_path = excel_file_path
         self.generator = FlatEnterpriseArchiveGenerator()
+        self._snapshot: Optional[HierarchySnapshot] = None
+        self._lock = threading.Lock()
     
     def _ensure_json_exists(self) -> bool:
         """
@@ -56,6 +120,82 @@ class HierarchyData:
         
         return True
     
+    def get_snapshot(self) -> Optional[HierarchySnapshot]:
+        """
+        获取层级结构快照，仅在文件修改时间变化时重新读取和解析
+        Returns:
+            Optional[HierarchySnapshot]: 快照，文件不存在或解析失败时返回None
+        """
+        if not self._ensure_json_exists():
+            return None
+
+        json_path = Path(self.json_file_path)
+        mtime = json_path.stat().st_mtime
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.mtime == mtime:
+            return snapshot
+
+        with self._lock:
+            # 等待锁期间可能已被其他线程重新加载
+            if self._snapshot is not None and self._snapshot.mtime == mtime:
+                return self._snapshot
+
+            snapshot = HierarchySnapshot(mtime, json_path.read_bytes())
+            self._snapshot = snapshot
+            log_info(f"成功加载层级结构文件: {self.json_file_path}",
+                    extra_data=f'{{"etag": {snapshot.etag}, "size": {len(snapshot.body)}, "gzip_size": {len(snapshot.gzip_body)}}}')
+            return snapshot
+
+    def get_level_children(self, level: str, parent_code: Optional[str] = None) -> HierarchyLevelResponse:
+        """
+        获取某一层级的子节点（不含更下级节点），供级联选择按需加载
+        Args:
+            level: 子节点层级，l1、l2、l3、fields
+            parent_code: 父级编码（l1 层级不需要；fields 层级为 l3_code）
+        Returns:
+            HierarchyLevelResponse: 子节点列表
+        """
+        if level != "l1" and level not in PARENT_LEVELS:
+            return HierarchyLevelResponse(
+                success=False,
+                message=f"不支持的层级: {level}",
+                level=level,
+                parent_code=parent_code
+            )
+
+        try:
+            snapshot = self.get_snapshot()
+        except Exception as e:
+            log_error("读取层级结构文件失败", exception=e,
+                     extra_data=f'{{"file_path": "{self.json_file_path}"}}')
+            snapshot = None
+
+        if snapshot is None:
+            return HierarchyLevelResponse(
+                success=False,
+                message="无法生成或读取层级结构数据文件",
+                level=level,
+                parent_code=parent_code
+            )
+
+        key = ("l1", None) if level == "l1" else (level, parent_code)
+        items = snapshot.children.get(key)
+        if items is None:
+            return HierarchyLevelResponse(
+                success=False,
+                message=f"未找到父级编码: {parent_code}",
+                level=level,
+                parent_code=parent_code
+            )
+
+        return HierarchyLevelResponse(
+            success=True,
+            message="获取层级数据成功",
+            level=level,
+            parent_code=parent_code,
+            items=items
+        )
+
     def get_hierarchy_data(self) -> HierarchyResponse:
         """
         获取完整的层级结构数据（供前端一次性获取）
@@ -63,24 +203,19 @@ class HierarchyData:
             HierarchyResponse: 包含完整层级数据的响应
         """
         try:
-            # 确保JSON文件存在
-            if not self._ensure_json_exists():
+            # 确保JSON文件存在并获取内存快照
+            snapshot = self.get_snapshot()
+            if snapshot is None:
                 return HierarchyResponse(
                     success=False,
                     message="无法生成或读取层级结构数据文件"
                 )
             
-            # 读取JSON文件
-            with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            log_info(f"成功读取层级结构文件: {self.json_file_path}")
-            
             # 返回原始数据结构，供前端直接使用
             return HierarchyResponse(
                 success=True,
                 message="获取层级结构数据成功",
-                data=data
+                data=snapshot.data
             )
             
         except json.JSONDecodeError as e:
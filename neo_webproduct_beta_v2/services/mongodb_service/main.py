@@ -1,31 +1,204 @@
 # services/mongodb_service/main.py
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional,List,Tuple
+from typing import Dict, Any, Optional,List,Tuple,Iterable,Iterator
+from itertools import islice
 import json5
 import sys
 import os
 import re
 import json
 import time
+import asyncio
 from datetime import datetime, date
 from decimal import Decimal
 from bson import ObjectId
+from collections import OrderedDict
 from contextlib import asynccontextmanager # 导入 asynccontextmanager
+from dataclasses import dataclass
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from services.mongodb_service.config import get_connection_string, get_config
-from services.mongodb_service.mongodb_manager import MongoDBManager
+from services.mongodb_service.config import get_config, get_active_environment, get_query_journal_config
+from services.mongodb_service.mongodb_manager import MongoDBManager, NAME_NGRAMS_FIELD
 from services.mongodb_service.flat_enterprise_archive_generator_v2 import generate_doc
-from services.mongodb_service.hierarchy_data import hierarchy_data
+from services.mongodb_service.hierarchy_data import hierarchy_data, HierarchyLevelResponse
+from services.mongodb_service.query_journal import QueryJournal
 from mongo_exception_handler import log_info, log_error, safe
 from schemas import *
 
 # 全局MongoDB管理器实例
 mongodb_manager: Optional[MongoDBManager] = None
 
+# 原生查询结果缓存容量与有效期（秒）
+QUERY_RESULT_CACHE_SIZE = 256
+QUERY_RESULT_CACHE_TTL = 300
+
+# 已编译查询缓存容量
+COMPILED_QUERY_CACHE_SIZE = 512
+
+# 必须位于聚合管道末尾的阶段（其后不能再追加$limit）
+PIPELINE_TERMINAL_STAGES = frozenset({"$out", "$merge"})
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """
+    编译后的原生查询（不可变、可哈希）
+
+    key 为规范化（去除空白差异）的查询类型和参数，用作结果缓存键；key 与 params_json 都保留原始键顺序，
+    $sort 等依赖键顺序的查询不会共用缓存。
+    """
+    query_type: str
+    params_json: str
+    key: str
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """返回查询参数的独立副本，调用方可以随意修改"""
+        return json.loads(self.params_json)
+
+    @property
+    def writes(self) -> bool:
+        """聚合管道中包含 $out/$merge 阶段（会写入集合，结果不能缓存）"""
+        if self.query_type not in ("aggregate", "group"):
+            return False
+        pipeline = self.params.get("pipeline")
+        if not isinstance(pipeline, list):
+            return False
+        return any(isinstance(stage, dict) and set(stage) & PIPELINE_TERMINAL_STAGES for stage in pipeline)
+
+class QueryCompiler:
+    """
+    原生查询编译器：解析、校验并规范化查询语句，按原始语句缓存编译结果（LRU）
+
+    大模型反复生成的相同语句直接命中缓存，不再重复执行正则预处理和json5解析。
+    """
+
+    def __init__(self, max_size: int = COMPILED_QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CompiledQuery]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, query_cmd: str) -> CompiledQuery:
+        """
+        编译查询语句
+
+        Raises:
+            ValueError: 不支持的查询类型
+        """
+        compiled = self._entries.get(query_cmd)
+        if compiled is not None:
+            self._entries.move_to_end(query_cmd)
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        query_type = _parse_query_type(query_cmd)
+        if not query_type:
+            raise ValueError("不支持的查询类型，只支持 find/findOne/aggregate/count/countDocuments/distinct 操作")
+
+        query_params = _parse_query_parameters_with_json5(query_cmd, query_type)
+        compiled = CompiledQuery(
+            query_type=query_type,
+            params_json=json.dumps(query_params, ensure_ascii=False, default=str),
+            # 不能按键排序：{"a": 1, "b": -1} 与 {"b": -1, "a": 1} 的 $sort 结果顺序不同
+            key=json.dumps([query_type, query_params], ensure_ascii=False, default=str),
+        )
+
+        self._entries[query_cmd] = compiled
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return compiled
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+class QueryResultCache:
+    """
+    原生查询结果缓存（LRU + TTL）
+
+    以解析后的 (query_type, query_params) 及分页参数为键，缓存分类后的查询结果。
+    专家模式下反复执行的相同查询直接返回缓存，写接口调用 invalidate() 使其整体失效。
+    invalidate() 同时递增 generation：执行查询前记下 generation，写入缓存时若已变化
+    （查询期间发生了写入）则丢弃结果，避免把写入前的结果缓存下来。
+    """
+
+    def __init__(self, max_size: int = QUERY_RESULT_CACHE_SIZE, ttl: float = QUERY_RESULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.stale_skips = 0
+
+    @staticmethod
+    def make_key(query_key: str, **options: Any) -> str:
+        """以已编译查询的规范化键加分页参数为键，仅空白不同的相同查询命中同一缓存"""
+        return query_key + "|" + json.dumps(options, sort_keys=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], generation: Optional[int] = None):
+        """写入缓存；generation 为执行查询前记下的代数，期间缓存被失效过则不写入"""
+        if generation is not None and generation != self.generation:
+            self.stale_skips += 1
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """数据发生写入时清空全部缓存"""
+        if self._entries:
+            self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "generation": self.generation,
+            "stale_skips": self.stale_skips,
+        }
+
+query_result_cache = QueryResultCache()
+query_compiler = QueryCompiler()
+
+# 原生查询日志（后台异步写入）
+query_journal = QueryJournal.from_config(get_query_journal_config())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -34,20 +207,29 @@ async def lifespan(app: FastAPI):
     """
     global mongodb_manager
     try:
-        # 使用local配置初始化MongoDB管理器
-        connection_string = get_connection_string("local")
-        config = get_config("local")
+        # 按运行环境（环境变量 MONGO_ENV，默认为配置文件中的 default_environment）初始化MongoDB管理器
+        environment = get_active_environment()
+        config = get_config(environment)
         collection_name = config.get_collection_name()
         
-        mongodb_manager = MongoDBManager(connection_string, collection_name)
+        mongodb_manager = MongoDBManager(config)
         await mongodb_manager.connect()
         
-        log_info("MongoDB 服务启动成功", extra_data=f'{{"collection": "{collection_name}"}}')
+        # 预先建立字段下标映射，字段更新时无需读取整个文档查找下标
+        template_documents = safe(generate_doc, return_value=[], show_error=False,
+                                  error_msg="字段模板加载失败")
+        mongodb_manager.register_field_template(template_documents)
+        
+        await query_journal.start()
+        
+        log_info("MongoDB 服务启动成功", extra_data=f'{{"environment": "{environment}", "collection": "{collection_name}"}}')
         yield # 在这里应用程序开始处理请求
     except Exception as e:
         log_error("MongoDB 服务启动失败", exception=e)
         raise
     finally:
+        # 写完剩余的查询日志
+        await query_journal.stop()
         # 应用程序关闭时断开MongoDB连接
         if mongodb_manager:
             await mongodb_manager.disconnect()
@@ -88,7 +270,10 @@ async def health_check(manager: MongoDBManager = Depends(get_mongodb_manager)):
         return {
             "status": "healthy" if is_connected else "unhealthy",
             "database_connected": is_connected,
-            "collection": manager.collection_name
+            "collection": manager.collection_name,
+            "query_result_cache": query_result_cache.get_stats(),
+            "compiled_query_cache": query_compiler.get_stats(),
+            "query_journal": query_journal.get_stats()
         }
     except Exception as e:
         log_error("健康检查失败", exception=e)
@@ -137,18 +322,18 @@ async def create_document(
             doc["enterprise_code"] = request.enterprise_code
             doc["enterprise_name"] = request.enterprise_name
         
-        # 插入文档到MongoDB，使用enterprise_code作为_id
-        result = await manager.insert_document_with_id(
-            document_id=request.enterprise_code,
-            document={
-                "_id": request.enterprise_code,
-                "enterprise_code": request.enterprise_code,
-                "enterprise_name": request.enterprise_name,
-                "fields": template_documents,
-                "created_at": manager.get_current_timestamp(),
-                "updated_at": manager.get_current_timestamp()
-            }
+        # 登记模板版本，用于按缓存下标更新字段
+        template_version = manager.register_field_template(template_documents)
+        
+        # 按配置的存储布局写入MongoDB，使用enterprise_code作为_id
+        result = await manager.insert_enterprise_archive(
+            enterprise_code=request.enterprise_code,
+            enterprise_name=request.enterprise_name,
+            template_documents=template_documents,
+            template_version=template_version
         )
+        # 数据已写入，使原生查询结果缓存失效
+        query_result_cache.invalidate()
         
         if result:
             log_info(f"企业档案文档创建成功", 
@@ -179,8 +364,91 @@ async def create_document(
         )
 
 @app.get("/api/v1/hierarchy")
-async def get_hierarchy_data():
-    return hierarchy_data.get_hierarchy_data()
+async def get_hierarchy_data(request: Request):
+    """
+    获取完整的层级结构数据
+
+    数据在内存中缓存，仅在文件修改时重新加载；支持 ETag（If-None-Match 返回304）和gzip压缩。
+    """
+    try:
+        snapshot = hierarchy_data.get_snapshot()
+    except Exception as e:
+        log_error("读取层级结构文件失败", exception=e)
+        snapshot = None
+
+    if snapshot is None:
+        return hierarchy_data.get_hierarchy_data()
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.gzip_body, media_type="application/json", headers=headers)
+
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/hierarchy/l1", response_model=HierarchyLevelResponse)
+async def get_hierarchy_l1():
+    """获取一级分类列表（不含下级节点）"""
+    return hierarchy_data.get_level_children("l1")
+
+@app.get("/api/v1/hierarchy/{level}/{parent_code}", response_model=HierarchyLevelResponse)
+async def get_hierarchy_children(level: str, parent_code: str):
+    """
+    按需获取某一层级的子节点
+
+    - **level**: 子节点层级，l2（parent_code 为 l1_code）、l3（parent_code 为 l2_code）、
+      fields（parent_code 为 l3_code）
+    - **parent_code**: 父级编码
+    """
+    return hierarchy_data.get_level_children(level, parent_code)
+
+# 不可更新的 full_path_code 列表
+EXCLUDED_FULL_PATH_CODES = {
+    "L19E5FFA.L279A000.L336E6A6.F1BDA09",
+}
+
+def _build_field_value_update(enterprise_code: str,
+                              full_path_code: str,
+                              dict_fields: FieldUpdateDict,
+                              timestamp: str) -> Dict[str, Any]:
+    """
+    构建单个字段需要写入的子字段值
+
+    Args:
+        enterprise_code: 企业代码
+        full_path_code: 字段完整路径编码
+        dict_fields: 字段更新字典
+        timestamp: 更新时间戳
+
+    Returns:
+        子字段名到值的字典（value、value_text、各URL及update_time）
+    """
+    field_suffix = full_path_code.rsplit('.', 1)[-1]
+
+    # 更新可选的URL字段，如果未提供则使用默认格式
+    pic_url = dict_fields.value_pic_url
+    if pic_url is None:
+        pic_url = f"http://get_pic_{enterprise_code}_{field_suffix}/pic"
+
+    doc_url = dict_fields.value_doc_url
+    if doc_url is None:
+        doc_url = f"http://get_doc_{enterprise_code}_{field_suffix}/doc"
+
+    video_url = dict_fields.value_video_url
+    if video_url is None:
+        video_url = f"http://get_video_{enterprise_code}_{field_suffix}/video"
+
+    return {
+        "value": dict_fields.value,
+        "value_text": dict_fields.value,  # 同时更新用于全文检索的字段
+        "value_pic_url": pic_url,
+        "value_doc_url": doc_url,
+        "value_video_url": video_url,
+        "update_time": timestamp,
+    }
 
 @app.post("/api/v1/fields/update", 
           response_model=UpdateFieldResponse,
@@ -203,10 +471,6 @@ async def update_field_value(
     该API会通过enterprise_code和full_path_code定位到具体的子文档字段，
     然后将dict_fields中的值插入或更新到对应的字段中。
     """
-    # 定义不可更新的 full_path_code 列表
-    EXCLUDED_FULL_PATH_CODES = {
-        "L19E5FFA.L279A000.L336E6A6.F1BDA09",
-    }
     # 判断 full_path_code 是否在排除列表中
     if request.full_path_code in EXCLUDED_FULL_PATH_CODES:
         log_info(f"忽略对不可更新字段的请求", 
@@ -219,9 +483,24 @@ async def update_field_value(
         log_info(f"开始更新字段值", 
                 extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "full_path_code": "{request.full_path_code}"}}')
         
-        # 1. 查找企业文档
-        enterprise_doc = await manager.find_document_by_id(request.enterprise_code)
-        if not enterprise_doc:
+        # 1. 准备更新数据 - 设置默认URL值
+        field_values = _build_field_value_update(
+            enterprise_code=request.enterprise_code,
+            full_path_code=request.full_path_code,
+            dict_fields=request.dict_fields,
+            timestamp=manager.get_current_timestamp()
+        )
+        updated_field_names = ["value", "value_pic_url", "value_doc_url", "value_video_url"]
+        
+        # 2. 按缓存的字段下标执行数据库更新操作
+        update_result = await manager.update_fields_by_path(
+            request.enterprise_code,
+            {request.full_path_code: field_values}
+        )
+        # 数据已写入，使原生查询结果缓存失效
+        query_result_cache.invalidate()
+        
+        if not update_result["document_found"]:
             log_error(f"企业文档未找到", 
                     extra_data=f'{{"enterprise_code": "{request.enterprise_code}"}}')
             return UpdateFieldResponse(
@@ -229,18 +508,7 @@ async def update_field_value(
                 message=f"企业代码 {request.enterprise_code} 对应的文档未找到"
             )
         
-        # 2. 在fields数组中查找匹配的子文档
-        fields_array = enterprise_doc.get("fields", [])
-        target_field_index = None
-        target_field = None
-        
-        for index, field in enumerate(fields_array):
-            if field.get("full_path_code") == request.full_path_code:
-                target_field_index = index
-                target_field = field
-                break
-        
-        if target_field_index is None:
+        if update_result["not_found_paths"]:
             log_error(f"字段未找到", 
                     extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "full_path_code": "{request.full_path_code}"}}')
             return UpdateFieldResponse(
@@ -248,39 +516,7 @@ async def update_field_value(
                 message=f"路径 {request.full_path_code} 对应的字段未找到"
             )
         
-        # 3. 准备更新数据 - 设置默认URL值
-        update_fields = {}
-        updated_field_names = []
-        
-        # 更新value字段（必填）
-        update_fields[f"fields.{target_field_index}.value"] = request.dict_fields.value
-        update_fields[f"fields.{target_field_index}.value_text"] = request.dict_fields.value  # 同时更新用于全文检索的字段
-        updated_field_names.append("value")
-        
-        # 更新可选的URL字段，如果未提供则使用默认格式
-        pic_url = request.dict_fields.value_pic_url
-        if pic_url is None:
-            pic_url = f"http://get_pic_{request.enterprise_code}_{request.full_path_code.rsplit('.', 1)[-1]}/pic"
-        update_fields[f"fields.{target_field_index}.value_pic_url"] = pic_url
-        updated_field_names.append("value_pic_url")
-        
-        doc_url = request.dict_fields.value_doc_url
-        if doc_url is None:
-            doc_url = f"http://get_doc_{request.enterprise_code}_{request.full_path_code.rsplit('.', 1)[-1]}/doc"
-        update_fields[f"fields.{target_field_index}.value_doc_url"] = doc_url
-        updated_field_names.append("value_doc_url")
-        
-        video_url = request.dict_fields.value_video_url
-        if video_url is None:
-            video_url = f"http://get_video_{request.enterprise_code}_{request.full_path_code.rsplit('.', 1)[-1]}/video"
-        update_fields[f"fields.{target_field_index}.value_video_url"] = video_url
-        updated_field_names.append("value_video_url")
-        
-        # 更新字段的更新时间
-        update_fields[f"fields.{target_field_index}.update_time"] = manager.get_current_timestamp()
-        
-        # 4. 执行数据库更新操作
-        success = await manager.update_document(request.enterprise_code, update_fields)
+        success = update_result["success"]
         
         if success:
             log_info(f"字段值更新成功", 
@@ -310,6 +546,109 @@ async def update_field_value(
             detail=f"更新字段值失败: {str(e)}"
         )
 
+@app.post("/api/v1/fields/batch_update",
+          response_model=BatchUpdateFieldsResponse,
+          summary="批量更新字段值")
+async def batch_update_field_values(
+    request: BatchUpdateFieldsRequest,
+    manager: MongoDBManager = Depends(get_mongodb_manager)
+) -> BatchUpdateFieldsResponse:
+    """
+    批量更新企业档案中多个字段的值
+
+    - **enterprise_code**: 企业代码，用于定位企业文档
+    - **updates**: 字段更新列表，每项包含 full_path_code 和 dict_fields（与 /api/v1/fields/update 相同）
+
+    该API只读取一次fields数组中的full_path_code建立下标映射，
+    然后把所有字段的更新合并为一个 $set 一次性写入数据库。
+    """
+    total_count = len(request.updates)
+    try:
+        log_info(f"开始批量更新字段值",
+                extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "total_count": {total_count}}}')
+
+        # 1. 合并所有字段的更新内容
+        field_updates = {}
+        skipped_paths = []
+        timestamp = manager.get_current_timestamp()
+
+        for item in request.updates:
+            if item.full_path_code in EXCLUDED_FULL_PATH_CODES:
+                skipped_paths.append(item.full_path_code)
+                continue
+
+            field_updates[item.full_path_code] = _build_field_value_update(
+                enterprise_code=request.enterprise_code,
+                full_path_code=item.full_path_code,
+                dict_fields=item.dict_fields,
+                timestamp=timestamp
+            )
+
+        if not field_updates:
+            log_info(f"没有需要更新的字段",
+                    extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "skipped_count": {len(skipped_paths)}}}')
+            return BatchUpdateFieldsResponse(
+                success=True,
+                message="没有需要更新的字段",
+                enterprise_code=request.enterprise_code,
+                total_count=total_count,
+                skipped_fields=skipped_paths
+            )
+
+        # 2. 按缓存的字段下标一次性执行数据库更新操作
+        update_result = await manager.update_fields_by_path(request.enterprise_code, field_updates)
+        # 数据已写入，使原生查询结果缓存失效
+        query_result_cache.invalidate()
+
+        if not update_result["document_found"]:
+            log_error(f"企业文档未找到",
+                    extra_data=f'{{"enterprise_code": "{request.enterprise_code}"}}')
+            return BatchUpdateFieldsResponse(
+                success=False,
+                message=f"企业代码 {request.enterprise_code} 对应的文档未找到",
+                enterprise_code=request.enterprise_code,
+                total_count=total_count
+            )
+
+        updated_paths = update_result["updated_paths"]
+        not_found_paths = update_result["not_found_paths"]
+        success = update_result["success"] and (bool(updated_paths) or not not_found_paths)
+
+        if success:
+            log_info(f"字段批量更新成功",
+                    extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "updated_count": {len(updated_paths)}, "not_found_count": {len(not_found_paths)}, "skipped_count": {len(skipped_paths)}}}')
+
+            return BatchUpdateFieldsResponse(
+                success=True,
+                message=f"字段批量更新成功，共更新 {len(updated_paths)} 个字段",
+                enterprise_code=request.enterprise_code,
+                total_count=total_count,
+                updated_count=len(updated_paths),
+                updated_fields=updated_paths,
+                skipped_fields=skipped_paths,
+                not_found_fields=not_found_paths
+            )
+        else:
+            log_error(f"字段批量更新失败",
+                    extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "total_count": {total_count}, "not_found_count": {len(not_found_paths)}}}')
+
+            return BatchUpdateFieldsResponse(
+                success=False,
+                message="未找到任何需要更新的字段" if update_result["success"] else "数据库更新操作失败",
+                enterprise_code=request.enterprise_code,
+                total_count=total_count,
+                skipped_fields=skipped_paths,
+                not_found_fields=not_found_paths
+            )
+    except Exception as e:
+        log_error("批量更新字段值异常", exception=e,
+                extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "total_count": {total_count}}}')
+
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量更新字段值失败: {str(e)}"
+        )
+
 @app.post("/api/v1/enterprises/search",
           response_model=EnterpriseSearchResponse,
           summary="企业模糊搜索")
@@ -333,7 +672,8 @@ async def search_enterprises(
         # 使用MongoDBManager的专用搜索方法
         documents, total_count = await manager.search_enterprises_by_text(
             search_text=request.enterprise_text,
-            limit=request.limit
+            limit=request.limit,
+            with_count=request.with_count
         )
         
         # 构建结果列表
@@ -347,9 +687,13 @@ async def search_enterprises(
         log_info(f"企业搜索完成", 
                  extra_data=f'{{"search_text": "{request.enterprise_text}", "found_count": {len(enterprises)}, "total_count": {total_count}}}')
         
+        message = f"找到 {len(enterprises)} 条匹配记录"
+        if total_count is not None:
+            message += f"（共 {total_count} 条）"
+        
         return EnterpriseSearchResponse(
             success=True,
-            message=f"找到 {len(enterprises)} 条匹配记录（共 {total_count} 条）",
+            message=message,
             total_count=total_count,
             enterprises=enterprises
         )
@@ -409,8 +753,8 @@ async def query_enterprise_fields(
         log_info(f"开始查询企业字段数据", 
                 extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "path_code": "{request.path_code_param}", "fields_param": {request.fields_param}}}')
         
-        # 1. 检查企业是否存在
-        enterprise_doc = await manager.find_document_by_id(request.enterprise_code)
+        # 1. 检查企业是否存在（只取_id，不读取整个fields数组）
+        enterprise_doc = await manager.find_document_by_id(request.enterprise_code, projection={"_id": 1})
         if not enterprise_doc:
             log_error(f"企业文档未找到", 
                     extra_data=f'{{"enterprise_code": "{request.enterprise_code}"}}')
@@ -502,8 +846,8 @@ async def edit_field_value(
     - **path_code_param**: 层级路径代码，用于匹配字段
     - **dict_fields**: 字段更新字典列表，每个字典包含要更新的字段信息
     
-    该API会通过enterprise_code查询文档，然后用path_code_param匹配fields数组中的path_code字段，
-    最后使用dict_fields中的key-value对更新匹配字段的值。
+    该API会通过path_code_param和field_code组合出字段完整路径，按缓存的字段下标定位fields数组中的字段，
+    然后使用dict_fields中的key-value对更新匹配字段的值，不需要把整个企业文档读入内存。
     """
     try:
         log_info(f"开始批量编辑字段值", 
@@ -516,9 +860,35 @@ async def edit_field_value(
                 message="dict_fields 不能为空"
             )
         
-        # 2. 查找企业文档
-        enterprise_doc = await manager.find_document_by_id(request.enterprise_code)
-        if not enterprise_doc:
+        # 2. 准备批量更新数据，按 path_code.field_code 组织为字段完整路径
+        field_updates = {}
+        timestamp = manager.get_current_timestamp()
+        
+        for field_dict in request.dict_fields:
+            field_code = field_dict.get("field_code")
+            if not field_code:
+                continue
+            
+            # 只保留FieldDataModel中存在的字段，跳过用于匹配的field_code
+            values = {
+                update_key: update_value
+                for update_key, update_value in field_dict.items()
+                if update_key != "field_code" and update_key in FieldDataModel.__fields__
+            }
+            
+            # 如果有字段被更新，同时更新时间戳
+            if values:
+                values["update_time"] = timestamp
+                field_updates[f"{request.path_code_param}.{field_code}"] = values
+        
+        # 3. 按缓存的字段下标执行数据库更新操作（无需读取整个文档）
+        update_result = await manager.update_fields_by_path(
+            request.enterprise_code, field_updates, path_code=request.path_code_param
+        )
+        # 数据已写入，使原生查询结果缓存失效
+        query_result_cache.invalidate()
+        
+        if not update_result["document_found"]:
             log_error(f"企业文档未找到", 
                     extra_data=f'{{"enterprise_code": "{request.enterprise_code}"}}')
             return EditFieldValueResponse(
@@ -526,15 +896,10 @@ async def edit_field_value(
                 message=f"企业代码 {request.enterprise_code} 对应的文档未找到"
             )
         
-        # 3. 在fields数组中查找匹配path_code的字段
-        fields_array = enterprise_doc.get("fields", [])
-        matched_fields_indices = []
+        # 4. 检查路径下是否存在字段
+        total_processed = update_result["path_field_count"]
         
-        for index, field in enumerate(fields_array):
-            if field.get("path_code") == request.path_code_param:
-                matched_fields_indices.append((index, field))
-        
-        if not matched_fields_indices:
+        if update_result["success"] and total_processed == 0:
             log_error(f"未找到匹配的字段", 
                     extra_data=f'{{"enterprise_code": "{request.enterprise_code}", "path_code_param": "{request.path_code_param}"}}')
             return EditFieldValueResponse(
@@ -542,48 +907,14 @@ async def edit_field_value(
                 message=f"路径代码 {request.path_code_param} 未匹配到任何字段"
             )
         
-        # 4. 准备批量更新数据
-        update_fields = {}
-        updated_field_codes = []
-        total_processed = 0
-        updated_count = 0
-        
-        # 将dict_fields转换为以field_code为key的字典，便于查找
-        field_updates_map = {}
-        for field_dict in request.dict_fields:
-            if "field_code" in field_dict:
-                field_updates_map[field_dict["field_code"]] = field_dict
+        updated_field_codes = [
+            full_path_code.rsplit('.', 1)[-1] for full_path_code in update_result["updated_paths"]
+        ]
+        updated_count = len(updated_field_codes)
         
-        # 遍历匹配的字段，应用更新
-        for field_index, field in matched_fields_indices:
-            field_code = field.get("field_code")
-            total_processed += 1
-            
-            # 检查是否有针对该字段的更新
-            if field_code in field_updates_map:
-                field_update = field_updates_map[field_code]
-                field_updated = False
-                
-                # 遍历更新字典中的所有字段
-                for update_key, update_value in field_update.items():
-                    # 跳过field_code，因为它只是用于匹配的
-                    if update_key == "field_code":
-                        continue
-                    
-                    # 检查字段是否存在于FieldDataModel中
-                    if update_key in FieldDataModel.__fields__:
-                        update_fields[f"fields.{field_index}.{update_key}"] = update_value
-                        field_updated = True
-                
-                # 如果有字段被更新，记录并更新时间戳
-                if field_updated:
-                    update_fields[f"fields.{field_index}.update_time"] = manager.get_current_timestamp()
-                    updated_field_codes.append(field_code)
-                    updated_count += 1
-        
-        # 5. 执行数据库更新操作
-        if update_fields:
-            success = await manager.update_document(request.enterprise_code, update_fields)
+        # 5. 返回更新结果
+        if field_updates:
+            success = update_result["success"]
             
             if success:
                 log_info(f"字段批量更新成功", 
@@ -681,6 +1012,8 @@ async def delete_many_documents(
         
         # 调用MongoDB管理器的批量删除方法
         delete_result = await manager.delete_many_documents(request.filter_query)
+        # 数据已写入，使原生查询结果缓存失效
+        query_result_cache.invalidate()
         
         # 构建响应
         response = DeleteManyDocumentsResponse(
@@ -733,50 +1066,99 @@ async def execute_mongo_command(
         包含新格式分类后数据的响应模型
     """
     start_time = time.time()
+    query_type = None
+    query_params = None
     
     try:
         log_info("开始执行MongoDB原生查询", 
                 extra_data=f'{{"query_cmd": "{request.query_cmd[:200]}...", "database": "{manager.database.name if manager.database is not None else "未知"}", "collection": "{manager.collection_name}"}}')
         
-        # 2.1 解析查询操作类型
-        query_type = _parse_query_type(request.query_cmd)
-        if not query_type:
+        # 只取到当前页为止的数据，限制分页深度，避免把整个集合读入内存
+        if request.page * request.page_size > MAX_QUERY_ROW_LIMIT:
             raise HTTPException(
                 status_code=400,
-                detail="不支持的查询类型，只支持 find/findOne/aggregate/count/countDocuments/distinct 操作"
+                detail=f"分页过深：页码×每页行数不能超过 {MAX_QUERY_ROW_LIMIT}，请缩小查询条件"
             )
         
-        # 2.2 解析查询参数（集合名将被忽略，使用配置的集合）
-        query_params = _parse_query_parameters_with_json5(request.query_cmd, query_type)
-        
-        # 2.3 执行MongoDB查询（使用配置的集合）
-        result_data, total_count = await _execute_mongodb_query(
-            manager, query_type, query_params
+        # 2.1 编译查询语句：解析操作类型和参数（集合名将被忽略，使用配置的集合），相同语句直接使用编译缓存
+        try:
+            compiled = query_compiler.compile(request.query_cmd)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query_type = compiled.query_type
+        query_params = compiled.params
+        
+        # 相同的查询（解析后参数一致）直接使用缓存结果
+        cache_key = QueryResultCache.make_key(
+            compiled.key, page=request.page, page_size=request.page_size, with_count=request.with_count
         )
-        
-        # 2.4 根据查询类型对返回数据进行分类处理 - 使用新格式
-        response_data = _classify_query_result_new_format(query_type, result_data, total_count,query_params)
+        # $out/$merge 管道每次都要真正执行写入，不读也不写结果缓存
+        writes = compiled.writes
+        cached = None if writes else query_result_cache.get(cache_key)
+        if cached is not None:
+            response_data, total_count = cached["response_data"], cached["total_count"]
+        else:
+            # 查询期间若有写入使缓存失效，结果不再写入缓存
+            cache_generation = query_result_cache.generation
+            # 2.3 执行MongoDB查询（使用配置的集合），只取到当前页为止的数据
+            row_offset = (request.page - 1) * request.page_size
+            try:
+                result_data, total_count = await _execute_mongodb_query(
+                    manager, query_type, query_params,
+                    row_limit=row_offset + request.page_size + 1,
+                    with_count=request.with_count
+                )
+            finally:
+                if writes:
+                    # 管道已（可能部分）写入集合，使原生查询结果缓存和计数缓存失效
+                    query_result_cache.invalidate()
+                    manager.count_cache.clear()
+            
+            # 2.4 根据查询类型对返回数据进行分类处理 - 使用新格式
+            response_data = _classify_query_result_new_format(
+                query_type, result_data, total_count, query_params,
+                page=request.page, page_size=request.page_size
+            )
+            # 从节点的结果可能滞后于刚完成的写入（写入后的 invalidate 挡不住），只缓存读主节点的结果
+            if manager.reads_from_primary and not writes:
+                query_result_cache.set(
+                    cache_key, {"response_data": response_data, "total_count": total_count}, generation=cache_generation
+                )
         
         # 2.5 计算统计信息 - 运行耗时以ms为单位
         execution_time = (time.time() - start_time) * 1000
         
+        query_journal.record(
+            request.query_cmd, query_type, query_params, execution_time,
+            row_count=len(response_data["result_data"]),
+            has_more=response_data.get("has_more", False),
+            cache_hit=cached is not None,
+            rows=response_data["result_data"]
+        )
+        
         log_info("MongoDB原生查询执行成功", 
-                extra_data=f'{{"query_type": "{query_type}", "result_type": "{response_data["type"]}", "execution_time_ms": {execution_time}, "collection": "{manager.collection_name}"}}')
+                extra_data=f'{{"query_type": "{query_type}", "result_type": "{response_data["type"]}", "execution_time_ms": {execution_time}, "collection": "{manager.collection_name}", "cache_hit": {str(cached is not None).lower()}}}')
         
         # 2.6 直接返回新格式的响应数据
         return ExecuteMongoQueryResponse(
             type=response_data["type"],
             period=f"{round(execution_time, 2)}ms",
             messages=response_data["messages"],
-            result_data=response_data["result_data"][0:100],
+            result_data=response_data["result_data"],
             structure_type = response_data["structure_type"],
-            field_strategy=response_data.get("field_strategy", "")  # 获取字段策略，默认为空
+            field_strategy=response_data.get("field_strategy", ""),  # 获取字段策略，默认为空
+            page=request.page,
+            page_size=request.page_size,
+            has_more=response_data.get("has_more", False),
+            total_count=total_count if query_type == "find" else None  # 仅find查询在with_count时统计总数
         )
         
     except HTTPException:
         raise
     except Exception as e:
         execution_time = (time.time() - start_time) * 1000
+        query_journal.record(request.query_cmd, query_type, query_params, execution_time,
+                             row_count=0, error=str(e))
         log_error("MongoDB原生查询执行失败", exception=e,
                  extra_data=f'{{"query_cmd": "{request.query_cmd[:200]}...", "execution_time_ms": {execution_time}, "collection": "{manager.collection_name if manager else "未知"}"}}')
         
@@ -894,6 +1276,17 @@ def _preprocess_js_object(js_str: str) -> str:
     
     return js_str
 
+def _loads_js_value(js_str: str) -> Any:
+    """
+    解析参数字符串：已是严格JSON时直接使用标准库json（C实现），否则预处理JS语法后用json5解析
+
+    严格JSON中不存在正则字面量、注释、Date()等JS语法，跳过预处理也避免了误改字符串中的 "/" 等内容。
+    """
+    try:
+        return json.loads(js_str)
+    except ValueError:
+        return json5.loads(_preprocess_js_object(js_str))
+
 def _parse_query_parameters_with_json5(query_cmd: str, query_type: str) -> Dict[str, Any]:
     """
     使用json5解析查询参数，更好地处理JavaScript语法
@@ -913,26 +1306,33 @@ def _parse_query_parameters_with_json5(query_cmd: str, query_type: str) -> Dict[
             
             # 如果有多个参数，用逗号分割（注意处理嵌套对象中的逗号）
             filter_str = _extract_first_parameter(params_str)
-            filter_str = _preprocess_js_object(filter_str)
             
             try:
-                filter_dict = json5.loads(filter_str) if filter_str else {}
-                return {"filter": filter_dict}
+                filter_dict = _loads_js_value(filter_str) if filter_str else {}
             except Exception as e:
                 log_error(f"解析find/findOne参数失败: {filter_str}", exception=e)
                 return {"filter": {}}
+            
+            # 第二个参数为投影，下推到数据库减少返回的数据量
+            query_params = {"filter": filter_dict}
+            params = _split_parameters(params_str)
+            if len(params) >= 2:
+                try:
+                    projection = _loads_js_value(params[1])
+                    if isinstance(projection, dict) and projection:
+                        query_params["projection"] = projection
+                except Exception as e:
+                    log_error(f"解析find/findOne投影参数失败: {params[1]}", exception=e)
+            return query_params
         
         elif query_type in ["aggregate", "group"]:
             params_str = _extract_method_params(query_cmd, "aggregate")
             if not params_str:
                 return {"pipeline": []}
             
-            # 预处理JavaScript对象语法
-            params_str = _preprocess_js_object(params_str)
-            
             try:
-                # 尝试解析为数组
-                pipeline = json5.loads(params_str)
+                # 尝试解析为数组（非严格JSON时预处理JavaScript对象语法）
+                pipeline = _loads_js_value(params_str)
                 
                 # 确保pipeline是列表类型
                 if not isinstance(pipeline, list):
@@ -973,10 +1373,8 @@ def _parse_query_parameters_with_json5(query_cmd: str, query_type: str) -> Dict[
             if not params_str:
                 return {"filter": {}}
             
-            params_str = _preprocess_js_object(params_str)
-            
             try:
-                filter_dict = json5.loads(params_str) if params_str else {}
+                filter_dict = _loads_js_value(params_str) if params_str else {}
                 return {"filter": filter_dict}
             except Exception as e:
                 log_error(f"解析{method}参数失败: {params_str}", exception=e)
@@ -1000,9 +1398,8 @@ def _parse_query_parameters_with_json5(query_cmd: str, query_type: str) -> Dict[
             
             if len(params) >= 2:
                 # 第二个参数是过滤条件（对象）
-                filter_str = _preprocess_js_object(params[1])
                 try:
-                    filter_dict = json5.loads(filter_str)
+                    filter_dict = _loads_js_value(params[1])
                 except Exception as e:
                     log_error(f"解析distinct过滤条件失败: {params[1]}", exception=e)
                     filter_dict = {}
@@ -1140,24 +1537,42 @@ def _split_parameters(params_str: str) -> List[str]:
     
     return params
 
+def _take_page(rows: Iterable[Any], page: int, page_size: int) -> Tuple[List[Any], bool]:
+    """
+    从惰性的结果行中取出指定页，取到下一页的第一行即停止
+
+    Returns:
+        元组：(当前页数据, 是否还有下一页)
+    """
+    offset = (page - 1) * page_size
+    page_rows = list(islice(rows, offset, offset + page_size + 1))
+    return page_rows[:page_size], len(page_rows) > page_size
+
 def _classify_query_result_new_format(query_type: str, 
                                       result_data: List[Dict[str, Any]], 
-                                      total_count: int,
-                                      query_params: Dict[str, Any]) -> Dict[str, Any]:
+                                      total_count: Optional[int],
+                                      query_params: Dict[str, Any],
+                                      page: int = 1,
+                                      page_size: int = 100) -> Dict[str, Any]:
     """
     优化后的查询结果分类处理函数 - 支持嵌套列表数据处理
     
+    明细和分组结果按行惰性扁平化，只处理到请求的页为止。
+    
     Args:
         query_type: 查询类型
         result_data: 查询结果数据
         total_count: 总数量
         query_params: 查询参数
+        page: 页码（从1开始）
+        page_size: 每页行数
     Returns:
         分类后的数据字典 - 新格式
     """
     result = None
     field_strategy = ""
     structure_type = "unknown"  # 用于标识实际处理的结构类型
+    has_more = False
     
     # 1、汇总数据   
     if query_type in ["count", "countDocuments", "distinct"]:
@@ -1179,8 +1594,8 @@ def _classify_query_result_new_format(query_type: str,
     elif query_type == "group":
         # 分组汇总类型：$group 聚合操作
         # ========== 核心优化：参考find/findOne/aggregate的处理逻辑 ==========
-        # 1. 检测并提取嵌套列表中的数据
-        flattened_data = _extract_nested_list_data(result_data)
+        # 1. 检测并提取嵌套列表中的数据（只取当前页）
+        flattened_data, has_more = _take_page(_extract_nested_list_data(result_data), page, page_size)
         # 2. 重新计算实际需要处理的数据量
         actual_data_count = len(flattened_data)
         # 3. 处理分组结果，应用字段别名
@@ -1205,7 +1620,8 @@ def _classify_query_result_new_format(query_type: str,
             "messages": "正常处理", 
             "result_data": processed_group_data,
             "structure_type": structure_type,  # 动态设置结构类型
-            "field_strategy": "group"
+            "field_strategy": "group",
+            "has_more": has_more
         }
     
     # 3、明细数据处理 - 优化后的逻辑  
@@ -1214,8 +1630,8 @@ def _classify_query_result_new_format(query_type: str,
         result_list = []
         
         # ========== 核心优化：处理嵌套列表的逻辑 ==========
-        # 检测并提取嵌套列表中的数据
-        flattened_data = _extract_nested_list_data(result_data)
+        # 检测并提取嵌套列表中的数据（只取当前页）
+        flattened_data, has_more = _take_page(_extract_nested_list_data(result_data), page, page_size)
         
         # 重新计算实际需要处理的数据量
         actual_data_count = len(flattened_data)
@@ -1235,61 +1651,23 @@ def _classify_query_result_new_format(query_type: str,
             "messages": "正常处理",
             "result_data": result_list,
             "structure_type": structure_type,  # 标识实际处理的结构类型
-            "field_strategy": field_strategy     # 标识使用的字段策略
+            "field_strategy": field_strategy,    # 标识使用的字段策略
+            "has_more": has_more
         }
     
-    # 记录执行命令和结果(临时测试使用)
-    try:
-        def convert_datetime_to_string(obj: Any) -> Any:
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            elif isinstance(obj, dict):
-                return {key: convert_datetime_to_string(value) for key, value in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_datetime_to_string(item) for item in obj]
-            else:
-                return obj
-        
-        storage_data = {
-            "query_type": query_type,
-            "query_params": query_params,
-            "result": {
-                "type": result["type"],
-                "result": result["result_data"],
-                "structure_type": result.get("structure_type", "unknown"),
-                "field_strategy": result.get("field_strategy", "existing_fields")
-            },
-            "total_count": total_count,
-        }
-        serializable_data = convert_datetime_to_string(storage_data)
-        # 以query_type命名文件
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"D://mongoquery_history//{query_type}_{timestamp}.json"
-        # 使用json5写入文件，支持更灵活的JSON格式
-        with open(filename, 'w', encoding='utf-8') as f:
-            json5.dump(serializable_data , f, ensure_ascii=False, indent=2)
-            
-    except Exception as e:
-        # 文件存储失败不影响主要功能，可以记录日志或静默处理
-        print(f"文件存储失败{e}")
     return result
 
 #region ----------- 明细查询结果 ----------------
-def _remove_duplicate_keys_from_data(result_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _remove_duplicate_keys_from_data(result_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
     """
-    检测并移除result_data中每项数据字典的重复key
+    检测并移除result_data中每项数据字典的重复key（生成器，按需逐条处理）
     
     Args:
-        result_data: 查询结果数据列表
+        result_data: 查询结果数据
         
-    Returns:
-        List[Dict[str, Any]]: 移除重复key后的数据列表
+    Yields:
+        Dict[str, Any]: 移除重复key后的数据
     """
-    if not result_data:
-        return result_data
-    
-    cleaned_data = []
-    
     for doc in result_data:
         if doc is None:
             continue
@@ -1323,25 +1701,39 @@ def _remove_duplicate_keys_from_data(result_data: List[Dict[str, Any]]) -> List[
                     cleaned_doc[key] = value
                     processed_keys.add(key_lower)
             
-            cleaned_data.append(cleaned_doc)
+            yield cleaned_doc
         else:
-            # 没有重复key，直接添加
-            cleaned_data.append(doc)
+            # 没有重复key，直接返回
+            yield doc
+
+def _map_field_names(docs: Iterable[Dict[str, Any]], field_dict: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    """
+    将文档中的模板字段替换为中文名称（生成器），未匹配的字段保留原有key
     
-    return cleaned_data
+    Args:
+        docs: 文档数据
+        field_dict: 字段模板（英文key -> 中文名称）
+        
+    Yields:
+        Dict[str, Any]: 映射后的文档
+    """
+    for doc in docs:
+        if doc is None:
+            continue
+        yield {field_dict.get(key, key): value for key, value in doc.items()}
 
-def _create_single_doc_document(result_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def _create_single_doc_document(result_data: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     处理单个文档的数据处理和字段映射
     
     Args:
-        result_data: 查询结果数据列表
+        result_data: 查询结果数据（已按页截取）
         
     Returns:
         元组：(处理后的数据列表, 包含字段策略的字典)
     """
     # 1. 先检测并移除重复key
-    cleaned_data = _remove_duplicate_keys_from_data(result_data)
+    cleaned_data = list(_remove_duplicate_keys_from_data(result_data))
     
     # 获取完整字段模板
     field_dict = _get_complete_field_template()
@@ -1350,50 +1742,23 @@ def _create_single_doc_document(result_data: List[Dict[str, Any]]) -> Tuple[List
     if not cleaned_data:
         return [], {"field_strategy": "flat_card"}
     
-    processed_data = []
-    
-    # 处理单个或空数据的情况
-    for doc in cleaned_data:
-        if doc is None:
-            continue
-            
-        processed_doc = {}
-        matched_fields = set()  # 记录匹配的字段
-        
-        # 2. 遍历文档的每个字段进行字段映射和对比操作
-        for key, value in doc.items():
-            if key in field_dict:
-                # 如果字段在模板中，替换为中文名称
-                chinese_name = field_dict[key]
-                processed_doc[chinese_name] = value
-                matched_fields.add(key)
-            else:
-                # 未匹配的字段保留原有key
-                processed_doc[key] = value
-        
-        processed_data.append(processed_doc)
+    # 2. 字段映射
+    processed_data = list(_map_field_names(cleaned_data, field_dict))
     
     # 判断字段策略：如果所有模板字段都能匹配到，则为full_card，否则为flat_card
-    if cleaned_data:
-        # 获取第一个非None文档来判断字段匹配情况
-        first_doc = next((doc for doc in cleaned_data if doc is not None), {})
-        matched_template_keys = set(first_doc.keys()) & set(field_dict.keys())
-        
-        # 判断是否模板字段全部匹配
-        if len(matched_template_keys) == len(field_dict):
-            field_strategy = "full_card"
-        else:
-            field_strategy = "flat_card"
+    matched_template_keys = set(cleaned_data[0].keys()) & set(field_dict.keys())
+    if len(matched_template_keys) == len(field_dict):
+        field_strategy = "full_card"
     else:
         field_strategy = "flat_card"
     return processed_data, {"field_strategy": field_strategy}
 
-def _create_multi_docs_document(result_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def _create_multi_docs_document(result_data: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     处理多个文档的数据处理和字段映射
     
     Args:
-        result_data: 查询结果数据列表
+        result_data: 查询结果数据（已按页截取）
         
     Returns:
         元组：(处理后的数据列表, 包含字段策略的字典)
@@ -1404,45 +1769,30 @@ def _create_multi_docs_document(result_data: List[Dict[str, Any]]) -> Tuple[List
     # 获取完整字段模板
     field_dict = _get_complete_field_template()
     
+    # 先用第一个文档判断字段策略
+    first_doc = next(cleaned_data, None)
+    
     # 如果没有数据，返回空结果
-    if not cleaned_data:
+    if first_doc is None:
         return [], {"field_strategy": "flat_table"}
     
-    # 先用第一个文档判断字段策略
-    first_doc = cleaned_data[0] if cleaned_data else {}
     field_strategy = "flat_table"  # 默认为平表策略
     
-    if first_doc:
-        # 检查第一个文档与模板的匹配情况
-        matched_template_keys = set(first_doc.keys()) & set(field_dict.keys())
-        
-        # 如果模板字段全部匹配，则为full_table
-        if len(matched_template_keys) == len(field_dict):
-            field_strategy = "full_table"
+    # 检查第一个文档与模板的匹配情况，模板字段全部匹配则为full_table
+    matched_template_keys = set(first_doc.keys()) & set(field_dict.keys())
+    if len(matched_template_keys) == len(field_dict):
+        field_strategy = "full_table"
     
-    processed_data = []
-    
-    # 2. 遍历所有文档进行字段映射处理和对比操作
-    for doc in cleaned_data:
-        if doc is None:
-            continue
-            
-        processed_doc = {}
-        
-        # 遍历文档的每个字段
-        for key, value in doc.items():
-            if key in field_dict:
-                # 如果字段在模板中，替换为中文名称
-                chinese_name = field_dict[key]
-                processed_doc[chinese_name] = value
-            else:
-                # 未匹配的字段保留原有key
-                processed_doc[key] = value
-        
-        processed_data.append(processed_doc)
+    # 2. 遍历所有文档进行字段映射处理
+    processed_data = list(_map_field_names(_chain_first(first_doc, cleaned_data), field_dict))
     
     return processed_data, {"field_strategy": field_strategy}
 
+def _chain_first(first: Any, rest: Iterator[Any]) -> Iterator[Any]:
+    """将已取出的第一个元素与剩余迭代器重新拼接"""
+    yield first
+    yield from rest
+
 def _get_complete_field_template() -> Dict[str, str]:
     """
     获取完整字段模板（用于full_fields策略）
@@ -1477,9 +1827,9 @@ def _get_complete_field_template() -> Dict[str, str]:
         "update_time": "更新时间",            
     }
 
-def _extract_nested_list_data(result_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _extract_nested_list_data(result_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
     """
-    提取嵌套列表中的数据，将复杂的嵌套结构扁平化处理
+    提取嵌套列表中的数据，将复杂的嵌套结构扁平化处理（生成器，调用方取够一页即停止）
     
     处理多种情况：
     1. 字段值是列表且包含字典：如 {"匹配的字段": [{"enterprise_code": "xxx"}, ...]}
@@ -1489,11 +1839,9 @@ def _extract_nested_list_data(result_data: List[Dict[str, Any]]) -> List[Dict[st
     Args:
         result_data: 原始查询结果数据
         
-    Returns:
-        扁平化后的数据列表，用于后续处理
+    Yields:
+        扁平化后的数据行，用于后续处理
     """
-    flattened_data = []
-    
     for doc in result_data:
         if doc is None:
             continue
@@ -1509,17 +1857,14 @@ def _extract_nested_list_data(result_data: List[Dict[str, Any]]) -> List[Dict[st
                 if isinstance(field_value[0], dict):
                     nested_data_found = True
                     
+                    # 原文档的非列表字段（如_id, 企业统一信用编码等）只计算一次
+                    base_fields = {k: v for k, v in doc.items() if not isinstance(v, list)}
+                    
                     # 提取列表中的每个字典数据
                     for list_item in field_value:
                         if isinstance(list_item, dict):
                             # 创建新的文档，包含原文档的基础信息和列表项的详细信息
-                            new_doc = {
-                                # 保留原文档的非列表字段（如_id, 企业统一信用编码等）
-                                **{k: v for k, v in doc.items() if not isinstance(v, list)},
-                                # 添加列表项的字段
-                                **list_item
-                            }
-                            flattened_data.append(new_doc)
+                            yield {**base_fields, **list_item}
                     
                     # 找到第一个字典列表后就退出，避免重复处理
                     break
@@ -1532,22 +1877,19 @@ def _extract_nested_list_data(result_data: List[Dict[str, Any]]) -> List[Dict[st
                     nested_data_found = True
                     
                     # 创建新的文档，包含原文档的基础信息和字典的详细信息
-                    new_doc = {
+                    yield {
                         # 保留原文档的非当前字典字段
                         **{k: v for k, v in doc.items() if k != field_name},
                         # 添加字典中的字段
                         **field_value
                     }
-                    flattened_data.append(new_doc)
                     
                     # 找到字典后就退出，避免重复处理
                     break
         
-        # 如果没有找到嵌套列表或字典，直接添加原文档
+        # 如果没有找到嵌套列表或字典，直接返回原文档
         if not nested_data_found:
-            flattened_data.append(doc)
-    
-    return flattened_data
+            yield doc
 #endregion ----------- 明细查询结果 --------------
 
 #region---------- 分组查询处理 -------------------
@@ -1669,11 +2011,100 @@ def _apply_group_field_aliases(group_doc: Dict[str, Any], query_params: Dict[str
     return processed_doc
 #endregion ---------- 分组查询处理 ---------------
     
+def _is_fields_unwind_stage(stage: Any) -> bool:
+    """判断聚合阶段是否为展开fields数组的$unwind"""
+    if not isinstance(stage, dict) or "$unwind" not in stage:
+        return False
+    unwind = stage["$unwind"]
+    if isinstance(unwind, dict):
+        unwind = unwind.get("path")
+    return unwind == "$fields"
+
+def _rewrite_fields_references(value: Any) -> Any:
+    """
+    将针对内嵌fields数组的字段引用改写为字段文档上的引用
+
+    - 键 "fields.xxx" -> "xxx"
+    - 表达式 "$fields.xxx" -> "$xxx"
+    - {"fields": {"$elemMatch": {...}}} -> 直接合并为字段文档上的条件
+    """
+    if isinstance(value, dict):
+        rewritten = {}
+        for key, item in value.items():
+            if key == "fields" and isinstance(item, dict) and list(item.keys()) == ["$elemMatch"]:
+                rewritten.update(_rewrite_fields_references(item["$elemMatch"]))
+                continue
+            if key.startswith("fields."):
+                key = key[len("fields."):]
+            rewritten[key] = _rewrite_fields_references(item)
+        return rewritten
+    if isinstance(value, list):
+        return [_rewrite_fields_references(item) for item in value]
+    if isinstance(value, str) and value.startswith("$fields."):
+        return "$" + value[len("$fields."):]
+    return value
+
+def _adapt_query_for_field_documents(query_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将面向"一企一档"内嵌布局编写的查询参数改写为字段集合上的查询
+
+    字段集合中每个文档即一个字段（带有enterprise_code等企业信息），
+    因此去掉 $unwind: "$fields" 阶段并去掉字段路径上的 "fields." 前缀即可。
+
+    Args:
+        query_params: _parse_query_parameters_with_json5 解析出的查询参数
+
+    Returns:
+        Dict[str, Any]: 改写后的查询参数
+    """
+    adapted = dict(query_params)
+    if isinstance(adapted.get("pipeline"), list):
+        adapted["pipeline"] = [
+            stage for stage in adapted["pipeline"] if not _is_fields_unwind_stage(stage)
+        ]
+    adapted = _rewrite_fields_references(adapted)
+
+    field_name = adapted.get("field")
+    if isinstance(field_name, str) and field_name.startswith("fields."):
+        adapted["field"] = field_name[len("fields."):]
+
+    return adapted
+
+# 未指定分页时明细查询最多返回的行数
+DEFAULT_QUERY_ROW_LIMIT = 100
+
+# 分页查询最多读取到的行数（页码×每页行数），更深的分页请缩小查询条件
+MAX_QUERY_ROW_LIMIT = 10000
+
+def _build_find_pipeline(filter_dict: Dict[str, Any],
+                         projection: Optional[Dict[str, Any]],
+                         row_limit: int) -> List[Dict[str, Any]]:
+    """
+    将内嵌布局上的find改写为聚合：由数据库展开fields数组并限制行数，
+    避免把整份企业文档取回后再在内存中扁平化
+
+    展开后的字段合并到企业基础信息上，与 _extract_nested_list_data 的扁平化结果一致；
+    没有fields数组的文档原样保留。
+    """
+    pipeline: List[Dict[str, Any]] = [{"$match": filter_dict}]
+    if projection:
+        pipeline.append({"$project": projection})
+    pipeline.extend([
+        {"$unwind": {"path": "$fields", "preserveNullAndEmptyArrays": True}},
+        {"$limit": row_limit},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$$ROOT", "$fields"]}}},
+        # 企业名称检索分词只用于索引检索，不返回给调用方
+        {"$project": {"fields": 0, NAME_NGRAMS_FIELD: 0}},
+    ])
+    return pipeline
+
 async def _execute_mongodb_query(
     manager: MongoDBManager, 
     query_type: str, 
-    query_params: Dict[str, Any]
-) -> Tuple[List[Dict[str, Any]], int]:
+    query_params: Dict[str, Any],
+    row_limit: int = DEFAULT_QUERY_ROW_LIMIT,
+    with_count: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
     """
     执行MongoDB查询 - 支持group查询
     
@@ -1681,16 +2112,25 @@ async def _execute_mongodb_query(
         manager: MongoDB管理器（已经连接到配置的数据库和集合）
         query_type: 查询类型
         query_params: 查询参数
+        row_limit: 明细/分组查询最多需要的结果行数（下推到数据库）。
+            每个返回文档扁平化后至少产生一行，因此按文档数限制不会少取数据
+        with_count: find查询是否统计匹配的文档总数，统计与查询并发执行
         
     Returns:
         [{}] 格式（列表格式）
     """
-    if manager.collection is None:
+    # 原生查询只读，走只读客户端（副本集下读从节点），不与写入争用主节点
+    collection = manager.read_query_collection
+    if collection is None:
         raise Exception("MongoDB集合未初始化")
     
-    # 直接使用管理器中配置的集合（"一企一档"）
-    collection = manager.collection
-    log_info(f"使用配置的集合: {manager.collection_name}")
+    # 一字段一文档布局下，将针对fields数组的查询改写到字段集合上执行
+    if manager.uses_field_documents:
+        query_params = _adapt_query_for_field_documents(query_params)
+        log_info(f"使用字段集合: {manager.field_collection_name}")
+    else:
+        # 直接使用管理器中配置的集合（"一企一档"）
+        log_info(f"使用配置的集合: {manager.collection_name}")
     
     total_count = 0
     result_data = []
@@ -1698,19 +2138,30 @@ async def _execute_mongodb_query(
     try:
         if query_type == "find":
             filter_dict = query_params.get("filter", {})
+            projection = query_params.get("projection")
             
-            # 获取总数
-            total_count = await collection.count_documents(filter_dict)
+            if manager.uses_field_documents:
+                # 字段集合中一个文档即一行，直接限制返回数量
+                cursor = collection.find(filter_dict, projection).limit(row_limit)
+            else:
+                # 内嵌布局由数据库展开fields数组并限制行数
+                cursor = collection.aggregate(_build_find_pipeline(filter_dict, projection, row_limit))
             
-            # 执行查询（限制返回数量避免内存问题）
-            cursor = collection.find(filter_dict).limit(100)
-            result_data = await cursor.to_list(length=100)
+            if with_count:
+                # 计数与查询并发执行，空条件走estimated_document_count，结果短期缓存
+                result_data, total_count = await asyncio.gather(
+                    cursor.to_list(length=row_limit),
+                    manager.count_documents_cached(filter_dict, collection)
+                )
+            else:
+                result_data = await cursor.to_list(length=row_limit)
+                total_count = None
             
         elif query_type == "findOne":
             filter_dict = query_params.get("filter", {})
             
             # findOne只返回一个文档
-            doc = await collection.find_one(filter_dict)
+            doc = await collection.find_one(filter_dict, query_params.get("projection"))
             result_data = [doc] if doc else []
             total_count = 1 if doc else 0
             
@@ -1725,11 +2176,15 @@ async def _execute_mongodb_query(
                 if not isinstance(stage, dict):
                     raise Exception(f"Pipeline阶段{i}必须是字典类型，当前类型: {type(stage)}")
             
+            # 追加$limit阶段，只取到当前页为止的文档；$out/$merge 必须是最后一个阶段且要写入全部结果，不追加
+            if not (pipeline and set(pipeline[-1]) & PIPELINE_TERMINAL_STAGES):
+                pipeline = pipeline + [{"$limit": row_limit}]
+            
             log_info(f"执行聚合查询，pipeline: {pipeline}")
             
             # 执行聚合查询
             cursor = collection.aggregate(pipeline)
-            result_data = await cursor.to_list(length=100)
+            result_data = await cursor.to_list(length=row_limit)
             total_count = len(result_data)
             
             # 对于group查询，记录额外信息
@@ -1739,8 +2194,8 @@ async def _execute_mongodb_query(
         elif query_type in ["count", "countDocuments"]:
             filter_dict = query_params.get("filter", {})
             
-            # 执行计数查询
-            count_result = await collection.count_documents(filter_dict)
+            # 执行计数查询（空条件走estimated_document_count，结果短期缓存）
+            count_result = await manager.count_documents_cached(filter_dict, collection)
             # 修正：确保 result_data 格式正确，包含 count 字段
             result_data = [{"count": count_result}]
             total_count = count_result  # 修正：total_count 应该是实际计数结果
@@ -1761,6 +2216,12 @@ async def _execute_mongodb_query(
         else:
             raise Exception(f"不支持的查询类型: {query_type}")
         
+        # 企业名称检索分词只用于索引检索，不返回给调用方
+        if query_type in ["find", "findOne", "aggregate", "group"]:
+            for doc in result_data:
+                if isinstance(doc, dict):
+                    doc.pop(NAME_NGRAMS_FIELD, None)
+        
         log_info(f"查询执行成功", 
                 extra_data=f'{{"query_type": "{query_type}", "collection": "{manager.collection_name}", "result_count": {len(result_data)}, "total_count": {total_count}}}')
         
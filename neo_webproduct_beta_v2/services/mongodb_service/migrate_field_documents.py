@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+企业档案存储布局迁移脚本 - 将"一企一文档"迁移为"一字段一文档"
+使用方法：python services/mongodb_service/migrate_field_documents.py [--env local] [--batch-size 2000] [--keep-embedded] [--dry-run] [--verbose]
+
+迁移完成后，将 mongo_config.yaml 中对应环境的 storage_layout 设置为 field_per_document 并重启服务。
+"""
+import sys
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+# 添加服务目录到Python路径
+service_root = Path(__file__).parent
+sys.path.insert(0, str(service_root))
+
+from pymongo import ReplaceOne
+
+def setup_logging(verbose=False):
+    """设置日志"""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    return logging.getLogger(__name__)
+
+class FieldDocumentMigrator:
+    """存储布局迁移器 - 复用MongoDBManager的连接与索引配置"""
+
+    def __init__(self, logger, env: str, batch_size: int, keep_embedded: bool, dry_run: bool):
+        self.logger = logger
+        self.env = env
+        self.batch_size = batch_size
+        self.keep_embedded = keep_embedded
+        self.dry_run = dry_run
+        self.manager = None
+
+    async def connect(self) -> bool:
+        """连接MongoDB并创建字段集合索引"""
+        from config import get_config, get_active_environment, list_configs
+        from mongodb_manager import MongoDBManager, STORAGE_LAYOUT_FIELD_PER_DOCUMENT
+
+        if self.env and self.env not in list_configs():
+            raise ValueError(f"未知的MongoDB运行环境: {self.env}，可用环境: {', '.join(list_configs())}")
+        config = get_config(self.env or get_active_environment())
+        self.manager = MongoDBManager(config, storage_layout=STORAGE_LAYOUT_FIELD_PER_DOCUMENT)
+        if not await self.manager.connect():
+            self.logger.error("❌ MongoDB连接失败")
+            return False
+
+        self.logger.info(f"✅ 已连接: {self.manager.collection_name} -> {self.manager.field_collection_name}")
+        return True
+
+    async def migrate(self) -> int:
+        """逐个企业迁移，返回迁移的企业数量"""
+        from flat_enterprise_archive_generator_v2 import get_template_version, to_field_documents
+
+        collection = self.manager.collection
+        field_collection = self.manager.field_collection
+
+        migrated = 0
+        cursor = collection.find({"fields": {"$exists": True}})
+        async for enterprise_doc in cursor:
+            enterprise_code = enterprise_doc["_id"]
+            fields = enterprise_doc.get("fields") or []
+
+            # 补齐字段上的企业信息，保证字段文档可独立按企业查询
+            for field in fields:
+                field["enterprise_code"] = enterprise_code
+                field["enterprise_name"] = enterprise_doc.get("enterprise_name", "")
+
+            template_version = enterprise_doc.get("template_version") or get_template_version(
+                [field.get("full_path_code", "") for field in fields]
+            )
+            field_documents = to_field_documents(fields, template_version)
+
+            if self.dry_run:
+                self.logger.info(f"[dry-run] {enterprise_code}: {len(field_documents)} 个字段")
+                migrated += 1
+                continue
+
+            # 按_id幂等写入，脚本中断后可重复执行
+            for start in range(0, len(field_documents), self.batch_size):
+                batch = field_documents[start:start + self.batch_size]
+                await field_collection.bulk_write(
+                    [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch],
+                    ordered=False
+                )
+
+            update = {"$set": {"template_version": template_version}}
+            if not self.keep_embedded:
+                update["$unset"] = {"fields": ""}
+            await collection.update_one({"_id": enterprise_code}, update)
+
+            migrated += 1
+            self.logger.info(f"✅ {enterprise_code}: 迁移 {len(field_documents)} 个字段")
+
+        return migrated
+
+    async def close(self):
+        """断开连接"""
+        if self.manager:
+            await self.manager.disconnect()
+
+async def run(args, logger) -> bool:
+    """执行迁移"""
+    migrator = FieldDocumentMigrator(
+        logger,
+        env=args.env,
+        batch_size=args.batch_size,
+        keep_embedded=args.keep_embedded,
+        dry_run=args.dry_run
+    )
+    try:
+        if not await migrator.connect():
+            return False
+        migrated = await migrator.migrate()
+        logger.info(f"🎉 迁移完成，共处理 {migrated} 个企业")
+        return True
+    except Exception as e:
+        logger.error(f"❌ 迁移失败: {e}")
+        return False
+    finally:
+        await migrator.close()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='一企一文档 -> 一字段一文档 存储布局迁移脚本')
+    parser.add_argument('--env', default=None, help='mongo_config.yaml 中的环境名称，默认为环境变量 MONGO_ENV 或 default_environment')
+    parser.add_argument('--batch-size', type=int, default=2000, help='每批写入的字段文档数量')
+    parser.add_argument('--keep-embedded', action='store_true', help='保留企业文档中的fields数组（便于回退）')
+    parser.add_argument('--dry-run', action='store_true', help='只统计不写入')
+    parser.add_argument('--verbose', action='store_true', help='详细输出')
+
+    args = parser.parse_args()
+    logger = setup_logging(args.verbose)
+
+    if not asyncio.run(run(args, logger)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,35 @@
 """
 优化的异常处理和日志模块 - 单例模式（线程安全）
 提供统一的日志记录、异常处理和安全执行功能
+
+日志写入为异步批量方式：调用方只生成日志记录并放入队列，
+由后台线程批量写入当天的CSV文件并定期刷新，调用方不做文件IO。
 """
 import csv
+import os
+import sys
+import time
+import queue
+import atexit
 import asyncio
 import threading
 import functools
 import traceback
-import inspect
 from typing import Callable, Any, Optional, Dict
 from datetime import datetime
 from pathlib import Path
 from contextlib import contextmanager
 from nicegui import ui
 
+# 日志级别，低于最低级别的日志在调用方直接丢弃
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'ERROR': 40}
+
+# 通过环境变量调整最低日志级别（如设置为 ERROR 即可丢弃热点接口的 INFO 日志）
+LOG_LEVEL_ENV = 'MONGO_LOG_LEVEL'
+
+# 写入线程停止标记
+_STOP = object()
+
 
 class MongoExceptionHandler:
     """线程安全的单例异常处理器"""
@@ -38,16 +54,30 @@ class MongoExceptionHandler:
         self.log_dir = Path('logs')
         self.max_stack_depth = 10  # 限制调用栈深度
         self.max_log_days = 30     # 保留日志天数
+        self.flush_interval = 1.0  # 日志文件刷新间隔（秒）
+        self.batch_size = 500      # 单次批量写入的最大记录数
+        self.min_level = LOG_LEVELS.get(os.environ.get(LOG_LEVEL_ENV, 'INFO').upper(), LOG_LEVELS['INFO'])
         
         # 创建日志目录
         self.log_dir.mkdir(exist_ok=True)
         
-        # 线程锁
-        self._file_lock = threading.Lock()
-        
         # 清理旧日志文件
         self._cleanup_old_logs()
         
+        # 用户信息获取入口（首次使用时导入）
+        self._auth_manager = None
+        
+        # 待写入的日志队列与后台写入线程
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self.dropped_count = 0
+        self._log_fp = None
+        self._log_writer = None
+        self._current_log_file: Optional[Path] = None
+        self._last_flush = time.monotonic()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='mongo-log-writer', daemon=True)
+        self._writer_thread.start()
+        atexit.register(self.close)
+        
         self._initialized = True
     
     def _get_today_log_file(self) -> Path:
@@ -102,15 +132,21 @@ class MongoExceptionHandler:
     def _get_current_user(self) -> Dict[str, Any]:
         """获取当前用户信息"""
         try:
-            from auth.session_manager import session_manager
-            from auth.auth_manager import auth_manager
+            if self._auth_manager is None:
+                from auth.auth_manager import auth_manager
+                self._auth_manager = auth_manager
+            if not self._auth_manager:
+                return {'user_id': None, 'username': 'anonymous'}
             
-            user = auth_manager.current_user
+            user = self._auth_manager.current_user
             if user:
                 return {
                     'user_id': user.id,
                     'username': user.username
                 }
+        except ModuleNotFoundError:
+            # 没有认证模块的进程（如独立服务）不再重复尝试导入
+            self._auth_manager = False
         except Exception:
             pass
         
@@ -119,10 +155,8 @@ class MongoExceptionHandler:
     def _get_caller_info(self, skip_frames: int = 2) -> Dict[str, Any]:
         """获取调用者信息"""
         try:
-            frame = inspect.currentframe()
             # 跳过指定数量的帧
-            for _ in range(skip_frames):
-                frame = frame.f_back if frame else None
+            frame = sys._getframe(skip_frames)
             
             if frame:
                 return {
@@ -158,44 +192,133 @@ class MongoExceptionHandler:
     
     def _write_log(self, level: str, message: str, exception: Optional[Exception] = None, 
                    extra_data: Optional[str] = None, skip_frames: int = 3):
-        """写入日志到CSV文件（线程安全）"""
+        """生成日志记录并放入写入队列（不做文件IO，不阻塞调用方）"""
+        if LOG_LEVELS.get(level, LOG_LEVELS['ERROR']) < self.min_level:
+            return
+        
         try:
-            with self._file_lock:
-                # 获取今天的日志文件
-                log_file = self._get_today_log_file()
-                
-                # 如果文件不存在则初始化
-                if not log_file.exists():
-                    self._init_csv_log(log_file)
-                
-                user_info = self._get_current_user()
-                caller_info = self._get_caller_info(skip_frames)
-                
-                # 准备日志数据
-                log_data = [
-                    datetime.now().isoformat(),
-                    level,
-                    user_info['user_id'],
-                    user_info['username'],
-                    caller_info['module'],
-                    caller_info['function'],
-                    caller_info['line_number'],
-                    message,
-                    type(exception).__name__ if exception else '',
-                    self._get_stack_trace(exception) if exception else '',
-                    extra_data or ''
-                ]
-                
-                # 写入CSV
-                with open(log_file, 'a', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(log_data)
-                    
+            # 用户和调用者信息依赖调用方上下文，需在当前线程获取
+            user_info = self._get_current_user()
+            caller_info = self._get_caller_info(skip_frames)
+            
+            # 准备日志数据
+            log_data = [
+                datetime.now().isoformat(),
+                level,
+                user_info['user_id'],
+                user_info['username'],
+                caller_info['module'],
+                caller_info['function'],
+                caller_info['line_number'],
+                message,
+                type(exception).__name__ if exception else '',
+                self._get_stack_trace(exception) if exception else '',
+                extra_data or ''
+            ]
+            
+            self._queue.put_nowait(log_data)
+            
+        except queue.Full:
+            # 写入跟不上时丢弃，避免日志拖慢业务请求
+            self.dropped_count += 1
         except Exception as e:
             # 备用日志记录（避免日志系统本身出错）
             print(f"[{datetime.now()}] 日志写入失败: {e}")
             print(f"[{datetime.now()}] 原始消息: {message}")
     
+    def _writer_loop(self):
+        """后台写入线程：批量取出日志记录写入当天的CSV文件"""
+        while True:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                # 空闲时把缓冲区内容刷新到文件
+                self._flush_file()
+                continue
+            
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            rows = [item for item in items if isinstance(item, list)]
+            try:
+                if rows:
+                    self._write_rows(rows)
+            except Exception as e:
+                print(f"[{datetime.now()}] 日志批量写入失败: {e}")
+            
+            # 处理刷新请求和停止标记
+            flush_events = [item for item in items if isinstance(item, threading.Event)]
+            if flush_events or any(item is _STOP for item in items):
+                self._flush_file()
+                for event in flush_events:
+                    event.set()
+            if any(item is _STOP for item in items):
+                self._close_file()
+                return
+    
+    def _write_rows(self, rows: list):
+        """将日志记录追加到当天的CSV文件，日期变化时切换文件"""
+        log_file = self._get_today_log_file()
+        if log_file != self._current_log_file:
+            self._close_file()
+            self._init_csv_log(log_file)
+            self._log_fp = open(log_file, 'a', newline='', encoding='utf-8')
+            self._log_writer = csv.writer(self._log_fp)
+            self._current_log_file = log_file
+        
+        self._log_writer.writerows(rows)
+        
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_file()
+    
+    def _flush_file(self):
+        if self._log_fp:
+            try:
+                self._log_fp.flush()
+            except Exception as e:
+                print(f"[{datetime.now()}] 日志刷新失败: {e}")
+        self._last_flush = time.monotonic()
+    
+    def _close_file(self):
+        if self._log_fp:
+            try:
+                self._log_fp.close()
+            except Exception:
+                pass
+        self._log_fp = None
+        self._log_writer = None
+        self._current_log_file = None
+    
+    def flush(self, timeout: float = 0.2):
+        """
+        等待已提交的日志写入文件（读取日志文件前调用）
+
+        调用方通常在事件循环中，只做短暂等待：队列已满或写入线程繁忙时不阻塞，
+        读到的日志可能缺少最近几条。
+        """
+        if not self._writer_thread.is_alive():
+            return
+        event = threading.Event()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            return
+        event.wait(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """写完剩余日志并停止后台写入线程（进程退出时自动调用）"""
+        if not self._writer_thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer_thread.join(timeout)
+    
+    def set_log_level(self, level: str):
+        """运行时调整最低日志级别（INFO/ERROR）"""
+        self.min_level = LOG_LEVELS.get(level.upper(), self.min_level)
+    
     def log_info(self, message: str, extra_data: Optional[str] = None):
         """记录信息日志"""
         self._write_log('INFO', message, extra_data=extra_data, skip_frames=2)
@@ -367,6 +490,7 @@ def get_log_files(days: int = 7) -> list:
 def get_today_errors(limit: int = 50) -> list:
     """获取今天的错误日志"""
     handler = get_exception_handler()
+    handler.flush()
     log_file = handler._get_today_log_file()
     
     if not log_file.exists():
@@ -387,6 +511,11 @@ def get_today_errors(limit: int = 50) -> list:
         print(f"读取错误日志失败: {e}")
         return []
 
+def set_log_level(level: str):
+    """运行时调整最低日志级别（INFO/ERROR）"""
+    get_exception_handler().set_log_level(level)
+
+
 def cleanup_logs(days_to_keep: int = 30):
     """手动清理旧日志文件"""
     handler = get_exception_handler()
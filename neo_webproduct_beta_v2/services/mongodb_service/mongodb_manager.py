@@ -1,8 +1,13 @@
 # services/mongodb_service/mongodb_manager.py
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
 from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
 from typing import Dict, Any, Optional, List,Tuple
 from datetime import datetime
+import asyncio
+import json
+import re
+import time
 import sys
 import os
 
@@ -11,6 +16,139 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 # from common.exception_handler import log_info, log_error, safe
 from mongo_exception_handler import log_info, log_error, safe
+from config import MongoDBConfig
+from flat_enterprise_archive_generator_v2 import get_template_version, to_field_documents
+
+# 存储布局：embedded 为一企一文档（字段内嵌在fields数组中），field_per_document 为一字段一文档
+STORAGE_LAYOUT_EMBEDDED = "embedded"
+STORAGE_LAYOUT_FIELD_PER_DOCUMENT = "field_per_document"
+
+# 字段查询接口返回的字段
+FIELD_QUERY_KEYS = (
+    "full_path_name", "value", "value_pic_url", "value_doc_url", "value_video_url",
+    "data_url", "encoding", "format", "license", "rights", "update_frequency", "value_dict",
+    "field_code", "field_name", "full_path_code", "path_code",
+)
+
+class FieldIndexMap:
+    """
+    字段下标映射
+
+    记录某个模板版本下 full_path_code / path_code 到 fields 数组下标的映射，
+    用于直接构建 fields.{index}.xxx 形式的 $set，无需把整个文档读入内存查找下标。
+    """
+
+    def __init__(self, version: str, full_path_codes: List[str]):
+        """
+        Args:
+            version: 模板版本戳
+            full_path_codes: 按fields数组顺序排列的字段完整路径编码列表
+        """
+        self.version = version
+        self.full_path_index: Dict[str, int] = {}
+        self.path_fields: Dict[str, Dict[str, str]] = {}  # path_code -> {field_code: full_path_code}
+
+        for index, full_path_code in enumerate(full_path_codes):
+            if not full_path_code:
+                continue
+            self.full_path_index[full_path_code] = index
+            path_code, _, field_code = full_path_code.rpartition('.')
+            self.path_fields.setdefault(path_code, {})[field_code] = full_path_code
+
+    def build_set(self, field_updates: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str], List[str]]:
+        """
+        将按字段路径组织的更新内容转换为 $set 更新字典
+
+        Args:
+            field_updates: full_path_code -> {子字段名: 值}
+
+        Returns:
+            元组：($set 更新字典, 已匹配的字段路径列表, 未找到的字段路径列表)
+        """
+        update_data = {}
+        matched_paths = []
+        not_found_paths = []
+
+        for full_path_code, values in field_updates.items():
+            index = self.full_path_index.get(full_path_code)
+            if index is None:
+                not_found_paths.append(full_path_code)
+                continue
+            for key, value in values.items():
+                update_data[f"fields.{index}.{key}"] = value
+            matched_paths.append(full_path_code)
+
+        return update_data, matched_paths, not_found_paths
+
+# 计数缓存有效期（秒）
+COUNT_CACHE_TTL = 30
+
+# 企业名称检索分词字段（字符一元+二元分词，建立多键索引）
+NAME_NGRAMS_FIELD = "name_ngrams"
+
+# 补建检索分词时每批处理的企业数量
+NAME_NGRAMS_BACKFILL_BATCH = 1000
+
+def make_name_ngrams(name: str) -> List[str]:
+    """
+    生成企业名称的检索分词：所有单字和相邻双字（忽略大小写与空白）
+
+    中文名称没有天然的分词边界，使用字符n-gram即可支持任意子串检索。
+    """
+    chars = re.sub(r"\s+", "", (name or "").lower())
+    grams = set(chars)
+    grams.update(chars[i:i + 2] for i in range(len(chars) - 1))
+    return sorted(grams)
+
+def make_query_ngrams(text: str) -> List[str]:
+    """
+    生成检索关键词的分词：单字直接匹配单字分词，多字使用相邻双字分词
+    （名称包含该关键词时一定包含这些双字，再用正则做最终确认）
+    """
+    chars = re.sub(r"\s+", "", (text or "").lower())
+    if len(chars) <= 1:
+        return [chars] if chars else []
+    return sorted({chars[i:i + 2] for i in range(len(chars) - 1)})
+
+class CountCache:
+    """
+    短期计数缓存
+
+    以 (集合名, 规范化后的查询条件) 为键缓存 count_documents 结果，
+    联想搜索、重复的聊天查询在有效期内不再重复做全量计数扫描。
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    @staticmethod
+    def make_key(collection_name: str, filter_dict: Dict[str, Any]) -> Tuple[str, str]:
+        """按键排序序列化查询条件，键顺序不同的相同条件命中同一缓存"""
+        return collection_name, json.dumps(filter_dict, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, key: Tuple[str, str]) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, count = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return count
+
+    def set(self, key: Tuple[str, str], count: int):
+        if len(self._entries) >= self.max_entries:
+            # 先清理过期项，仍然超限时整体清空
+            now = time.monotonic()
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[key] = (time.monotonic() + self.ttl, count)
+
+    def clear(self):
+        self._entries.clear()
 
 class MongoDBManager:
     """
@@ -20,22 +158,59 @@ class MongoDBManager:
     所有操作都经过异常处理和日志记录。
     """
     
-    def __init__(self, connection_string: str, collection_name: str = "default_collection"):
+    def __init__(self, config: MongoDBConfig, storage_layout: Optional[str] = None):
         """
         初始化MongoDB管理器
         
         Args:
-            connection_string: MongoDB连接字符串
-            collection_name: 集合名称
+            config: 环境配置（连接串、集合、连接池、超时、读偏好、压缩）
+            storage_layout: 覆盖配置中的存储布局，embedded 或 field_per_document
         """
-        self.connection_string = connection_string
-        self.collection_name = collection_name
+        self.config = config
+        self.connection_string = config.get_connection_string()
+        self.collection_name = config.get_collection_name() or "default_collection"
+        self.storage_layout = storage_layout or config.get_storage_layout()
+        self.field_collection_name = config.get_field_collection_name() or f"{self.collection_name}_fields"
         self.client: Optional[AsyncIOMotorClient] = None
         self.database: Optional[AsyncIOMotorDatabase] = None
         self.collection: Optional[AsyncIOMotorCollection] = None
+        self.field_collection: Optional[AsyncIOMotorCollection] = None
+
+        # 只读客户端（副本集下读从节点），供搜索、字段查询、原生查询使用，单机环境与主客户端相同
+        self.read_client: Optional[AsyncIOMotorClient] = None
+        self.read_collection: Optional[AsyncIOMotorCollection] = None
+        self.read_field_collection: Optional[AsyncIOMotorCollection] = None
+        # 只读客户端是否读主节点（读从节点时结果可能滞后于刚完成的写入）
+        self.reads_from_primary = True
+
+        # 字段下标映射缓存：模板版本戳 -> FieldIndexMap
+        self._field_index_maps: Dict[str, FieldIndexMap] = {}
+        self.current_template_version: Optional[str] = None
+
+        # 计数结果短期缓存
+        self.count_cache = CountCache()
+
+        # 企业检索索引是否可用（分词补建完成后才走索引检索）
+        self.search_index_ready = False
+        self._search_backfill_task: Optional[asyncio.Task] = None
         
         log_info(f"MongoDB管理器初始化", 
-                extra_data=f'{{"collection": "{collection_name}"}}')
+                extra_data=f'{{"collection": "{self.collection_name}", "storage_layout": "{self.storage_layout}"}}')
+
+    @property
+    def uses_field_documents(self) -> bool:
+        """是否使用一字段一文档的存储布局"""
+        return self.storage_layout == STORAGE_LAYOUT_FIELD_PER_DOCUMENT
+
+    @property
+    def query_collection(self) -> Optional[AsyncIOMotorCollection]:
+        """原生查询所使用的集合：一字段一文档布局下为字段集合"""
+        return self.field_collection if self.uses_field_documents else self.collection
+
+    @property
+    def read_query_collection(self) -> Optional[AsyncIOMotorCollection]:
+        """只读接口的原生查询集合（走只读客户端）"""
+        return self.read_field_collection if self.uses_field_documents else self.read_collection
     
     async def connect(self) -> bool:
         """
@@ -47,32 +222,33 @@ class MongoDBManager:
         try:
             log_info("正在连接MongoDB...")
             
-            # 创建异步客户端
-            self.client = AsyncIOMotorClient(
-                self.connection_string,
-                serverSelectionTimeoutMS=30000,  # 30秒超时
-                connectTimeoutMS=30000,
-                socketTimeoutMS=30000,
-                maxPoolSize=50,  # 最大连接池大小
-                minPoolSize=1,   # 最小连接池大小
-                maxIdleTimeMS=60000  # 最大空闲时间60秒
-            )
-            
-            # 从连接字符串中提取数据库名
-            # 格式: mongodb://[username:password@]host:port/database[?options]
-            if "/" in self.connection_string.split("://")[1]:
-                db_name = self.connection_string.split("/")[-1].split("?")[0]
-            else:
-                db_name = "test"  # 默认数据库
+            # 创建异步客户端（连接池、超时、读偏好、压缩均来自环境配置）
+            client_options = self.config.get_client_options()
+            self.client = AsyncIOMotorClient(self.connection_string, **client_options)
             
+            db_name = self.config.get_database_name()
             self.database = self.client[db_name]
             self.collection = self.database[self.collection_name]
+            self.field_collection = self.database[self.field_collection_name]
+
+            # 副本集环境下为只读接口单独建立读从节点的客户端，避免大查询与写入争用主节点
+            read_options = self.config.get_read_only_client_options()
+            self.read_client = AsyncIOMotorClient(self.connection_string, **read_options) if read_options else self.client
+            self.reads_from_primary = (read_options or client_options)["readPreference"] == "primary"
+            read_database = self.read_client[db_name]
+            self.read_collection = read_database[self.collection_name]
+            self.read_field_collection = read_database[self.field_collection_name]
             
             # 测试连接
             await self.client.admin.command('ping')
+
+            if self.uses_field_documents:
+                await self.ensure_field_document_indexes()
+
+            await self.ensure_search_indexes()
             
             log_info("MongoDB连接成功", 
-                    extra_data=f'{{"database": "{db_name}", "collection": "{self.collection_name}"}}')
+                    extra_data=f'{{"database": "{db_name}", "collection": "{self.collection_name}", "max_pool_size": {client_options["maxPoolSize"]}, "read_preference": "{client_options["readPreference"]}", "read_only_client": {str(read_options is not None).lower()}}}')
             
             return True
             
@@ -86,6 +262,10 @@ class MongoDBManager:
     async def disconnect(self):
         """断开MongoDB连接"""
         try:
+            if self._search_backfill_task and not self._search_backfill_task.done():
+                self._search_backfill_task.cancel()
+            if self.read_client and self.read_client is not self.client:
+                self.read_client.close()
             if self.client:
                 self.client.close()
                 log_info("MongoDB连接已断开")
@@ -127,8 +307,11 @@ class MongoDBManager:
             # 添加时间戳
             document["created_at"] = self.get_current_timestamp()
             document["updated_at"] = self.get_current_timestamp()
+            if "enterprise_name" in document:
+                document.setdefault(NAME_NGRAMS_FIELD, make_name_ngrams(document["enterprise_name"]))
             
             result = await self.collection.insert_one(document)
+            self.count_cache.clear()
             
             doc_id = str(result.inserted_id)
             log_info(f"文档插入成功", extra_data=f'{{"document_id": "{doc_id}"}}')
@@ -162,6 +345,8 @@ class MongoDBManager:
             document["_id"] = document_id
             document["created_at"] = self.get_current_timestamp()
             document["updated_at"] = self.get_current_timestamp()
+            if "enterprise_name" in document:
+                document.setdefault(NAME_NGRAMS_FIELD, make_name_ngrams(document["enterprise_name"]))
             
             # 使用upsert=True，如果文档存在则更新，不存在则插入
             result = await self.collection.replace_one(
@@ -169,6 +354,7 @@ class MongoDBManager:
                 document, 
                 upsert=True
             )
+            self.count_cache.clear()
             
             if result.upserted_id is not None:
                 log_info(f"文档插入成功", extra_data=f'{{"document_id": "{document_id}"}}')
@@ -184,13 +370,174 @@ class MongoDBManager:
                      extra_data=f'{{"document_id": "{document_id}"}}')
             return False
     
-    async def find_document_by_id(self, document_id: str) -> Optional[Dict[str, Any]]:
+    async def ensure_field_document_indexes(self) -> bool:
+        """
+        为一字段一文档布局的字段集合创建索引
+
+        Returns:
+            bool: 创建是否成功
+        """
+        try:
+            if self.field_collection is None:
+                log_error("MongoDB字段集合未初始化")
+                return False
+
+            await self.field_collection.create_index(
+                [("enterprise_code", ASCENDING), ("path_code", ASCENDING), ("field_code", ASCENDING)],
+                name="idx_enterprise_path_field", unique=True
+            )
+            await self.field_collection.create_index(
+                [("enterprise_code", ASCENDING), ("full_path_code", ASCENDING)],
+                name="idx_enterprise_full_path", unique=True
+            )
+            # 跨企业查询某个字段（如按 fields.path_code / fields.field_code 过滤）
+            await self.field_collection.create_index(
+                [("path_code", ASCENDING), ("field_code", ASCENDING)],
+                name="idx_path_field"
+            )
+
+            log_info("字段集合索引创建成功",
+                    extra_data=f'{{"field_collection": "{self.field_collection_name}"}}')
+            return True
+
+        except Exception as e:
+            log_error("字段集合索引创建失败", exception=e,
+                     extra_data=f'{{"field_collection": "{self.field_collection_name}"}}')
+            return False
+
+    async def ensure_search_indexes(self) -> bool:
+        """
+        创建企业检索索引：enterprise_code 前缀检索索引、企业名称分词多键索引。
+        缺少分词的历史企业文档在后台补建，补建完成前检索仍使用正则全表匹配。
+
+        Returns:
+            bool: 索引是否创建成功
+        """
+        try:
+            await self.collection.create_index(
+                [("enterprise_code", ASCENDING)], name="idx_enterprise_code"
+            )
+            await self.collection.create_index(
+                [(NAME_NGRAMS_FIELD, ASCENDING)], name="idx_name_ngrams"
+            )
+
+            # {field: None} 可以走索引，快速判断是否存在未补建分词的企业
+            pending = await self.collection.find_one({NAME_NGRAMS_FIELD: None}, {"_id": 1})
+            if pending is None:
+                self.search_index_ready = True
+            else:
+                self._search_backfill_task = asyncio.create_task(self._backfill_name_ngrams())
+
+            log_info("企业检索索引创建成功",
+                    extra_data=f'{{"collection": "{self.collection_name}", "search_index_ready": {str(self.search_index_ready).lower()}}}')
+            return True
+
+        except Exception as e:
+            log_error("企业检索索引创建失败", exception=e,
+                     extra_data=f'{{"collection": "{self.collection_name}"}}')
+            return False
+
+    async def _backfill_name_ngrams(self):
+        """为缺少名称分词的企业文档补建分词，完成后切换为索引检索"""
+        try:
+            log_info("开始补建企业名称检索分词")
+            updated = 0
+            skipped_ids = []
+            while True:
+                cursor = self.collection.find(
+                    {NAME_NGRAMS_FIELD: None}, {"enterprise_name": 1}
+                ).limit(NAME_NGRAMS_BACKFILL_BATCH)
+                batch = await cursor.to_list(length=NAME_NGRAMS_BACKFILL_BATCH)
+                if not batch:
+                    break
+
+                operations = []
+                for doc in batch:
+                    name = doc.get("enterprise_name")
+                    if name is not None and not isinstance(name, str):
+                        # 名称格式异常：写入空分词，避免反复扫描同一文档导致补建无法完成
+                        skipped_ids.append(str(doc["_id"]))
+                        name_ngrams = []
+                    else:
+                        name_ngrams = make_name_ngrams(name)
+                    operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {NAME_NGRAMS_FIELD: name_ngrams}}))
+
+                await self.collection.bulk_write(operations, ordered=False)
+                updated += len(batch)
+
+            if skipped_ids:
+                log_error("部分企业名称格式异常，已跳过分词",
+                         extra_data=f'{{"skipped_count": {len(skipped_ids)}, "skipped_ids": {json.dumps(skipped_ids[:100], ensure_ascii=False)}}}')
+
+            self.search_index_ready = True
+            log_info("企业名称检索分词补建完成", extra_data=f'{{"updated_count": {updated}, "skipped_count": {len(skipped_ids)}}}')
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_error("企业名称检索分词补建失败", exception=e)
+
+    async def insert_enterprise_archive(self, enterprise_code: str, enterprise_name: str,
+                                        template_documents: List[Dict[str, Any]],
+                                        template_version: Optional[str] = None) -> bool:
+        """
+        按当前存储布局写入企业档案
+
+        embedded 布局下字段内嵌在企业文档的fields数组中；
+        field_per_document 布局下企业文档只保存基础信息，字段逐个写入字段集合。
+
+        Args:
+            enterprise_code: 企业代码（同时作为企业文档的_id）
+            enterprise_name: 企业名称
+            template_documents: 已填充企业信息的字段模板列表
+            template_version: 模板版本戳
+
+        Returns:
+            bool: 写入是否成功
+        """
+        enterprise_document = {
+            "_id": enterprise_code,
+            "enterprise_code": enterprise_code,
+            "enterprise_name": enterprise_name,
+            "template_version": template_version,
+            NAME_NGRAMS_FIELD: make_name_ngrams(enterprise_name),
+        }
+
+        if not self.uses_field_documents:
+            enterprise_document["fields"] = template_documents
+            return await self.insert_document_with_id(enterprise_code, enterprise_document)
+
+        try:
+            if self.field_collection is None:
+                log_error("MongoDB字段集合未初始化")
+                return False
+
+            # 先替换字段文档，再写入企业基础文档
+            await self.field_collection.delete_many({"enterprise_code": enterprise_code})
+            field_documents = to_field_documents(template_documents, template_version)
+            if field_documents:
+                await self.field_collection.insert_many(field_documents, ordered=False)
+            self.count_cache.clear()
+
+            log_info(f"字段文档写入成功",
+                    extra_data=f'{{"enterprise_code": "{enterprise_code}", "fields_count": {len(field_documents)}}}')
+
+            return await self.insert_document_with_id(enterprise_code, enterprise_document)
+
+        except Exception as e:
+            log_error("字段文档写入失败", exception=e,
+                     extra_data=f'{{"enterprise_code": "{enterprise_code}"}}')
+            return False
+
+    async def find_document_by_id(self, document_id: str,
+                                  projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         根据ID查找文档
-        
+
         Args:
             document_id: 文档ID
-            
+            projection: 投影字段（可选），为空时返回完整文档
+
         Returns:
             Optional[Dict]: 找到的文档，未找到返回None
         """
@@ -198,8 +545,8 @@ class MongoDBManager:
             if self.collection is None:
                 log_error("MongoDB集合未初始化")
                 return None
-            
-            document = await self.collection.find_one({"_id": document_id})
+
+            document = await self.collection.find_one({"_id": document_id}, projection)
             
             if document:
                 log_info(f"文档查找成功", extra_data=f'{{"document_id": "{document_id}"}}')
@@ -273,6 +620,39 @@ class MongoDBManager:
             log_error("文档统计失败", exception=e)
             return 0
     
+    async def count_documents_cached(self, filter_dict: Optional[Dict[str, Any]] = None,
+                                     collection: Optional[AsyncIOMotorCollection] = None) -> int:
+        """
+        统计文档数量（带短期缓存）
+
+        空条件使用 estimated_document_count 直接读取集合元数据，
+        其余条件的结果按规范化条件缓存 COUNT_CACHE_TTL 秒。
+
+        Args:
+            filter_dict: 查询过滤条件
+            collection: 统计的集合，默认为企业集合
+
+        Returns:
+            int: 文档数量
+        """
+        collection = collection if collection is not None else self.collection
+        if collection is None:
+            raise Exception("MongoDB集合未初始化")
+
+        filter_dict = filter_dict or {}
+        key = CountCache.make_key(collection.name, filter_dict)
+        count = self.count_cache.get(key)
+        if count is not None:
+            return count
+
+        if filter_dict:
+            count = await collection.count_documents(filter_dict)
+        else:
+            count = await collection.estimated_document_count()
+
+        self.count_cache.set(key, count)
+        return count
+
     async def update_document(self, document_id: str, update_data: Dict[str, Any]) -> bool:
         """
         更新文档
@@ -291,11 +671,15 @@ class MongoDBManager:
             
             # 添加更新时间
             update_data["updated_at"] = self.get_current_timestamp()
+            # 企业名称变更时同步重建检索分词，否则按新名称检索不到
+            if "enterprise_name" in update_data:
+                update_data[NAME_NGRAMS_FIELD] = make_name_ngrams(update_data["enterprise_name"])
             
             result = await self.collection.update_one(
                 {"_id": document_id},
                 {"$set": update_data}
             )
+            self.count_cache.clear()
             
             if result.modified_count > 0:
                 log_info(f"文档更新成功", extra_data=f'{{"document_id": "{document_id}"}}')
@@ -309,6 +693,182 @@ class MongoDBManager:
                      extra_data=f'{{"document_id": "{document_id}"}}')
             return False
     
+    def register_field_template(self, template_documents: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        注册当前字段模板，建立并缓存字段下标映射
+
+        Args:
+            template_documents: generate_doc() 生成的模板字段列表
+
+        Returns:
+            Optional[str]: 模板版本戳，模板为空时返回None
+        """
+        if not template_documents:
+            return None
+
+        full_path_codes = [doc.get("full_path_code") for doc in template_documents]
+        version = get_template_version(full_path_codes)
+
+        if version not in self._field_index_maps:
+            self._cache_field_index(FieldIndexMap(version, full_path_codes))
+            log_info(f"字段下标映射已建立",
+                    extra_data=f'{{"template_version": "{version}", "fields_count": {len(full_path_codes)}}}')
+
+        self.current_template_version = version
+        return version
+
+    def _cache_field_index(self, field_index: FieldIndexMap, max_versions: int = 8):
+        """缓存字段下标映射，模板版本一般很少，超过上限时淘汰最早的版本"""
+        if len(self._field_index_maps) >= max_versions:
+            oldest_version = next(iter(self._field_index_maps))
+            if oldest_version != self.current_template_version:
+                self._field_index_maps.pop(oldest_version, None)
+        self._field_index_maps[field_index.version] = field_index
+
+    def _resolve_field_index(self, document: Dict[str, Any]) -> FieldIndexMap:
+        """根据只包含字段路径的文档投影获取（或建立）对应的字段下标映射"""
+        stored_version = document.get("template_version")
+        if stored_version in self._field_index_maps:
+            return self._field_index_maps[stored_version]
+
+        full_path_codes = [field.get("full_path_code") for field in document.get("fields", [])]
+        version = get_template_version(full_path_codes)
+        if version not in self._field_index_maps:
+            self._cache_field_index(FieldIndexMap(version, full_path_codes))
+        return self._field_index_maps[version]
+
+    async def update_fields_by_path(self, document_id: str,
+                                    field_updates: Dict[str, Dict[str, Any]],
+                                    path_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        按字段完整路径批量更新fields数组中的子字段
+
+        优先使用当前模板的缓存下标直接更新（以 template_version 作为条件，一次往返）；
+        文档的模板版本不一致或缺失时，只读取字段路径投影建立映射，并为文档补写版本戳。
+        一字段一文档布局下则通过索引定位字段文档并使用 bulk_write 批量更新。
+
+        Args:
+            document_id: 文档ID（企业代码）
+            field_updates: full_path_code -> {子字段名: 值}
+            path_code: 层级路径代码（可选），指定时在结果中返回该路径下的字段数量
+
+        Returns:
+            Dict[str, Any]: 包含 success、document_found、updated_paths、not_found_paths、path_field_count
+        """
+        result = {
+            "success": False,
+            "document_found": True,
+            "updated_paths": [],
+            "not_found_paths": [],
+            "path_field_count": 0
+        }
+        try:
+            if self.collection is None:
+                log_error("MongoDB集合未初始化")
+                return result
+
+            timestamp = self.get_current_timestamp()
+
+            if self.uses_field_documents:
+                return await self._update_field_documents(document_id, field_updates, path_code,
+                                                          timestamp, result)
+
+            # 1. 快速路径：文档模板版本与当前模板一致，直接按缓存下标更新
+            field_index = self._field_index_maps.get(self.current_template_version)
+            if field_index is not None:
+                update_data, updated_paths, not_found_paths = field_index.build_set(field_updates)
+                if update_data:
+                    update_data["updated_at"] = timestamp
+                    update_result = await self.collection.update_one(
+                        {"_id": document_id, "template_version": field_index.version},
+                        {"$set": update_data}
+                    )
+                    if update_result.matched_count > 0:
+                        self.count_cache.clear()
+                        result.update(success=True, updated_paths=updated_paths,
+                                      not_found_paths=not_found_paths,
+                                      path_field_count=len(field_index.path_fields.get(path_code, {})))
+                        return result
+
+            # 2. 慢速路径：只读取字段路径，建立该文档对应的下标映射
+            document = await self.collection.find_one(
+                {"_id": document_id},
+                {"template_version": 1, "fields.full_path_code": 1}
+            )
+            if not document:
+                log_info(f"文档未找到", extra_data=f'{{"document_id": "{document_id}"}}')
+                result["document_found"] = False
+                return result
+
+            field_index = self._resolve_field_index(document)
+            update_data, updated_paths, not_found_paths = field_index.build_set(field_updates)
+            result.update(updated_paths=updated_paths, not_found_paths=not_found_paths,
+                          path_field_count=len(field_index.path_fields.get(path_code, {})))
+
+            if document.get("template_version") != field_index.version:
+                update_data["template_version"] = field_index.version
+
+            if update_data:
+                if updated_paths:
+                    update_data["updated_at"] = timestamp
+                await self.collection.update_one({"_id": document_id}, {"$set": update_data})
+                self.count_cache.clear()
+
+            result["success"] = True
+            return result
+
+        except Exception as e:
+            log_error("按字段路径更新失败", exception=e,
+                     extra_data=f'{{"document_id": "{document_id}", "fields_count": {len(field_updates)}}}')
+            return result
+
+    async def _update_field_documents(self, enterprise_code: str,
+                                      field_updates: Dict[str, Dict[str, Any]],
+                                      path_code: Optional[str],
+                                      timestamp: str,
+                                      result: Dict[str, Any]) -> Dict[str, Any]:
+        """一字段一文档布局下的字段更新：索引查找已有字段，再一次 bulk_write"""
+        full_path_codes = list(field_updates.keys())
+        existing_paths = set()
+        if full_path_codes:
+            cursor = self.field_collection.find(
+                {"enterprise_code": enterprise_code, "full_path_code": {"$in": full_path_codes}},
+                {"_id": 0, "full_path_code": 1}
+            )
+            existing_paths = {doc["full_path_code"] for doc in await cursor.to_list(length=None)}
+
+        if not existing_paths:
+            enterprise_document = await self.collection.find_one({"_id": enterprise_code}, {"_id": 1})
+            if not enterprise_document:
+                log_info(f"文档未找到", extra_data=f'{{"document_id": "{enterprise_code}"}}')
+                result["document_found"] = False
+                return result
+
+        updated_paths = [code for code in full_path_codes if code in existing_paths]
+        operations = [
+            UpdateOne(
+                {"enterprise_code": enterprise_code, "full_path_code": code},
+                {"$set": field_updates[code]}
+            )
+            for code in updated_paths
+        ]
+        if operations:
+            await self.field_collection.bulk_write(operations, ordered=False)
+            await self.collection.update_one({"_id": enterprise_code}, {"$set": {"updated_at": timestamp}})
+            self.count_cache.clear()
+
+        if path_code:
+            result["path_field_count"] = await self.field_collection.count_documents(
+                {"enterprise_code": enterprise_code, "path_code": path_code}
+            )
+
+        result.update(
+            success=True,
+            updated_paths=updated_paths,
+            not_found_paths=[code for code in full_path_codes if code not in existing_paths]
+        )
+        return result
+
     async def delete_document(self, document_id: str) -> bool:
         """
         删除文档
@@ -325,6 +885,10 @@ class MongoDBManager:
                 return False
             
             result = await self.collection.delete_one({"_id": document_id})
+
+            if self.uses_field_documents:
+                await self.field_collection.delete_many({"enterprise_code": document_id})
+            self.count_cache.clear()
             
             if result.deleted_count > 0:
                 log_info(f"文档删除成功", extra_data=f'{{"document_id": "{document_id}"}}')
@@ -378,9 +942,18 @@ class MongoDBManager:
                     "message": "没有找到符合条件的文档"
                 }
             
+            # 一字段一文档布局下，先记录待删除的企业代码，以便同步删除字段文档
+            enterprise_codes = []
+            if self.uses_field_documents:
+                enterprise_codes = await self.collection.distinct("_id", filter_query)
+
             # 执行批量删除
             result = await self.collection.delete_many(filter_query)
             deleted_count = result.deleted_count
+
+            if enterprise_codes:
+                await self.field_collection.delete_many({"enterprise_code": {"$in": enterprise_codes}})
+            self.count_cache.clear()
             
             if deleted_count > 0:
                 log_info(f"批量删除文档成功", 
@@ -474,31 +1047,25 @@ class MongoDBManager:
             log_error("获取数据库统计信息失败", exception=e)
             return None
         
-    async def search_enterprises_by_text(self, search_text: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+    async def search_enterprises_by_text(self, search_text: str, limit: int = 10,
+                                         with_count: bool = True) -> Tuple[List[Dict[str, Any]], Optional[int]]:
         """
         根据企业代码或企业名称进行模糊搜索
         
         Args:
             search_text: 搜索关键词
             limit: 返回结果数量限制
+            with_count: 是否统计总匹配数量（与查询并发执行，结果短期缓存）
             
         Returns:
-            Tuple[List[Dict], int]: (匹配的文档列表, 总匹配数量)
+            Tuple[List[Dict], Optional[int]]: (匹配的文档列表, 总匹配数量，不统计时为None)
         """
         try:
             if self.collection is None:
                 log_error("MongoDB集合未初始化")
                 return [], 0
             
-            # 构建模糊查询条件
-            search_pattern = {"$regex": search_text, "$options": "i"}  # i表示忽略大小写
-            
-            filter_dict = {
-                "$or": [
-                    {"enterprise_code": search_pattern},
-                    {"enterprise_name": search_pattern}
-                ]
-            }
+            filter_dict = self._build_enterprise_search_filter(search_text)
             
             # 只返回需要的字段以提高性能
             projection = {
@@ -507,12 +1074,16 @@ class MongoDBManager:
                 "enterprise_name": 1
             }
             
-            # 执行查询
-            cursor = self.collection.find(filter_dict, projection).limit(limit)
-            documents = await cursor.to_list(length=limit)
-            
-            # 获取总数
-            total_count = await self.collection.count_documents(filter_dict)
+            # 执行查询（只读客户端），需要总数时与计数并发执行
+            cursor = self.read_collection.find(filter_dict, projection).limit(limit)
+            if with_count:
+                documents, total_count = await asyncio.gather(
+                    cursor.to_list(length=limit),
+                    self.count_documents_cached(filter_dict, self.read_collection)
+                )
+            else:
+                documents = await cursor.to_list(length=limit)
+                total_count = None
             
             log_info(f"企业搜索查询完成", 
                     extra_data=f'{{"search_text": "{search_text}", "found_count": {len(documents)}, "total_count": {total_count}}}')
@@ -524,6 +1095,41 @@ class MongoDBManager:
                     extra_data=f'{{"search_text": "{search_text}"}}')
             return [], 0
         
+    def _build_enterprise_search_filter(self, search_text: str) -> Dict[str, Any]:
+        """
+        构建企业检索条件
+
+        检索索引可用时：enterprise_code 使用锚定前缀匹配，enterprise_name 先用分词
+        多键索引缩小范围再用正则确认包含关系，两个分支都能走索引；
+        否则退回对两个字段的正则全表匹配。
+        """
+        if not self.search_index_ready:
+            # 构建模糊查询条件
+            search_pattern = {"$regex": search_text, "$options": "i"}  # i表示忽略大小写
+            return {
+                "$or": [
+                    {"enterprise_code": search_pattern},
+                    {"enterprise_name": search_pattern}
+                ]
+            }
+
+        text = search_text.strip()
+        escaped = re.escape(text)
+
+        # 统一信用代码为大写，同时匹配原样输入和大写输入的前缀
+        code_prefixes = {text, text.upper()}
+        conditions: List[Dict[str, Any]] = [
+            {"enterprise_code": {"$regex": f"^{re.escape(prefix)}"}} for prefix in code_prefixes
+        ]
+
+        name_condition: Dict[str, Any] = {"enterprise_name": {"$regex": escaped, "$options": "i"}}
+        query_ngrams = make_query_ngrams(text)
+        if query_ngrams:
+            name_condition[NAME_NGRAMS_FIELD] = {"$all": query_ngrams}
+        conditions.append(name_condition)
+
+        return {"$or": conditions}
+
     async def query_fields_by_path_and_codes(self, enterprise_code: str, path_code: str, field_codes: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
         """
         根据企业代码、路径代码和字段代码列表查询字段
@@ -541,62 +1147,48 @@ class MongoDBManager:
                 log_error("MongoDB集合未初始化")
                 return [], 0
             
-            # 构建基础查询条件
-            base_filter = {
-                "_id": enterprise_code,
-            }
-            
-            # 构建聚合管道
-            pipeline = [
-                # 匹配企业文档
-                {"$match": base_filter},
-                
-                # 展开fields数组
-                {"$unwind": "$fields"},
-                
-                # 构建字段匹配条件
-                {
-                    "$match": {
-                        "fields.path_code": path_code
+            if self.uses_field_documents:
+                # 一字段一文档布局：直接在 (enterprise_code, path_code, field_code) 索引上查询
+                filter_dict = {"enterprise_code": enterprise_code, "path_code": path_code}
+                if field_codes:
+                    filter_dict["field_code"] = {"$in": field_codes}
+
+                projection = {"_id": 0, **{key: 1 for key in FIELD_QUERY_KEYS}}
+                cursor = self.read_field_collection.find(filter_dict, projection).sort("field_order", ASCENDING)
+                results = await cursor.to_list(length=None)
+            else:
+                # 构建聚合管道
+                pipeline = [
+                    # 匹配企业文档
+                    {"$match": {"_id": enterprise_code}},
+
+                    # 展开fields数组
+                    {"$unwind": "$fields"},
+
+                    # 构建字段匹配条件
+                    {
+                        "$match": {
+                            "fields.path_code": path_code
+                        }
                     }
-                }
-            ]
-            
-            # 如果指定了字段代码列表，则添加字段代码过滤条件
-            if field_codes and len(field_codes) > 0:
+                ]
+
+                # 如果指定了字段代码列表，则添加字段代码过滤条件
+                if field_codes and len(field_codes) > 0:
+                    pipeline.append({
+                        "$match": {
+                            "fields.field_code": {"$in": field_codes}
+                        }
+                    })
+
+                # 投影需要的字段
                 pipeline.append({
-                    "$match": {
-                        "fields.field_code": {"$in": field_codes}
-                    }
+                    "$project": {"_id": 0, **{key: f"$fields.{key}" for key in FIELD_QUERY_KEYS}}
                 })
-            
-            # 投影需要的字段
-            pipeline.append({
-                "$project": {
-                    "_id": 0,
-                    "full_path_name": "$fields.full_path_name",
-                    "value": "$fields.value",
-                    "value_pic_url": "$fields.value_pic_url",
-                    "value_doc_url": "$fields.value_doc_url",
-                    "value_video_url": "$fields.value_video_url",
-                    "data_url": "$fields.data_url",
-                    "encoding": "$fields.encoding",
-                    "format": "$fields.format",
-                    "license": "$fields.license",
-                    "rights": "$fields.rights",
-                    "update_frequency": "$fields.update_frequency",
-                    "value_dict": "$fields.value_dict",
-                    # 额外包含一些可能有用的字段
-                    "field_code": "$fields.field_code",
-                    "field_name": "$fields.field_name",
-                    "full_path_code": "$fields.full_path_code",
-                    "path_code": "$fields.path_code"
-                }
-            })
-            
-            # 执行聚合查询
-            cursor = self.collection.aggregate(pipeline)
-            results = await cursor.to_list(length=None)
+
+                # 执行聚合查询（只读客户端）
+                cursor = self.read_collection.aggregate(pipeline)
+                results = await cursor.to_list(length=None)
             
             # 统计总数
             total_count = len(results)
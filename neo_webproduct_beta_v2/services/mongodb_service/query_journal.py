@@ -0,0 +1,189 @@
+# services/mongodb_service/query_journal.py
+"""
+原生查询日志 - 异步、有界的查询记录
+
+请求处理只把精简记录放入队列（不做序列化和文件IO），由后台任务批量写入按大小轮转的JSONL文件。
+记录内容：查询语句（截断）、参数哈希、耗时、结果行数、是否命中缓存，以及可选的少量结果样例。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from mongo_exception_handler import log_info, log_error
+
+# 查询语句记录的最大长度
+MAX_QUERY_TEXT_LENGTH = 2000
+
+# 单次批量写入的最大记录数
+WRITE_BATCH_SIZE = 200
+
+class QueryJournal:
+    """原生查询日志写入器"""
+
+    def __init__(self, directory: str, sample_rate: float = 1.0, sample_rows: int = 0,
+                 max_file_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 queue_size: int = 1000, enabled: bool = True):
+        """
+        初始化查询日志
+
+        Args:
+            directory: 日志目录，相对路径相对于服务目录
+            sample_rate: 记录比例（0~1），1表示每条查询都记录
+            sample_rows: 每条记录附带的结果样例行数，0表示不记录结果
+            max_file_bytes: 单个日志文件的最大字节数，超过后轮转
+            backup_count: 保留的历史日志文件数量
+            queue_size: 待写入队列的容量，队列满时丢弃新记录
+            enabled: 是否启用
+        """
+        path = Path(directory)
+        if not path.is_absolute():
+            path = Path(__file__).parent / path
+        self.file_path = path / "query_journal.jsonl"
+        self.sample_rate = sample_rate
+        self.sample_rows = sample_rows
+        self.max_file_bytes = max_file_bytes
+        self.backup_count = backup_count
+        self.queue_size = queue_size
+        self.enabled = enabled
+
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._logger: Optional[logging.Logger] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "QueryJournal":
+        """根据 mongo_config.yaml 中的 query_journal 配置创建"""
+        return cls(
+            directory=config.get("directory", "logs/query_journal"),
+            sample_rate=float(config.get("sample_rate", 1.0)),
+            sample_rows=int(config.get("sample_rows", 0)),
+            max_file_bytes=int(config.get("max_file_bytes", 10 * 1024 * 1024)),
+            backup_count=int(config.get("backup_count", 5)),
+            queue_size=int(config.get("queue_size", 1000)),
+            enabled=bool(config.get("enabled", True)),
+        )
+
+    async def start(self):
+        """创建日志文件并启动后台写入任务"""
+        if not self.enabled or self._task is not None:
+            return
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                self.file_path, maxBytes=self.max_file_bytes,
+                backupCount=self.backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+            self._logger = logging.getLogger(f"query_journal.{self.file_path}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.handlers = [handler]
+
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+            log_info("查询日志已启动", extra_data=f'{{"file": "{self.file_path.as_posix()}", "sample_rate": {self.sample_rate}}}')
+        except Exception as e:
+            self.enabled = False
+            log_error("查询日志启动失败", exception=e)
+
+    async def stop(self):
+        """写完队列中剩余的记录后停止"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._queue = None
+            for handler in self._logger.handlers:
+                handler.close()
+
+    def record(self, query_cmd: str, query_type: Optional[str], query_params: Optional[Dict[str, Any]],
+               duration_ms: float, row_count: int, has_more: bool = False, cache_hit: bool = False,
+               rows: Optional[List[Any]] = None, error: Optional[str] = None):
+        """
+        记录一次查询（非阻塞，只做采样判断和入队）
+
+        Args:
+            query_cmd: 原始查询语句
+            query_type: 查询类型
+            query_params: 解析后的查询参数（只记录其哈希）
+            duration_ms: 执行耗时（毫秒）
+            row_count: 返回的结果行数
+            has_more: 是否还有下一页
+            cache_hit: 是否命中结果缓存
+            rows: 返回的结果数据，用于截取样例
+            error: 错误信息
+        """
+        if self._queue is None:
+            return
+        # 失败的查询总是记录，成功的查询按比例采样
+        if error is None and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "query_type": query_type,
+            "query": query_cmd[:MAX_QUERY_TEXT_LENGTH],
+            "params_hash": _hash_params(query_params),
+            "duration_ms": round(duration_ms, 2),
+            "row_count": row_count,
+            "has_more": has_more,
+            "cache_hit": cache_hit,
+        }
+        if error is not None:
+            entry["error"] = error[:MAX_QUERY_TEXT_LENGTH]
+        if self.sample_rows > 0 and rows:
+            # 只保留引用，序列化在后台任务中完成
+            entry["sample"] = rows[:self.sample_rows]
+
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled and self._task is not None,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "dropped": self.dropped,
+            "sample_rate": self.sample_rate,
+        }
+
+    async def _run(self):
+        """后台写入任务：批量取出记录，在线程中序列化并写入文件"""
+        while True:
+            entry = await self._queue.get()
+            batch = [entry]
+            while len(batch) < WRITE_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            stopping = None in batch
+            entries = [item for item in batch if item is not None]
+            if entries:
+                try:
+                    await asyncio.to_thread(self._write, entries)
+                except Exception as e:
+                    log_error("查询日志写入失败", exception=e)
+            if stopping:
+                return
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        for entry in entries:
+            self._logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+def _hash_params(query_params: Optional[Dict[str, Any]]) -> Optional[str]:
+    """查询参数的哈希，用于归并相同的查询"""
+    if query_params is None:
+        return None
+    normalized = json.dumps(query_params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
@@ -50,17 +50,58 @@ class UpdateFieldResponse(BaseModel):
     full_path_code: Optional[str] = Field(None, description="字段路径")
     updated_fields: Optional[List[str]] = Field(None, description="已更新的字段列表")
 
+# --------------------------批量字段更新模型--------------------------
+class BatchFieldUpdateItem(BaseModel):
+    """批量更新中的单个字段项"""
+    full_path_code: str = Field(..., description="字段完整路径编码")
+    dict_fields: FieldUpdateDict = Field(..., description="要更新的字段值字典")
+
+class BatchUpdateFieldsRequest(BaseModel):
+    """批量更新字段请求模型"""
+    enterprise_code: str = Field(..., description="企业代码", max_length=100)
+    updates: List[BatchFieldUpdateItem] = Field(..., description="字段更新列表", min_length=1, max_length=2000)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "enterprise_code": "TEST001",
+                "updates": [
+                    {
+                        "full_path_code": "L1_001.L2_001.L3_001.FIELD_001",
+                        "dict_fields": {"value": "测试值1"}
+                    },
+                    {
+                        "full_path_code": "L1_001.L2_001.L3_001.FIELD_002",
+                        "dict_fields": {"value": "测试值2"}
+                    }
+                ]
+            }
+        }
+
+class BatchUpdateFieldsResponse(BaseModel):
+    """批量更新字段响应模型"""
+    success: bool = Field(..., description="是否成功")
+    message: str = Field(..., description="响应消息")
+    enterprise_code: Optional[str] = Field(None, description="企业代码")
+    total_count: int = Field(0, description="请求中的字段总数")
+    updated_count: int = Field(0, description="实际更新的字段数量")
+    updated_fields: List[str] = Field(default_factory=list, description="已更新的字段路径列表")
+    skipped_fields: List[str] = Field(default_factory=list, description="不允许修改而被忽略的字段路径列表")
+    not_found_fields: List[str] = Field(default_factory=list, description="未找到的字段路径列表")
+
 # --------------------------搜索模型--------------------------
 class EnterpriseSearchRequest(BaseModel):
     """企业搜索请求模型"""
     enterprise_text: str = Field(..., description="企业搜索文本", min_length=1, max_length=200)
     limit: Optional[int] = Field(10, description="返回结果数量限制", ge=1, le=100)
+    with_count: bool = Field(True, description="是否统计总匹配数量，联想输入等场景可关闭以减少计数开销")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "enterprise_text": "科技有限公司",
-                "limit": 10
+                "limit": 10,
+                "with_count": True
             }
         }
 
@@ -73,7 +114,7 @@ class EnterpriseSearchResponse(BaseModel):
     """企业搜索响应模型"""
     success: bool = Field(..., description="是否成功")
     message: str = Field(..., description="响应消息")
-    total_count: int = Field(..., description="匹配的总数量")
+    total_count: Optional[int] = Field(None, description="匹配的总数量，未统计时为空")
     enterprises: List[EnterpriseSearchItem] = Field(..., description="企业列表")
     
     class Config:
@@ -260,11 +301,16 @@ class DeleteManyDocumentsResponse(BaseModel):
 class ExecuteMongoQueryRequest(BaseModel):
     """执行MongoDB原生查询请求模型"""
     query_cmd: str = Field(..., description="原始MongoDB查询语句", min_length=1)
+    page: int = Field(default=1, ge=1, le=100, description="明细/分组结果的页码（从1开始，页码×每页行数不超过10000）")
+    page_size: int = Field(default=100, ge=1, le=1000, description="每页返回的结果行数")
+    with_count: bool = Field(default=False, description="find查询是否统计匹配的文档总数（与查询并发执行）")
     
     class Config:
         json_schema_extra = {
             "example": {
-                "query_cmd": "db.collection.find({\"enterprise_code\": \"TEST001\"})"
+                "query_cmd": "db.collection.find({\"enterprise_code\": \"TEST001\"})",
+                "page": 1,
+                "page_size": 100
             }
         }
 
@@ -343,6 +389,10 @@ class ExecuteMongoQueryResponse(BaseModel):
     result_data: List[Any] = Field(..., description="结果数据列表")
     structure_type: str = Field(default="")
     field_strategy: str = Field(default="")
+    page: int = Field(default=1, description="当前页码")
+    page_size: int = Field(default=100, description="每页行数")
+    has_more: bool = Field(default=False, description="是否还有下一页")
+    total_count: Optional[int] = Field(default=None, description="匹配的文档总数，仅在with_count时返回")
     
     class Config:
         json_schema_extra = {